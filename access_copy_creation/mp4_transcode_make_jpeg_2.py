@@ -22,7 +22,7 @@ to determine correct transcode paths (RNA or BFI).
 7. Look up in CID for MTQ yes/no and if yes, begin transcode of MP4 to HLS in specific path.
 8. Uses duration to calculate how many seconds until 20% of total duration.
 9. Extract JPEG image from MP4 file.
-10. Uses 'gm' to generate full size(600x600ppi) and thumbnail(300x300ppi) from extracted JPEG.
+10. Uses image_utils to generate full size(600x600ppi) and thumbnail(300x300ppi) from one decode of the extracted JPEG.
 11. Delete the first FFmpeg JPEG created from MP4 only.
 12. Where JPEG or HLS assets (to follow) are created, write names to fields in CID media record.
 13. Moves source file to completed folder for deletion.
@@ -48,6 +48,7 @@ import tenacity
 # Local packages
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import image_utils
 import utils
 
 # Global paths from environment vars
@@ -412,8 +413,7 @@ def main():
                 sys.exit("Exiting: JPEG not created from MP4 file")
 
         # Generate Full size 600x600, thumbnail 300x300
-        full_jpeg = make_jpg(jpeg_location, "full", None, None)
-        thumb_jpeg = make_jpg(jpeg_location, "thumb", None, None)
+        full_jpeg, thumb_jpeg = image_utils.make_derivatives(jpeg_location)
         print(full_jpeg, thumb_jpeg)
 
         if thumb_jpeg is None:
@@ -471,12 +471,10 @@ def main():
             log_build.append(f"Creating new transcode path: {transcode_pth}")
             os.makedirs(transcode_pth, mode=0o777, exist_ok=True)
 
-        if not oversize:
-            full_jpeg = make_jpg(fullpath, "full", transcode_pth, None)
-        else:
-            full_jpeg = make_jpg(fullpath, "oversize", transcode_pth, percent)
-
-        thumb_jpeg = make_jpg(fullpath, "thumb", transcode_pth, None)
+        # Decode source once for both large image and thumbnail
+        full_jpeg, thumb_jpeg = image_utils.make_derivatives(
+            fullpath, transcode_pth, percent if oversize else None
+        )
 
         if thumb_jpeg is None:
             thumb_jpeg = ""
@@ -1043,60 +1041,6 @@ def create_transcode(
     )
 
 
-def make_jpg(
-    filepath: str, arg: str, transcode_pth: Optional[str], percent: Optional[str]
-) -> Optional[str]:
-    """
-    Create GM JPEG using command based on argument
-    These command work. For full size don't use resize.
-    """
-
-    start_reduce = ["gm", "convert", "-density", "300x300", filepath, "-strip"]
-
-    start = ["gm", "convert", "-density", "600x600", filepath, "-strip"]
-
-    thumb = [
-        "-resize",
-        "x180",
-    ]
-
-    oversize = [
-        "-resize",
-        f"{percent}%x{percent}%",
-    ]
-
-    if not transcode_pth:
-        out = os.path.splitext(filepath)[0]
-    else:
-        fname = os.path.split(filepath)[1]
-        file = os.path.splitext(fname)[0]
-        out = os.path.join(transcode_pth, file)
-
-    if "thumb" in arg:
-        outfile = f"{out}_thumbnail.jpg"
-        cmd = start_reduce + thumb + [f"{outfile}"]
-    elif "oversize" in arg:
-        outfile = f"{out}_largeimage.jpg"
-        cmd = start + oversize + [f"{outfile}"]
-    else:
-        outfile = f"{out}_largeimage.jpg"
-        cmd = start + [f"{outfile}"]
-
-    try:
-        subprocess.call(cmd)
-    except Exception as err:
-        LOGGER.error(
-            "%s\tERROR\tJPEG creation failed for filepath: %s\n%s",
-            local_time(),
-            filepath,
-            err,
-        )
-
-    print(outfile)
-    if os.path.exists(outfile):
-        return outfile
-
-
 def conformance_check(file: str) -> str:
     """
     Checks file against MP4 mediaconch policy
@@ -26,7 +26,7 @@ to determine correct transcode paths (RNA or BFI).
 7. Look up in CID for MTQ yes/no and if yes, begin transcode of MP4 to HLS in specific path.
 8. Uses duration to calculate how many seconds until 20% of total duration.
 9. Extract JPEG image from MP4 file.
-10. Uses 'gm' to generate full size(600x600ppi) and thumbnail(300x300ppi) from extracted JPEG.
+10. Uses image_utils to generate full size(600x600ppi) and thumbnail(300x300ppi) from one decode of the extracted JPEG.
 11. Delete the first FFmpeg JPEG created from MP4 only.
 12. Where JPEG or HLS assets (to follow) are created, write names to fields in CID media record.
 13. Moves source file to completed folder for deletion.
@@ -55,6 +55,8 @@ import tenacity
 # Local packages
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import image_utils
+import interval_utils
 import utils
 
 # Global paths from environment vars
@@ -381,8 +383,7 @@ def main():
             sys.exit("Exiting: JPEG not created from MP4 file")
 
         # Generate Full size 600x600, thumbnail 300x300
-        full_jpeg = make_jpg(jpeg_location, "full", None, None)
-        thumb_jpeg = make_jpg(jpeg_location, "thumb", None, None)
+        full_jpeg, thumb_jpeg = image_utils.make_derivatives(jpeg_location)
         if thumb_jpeg is None:
             thumb_jpeg = ""
         if full_jpeg is None:
@@ -437,12 +438,10 @@ def main():
             log_build.append(f"Creating new transcode path: {transcode_pth}")
             os.makedirs(transcode_pth, mode=0o777, exist_ok=True)
 
-        if not oversize:
-            full_jpeg = make_jpg(fullpath, "full", transcode_pth, None)
-        else:
-            full_jpeg = make_jpg(fullpath, "oversize", transcode_pth, percent)
-
-        thumb_jpeg = make_jpg(fullpath, "thumb", transcode_pth, None)
+        # Decode source once for both large image and thumbnail
+        full_jpeg, thumb_jpeg = image_utils.make_derivatives(
+            fullpath, transcode_pth, percent if oversize else None
+        )
         if thumb_jpeg is None:
             thumb_jpeg = ""
         if full_jpeg is None:
@@ -529,66 +528,9 @@ def adjust_seconds(duration: float, data: str) -> float:
     Adjust second durations within
     FFmpeg detected blackspace
     """
-    blist = retrieve_blackspaces(data)
-    print(f"*** BLACK GAPS: {blist}")
-    if not blist:
-        return duration // 2
-
-    secs = duration // 4
-    clash = check_seconds(blist, secs)
-    if not clash:
-        return secs
-
-    for num in range(2, 5):
-        frame_secs = duration // num
-        clash = check_seconds(blist, frame_secs)
-        if not clash:
-            return frame_secs
-
-    if len(blist) > 2:
-        first = blist[1].split(" - ")[1]
-        second = blist[2].split(" - ")[0]
-        frame_secs = int(first) + (int(second) - int(first)) // 2
-        if int(first) < frame_secs < int(second):
-            return frame_secs
-
-    return duration // 2
-
-
-def retrieve_blackspaces(data: str) -> list[str]:
-    """
-    Retrieve black detect log and check if
-    second variable falls in blocks of blackdetected
-    """
-    data_list = data.splitlines()
-    time_range = []
-    for line in data_list:
-        if "black_start" in line:
-            split_line = line.split(":")
-            split_start = split_line[1].split(".")[0]
-            start = re.sub("[^0-9]", "", split_start)
-            split_end = split_line[2].split(".")[0]
-            end = re.sub("[^0-9]", "", split_end)
-            # Round up to next second for cover
-            end = str(int(end) + 1)
-            time_range.append(f"{start} - {end}")
-    return time_range
-
-
-def check_seconds(blackspace: list[str], seconds: float) -> Optional[bool]:
-    """
-    Create range and check for second within
-    """
-    clash = []
-    for item in blackspace:
-        start, end = item.split(" - ")
-        st = int(start) - 1
-        ed = int(end) + 1
-        if seconds in range(st, ed):
-            clash.append(seconds)
-
-    if len(clash) > 0:
-        return True
+    starts, ends = interval_utils.parse_detector(data, "black")
+    print(f"*** BLACK GAPS: {list(zip(starts.tolist(), ends.tolist()))}")
+    return interval_utils.choose_clear_second(duration, starts, ends)
 
 
 def get_jpeg(seconds: float, fullpath: str, outpath: str) -> bool:
@@ -1292,59 +1234,6 @@ def create_transcode(
         )
 
 
-def make_jpg(
-    filepath: str, arg: str, transcode_pth: Optional[str], percent: Optional[str]
-) -> Optional[str]:
-    """
-    Create GM JPEG using command based on argument
-    These command work. For full size don't use resize.
-    """
-
-    start_reduce = ["gm", "convert", "-density", "300x300", filepath, "-strip"]
-
-    start = ["gm", "convert", "-density", "600x600", filepath, "-strip"]
-
-    thumb = [
-        "-resize",
-        "x180",
-    ]
-
-    oversize = [
-        "-resize",
-        f"{percent}%x{percent}%",
-    ]
-
-    if not transcode_pth:
-        out = os.path.splitext(filepath)[0]
-    else:
-        fname = os.path.split(filepath)[1]
-        file = os.path.splitext(fname)[0]
-        out = os.path.join(transcode_pth, file)
-
-    if "thumb" in arg:
-        outfile = f"{out}_thumbnail.jpg"
-        cmd = start_reduce + thumb + [f"{outfile}"]
-    elif "oversize" in arg:
-        outfile = f"{out}_largeimage.jpg"
-        cmd = start + oversize + [f"{outfile}"]
-    else:
-        outfile = f"{out}_largeimage.jpg"
-        cmd = start + [f"{outfile}"]
-
-    try:
-        subprocess.call(cmd)
-    except subprocess.CalledProcessError as err:
-        LOGGER.error(
-            "%s\tERROR\tJPEG creation failed for filepath: %s\n%s",
-            local_time(),
-            filepath,
-            err,
-        )
-    os.chmod(outfile, 0o777)
-    if os.path.exists(outfile):
-        return outfile
-
-
 def check_mod_time(fpath: str) -> bool:
     """
     See if mod time over 5 hrs old
@@ -76,6 +76,25 @@ def retrieve_record(api, database, search, limit, fields=None):
     return hits, record["adlibJSON"]["recordList"]["record"]
 
 
+# (api: str, database: str, field: str, values: Iterable[str], fields=None, batch: int = 50) -> Optional[list[dict[str, Any]]]
+def retrieve_records_bulk(api, database, field, values, fields=None, batch=50):
+    """
+    Retrieve all records where field matches any of
+    values, batching values into 'or' searches so
+    there is one request per batch, not per value
+    """
+    values = [str(value).strip() for value in values if str(value).strip()]
+    records = []
+    for num in range(0, len(values), batch):
+        terms = " or ".join(f'{field}="{value}"' for value in values[num : num + batch])
+        hits, result = retrieve_record(api, database, f"({terms})", "0", fields)
+        if hits is None:
+            return None
+        if isinstance(result, list):
+            records.extend(result)
+    return records
+
+
 # (api: str, query: dict[str, str]) -> dict[Any, Any]:
 @retry(stop=stop_after_attempt(10))
 def get(api, query):
@@ -5,9 +5,13 @@ to one utility module
 2024
 """
 
+import base64
+import hashlib
 import json
 import os
-from typing import Optional, Union, List, Dict, Any
+import time
+import zlib
+from typing import Optional, Union, List, Dict, Any, Iterator, Tuple
 
 from ds3 import ds3, ds3Helpers
 
@@ -300,6 +304,193 @@ def download_bp_object(fname: str, outpath: str, bucket: str) -> str:
     return get_job_id
 
 
+class HashingSink:
+    """
+    File-like sink for GetObjectRequest that
+    hashes each blob's bytes as they are written,
+    so no second read of the download is needed
+    """
+
+    def __init__(self, stream, checksum_type: str = "MD5"):
+        self.stream = stream
+        self.checksum_type = checksum_type.upper()
+        self.size = 0
+        if self.checksum_type == "CRC_32":
+            self.crc = 0
+            self.hash = None
+        else:
+            name = {"MD5": "md5", "SHA_256": "sha256", "SHA_512": "sha512"}.get(
+                self.checksum_type
+            )
+            self.hash = hashlib.new(name) if name else None
+
+    @property
+    def supported(self) -> bool:
+        return self.hash is not None or self.checksum_type == "CRC_32"
+
+    def write(self, data: bytes) -> int:
+        if self.hash is not None:
+            self.hash.update(data)
+        elif self.checksum_type == "CRC_32":
+            self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def checksum(self) -> Optional[str]:
+        """
+        Base64 digest, as Black Pearl
+        reports blob checksums
+        """
+        if self.hash is not None:
+            return base64.b64encode(self.hash.digest()).decode()
+        if self.checksum_type == "CRC_32":
+            return base64.b64encode(self.crc.to_bytes(4, "big")).decode()
+        return None
+
+
+def get_blob_checksums(fname: str, bucket: str) -> Dict[int, Tuple[str, str]]:
+    """
+    Per-blob checksums recorded by Black Pearl,
+    as {offset: (checksum_type, base64 checksum)}
+    """
+    request = ds3.GetObjectsWithFullDetailsSpectraS3Request(
+        name=fname, bucket_id=bucket, latest=True
+    )
+    checksums: Dict[int, Tuple[str, str]] = {}
+    try:
+        result = CLIENT.get_objects_with_full_details_spectra_s3(request)
+        obj = result.result["ObjectList"][0]
+        for blob in obj["Blobs"]["ObjectList"]:
+            if blob.get("Checksum"):
+                checksums[int(blob["Offset"])] = (
+                    blob.get("ChecksumType") or "MD5",
+                    blob["Checksum"],
+                )
+    except Exception as err:
+        print(f"Unable to retrieve blob checksums for {fname}: {err}")
+    return checksums
+
+
+def _run_get_job(
+    job_result: Dict[str, Any],
+    file_paths: Dict[str, str],
+    bucket: str,
+    verify: bool = True,
+) -> Iterator[Tuple[str, Optional[bool]]]:
+    """
+    Pull every chunk of a GET job as it becomes
+    ready, writing each blob at its offset through a
+    HashingSink. Yields (name, verified) once all of
+    an object's blobs are written: True when every
+    blob matches Black Pearl's checksum, False on any
+    mismatch, None if checksums were not available
+    """
+    job_id: str = job_result["JobId"]
+
+    # Bytes still to arrive per object, blobs may span chunks
+    remaining: Dict[str, int] = {}
+    chunk_ids: set[str] = set()
+    for chunk in job_result["ObjectsList"]:
+        chunk_ids.add(chunk["ChunkId"])
+        for blob in chunk["ObjectList"]:
+            remaining[blob["Name"]] = remaining.get(blob["Name"], 0) + int(
+                blob["Length"]
+            )
+    expected: Dict[str, Dict[int, Tuple[str, str]]] = {
+        fname: get_blob_checksums(fname, bucket) if verify else {}
+        for fname in remaining
+    }
+    verified: Dict[str, Optional[bool]] = {
+        fname: (True if expected[fname] else None) for fname in remaining
+    }
+    for file_path in file_paths.values():
+        with open(file_path, "wb"):
+            pass
+
+    while chunk_ids:
+        ready = CLIENT.get_job_chunks_ready_for_client_processing_spectra_s3(
+            ds3.GetJobChunksReadyForClientProcessingSpectraS3Request(job_id)
+        )
+        chunks = [
+            chunk
+            for chunk in ready.result["ObjectsList"]
+            if chunk["ChunkId"] in chunk_ids
+        ]
+        if not chunks:
+            time.sleep(ready.retryAfter)
+            continue
+        for chunk in chunks:
+            chunk_ids.discard(chunk["ChunkId"])
+            for blob in chunk["ObjectList"]:
+                fname = blob["Name"]
+                offset = int(blob["Offset"])
+                checksum_type, checksum = expected[fname].get(offset, ("MD5", None))
+                with open(file_paths[fname], "r+b") as stream:
+                    stream.seek(offset)
+                    sink = HashingSink(stream, checksum_type)
+                    CLIENT.get_object(
+                        ds3.GetObjectRequest(
+                            bucket, fname, sink, offset=offset, job=job_id
+                        )
+                    )
+                if verified[fname] is not None:
+                    if checksum is None or not sink.supported:
+                        verified[fname] = None
+                    elif sink.checksum() != checksum:
+                        print(f"Checksum mismatch for {fname} blob at {offset}")
+                        verified[fname] = False
+                remaining[fname] -= int(blob["Length"])
+                if remaining[fname] <= 0:
+                    yield fname, verified[fname]
+
+
+def download_verified_object(
+    fname: str, outpath: str, bucket: str
+) -> Tuple[Optional[str], Optional[bool]]:
+    """
+    Download one object (blobbed or not) to outpath,
+    verifying each blob's checksum on the way in.
+    Returns (job ID, verified), job ID None on failure
+    """
+    if bucket == "":
+        bucket = "imagen"
+
+    file_path: str = os.path.join(outpath, fname)
+    request = ds3.GetBulkJobSpectraS3Request(bucket, [ds3.Ds3GetObject(fname)])
+    try:
+        bulk_get = CLIENT.get_bulk_job_spectra_s3(request)
+        job_id: str = bulk_get.result["JobId"]
+        print(f"BP get job ID: {job_id}")
+        for _, verified in _run_get_job(bulk_get.result, {fname: file_path}, bucket):
+            return job_id, verified
+    except Exception as err:
+        print(f"Unable to retrieve file {fname} from Black Pearl: {err}")
+    return None, None
+
+
+def download_bulk_objects(
+    file_paths: Dict[str, str], bucket: str
+) -> Iterator[Tuple[str, Optional[bool]]]:
+    """
+    Retrieve many objects from one bucket in a single
+    DS3 bulk GET job, so the library can order reads by
+    tape position. Yields (name, verified) as soon as
+    all of an object's blobs are written to file_paths[name]
+    """
+    if bucket == "":
+        bucket = "imagen"
+
+    request = ds3.GetBulkJobSpectraS3Request(
+        bucket, [ds3.Ds3GetObject(fname) for fname in file_paths]
+    )
+    bulk_get = CLIENT.get_bulk_job_spectra_s3(request)
+    print(f"BP bulk get job ID: {bulk_get.result['JobId']}")
+    yield from _run_get_job(bulk_get.result, file_paths, bucket)
+
+
 def download_blobbed_object(fname: str, outpath: str, bucket: str) -> str:
     """
     Download the BP object from SpectraLogic
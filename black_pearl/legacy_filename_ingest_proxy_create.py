@@ -41,7 +41,6 @@ import hashlib
 import json
 import logging
 import os
-import re
 import shutil
 import subprocess
 import sys
@@ -52,6 +51,8 @@ import pandas
 # Private imports
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import image_utils
+import interval_utils
 import utils
 
 # Global paths
@@ -490,8 +491,11 @@ def main():
                 continue
 
             # Generate Full size 600x600, thumbnail 300x300
-            full_jpeg = make_jpg(jpeg_path, "full", None, None)
-            thumb_jpeg = make_jpg(jpeg_path, "thumb", None, None)
+            full_jpeg, thumb_jpeg = image_utils.make_derivatives(jpeg_path)
+            if thumb_jpeg is None:
+                thumb_jpeg = ""
+            if full_jpeg is None:
+                full_jpeg = ""
             LOGGER.info(
                 "New images created at {seconds_for_jpeg} seconds into video:\n - %s\n - %s",
                 full_jpeg,
@@ -630,66 +634,9 @@ def adjust_seconds(duration: float, data: str) -> float:
     Adjust second durations within
     FFmpeg detected blackspace
     """
-    blist = retrieve_blackspaces(data)
-    print(f"*** BLACK GAPS: {blist}")
-    if not blist:
-        return duration // 2
-
-    secs = duration // 4
-    clash = check_seconds(blist, secs)
-    if not clash:
-        return secs
-
-    for num in range(2, 5):
-        frame_secs = duration // num
-        clash = check_seconds(blist, frame_secs)
-        if not clash:
-            return frame_secs
-
-    if len(blist) > 2:
-        first = blist[1].split(" - ")[1]
-        second = blist[2].split(" - ")[0]
-        frame_secs = int(first) + (int(second) - int(first)) // 2
-        if int(first) < frame_secs < int(second):
-            return frame_secs
-
-    return duration // 2
-
-
-def check_seconds(blackspace: list[str], seconds: Union[int, float]) -> Optional[bool]:
-    """
-    Create range and check for second within
-    """
-    clash = []
-    for item in blackspace:
-        start, end = item.split(" - ")
-        st = int(start) - 1
-        ed = int(end) + 1
-        if seconds in range(st, ed):
-            clash.append(seconds)
-
-    if len(clash) > 0:
-        return True
-
-
-def retrieve_blackspaces(data: str) -> list[str]:
-    """
-    Retrieve black detect log and check if
-    second variable falls in blocks of blackdetected
-    """
-    data_list: list[str] = data.splitlines()
-    time_range: list = []
-    for line in data_list:
-        if "black_start" in line:
-            split_line = line.split(":")
-            split_start = split_line[1].split(".")[0]
-            start = re.sub("[^0-9]", "", split_start)
-            split_end = split_line[2].split(".")[0]
-            end = re.sub("[^0-9]", "", split_end)
-            # Round up to next second for cover
-            end = str(int(end) + 1)
-            time_range.append(f"{start} - {end}")
-    return time_range
+    starts, ends = interval_utils.parse_detector(data, "black")
+    print(f"*** BLACK GAPS: {list(zip(starts.tolist(), ends.tolist()))}")
+    return interval_utils.choose_clear_second(duration, starts, ends)
 
 
 def put_file(fpath: str, ref_num: str, bucket_name: str) -> Optional[str]:
@@ -743,60 +690,6 @@ def get_jpeg(seconds: int, fullpath: str, outpath: str) -> bool:
         return False
 
 
-def make_jpg(
-    filepath: str, arg: str, transcode_pth: Optional[str], percent: Optional[str]
-) -> Optional[str]:
-    """
-    Create GM JPEG using command based on argument
-    These command work. For full size don't use resize.
-    """
-    start_reduce: list[str] = [
-        "gm",
-        "convert",
-        "-density",
-        "300x300",
-        filepath,
-        "-strip",
-    ]
-
-    start: list[str] = ["gm", "convert", "-density", "600x600", filepath, "-strip"]
-
-    thumb: list[str] = [
-        "-resize",
-        "x180",
-    ]
-
-    oversize: list[str] = [
-        "-resize",
-        f"{percent}%x{percent}%",
-    ]
-
-    if not transcode_pth:
-        out = os.path.splitext(filepath)[0]
-    else:
-        fname = os.path.split(filepath)[1]
-        file = os.path.splitext(fname)[0]
-        out = os.path.join(transcode_pth, file)
-
-    if "thumb" in arg:
-        outfile = f"{out}_thumbnail.jpg"
-        cmd = start_reduce + thumb + [f"{outfile}"]
-    elif "oversize" in arg:
-        outfile = f"{out}_largeimage.jpg"
-        cmd = start + oversize + [f"{outfile}"]
-    else:
-        outfile = f"{out}_largeimage.jpg"
-        cmd = start + [f"{outfile}"]
-
-    try:
-        subprocess.call(cmd)
-    except Exception as err:
-        LOGGER.error("JPEG creation failed for filepath: %s\n%s", filepath, err)
-
-    if os.path.exists(outfile):
-        return outfile
-
-
 def get_part_whole(fname: str) -> Optional[tuple[str, str]]:
     """
     Receive a filename extract part whole from end
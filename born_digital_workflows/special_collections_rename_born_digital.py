@@ -39,6 +39,7 @@ import requests
 # Private packages
 sys.path.append(os.environ["CODE"])
 import adlib_v3_sess as adlib
+import exiftool_utils
 import utils
 
 # Global path variables
@@ -194,6 +195,16 @@ def main():
             x for x in os.listdir(wpath) if os.path.isfile(os.path.join(wpath, x))
         ]
         sorted_images = sorted(images)
+        # Prefetch EXIF for the folder through one exiftool session
+        try:
+            exif_text = exiftool_utils.get_text(
+                os.path.join(wpath, x)
+                for x in sorted_images
+                if x.lower().endswith((".tiff", ".tif", ".jpeg", ".jpg"))
+            )
+        except OSError as err:
+            LOGGER.warning("Unable to prefetch EXIF data for %s: %s", wpath, err)
+            exif_text = {}
         for image in sorted_images:
             if not image.endswith(
                 (".tiff", ".tif", ".TIFF", ".TIF", ".jpeg", ".jpg", ".JPEG", ".JPG")
@@ -233,7 +244,9 @@ def main():
                 continue
 
             # Born Digital records to be made
-            record_digital, metadata = build_defaults(work_data, ipath, image)
+            record_digital, metadata = build_defaults(
+                work_data, ipath, image, exif_text.get(ipath)
+            )
             digi_priref, digi_obj = create_new_image_record(record_digital, session)
             LOGGER.info(
                 "* New Item record created for image %s Born Digital %s",
@@ -304,7 +317,10 @@ def main():
 
 #
 def build_defaults(
-    work_data: Optional[tuple[str, str, str, str, str, str]], ipath: str, image: str
+    work_data: Optional[tuple[str, str, str, str, str, str]],
+    ipath: str,
+    image: str,
+    exif: Optional[str] = None,
 ) -> Optional[tuple[list[dict[str, str]], Optional[str]]]:
     """
     Build up item record defaults
@@ -346,7 +362,7 @@ def build_defaults(
             if bitdepth == key:
                 records.append({"bit_depth.lref": val})
 
-    metadata_rec, metadata = get_exifdata(ipath)
+    metadata_rec, metadata = get_exifdata(ipath, exif)
     if metadata_rec:
         records.extend(metadata_rec)
 
@@ -362,7 +378,9 @@ def build_defaults(
     return records, metadata
 
 
-def get_exifdata(dpath: str) -> tuple[Optional[list[dict[str, str]]], Optional[str]]:
+def get_exifdata(
+    dpath: str, data: Optional[str] = None
+) -> tuple[Optional[list[dict[str, str]]], Optional[str]]:
     """
     Attempt to get metadata for record build
     Example dict below, waiting for confirmation
@@ -370,7 +388,12 @@ def get_exifdata(dpath: str) -> tuple[Optional[list[dict[str, str]]], Optional[s
     metadata: list[dict[str, str]] = []
     creator_data: list[str] = []
     rights_data: list[str] = []
-    data: str = utils.exif_data(dpath)
+    if data is None:
+        try:
+            data = exiftool_utils.get_text([dpath]).get(dpath)
+        except OSError as err:
+            LOGGER.warning("Unable to read EXIF data for %s: %s", dpath, err)
+            return None, None
     if not data:
         return None, None
     data_list = data.split("\n")
@@ -38,6 +38,7 @@ import requests
 # Private packages
 sys.path.append(os.environ["CODE"])
 import adlib_v3_sess as adlib
+import exiftool_utils
 import utils
 
 # Global path variables
@@ -194,6 +195,16 @@ def main():
             x for x in os.listdir(rpath) if os.path.isfile(os.path.join(rpath, x))
         ]
         sorted_images = sorted(images)
+        # Prefetch EXIF for the folder through one exiftool session
+        try:
+            exif_text = exiftool_utils.get_text(
+                os.path.join(rpath, x)
+                for x in sorted_images
+                if x.lower().endswith((".tiff", ".tif", ".jpeg", ".jpg"))
+            )
+        except OSError as err:
+            LOGGER.warning("Unable to prefetch EXIF data for %s: %s", rpath, err)
+            exif_text = {}
         for image in sorted_images:
             if not image.endswith(
                 (".tiff", ".tif", ".TIFF", ".TIF", ".jpeg", ".jpg", ".JPEG", ".JPG")
@@ -233,7 +244,9 @@ def main():
                 continue
 
             # Digital Derivative record to be made
-            record_digital, metadata = build_defaults(record_data, ipath, image)
+            record_digital, metadata = build_defaults(
+                record_data, ipath, image, exif_text.get(ipath)
+            )
             digi_priref, digi_obj = create_new_image_record(record_digital, session)
             LOGGER.info(
                 "* New Item record created for image %s. Digital Derivative %s",
@@ -313,7 +326,7 @@ def main():
     )
 
 
-def build_defaults(data, ipath: str, image: str):
+def build_defaults(data, ipath: str, image: str, exif: Optional[str] = None):
     """
     Build up item record defaults
     """
@@ -359,7 +372,7 @@ def build_defaults(data, ipath: str, image: str):
             if bitdepth == key:
                 records.append({"bit_depth.lref": val})
 
-    metadata_rec, metadata = get_exifdata(ipath)
+    metadata_rec, metadata = get_exifdata(ipath, exif)
     if metadata_rec:
         records.extend(metadata_rec)
 
@@ -375,7 +388,9 @@ def build_defaults(data, ipath: str, image: str):
     return records, metadata
 
 
-def get_exifdata(dpath: str) -> tuple[Optional[list[dict[str, str]]], Optional[str]]:
+def get_exifdata(
+    dpath: str, data: Optional[str] = None
+) -> tuple[Optional[list[dict[str, str]]], Optional[str]]:
     """
     Attempt to get metadata for record build
     Example dict below, waiting for confirmation
@@ -383,7 +398,12 @@ def get_exifdata(dpath: str) -> tuple[Optional[list[dict[str, str]]], Optional[s
     metadata: list[dict[str, str]] = []
     creator_data = []
     rights_data = []
-    data = utils.exif_data(dpath)
+    if data is None:
+        try:
+            data = exiftool_utils.get_text([dpath]).get(dpath)
+        except OSError as err:
+            LOGGER.warning("Unable to read EXIF data for %s: %s", dpath, err)
+            return None, None
     if not data:
         return None, None
     data_list = data.split("\n")
@@ -0,0 +1,245 @@
+"""
+Staged CSV pipeline for CID documentation scripts
+
+Stages:
+- validated_rows() reads CSV rows and validates them in
+  chunks on a process pool, yielding (row number, model)
+  in CSV order, with None for rows that fail validation
+- dedupe() drops repeated rows by a key, and group_rows()
+  groups rows by the record they write to (eg a film code)
+- write_groups() hands each group to one of a bounded set
+  of writer threads, so rows for one record are always
+  written in order by one thread
+- Checkpoint records the count of leading CSV rows that
+  are committed. A script restarted on the same CSV
+  resumes after them, instead of from row 1. Rows written
+  after that point are written again, so writers must
+  check CID for existing records
+
+Usage:
+    checkpoint = csv_pipeline.Checkpoint(CHECKPOINT, csv_path)
+    rows = csv_pipeline.validated_rows(csv_path, validate, checkpoint.start())
+    rows, skipped = csv_pipeline.dedupe(rows, row_key)
+    checkpoint.done(skipped)
+    groups = csv_pipeline.group_rows(rows, work_key)
+    csv_pipeline.write_groups(groups, write_group, checkpoint)
+
+2026
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from multiprocessing import Pool
+from typing import Any, Callable, Final, Hashable, Iterable, Iterator, Optional
+
+LOGGER = logging.getLogger("csv_pipeline")
+PROCESSES: Final = 4
+CHUNK: Final = 500
+WRITERS: Final = 4
+
+Row = tuple[int, Any]
+
+
+def read_rows(csv_path: str, start: int = 0) -> Iterator[tuple[int, dict[str, str]]]:
+    """
+    CSV rows as dicts numbered from 1,
+    skipping the first start rows
+    """
+    with open(csv_path, "r", encoding="utf-8", newline="") as file:
+        reader = csv.DictReader(file)
+        yield from islice(enumerate(reader, 1), start, None)
+
+
+def validate_chunk(
+    args: tuple[Callable[[dict[str, str]], Any], list[tuple[int, dict[str, str]]]],
+) -> list[Row]:
+    """
+    Validate a chunk of rows, in a pool process.
+    Rows that fail validation are returned as None
+    """
+    validate, chunk = args
+    results = []
+    for num, row in chunk:
+        try:
+            results.append((num, validate(row)))
+        except (ValueError, TypeError) as err:
+            LOGGER.warning("CSV row %s failed validation: %s", num, err)
+            results.append((num, None))
+    return results
+
+
+def chunked(rows: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """
+    Split an iterable into lists of size
+    """
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def validated_rows(
+    csv_path: str,
+    validate: Callable[[dict[str, str]], Any],
+    start: int = 0,
+    processes: int = PROCESSES,
+    chunk_size: int = CHUNK,
+) -> Iterator[Row]:
+    """
+    Validated rows in CSV order, after the first
+    start rows. validate must be a module level
+    function so it can be sent to the pool
+    """
+    chunks = (
+        (validate, chunk) for chunk in chunked(read_rows(csv_path, start), chunk_size)
+    )
+    with Pool(processes) as pool:
+        for results in pool.imap(validate_chunk, chunks):
+            yield from results
+
+
+def dedupe(
+    rows: Iterable[Row], key: Callable[[Any], Hashable]
+) -> tuple[list[Row], list[int]]:
+    """
+    Valid rows with the first of any repeated key,
+    and row numbers of invalid or repeated rows
+    """
+    kept = []
+    skipped = []
+    seen = set()
+    for num, row in rows:
+        row_key = key(row) if row is not None else None
+        if row_key is None or row_key in seen:
+            skipped.append(num)
+            continue
+        seen.add(row_key)
+        kept.append((num, row))
+    LOGGER.info("CSV rows kept: %s, skipped: %s", len(kept), len(skipped))
+    return kept, skipped
+
+
+def group_rows(
+    rows: Iterable[Row], key: Callable[[Any], Hashable]
+) -> dict[Hashable, list[Row]]:
+    """
+    Rows grouped by key, groups ordered
+    by the first row of each
+    """
+    groups: dict[Hashable, list[Row]] = {}
+    for num, row in rows:
+        groups.setdefault(key(row), []).append((num, row))
+    return groups
+
+
+class Checkpoint:
+    """
+    Count of leading CSV rows committed, kept in
+    a JSON file for the CSV's size and mtime
+    """
+
+    def __init__(self, path: str, csv_path: str) -> None:
+        self.path = path
+        stat = os.stat(csv_path)
+        self.source = {"csv": csv_path, "size": stat.st_size, "mtime": stat.st_mtime}
+        self.row = 0
+        self._done: set[int] = set()
+        self._lock = threading.Lock()
+
+    def start(self) -> int:
+        """
+        Rows committed by an earlier run of
+        this CSV, 0 if it has changed since
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return 0
+        if saved.get("source") == self.source:
+            self.row = int(saved.get("row", 0))
+            LOGGER.info("Resuming %s after row %s", self.source["csv"], self.row)
+        return self.row
+
+    def commit(self, row: int) -> None:
+        """
+        Record rows up to and including row
+        as committed, via a temp file
+        """
+        self.row = row
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump({"source": self.source, "row": row}, file)
+        os.replace(tmp, self.path)
+
+    def done(self, rows: Iterable[int]) -> None:
+        """
+        Mark rows done, committing any
+        that now follow on from row
+        """
+        with self._lock:
+            self._done.update(rows)
+            row = self.row
+            while row + 1 in self._done:
+                row += 1
+                self._done.discard(row)
+            if row != self.row:
+                self.commit(row)
+
+    def clear(self) -> None:
+        """
+        Remove the checkpoint once a run
+        finishes, so a rerun starts at row 0
+        """
+        self.row = 0
+        self._done.clear()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def write_groups(
+    groups: dict[Hashable, list[Row]],
+    write_group: Callable[[Hashable, list[Row]], None],
+    checkpoint: Checkpoint,
+    writers: int = WRITERS,
+    stop: Optional[Callable[[], Optional[str]]] = None,
+) -> Optional[str]:
+    """
+    Run write_group for each group on up to writers
+    threads, marking rows done as groups complete.
+    stop is checked before each group starts, and
+    its reason returned once running groups finish.
+    A group that raises is logged and not marked done
+    """
+    pending = iter(groups.items())
+    running = {}
+    reason = None
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        while True:
+            while not reason and len(running) < writers:
+                reason = stop() if stop else None
+                if reason:
+                    LOGGER.info("Stopping CSV writes: %s", reason)
+                    break
+                group = next(pending, None)
+                if group is None:
+                    break
+                key, rows = group
+                running[executor.submit(write_group, key, rows)] = (key, rows)
+            if not running:
+                return reason
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key, rows = running.pop(future)
+                try:
+                    future.result()
+                except Exception as err:
+                    LOGGER.exception("Write failed for %s: %s", key, err)
+                    continue
+                checkpoint.done(num for num, _ in rows)
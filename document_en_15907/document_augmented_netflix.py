@@ -40,10 +40,11 @@ import os
 import sys
 from typing import Final, Optional
 import pandas
-import yaml
 
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import csv_pipeline
+import genre_map
 import utils
 from parsers import stream_catalogue as ct
 from parsers import stream_episode as ep
@@ -59,6 +60,9 @@ LOGS: Final = os.path.join(ADMIN, "Logs")
 CODE: Final = os.environ.get("CODE_DEPENDS")
 GENRE_MAP: Final = os.path.join(CODE, "document_en_15907/EPG_genre_mapping.yaml")
 CONTROL_JSON: Final = os.path.join(LOGS, "downtime_control.json")
+GENRES: Final = genre_map.GenreMap(
+    GENRE_MAP, os.path.join(ADMIN, "off_air_tv/redux_undefined_genres.txt")
+)
 CID_API: Final = utils.get_current_api()
 FORMAT: Final = "%Y-%m-%d"
 
@@ -441,69 +445,12 @@ def genre_retrieval(category_code: str, description: str, title: str) -> list[st
     """
     Retrieve genre data, return as list
     """
-    with open(GENRE_MAP, "r", encoding="utf-8") as files:
-        data = yaml.load(files, Loader=yaml.FullLoader)
-        print(
-            f"genre_retrieval(): The genre data is being retrieved for: {category_code}"
-        )
-    gpath = os.path.join(ADMIN, "off_air_tv/redux_undefined_genres.txt")
-    for _ in data:
-        if category_code in data["genres"]:
-            genre_one: list[str] = []
-            genre_two: list[str] = []
-            try:
-                print(data["genres"])
-                genre_one = data["genres"][category_code.strip("u")]["Genre"]
-                print(f"genre_retrieval(): Genre one: {genre_one}")
-                if "Undefined" in genre_one:
-                    print(
-                        f"genre_retrieval(): Undefined category_code discovered: {category_code}"
-                    )
-                    with open(gpath, "a", encoding="utf-8") as genre_log:
-                        print(
-                            "genre_retrieval(): Writing Undefined category details to genre log"
-                        )
-                        genre_log.write("\n")
-                        genre_log.write(
-                            f"Category: {category_code}     Title: {title}     Description: {description}"
-                        )
-                    genre_one_priref: str = ""
-                elif isinstance(genre_one, dict):
-                    for _, val in genre_one.items():
-                        genre_one_priref: str = val
-                    print(
-                        f"genre_retrieval(): Key value for genre_one_priref: {genre_one_priref}"
-                    )
-                elif isinstance(genre_one, str):
-                    genre_one_priref = genre_one.split(":")[-1]
-                else:
-                    genre_one_priref = ""
-            except (IndexError, KeyError, TypeError):
-                genre_one_priref = ""
-            try:
-                genre_two = data["genres"][category_code.strip("u")]["Genre2"]
-                for _, val in genre_two.items():
-                    genre_two_priref = val
-                print(
-                    f"genre_retrieval(): Key value for genre_two_priref: {genre_two_priref}"
-                )
-            except (IndexError, KeyError, TypeError):
-                genre_two_priref: str = ""
-            return [genre_one_priref, genre_two_priref]
-        else:
-            LOGGER.warning(
-                "%s -- New category not in EPG_genre_map.yaml: %s",
-                category_code,
-                title,
-            )
-            with open(gpath, "a", encoding="utf-8") as genre_log:
-                print(
-                    "genre_retrieval(): Writing Undefined category details to genre log"
-                )
-                genre_log.write("\n")
-                genre_log.write(
-                    f"Category: {category_code}     Title: {title}     Description: {description}"
-                )
+    print(f"genre_retrieval(): The genre data is being retrieved for: {category_code}")
+    prirefs = GENRES.lookup(category_code, title, description)
+    if prirefs is None:
+        return None
+    print(f"genre_retrieval(): Genre prirefs: {prirefs[:2]}")
+    return list(prirefs[:2])
 
 
 def make_work_dictionary(
@@ -674,7 +621,15 @@ def main():
     prog_dct: dict[str, list[str]] = read_csv_to_dict(csv_path)
     csv_range = len(prog_dct["title"])
     LOGGER.info("=== Document augmented Netflix start ===============================")
-    for num in range(0, csv_range):
+    checkpoint = csv_pipeline.Checkpoint(
+        os.path.join(LOGS, "document_augmented_netflix_checkpoint.json"), csv_path
+    )
+    ready = False
+    for num in range(checkpoint.start(), csv_range):
+        if ready:
+            # Previous row is complete, a rerun resumes after it
+            checkpoint.done([num])
+        ready = True
         # Capture CSV supplied data to vars
         title = prog_dct["title"][num]
         article = prog_dct["article"][num]
@@ -737,10 +692,12 @@ def main():
                     title,
                     matched_folders,
                 )
+                ready = False
                 continue
         if len(matched_folders) == 0:
             LOGGER.warning("No match found: %s %s", article, title)
             # At some point initiate 'title' search in PATV data
+            ready = False
             continue
 
         print(f"TITLE MATCH: {article} {title} -- {matched_folders[0]}")
@@ -1014,6 +971,7 @@ def main():
                         "============ Episodes found in NETFLIX folder do not match total episodes supplied ============="
                     )
 
+    checkpoint.clear()
     LOGGER.info("=== Document augmented Netflix end =================================")
 
 
@@ -11,13 +11,18 @@ using augmented metadata supply (JSON via API) and traversing filesystem paths t
        asset_id that has a new episode). If 'Generic' present at start of episode title create new work,
        otherwise only create manifestation and item, and link to existing work.
        If new series (if episodic and series data present) create new series from downloaded
-       EPG series data, then link work-manifestion-item to it.
+       EPG series data, then link work-manifestion-item to it. Advert breaks found by
+       helpers/advert_break_detector.py (advert_breaks.json) are added to the Item record.
     2. Add the WebVTT subtitles to the Item record (utb and label.text) using requests library
        push to avoid problems with escape characters through adlib.py method. [Deprecated feature]
     3. Rename the MPEG transport stream file with the Item object number, into autoingest
     4. Rename the subtitles.vtt file with Item object number and move to Isilon folder
     5. Identify the folder as completed by renaming the JSON with .documented suffix
 
+    Run with --parallel to document each channel folder in its own worker process.
+    Series and work creation is locked per series ID and asset ID across workers, and
+    the CID failure circuit breaker counts failures from all workers.
+
     NOTE: this assumes a separate script - fetch_stora_augmented.py - will fetch the JSON
     for each programme from the API and place it in paths to be used here. Where none is matched
     document_stora.py will update to CID from the info.csv generated from the STORA TS file metadata.
@@ -28,22 +33,25 @@ Refactored Py3 2023
 # Public packages
 import csv
 import datetime
+import functools
 import glob
 import json
 import logging
 import os
 import shutil
 import sys
+from multiprocessing import Event, Pool, Value
 from time import sleep
 
 import tenacity
-import yaml
 from series_retrieve import check_id, retrieve
 
 sys.path.append(os.environ["CODE"])
 import adlib_v3_sess as adlib
+import genre_map
+import key_lock
 import utils
-from helpers import stora_helper
+from helpers import advert_break_detector, stora_helper, stora_lookup_cache
 from parsers import stora_episode_parser as jp
 from parsers import stora_series_parser as sp
 
@@ -61,7 +69,19 @@ MPEG_TS_POLICY = os.path.join(os.environ["MEDIACONCH"], "mpeg_ts_policy.xml")
 SUBS_PTH = os.environ["SUBS_PATH2"]
 GENRE_PTH = SUBS_PTH.split("subtitles_not_in_cid/")[0]
 CID_API = utils.get_current_api()
-FAILURE_COUNTER = 0
+GENRES = genre_map.GenreMap(
+    GENRE_MAP, os.path.join(GENRE_PTH, "redux_undefined_genres.txt")
+)
+LOOKUPS = stora_lookup_cache.StoraLookupCache(
+    os.path.join(LOG_PATH, "stora_lookup_cache.json"), SERIES_CACHE_PATH
+)
+LOCK_PATH = os.path.join(LOG_PATH, "stora_locks")
+MAX_PARALLEL = 8
+
+# Shared with workers by init_worker() in --parallel mode
+FAILURE_COUNTER = Value("i", 0)
+STOP = Event()
+PARALLEL = False
 
 # Setup logging
 logger = logging.getLogger("document_augmented_stora")
@@ -162,6 +182,15 @@ CHANNELS = {
 }
 
 
+@functools.cache
+def load_series_list():
+    """
+    Series list read once per run
+    """
+    with open(SERIES_LIST, "r") as file:
+        return frozenset(json.load(file))
+
+
 def look_up_series_list(alternative_num):
     """
     Check if series requires annual series creation
@@ -169,22 +198,60 @@ def look_up_series_list(alternative_num):
 
     if alternative_num.strip() == "2af14f77-ef15-517c-a463-04dc0a7c81ad":
         return "BBC News"
-    with open(SERIES_LIST, "r") as file:
-        slist = json.load(file)
-        if alternative_num in slist:
-            return True
+    if alternative_num in load_series_list():
+        return True
     return False
 
 
+def cid_series_id(series_id, root):
+    """
+    Series ID as held in CID, with year prefix for
+    annual series and year_month for BBC News.
+    Returns series ID, month and BBC split flag
+    """
+    series_chck = look_up_series_list(series_id)
+    if series_chck == "BBC News":
+        month = root.split("/")[-4]
+        return f"{YEAR_PATH}_{month}_{series_id}", month, True
+    if series_chck is True:
+        return f"{YEAR_PATH}_{series_id}", "", False
+    return series_id, "", False
+
+
+def epg_ids(fullpath):
+    """
+    Asset ID and series ID of an EPG JSON, picked
+    as fetch_lines() does, for prewarming lookups
+    """
+    try:
+        with open(fullpath, "r", encoding="utf-8") as inf:
+            asset = json.load(inf)["item"][0]["asset"]
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        return None, None
+    related = asset.get("related") or []
+    series_id = related[0].get("id") if related else None
+    for subdct in related:
+        if subdct.get("type") == "series":
+            if len(str(subdct.get("id"))) == 36:
+                series_id = subdct["id"]
+            break
+    return asset.get("id"), series_id
+
+
 @tenacity.retry(wait=tenacity.wait_fixed(5), stop=tenacity.stop_after_attempt(10))
 def cid_series_query(series_id, sess):
     """
     Sends CID request for series_id data
     """
 
+    # Workers recheck cached misses, another may have created it since
+    cached = LOOKUPS.series.get(series_id)
+    if cached or (cached == "" and not PARALLEL):
+        print(f"cid_series_query(): Series priref from lookup cache: {cached}")
+        return (1, cached) if cached else (0, "")
+
     print(f"CID SERIES QUERY: {series_id}")
     search = f'alternative_number="{series_id}"'
-    sleep(0.5)
     try:
         hit_count, series_query_result = adlib.retrieve_record(
             CID_API, "works", search, "1", sess
@@ -201,10 +268,13 @@ def cid_series_query(series_id, sess):
         print(
             "cid_series_query(): Series hit count and series priref will return empty strings"
         )
+        if hit_count == 0:
+            LOOKUPS.set_series(series_id, "")
         return hit_count, ""
     if "priref" in str(series_query_result):
         series_priref = adlib.retrieve_field_name(series_query_result[0], "priref")[0]
         print(f"cid_series_query(): Series priref: {series_priref}")
+        LOOKUPS.set_series(series_id, series_priref)
     else:
         print("cid_series_query(): Unable to access series_priref")
         return hit_count, ""
@@ -219,22 +289,26 @@ def find_repeats(asset_id, sess):
     PATV showings of a manifestation
     """
 
+    cached = LOOKUPS.works.get(asset_id)
+    if cached or (cached == "" and not PARALLEL):
+        print(f"*** find_repeats(): Parent work from lookup cache: {cached}")
+        return cached or 0
+
     search = (
         f'alternative_number="{asset_id}" AND alternative_number.type="PATV asset id"'
     )
-    sleep(0.5)
     hits, result = adlib.retrieve_record(CID_API, "manifestations", search, "1", sess)
     print(f"*** find_repeats(): {hits}\n{result}")
     if hits is None:
         print(f"CID API could not be reached for Manifestations search: {search}")
         return None
     if hits == 0:
+        LOOKUPS.set_work(asset_id, "")
         return 0
     try:
         man_priref = adlib.retrieve_field_name(result[0], "priref")[0]
     except (IndexError, TypeError, KeyError):
         return None
-    sleep(0.5)
     full_result = adlib.retrieve_record(
         CID_API,
         "manifestations",
@@ -276,6 +350,7 @@ def find_repeats(asset_id, sess):
         f"Priref with matching asset_id in CID: {man_priref} / Parent Work: {ppriref}"
     )
     if len(ppriref) > 1:
+        LOOKUPS.set_work(asset_id, ppriref)
         return ppriref
 
 
@@ -284,144 +359,70 @@ def series_check(series_id):
     Separate function that looks up series info when called in script
     """
 
-    for files in os.listdir(SERIES_CACHE_PATH):
-        if series_id not in files:
-            continue
-        if not files.endswith(".json"):
-            continue
+    if series_id in LOOKUPS.series_data:
+        return LOOKUPS.series_data[series_id]
+    fullpath = LOOKUPS.series_file(series_id)
+    if fullpath is None:
+        return None
 
-        filename = os.path.splitext(files)[0]
-        fullpath = os.path.join(SERIES_CACHE_PATH, files)
-        print(f"series_check(): MATCH! {filename} with Series_ID {series_id}")
-        print(
-            f"series_check(): Json to be opened and read for series data retrieval: {fullpath}"
-        )
-        with open(fullpath, "r", encoding="utf-8") as inf:
-            lines = inf.read()
-        val = sp.parse_payload_strict_json(lines)
-        if not val:
-            return None
-
-        # Sort and return longest of descriptions
-        series_descriptions = []
-        series_short = val.summary.short or ""
-        series_descriptions.append(series_short)
-        series_medium = val.summary.medium or ""
-        series_descriptions.append(series_medium)
-        series_long = val.summary.long or ""
-        series_descriptions.append(series_long)
-        series_descriptions.sort(key=len, reverse=True)
-        series_description = series_descriptions[0]
-        print(f"series_check(): Series description longest: {series_description}")
-
-        series_title_full = val.title or ""
-        print(f"series_check(): Series title full: {series_title_full}")
-
-        # series category codes, unsure if there's always two parts to category, selects longest
-        series_category_codes = []
-        series_category_code = ""
-        if len(val.category) >= 1:
-            for num in range(0, len(val.category)):
-                series_category_codes.append(val.category[num].code or "")
-        series_category_codes.sort(key=len, reverse=True)
-        if len(series_category_codes) > 0:
-            series_category_code = series_category_codes[0]
-            print(
-                f"series_check(): Series category code, longest: {series_category_code}"
-            )
+    filename = os.path.splitext(os.path.basename(fullpath))[0]
+    print(f"series_check(): MATCH! {filename} with Series_ID {series_id}")
+    print(
+        f"series_check(): Json to be opened and read for series data retrieval: {fullpath}"
+    )
+    with open(fullpath, "r", encoding="utf-8") as inf:
+        lines = inf.read()
+    val = sp.parse_payload_strict_json(lines)
+    if not val:
+        return None
 
-        return (
-            series_description,
-            series_short,
-            series_medium,
-            series_long,
-            series_title_full,
-            series_category_code,
-        )
+    # Sort and return longest of descriptions
+    series_descriptions = []
+    series_short = val.summary.short or ""
+    series_descriptions.append(series_short)
+    series_medium = val.summary.medium or ""
+    series_descriptions.append(series_medium)
+    series_long = val.summary.long or ""
+    series_descriptions.append(series_long)
+    series_descriptions.sort(key=len, reverse=True)
+    series_description = series_descriptions[0]
+    print(f"series_check(): Series description longest: {series_description}")
+
+    series_title_full = val.title or ""
+    print(f"series_check(): Series title full: {series_title_full}")
+
+    # series category codes, unsure if there's always two parts to category, selects longest
+    series_category_codes = []
+    series_category_code = ""
+    if len(val.category) >= 1:
+        for num in range(0, len(val.category)):
+            series_category_codes.append(val.category[num].code or "")
+    series_category_codes.sort(key=len, reverse=True)
+    if len(series_category_codes) > 0:
+        series_category_code = series_category_codes[0]
+        print(f"series_check(): Series category code, longest: {series_category_code}")
+
+    LOOKUPS.series_data[series_id] = (
+        series_description,
+        series_short,
+        series_medium,
+        series_long,
+        series_title_full,
+        series_category_code,
+    )
+    return LOOKUPS.series_data[series_id]
 
 
 def genre_retrieval(category_code, description, title):
     """
     Retrieve genre data, return as list
     """
-    with open(GENRE_MAP, "r", encoding="utf8") as files:
-        data = yaml.load(files, Loader=yaml.FullLoader)
-        print(
-            f"genre_retrieval(): The genre data is being retrieved for: {category_code}"
-        )
-    for _ in data:
-        if category_code in data["genres"]:
-            genre_one = {}
-            genre_two = {}
-            subject_one = {}
-            subject_two = {}
-
-            genre_one = data["genres"][category_code.strip("u")]["Genre"]
-            print(f"genre_retrieval(): Genre one: {genre_one}")
-            if "Undefined" in str(genre_one):
-                print(
-                    f"genre_retrieval(): Undefined category_code discovered: {category_code}"
-                )
-                with open(
-                    os.path.join(GENRE_PTH, "redux_undefined_genres.txt"), "a"
-                ) as genre_log:
-                    genre_log.write("\n")
-                    genre_log.write(
-                        f"Category: {category_code}     Title: {title}     Description: {description}"
-                    )
-                genre_one_priref = ""
-            else:
-                for _, val in genre_one.items():
-                    genre_one_priref = val
-                print(
-                    f"genre_retrieval(): Key value for genre_one_priref: {genre_one_priref}"
-                )
-            try:
-                genre_two = data["genres"][category_code.strip("u")]["Genre2"]
-                for _, val in genre_two.items():
-                    genre_two_priref = val
-            except (IndexError, KeyError):
-                genre_two_priref = ""
-
-            try:
-                subject_one = data["genres"][category_code.strip("u")]["Subject"]
-                for _, val in subject_one.items():
-                    subject_one_priref = val
-                print(
-                    f"genre_retrieval(): Key value for subject_one_priref: {subject_one_priref}"
-                )
-            except (IndexError, KeyError):
-                subject_one_priref = ""
-
-            try:
-                subject_two = data["genres"][category_code.strip("u")]["Subject2"]
-                for _, val in subject_two.items():
-                    subject_two_priref = val
-                print(
-                    f"genre_retrieval(): Key value for subject_two_priref: {subject_two_priref}"
-                )
-            except (IndexError, KeyError):
-                subject_two_priref = ""
-
-            return [
-                genre_one_priref,
-                genre_two_priref,
-                subject_one_priref,
-                subject_two_priref,
-            ]
-
-        else:
-            logger.warning(
-                "%s -- New category not in EPG_genre_map.yaml: %s", category_code, title
-            )
-            with open(
-                os.path.join(GENRE_PTH, "redux_undefined_genres.txt"), "a"
-            ) as genre_log:
-                genre_log.write("\n")
-                genre_log.write(
-                    f"Category: {category_code}     Title: {title}     Description: {description}"
-                )
-            return []
+    print(f"genre_retrieval(): The genre data is being retrieved for: {category_code}")
+    prirefs = GENRES.lookup(category_code, title, description)
+    if prirefs is None:
+        return []
+    print(f"genre_retrieval(): Genre and subject prirefs: {prirefs}")
+    return list(prirefs)
 
 
 def csv_retrieve(fullpath):
@@ -801,14 +802,120 @@ def main():
     print(f"Found JSON file total: {len(file_list)}")
     sess = adlib.create_session()
 
+    # One batched CID lookup for every programme's series and asset IDs
+    series_ids = []
+    asset_ids = []
+    for fullpath in file_list:
+        root, file = os.path.split(fullpath)
+        if not file.startswith("info_") or not os.path.exists(
+            os.path.join(root, "stream.mpeg2.ts")
+        ):
+            continue
+        asset_id, series_id = epg_ids(fullpath)
+        asset_ids.append(asset_id)
+        if series_id:
+            series_ids.append(cid_series_id(str(series_id), root)[0])
+    try:
+        LOOKUPS.prewarm(CID_API, sess, series_ids, asset_ids)
+    except Exception as err:
+        logger.warning("Unable to prewarm CID lookups, querying per file: %s", err)
+    with key_lock.hold(LOCK_PATH, "lookup_cache"):
+        LOOKUPS.save()
+
+    if "--parallel" in sys.argv:
+        document_parallel(file_list)
+    else:
+        document_files(file_list, sess)
+        GENRES.flush()
+        with key_lock.hold(LOCK_PATH, "lookup_cache"):
+            LOOKUPS.save()
+    logger.info(
+        "========== STORA documentation script END ===================================================\n"
+    )
+
+
+def channel_folders(file_list):
+    """
+    Group JSON paths by channel folder,
+    STORAGE_PATH/MM/DD/<channel>/<programme>/
+    """
+    folders = {}
+    for fullpath in file_list:
+        channel = os.path.dirname(os.path.dirname(fullpath))
+        folders.setdefault(channel, []).append(fullpath)
+    return folders
+
+
+def init_worker(counter, stop):
+    """
+    Pool initializer sharing the failure
+    counter and stop flag with every worker
+    """
+    global FAILURE_COUNTER, STOP, PARALLEL
+    FAILURE_COUNTER = counter
+    STOP = stop
+    PARALLEL = True
+
+
+def document_channel(file_list):
+    """
+    Pool worker: document one channel folder
+    with its own CID session. Returns the
+    exit message if the worker stopped early
+    """
+    channel = os.path.dirname(os.path.dirname(file_list[0]))
+    try:
+        document_files(file_list, adlib.create_session())
+    except SystemExit as err:
+        STOP.set()
+        return channel, str(err)
+    finally:
+        GENRES.flush()
+        with key_lock.hold(LOCK_PATH, "lookup_cache"):
+            LOOKUPS.save()
+    return channel, ""
+
+
+def document_parallel(file_list):
+    """
+    One worker per channel folder, up to MAX_PARALLEL
+    at once. Series and work creation are locked per
+    series ID and asset ID across workers
+    """
+    folders = channel_folders(file_list)
+    if not folders:
+        return
+    logger.info("Documenting %s channel folders in parallel", len(folders))
+    with Pool(
+        processes=min(MAX_PARALLEL, len(folders)),
+        initializer=init_worker,
+        initargs=(FAILURE_COUNTER, STOP),
+    ) as pool:
+        for channel, error in pool.imap_unordered(document_channel, folders.values()):
+            if error:
+                logger.warning("Worker for %s stopped: %s", channel, error)
+            else:
+                logger.info("Worker for %s finished", channel)
+    if STOP.is_set():
+        sys.exit("STORA documentation workers stopped early. Script exiting.")
+
+
+def document_files(file_list, sess):
+    """
+    Document each programme JSON in turn, holding
+    a lock on its asset ID so no other worker can
+    document a showing of the same asset meanwhile
+    """
     for fullpath in file_list:
-        if FAILURE_COUNTER > 2:
+        if FAILURE_COUNTER.value > 2:
             logger.critical(
                 "Multiple CID item record creation failures. Script exiting."
             )
             sys.exit(
                 "Multiple CID item record creation failures detected. Script exiting."
             )
+        if STOP.is_set():
+            sys.exit("Another STORA documentation worker stopped. Script exiting.")
         if not utils.check_control("pause_scripts") or not utils.check_control("stora"):
             logger.info(
                 "Script run prevented by downtime_control.json. Script exiting."
@@ -818,144 +925,144 @@ def main():
             logger.warning("* Cannot establish CID session, exiting script")
             sys.exit("* Cannot establish CID session, exiting script")
 
-        root, file = os.path.split(fullpath)
-        if not os.path.exists(os.path.join(root, "stream.mpeg2.ts")):
-            logger.info("Skipping: No stream file found in path: %s", root)
-            continue
-        if not os.path.exists(fullpath):
-            continue
-        if not file.endswith(".json") or not file.startswith("info_"):
-            continue
-        new_work = False
+        asset_id = epg_ids(fullpath)[0] or fullpath
+        with key_lock.hold(LOCK_PATH, f"asset_{asset_id}"):
+            document_programme(fullpath, sess)
 
-        print(f"\nFullpath for file being handled: {fullpath}")
-        with open(fullpath, "r", encoding="utf-8") as inf:
-            json_data = inf.read()
 
-        # Retrieve all data needed from JSON
-        if json_data:
-            generic, epg_dict = fetch_lines(fullpath, json_data)
-        else:
-            print("No EPG dictionary found. Skipping!")
-            continue
-        if generic is True:
-            print("Generic episode title found")
-        title = epg_dict["title"]
-        print(f"Title: {title}")
-        description = epg_dict["description"]
-        print(f"Longest Description: {description}")
-        broadcast_channel = ""
-        if "channel" in epg_dict:
-            channel = epg_dict["channel"]
-            print(f"Channel selected: {channel}")
-        if "broadcast_channel" in epg_dict:
-            broadcast_channel = epg_dict["broadcast_channel"]
-            print(f"Broadcaster: {broadcast_channel}")
-
-        # CSV data gather
-        csv_data = csv_retrieve(os.path.join(root, "info.csv"))
-        if csv_data:
-            try:
-                csv_description = csv_data[0]
-                csv_actual_duration = csv_data[1]
-                print(f"** CSV DESCRIPTION: {csv_description}")
-                print(f"** CSV ACTUAL DURATION: {csv_actual_duration}")
-                csv_dump = csv_data[2]
-                print(f"** CSV DATA FOR UTB: {csv_dump}")
-            except (IndexError, TypeError, KeyError) as err:
-                csv_data = []
-                csv_description = ""
-                csv_actual_duration = ""
-                csv_dump = ""
-                print(err)
-        else:
+def document_programme(fullpath, sess):
+    """
+    Create series, work, manifestation and item
+    records for one programme JSON and move its
+    stream and subtitles on
+    """
+    root, file = os.path.split(fullpath)
+    if not os.path.exists(os.path.join(root, "stream.mpeg2.ts")):
+        logger.info("Skipping: No stream file found in path: %s", root)
+        return
+    if not os.path.exists(fullpath):
+        return
+    if not file.endswith(".json") or not file.startswith("info_"):
+        return
+    new_work = False
+
+    print(f"\nFullpath for file being handled: {fullpath}")
+    with open(fullpath, "r", encoding="utf-8") as inf:
+        json_data = inf.read()
+
+    # Retrieve all data needed from JSON
+    if json_data:
+        generic, epg_dict = fetch_lines(fullpath, json_data)
+    else:
+        print("No EPG dictionary found. Skipping!")
+        return
+    if generic is True:
+        print("Generic episode title found")
+    title = epg_dict["title"]
+    print(f"Title: {title}")
+    description = epg_dict["description"]
+    print(f"Longest Description: {description}")
+    broadcast_channel = ""
+    if "channel" in epg_dict:
+        channel = epg_dict["channel"]
+        print(f"Channel selected: {channel}")
+    if "broadcast_channel" in epg_dict:
+        broadcast_channel = epg_dict["broadcast_channel"]
+        print(f"Broadcaster: {broadcast_channel}")
+
+    # CSV data gather
+    csv_data = csv_retrieve(os.path.join(root, "info.csv"))
+    if csv_data:
+        try:
+            csv_description = csv_data[0]
+            csv_actual_duration = csv_data[1]
+            print(f"** CSV DESCRIPTION: {csv_description}")
+            print(f"** CSV ACTUAL DURATION: {csv_actual_duration}")
+            csv_dump = csv_data[2]
+            print(f"** CSV DATA FOR UTB: {csv_dump}")
+        except (IndexError, TypeError, KeyError) as err:
             csv_data = []
             csv_description = ""
             csv_actual_duration = ""
             csv_dump = ""
+            print(err)
+    else:
+        csv_data = []
+        csv_description = ""
+        csv_actual_duration = ""
+        csv_dump = ""
+
+    # Get defaults as lists of dictionary pairs
+    rec_def, ser_def, work_def, work_res_def, man_def, item_def = build_defaults(
+        epg_dict
+    )
 
-        # Get defaults as lists of dictionary pairs
-        rec_def, ser_def, work_def, work_res_def, man_def, item_def = build_defaults(
-            epg_dict
+    # Asset id check here
+    work_priref = ""
+    if "asset_id" in epg_dict:
+        print(f"Checking if this asset_id already in CID: {epg_dict['asset_id']}")
+        work_priref = find_repeats(epg_dict["asset_id"], sess)
+        print(work_priref)
+    if work_priref is None:
+        print(
+            "Cannot retrieve Work parent data. Maybe missing in CID or problems accessing dB via API. Skipping"
         )
-
-        # Asset id check here
-        work_priref = ""
-        if "asset_id" in epg_dict:
-            print(f"Checking if this asset_id already in CID: {epg_dict['asset_id']}")
-            work_priref = find_repeats(epg_dict["asset_id"], sess)
-            print(work_priref)
-        if work_priref is None:
-            print(
-                "Cannot retrieve Work parent data. Maybe missing in CID or problems accessing dB via API. Skipping"
-            )
-            logger.warning(
-                "Skipping further actions: Failed to retrieve response from CID API for asset_id search: \n%s",
-                epg_dict["asset_id"],
-            )
-            continue
-        elif work_priref == 0:
+        logger.warning(
+            "Skipping further actions: Failed to retrieve response from CID API for asset_id search: \n%s",
+            epg_dict["asset_id"],
+        )
+        return
+    elif work_priref == 0:
+        new_work = True
+    elif len(work_priref) > 4:
+        print(
+            f"**** JSON file found to have repeated Asset ID, previous work: {work_priref}"
+        )
+        if generic is True:
+            print("Generic in title, assuming programme is new content")
             new_work = True
-        elif len(work_priref) > 4:
-            print(
-                f"**** JSON file found to have repeated Asset ID, previous work: {work_priref}"
-            )
-            if generic is True:
-                print("Generic in title, assuming programme is new content")
-                new_work = True
-            else:
-                logger.info(
-                    "** Programme found to be a repeat. Making manifestation/item only and linking to Priref: %s",
-                    work_priref,
-                )
-
-        # Check file health with policy verification - skip if broken MPEG file
-        acquired_filename = os.path.join(root, "stream.mpeg2.ts")
-        print(f"Path for programme stream content: {acquired_filename}")
-        """
-        success, response = utils.get_mediaconch(acquired_filename, MPEG_TS_POLICY)
-        if success is False:
-            # Fix 'BROKEN' to folder name, update failure CSV
-            logger.warning(
-                "File found that has failed MPEG-TS policy:\n%s", acquired_filename
+        else:
+            logger.info(
+                "** Programme found to be a repeat. Making manifestation/item only and linking to Priref: %s",
+                work_priref,
             )
-            logger.warning("Marking JSON with .PROBLEM")
-            mark_broken_stream(fullpath, acquired_filename)
-            logger.warning("Marking stream.mpeg2.ts.BROKEN and updating CSV")
-            update_broken_ts(acquired_filename, work_priref, response, epg_dict)
-            continue
-        logger.info("MPEG-TS passed MediaConch check: %s", success)
-        print(response)
-        """
 
-        # Make news channels new works for all live programming
-        if channel in NEWS_CHANNELS:
-            new_work = True
+    # Check file health with policy verification - skip if broken MPEG file
+    acquired_filename = os.path.join(root, "stream.mpeg2.ts")
+    print(f"Path for programme stream content: {acquired_filename}")
+    """
+    success, response = utils.get_mediaconch(acquired_filename, MPEG_TS_POLICY)
+    if success is False:
+        # Fix 'BROKEN' to folder name, update failure CSV
+        logger.warning(
+            "File found that has failed MPEG-TS policy:\n%s", acquired_filename
+        )
+        logger.warning("Marking JSON with .PROBLEM")
+        mark_broken_stream(fullpath, acquired_filename)
+        logger.warning("Marking stream.mpeg2.ts.BROKEN and updating CSV")
+        update_broken_ts(acquired_filename, work_priref, response, epg_dict)
+        return
+    logger.info("MPEG-TS passed MediaConch check: %s", success)
+    print(response)
+    """
 
-        if new_work is True:
-            # Create the Work record here, and populate work_priref
-            print(
-                "JSON file does not have repeated asset_id. Creating new work record..."
-            )
-            series_return = []
-            series_work_id = ""
-            if "series_id" in epg_dict:
-                print("Series ID exists, trying to retrieve series data from CID")
-                # Check if series already in CID and/or series_cache, if not generate series_cache json
-                series_chck = look_up_series_list(epg_dict["series_id"])
-                month = ""
-                if series_chck == "BBC News":
-                    bbc_split = True
-                    month = root.split("/")[-4]
-                    series_id = f"{YEAR_PATH}_{month}_{epg_dict['series_id']}"
-                elif series_chck is False:
-                    series_id = epg_dict["series_id"]
-                    bbc_split = False
-                elif series_chck is True:
-                    series_id = f"{YEAR_PATH}_{epg_dict['series_id']}"
-                    logger.info("Series found for annual refresh: %s", series_chck)
-                    bbc_split = False
+    # Make news channels new works for all live programming
+    if channel in NEWS_CHANNELS:
+        new_work = True
 
+    if new_work is True:
+        # Create the Work record here, and populate work_priref
+        print("JSON file does not have repeated asset_id. Creating new work record...")
+        series_return = []
+        series_work_id = ""
+        if "series_id" in epg_dict:
+            print("Series ID exists, trying to retrieve series data from CID")
+            # Check if series already in CID and/or series_cache, if not generate series_cache json
+            series_id, month, bbc_split = cid_series_id(epg_dict["series_id"], root)
+            if series_id != epg_dict["series_id"] and not bbc_split:
+                logger.info("Series found for annual refresh: %s", series_id)
+
+            with key_lock.hold(LOCK_PATH, f"series_{series_id}"):
                 series_return = cid_series_query(series_id, sess)
                 if series_return[0] is None:
                     print(f"CID Series data not retrieved: {epg_dict['series_id']}")
@@ -963,7 +1070,7 @@ def main():
                         "Skipping further actions: Failed to retrieve response from CID API for series_work_id search: \n%s",
                         epg_dict["series_id"],
                     )
-                    continue
+                    return
 
                 hit_count = series_return[0]
                 series_work_id = series_return[1]
@@ -987,166 +1094,161 @@ def main():
                             "Skipping further actions: Creation of series failed as no series_work_id found: \n%s",
                             epg_dict["series_id"],
                         )
-                        continue
-
-            # Create Work
-            work_values = []
-            work_values.extend(rec_def)
-            work_values.extend(work_def)
-            work_values.extend(work_res_def)
-            work_priref = create_work(
-                fullpath,
-                series_work_id,
-                work_values,
-                csv_description,
-                csv_dump,
-                epg_dict,
-                sess,
-            )
-
-        if not work_priref:
-            print(
-                f"Work error, priref not numeric from new file creation: {work_priref}"
-            )
-            continue
-        if not work_priref.isnumeric() and new_work is True:
-            print(
-                f"Work error, priref not numeric from new file creation: {work_priref}"
-            )
-            continue
-
-        # Create CID manifestation record
-        manifestation_values = []
-        manifestation_values.extend(rec_def)
-        manifestation_values.extend(man_def)
-        manifestation_priref = create_manifestation(
+                        return
+                    LOOKUPS.set_series(series_id, series_work_id)
+
+        # Create Work
+        work_values = []
+        work_values.extend(rec_def)
+        work_values.extend(work_def)
+        work_values.extend(work_res_def)
+        work_priref = create_work(
             fullpath,
-            work_priref,
-            csv_actual_duration,
-            manifestation_values,
+            series_work_id,
+            work_values,
+            csv_description,
+            csv_dump,
             epg_dict,
             sess,
         )
 
-        if not manifestation_priref:
-            print(
-                f"CID Manifestation priref not retrieved for manifestation: {manifestation_priref}"
-            )
-            if new_work:
-                print(f"*** Manual clean up needed for Work {work_priref}")
-            sys.exit("Exiting for failure to create new manifestations")
-
-        # Check if subtitles are populated
-        old_webvtt = os.path.join(root, "subtitles.vtt")
-        webvtt_payload = build_webvtt_dct(old_webvtt)
-
-        # Create CID item record
-        item_values = []
-        item_values.extend(rec_def)
-        item_values.extend(item_def)
-        item_data = create_cid_item_record(
-            work_priref,
-            manifestation_priref,
-            acquired_filename,
-            fullpath,
-            file,
-            new_work,
-            item_values,
-            epg_dict,
-            sess,
+    if not work_priref:
+        print(f"Work error, priref not numeric from new file creation: {work_priref}")
+        return
+    if not work_priref.isnumeric() and new_work is True:
+        print(f"Work error, priref not numeric from new file creation: {work_priref}")
+        return
+
+    # Create CID manifestation record
+    manifestation_values = []
+    manifestation_values.extend(rec_def)
+    manifestation_values.extend(man_def)
+    manifestation_priref = create_manifestation(
+        fullpath,
+        work_priref,
+        csv_actual_duration,
+        manifestation_values,
+        epg_dict,
+        sess,
+    )
+
+    if not manifestation_priref:
+        print(
+            f"CID Manifestation priref not retrieved for manifestation: {manifestation_priref}"
         )
-        print(f"item_object_number: {item_data}")
+        if new_work:
+            print(f"*** Manual clean up needed for Work {work_priref}")
+        sys.exit("Exiting for failure to create new manifestations")
+    if not LOOKUPS.works.get(epg_dict["asset_id"]):
+        LOOKUPS.set_work(epg_dict["asset_id"], work_priref)
+
+    # Check if subtitles are populated
+    old_webvtt = os.path.join(root, "subtitles.vtt")
+    webvtt_payload = build_webvtt_dct(old_webvtt)
+
+    # Create CID item record
+    item_values = []
+    item_values.extend(rec_def)
+    item_values.extend(item_def)
+    item_values.extend(advert_break_detector.segment_values(root))
+    item_data = create_cid_item_record(
+        work_priref,
+        manifestation_priref,
+        acquired_filename,
+        fullpath,
+        file,
+        new_work,
+        item_values,
+        epg_dict,
+        sess,
+    )
+    print(f"item_object_number: {item_data}")
 
-        if item_data is None:
+    if item_data is None:
+        print(
+            f"CID Item object number not retrieved for manifestation: {manifestation_priref}"
+        )
+        if new_work:
             print(
-                f"CID Item object number not retrieved for manifestation: {manifestation_priref}"
+                f"*** Manual clean up needed for Work {work_priref} and Manifestation {manifestation_priref}"
             )
-            if new_work:
-                print(
-                    f"*** Manual clean up needed for Work {work_priref} and Manifestation {manifestation_priref}"
-                )
-                continue
-            else:
-                print(
-                    f"*** Manual clean up needed for Manifestation {manifestation_priref}"
-                )
-                continue
-        if len(item_data[0]) == 0 or len(item_data[1]) == 0:
+            return
+        else:
             print(
-                f"Error retrieving Item record priref and object number. Skipping completion of this programme, manual clean up of records needed."
+                f"*** Manual clean up needed for Manifestation {manifestation_priref}"
             )
-            if new_work:
-                print(
-                    f"*** Manual clean up needed for Work {work_priref} and Manifestation {manifestation_priref}"
-                )
-                continue
-            else:
-                print(
-                    f"*** Manual clean up needed for Manifestation {manifestation_priref}"
-                )
-                continue
-
-        """
-        # Build webvtt payload [deprecated]
-        if webvtt_payload:
-            success = push_payload(item_data[1], webvtt_payload, sess)
-            if not success:
-                logger.warning("Unable to push webvtt_payload to CID Item %s", item_data[1])
-        """
-        # Rename JSON with .documented
-        documented = f"{fullpath}.documented"
-        print(f"* Renaming {fullpath} to {documented}")
-        try:
-            os.rename(fullpath, f"{fullpath}.documented")
-        except Exception as err:
-            print(f"** PROBLEM: Could not rename {fullpath} to {documented}")
-            logger.warning(
-                "%s\tCould not rename to %s. Error: %s", fullpath, documented, err
+            return
+    if len(item_data[0]) == 0 or len(item_data[1]) == 0:
+        print(
+            f"Error retrieving Item record priref and object number. Skipping completion of this programme, manual clean up of records needed."
+        )
+        if new_work:
+            print(
+                f"*** Manual clean up needed for Work {work_priref} and Manifestation {manifestation_priref}"
             )
+            return
+        else:
+            print(
+                f"*** Manual clean up needed for Manifestation {manifestation_priref}"
+            )
+            return
+
+    """
+    # Build webvtt payload [deprecated]
+    if webvtt_payload:
+        success = push_payload(item_data[1], webvtt_payload, sess)
+        if not success:
+            logger.warning("Unable to push webvtt_payload to CID Item %s", item_data[1])
+    """
+    # Rename JSON with .documented
+    documented = f"{fullpath}.documented"
+    print(f"* Renaming {fullpath} to {documented}")
+    try:
+        os.rename(fullpath, f"{fullpath}.documented")
+    except Exception as err:
+        print(f"** PROBLEM: Could not rename {fullpath} to {documented}")
+        logger.warning(
+            "%s\tCould not rename to %s. Error: %s", fullpath, documented, err
+        )
+
+    # Rename transport stream file with Item object number and move to autoingest
+    item_object_number_underscore = item_data[0].replace("-", "_")
+    new_filename = f"{item_object_number_underscore}_01of01.ts"
+    destination = f"{AUTOINGEST_PATH}{new_filename}"
+    print(f"* Renaming {acquired_filename} to {destination}")
+    try:
+        shutil.move(acquired_filename, destination)
+        logger.info("%s\tRenamed %s to %s", fullpath, acquired_filename, destination)
+    except Exception as err:
+        print(
+            f"** PROBLEM: Could not rename & move {acquired_filename} to {destination}"
+        )
+        logger.warning(
+            "%s\tCould not rename & move %s to %s. Error: %s",
+            fullpath,
+            acquired_filename,
+            destination,
+            err,
+        )
 
-        # Rename transport stream file with Item object number and move to autoingest
-        item_object_number_underscore = item_data[0].replace("-", "_")
-        new_filename = f"{item_object_number_underscore}_01of01.ts"
-        destination = f"{AUTOINGEST_PATH}{new_filename}"
-        print(f"* Renaming {acquired_filename} to {destination}")
+    # Rename .vtt subtitle file with Item object number and move to Isilon for use later in MTQ workflow
+    if webvtt_payload is not None:
+        new_vtt_name = f"{item_object_number_underscore}_01of01.vtt"
+        new_vtt = f"{SUBS_PTH}{new_vtt_name}"
+        print(f"* Renaming {old_webvtt} to {new_vtt}")
         try:
-            shutil.move(acquired_filename, destination)
-            logger.info(
-                "%s\tRenamed %s to %s", fullpath, acquired_filename, destination
-            )
+            shutil.move(old_webvtt, new_vtt)
+            logger.info("%s\tRenamed %s to %s", fullpath, old_webvtt, new_vtt)
         except Exception as err:
-            print(
-                f"** PROBLEM: Could not rename & move {acquired_filename} to {destination}"
-            )
+            print(f"** PROBLEM: Could not rename {old_webvtt} to {new_vtt}")
             logger.warning(
-                "%s\tCould not rename & move %s to %s. Error: %s",
+                "%s\tCould not rename %s to %s. Error: %s",
                 fullpath,
-                acquired_filename,
-                destination,
+                old_webvtt,
+                new_vtt,
                 err,
             )
 
-        # Rename .vtt subtitle file with Item object number and move to Isilon for use later in MTQ workflow
-        if webvtt_payload is not None:
-            new_vtt_name = f"{item_object_number_underscore}_01of01.vtt"
-            new_vtt = f"{SUBS_PTH}{new_vtt_name}"
-            print(f"* Renaming {old_webvtt} to {new_vtt}")
-            try:
-                shutil.move(old_webvtt, new_vtt)
-                logger.info("%s\tRenamed %s to %s", fullpath, old_webvtt, new_vtt)
-            except Exception as err:
-                print(f"** PROBLEM: Could not rename {old_webvtt} to {new_vtt}")
-                logger.warning(
-                    "%s\tCould not rename %s to %s. Error: %s",
-                    fullpath,
-                    old_webvtt,
-                    new_vtt,
-                    err,
-                )
-    logger.info(
-        "========== STORA documentation script END ===================================================\n"
-    )
-
 
 def create_series(
     fullpath,
@@ -2120,8 +2222,8 @@ def mark_problem_json(fullpath):
     problem = f"{fullpath}.PROBLEM"
     print(f"* Renaming {fullpath} to {problem}")
     logger.info("%s\t Renaming JSON to %s", fullpath, problem)
-    global FAILURE_COUNTER
-    FAILURE_COUNTER += 1
+    with FAILURE_COUNTER.get_lock():
+        FAILURE_COUNTER.value += 1
     try:
         os.rename(fullpath, problem)
     except Exception as err:
@@ -44,6 +44,7 @@ import requests
 sys.path.append(os.environ["CODE"])
 import adlib_v3_sess as adlib
 import utils
+from helpers import stora_people_cache
 from parsers import stora_episode_parser as jp
 
 # Global vars
@@ -61,6 +62,9 @@ LOG_PATH: Final = os.environ["LOG_PATH"]
 CID_API: Final = utils.get_current_api()
 CODEPTH: Final = os.environ["CODE"]
 CONTROL_JSON: Final = os.path.join(LOG_PATH, "downtime_control.json")
+PEOPLE: Final = stora_people_cache.StoraPeopleCache(
+    os.path.join(LOG_PATH, "stora_people_cache.json")
+)
 
 # Setup logging
 LOGGER = logging.getLogger("document_stora_castcred")
@@ -386,6 +390,10 @@ def cid_person_check(credit_id, session):
     """
     Retrieve if Person record with priref already exist for credit_entity_id
     """
+    cached = PEOPLE.get(credit_id)
+    if cached is not None:
+        return cached if cached[0] else (None, None, None)
+
     search = f"(utb.content='{credit_id}' WHEN utb.fieldname='PATV Person ID')"
     try:
         result = adlib.retrieve_record(CID_API, "people", search, "0", session)[1]
@@ -414,6 +422,8 @@ def cid_person_check(credit_id, session):
             activity_types.append(act_type[count])
         except (KeyError, IndexError):
             pass
+    if priref:
+        PEOPLE.set_person(credit_id, priref, name, activity_types)
     return priref, name, activity_types
 
 
@@ -509,6 +519,17 @@ def main():
     file_list.sort()
 
     session = adlib.create_session()
+
+    # Resolve every contributor in this batch with chunked CID searches
+    credit_ids = []
+    for fullpath in file_list:
+        credit_ids.extend(stora_people_cache.contributor_ids(fullpath))
+    try:
+        PEOPLE.prewarm(CID_API, session, credit_ids)
+    except Exception as err:
+        LOGGER.warning("Unable to prewarm people cache, checking per person: %s", err)
+    PEOPLE.save()
+
     for fullpath in file_list:
         root, file = os.path.split(fullpath)
         if not file.endswith("json.documented"):
@@ -669,7 +690,6 @@ def main():
                                     )
                                     append_activity_type(
                                         person_priref,
-                                        person_act_type,
                                         activity_type,
                                         session,
                                     )
@@ -795,7 +815,6 @@ def main():
                                     )
                                     success = append_activity_type(
                                         person_priref,
-                                        person_act_type,
                                         activity_type_cred,
                                         session,
                                     )
@@ -867,6 +886,7 @@ def main():
 
         rename(root, file, work_priref)
 
+    PEOPLE.save()
     LOGGER.info(
         "=============== END document_stora_castcred script END ===============\n"
     )
@@ -911,14 +931,24 @@ def sort_cred_dct(cred_list):
     return cred_dct_update
 
 
-def append_activity_type(person_priref, old_act_type, activity_type, session):
+def append_activity_type(person_priref, activity_type, session):
     """
-    Append activity type to person record if different
+    Append activity type to person record if different,
+    re-reading the record's activity types from CID first
+    so types added since it was looked up are kept
     """
+    current = stora_people_cache.current_activity_types(CID_API, session, person_priref)
+    if current is None:
+        LOGGER.warning(
+            "append_activity_type(): Unable to read Person record %s", person_priref
+        )
+        return False
+    if activity_type in current:
+        PEOPLE.set_activity_types(person_priref, current)
+        return True
     act_type = [{"activity_type": activity_type}]
-    if old_act_type:
-        for act in old_act_type:
-            act_type.append({"activity_type": act})
+    for act in current:
+        act_type.append({"activity_type": act})
 
     # Convert dict to xml using adlib
     print(act_type)
@@ -937,6 +967,7 @@ def append_activity_type(person_priref, old_act_type, activity_type, session):
         if record is None:
             print("Unable to write activity type to Person record")
             return False
+        PEOPLE.set_activity_types(person_priref, current + [activity_type])
         return True
     except Exception as err:
         if "bool" in str(err):
@@ -1050,6 +1081,18 @@ def make_person_record(session, credit_dct=None):
             return None
     except (IndexError, TypeError, KeyboardInterrupt):
         return None
+
+    fields = {}
+    for field in credit_dct:
+        for key, value in field.items():
+            fields.setdefault(key, []).append(value)
+    if fields.get("alternative_number"):
+        PEOPLE.set_person(
+            fields["alternative_number"][0],
+            credit_priref,
+            fields.get("name", [""])[0],
+            fields.get("activity_type", []),
+        )
     return credit_priref
 
 
@@ -46,6 +46,7 @@ import requests
 sys.path.append(os.environ["CODE"])
 import adlib_v3_sess as adlib
 import utils
+from helpers import stora_people_cache
 from parsers import stora_episode_parser as jp
 
 # Global vars
@@ -57,6 +58,9 @@ LOG_PATH: Final = os.environ["LOG_PATH"]
 CID_API: Final = utils.get_current_api()
 CODEPTH: Final = os.environ["CODE"]
 CONTROL_JSON: Final = os.path.join(LOG_PATH, "downtime_control.json")
+PEOPLE: Final = stora_people_cache.StoraPeopleCache(
+    os.path.join(LOG_PATH, "stora_people_cache.json")
+)
 
 # Setup logging
 LOGGER = logging.getLogger("document_stora_castcred_mopup")
@@ -397,6 +401,10 @@ def cid_person_check(credit_id, session):
     """
     Retrieve if Person record with priref already exist for credit_entity_id
     """
+    cached = PEOPLE.get(credit_id)
+    if cached is not None:
+        return cached if cached[0] else (None, None, None)
+
     search = f"(utb.content='{credit_id}' WHEN utb.fieldname='PATV Person ID')"
     try:
         result = adlib.retrieve_record(CID_API, "people", search, "0", session)[1]
@@ -425,6 +433,8 @@ def cid_person_check(credit_id, session):
             activity_types.append(act_type[count])
         except (KeyError, IndexError):
             pass
+    if priref:
+        PEOPLE.set_person(credit_id, priref, name, activity_types)
     return priref, name, activity_types
 
 
@@ -537,6 +547,19 @@ def main():
         file_list.sort()
 
         session = adlib.create_session()
+
+        # Resolve every contributor in this batch with chunked CID searches
+        credit_ids = []
+        for fullpath in file_list:
+            credit_ids.extend(stora_people_cache.contributor_ids(fullpath))
+        try:
+            PEOPLE.prewarm(CID_API, session, credit_ids)
+        except Exception as err:
+            LOGGER.warning(
+                "Unable to prewarm people cache, checking per person: %s", err
+            )
+        PEOPLE.save()
+
         for fullpath in file_list:
             root, file = os.path.split(fullpath)
             if not file.endswith("json.documented_castcred"):
@@ -709,7 +732,6 @@ def main():
                                         )
                                         append_activity_type(
                                             person_priref,
-                                            person_act_type,
                                             activity_type,
                                             session,
                                         )
@@ -840,7 +862,6 @@ def main():
                                         )
                                         success = append_activity_type(
                                             person_priref,
-                                            person_act_type,
                                             activity_type_cred,
                                             session,
                                         )
@@ -918,6 +939,7 @@ def main():
 
             rename(root, file, work_priref)
 
+    PEOPLE.save()
     LOGGER.info(
         "=============== END document_stora_castcred script END ===============\n"
     )
@@ -962,14 +984,24 @@ def sort_cred_dct(cred_list):
     return cred_dct_update
 
 
-def append_activity_type(person_priref, old_act_type, activity_type, session):
+def append_activity_type(person_priref, activity_type, session):
     """
-    Append activity type to person record if different
+    Append activity type to person record if different,
+    re-reading the record's activity types from CID first
+    so types added since it was looked up are kept
     """
+    current = stora_people_cache.current_activity_types(CID_API, session, person_priref)
+    if current is None:
+        LOGGER.warning(
+            "append_activity_type(): Unable to read Person record %s", person_priref
+        )
+        return False
+    if activity_type in current:
+        PEOPLE.set_activity_types(person_priref, current)
+        return True
     act_type = [{"activity_type": activity_type}]
-    if old_act_type:
-        for act in old_act_type:
-            act_type.append({"activity_type": act})
+    for act in current:
+        act_type.append({"activity_type": act})
 
     # Convert dict to xml using adlib
     print(act_type)
@@ -988,6 +1020,7 @@ def append_activity_type(person_priref, old_act_type, activity_type, session):
         if record is None:
             print("Unable to write activity type to Person record")
             return False
+        PEOPLE.set_activity_types(person_priref, current + [activity_type])
         return True
     except Exception as err:
         if "bool" in str(err):
@@ -1101,6 +1134,18 @@ def make_person_record(session, credit_dct=None):
             return None
     except (IndexError, TypeError, KeyboardInterrupt):
         return None
+
+    fields = {}
+    for field in credit_dct:
+        for key, value in field.items():
+            fields.setdefault(key, []).append(value)
+    if fields.get("alternative_number"):
+        PEOPLE.set_person(
+            fields["alternative_number"][0],
+            credit_priref,
+            fields.get("name", [""])[0],
+            fields.get("activity_type", []),
+        )
     return credit_priref
 
 
@@ -9,7 +9,8 @@ main():
 1. Open platform year CSV and read list of article, title, level and platform
 2. Build PA Media URL with title and platform catalogue ID
    url = os.path.join(URL, f"asset?Anatomy%20of%20a%20Scandal&apikey={os.environ['PATV_KEY']}")
-3. Call the API for title, using fetch('title')
+3. Call the API for title, using fetch('title'), through the shared
+   rate limited and cached patv_client
 4. When downloaded iterates the returned assets identifying which approach to take:
    Episodic: Handling multiple episodes per season
    Monographic: Handling single instances
@@ -31,11 +32,10 @@ import sys
 from typing import Any, Final, Optional
 
 import pandas
-import requests
-import tenacity
 
 # Local package
 sys.path.append(os.environ["CODE"])
+import patv_client
 import utils
 
 # Global variables
@@ -54,6 +54,7 @@ FORMATTER = logging.Formatter("%(asctime)s\t%(levelname)s\t%(message)s")
 HDLR.setFormatter(FORMATTER)
 LOGGER.addHandler(HDLR)
 LOGGER.setLevel(logging.INFO)
+logging.getLogger("patv_client").addHandler(HDLR)
 
 # PATV API details including unique identifiers for Netflix catalogue
 URL = os.environ.get("PATV_STREAM_URL")
@@ -63,6 +64,9 @@ STREAM_KEYS = {
     "Amazon": os.environ.get("PA_AMAZON"),
     "Disney": os.environ.get("PA_DISNEY"),
 }
+# Asset data fetched in the last week is not requested again
+MAX_AGE: Final = patv_client.DAY * 7
+CLIENT = patv_client.PATVClient(HEADERS, cache_dir=os.path.join(LOG_PATH, "patv_cache"))
 
 
 def read_csv_to_dict(csv_path: str) -> dict[str, list[str]]:
@@ -100,68 +104,57 @@ def get_folder_title(article: str, title: str) -> str:
     return title
 
 
-@tenacity.retry(stop=tenacity.stop_after_attempt(3))
+def asset_url(cat_id: str, search_type: str, search_id: str, title: str) -> str:
+    """
+    PATV URL for each search type
+    """
+    url_title = title.replace(" ", "%20")  # .replace("&", "and")
+    url_title = f"%27{url_title}%27"
+    if search_type == "title":
+        return f"{URL}catalogue/{cat_id}/asset?title={url_title}&apikey={os.environ['PATV_KEY']}"
+    if search_type == "cat_asset":
+        return f"{URL}catalogue/{cat_id}/asset/{search_id}"
+    if search_type == "asset":
+        return f"{URL}asset/{search_id}".strip()
+    if search_type == "contributors":
+        return f"{URL}asset/{search_id}/contributor"
+    return ""
+
+
 def fetch(
     cat_id: str, search_type: str, search_id: str, title: str
 ) -> Optional[dict[str, str]]:
     """
-    Fetch data from PATV URL
+    Fetch data from PATV URL, all pages of a title
+    search. Asset and contributor data fetched within
+    MAX_AGE is reused from the client cache
     """
-    url_title = title.replace(" ", "%20")  # .replace("&", "and")
-    url_title = f"%27{url_title}%27"
-    print(search_type, url_title)
+    url = asset_url(cat_id, search_type, search_id, title)
+    if not url:
+        return None
+    print(search_type, url)
     if search_type == "title":
-        try:
-            url_all = f"{URL}catalogue/{cat_id}/asset?title={url_title}&apikey={os.environ['PATV_KEY']}"
-            print(url_all)
-            req = requests.get(url_all, headers=HEADERS)
-            print("========================")
-            print(req.text)
-            dct = json.loads(req.text)
-            return dct
-        except Exception as err:
-            print("fetch(): **** PROBLEM: Cannot fetch EPG metadata.")
-            LOGGER.critical("**** PROBLEM: Cannot fetch EPG metadata. **** \n%s", err)
-            raise tenacity.TryAgain
-    elif search_type == "cat_asset":
-        try:
-            req = requests.get(
-                f"{URL}catalogue/{cat_id}/asset/{search_id}",
-                headers=HEADERS,
-            )
-            dct = json.loads(req.text)
-            return dct
-        except json.decoder.JSONDecodeError as err:
-            print(f"fetch(): **** PROBLEM: JSON cannot decode text:\n{req.text}.")
-            LOGGER.critical(
-                "**** PROBLEM: JSON cannot decode text: \n%s\n%s", req.text, err
-            )
-            raise tenacity.TryAgain
-        except Exception as err:
-            print("fetch(): **** PROBLEM: Cannot fetch EPG metadata.")
-            LOGGER.critical("**** PROBLEM: Cannot fetch EPG metadata. **** \n%s", err)
-            raise tenacity.TryAgain
-    elif search_type == "asset":
-        try:
-            print(f"{URL}asset/{search_id}")
-            req = requests.get(f"{URL}asset/{search_id}".strip(), headers=HEADERS)
-            print(req.text)
-            dct = json.loads(req.text)
-            return dct
-        except Exception as err:
-            print("fetch(): **** PROBLEM: Cannot fetch EPG metadata.")
-            LOGGER.critical("**** PROBLEM: Cannot fetch EPG metadata. **** \n%s", err)
-            raise tenacity.TryAgain
-    elif search_type == "contributors":
-        try:
-            req = requests.get(f"{URL}asset/{search_id}/contributor", headers=HEADERS)
-            dct = json.loads(req.text)
-            return dct
-        except Exception as err:
-            print("fetch(): **** PROBLEM: Cannot fetch EPG metadata.")
-            LOGGER.critical("**** PROBLEM: Cannot fetch EPG metadata. **** \n%s", err)
-            raise tenacity.TryAgain
-    return None
+        dct = CLIENT.get_all(url)
+    else:
+        dct = CLIENT.get(url, max_age=MAX_AGE)
+    if dct is None:
+        print("fetch(): **** PROBLEM: Cannot fetch EPG metadata.")
+        LOGGER.critical("**** PROBLEM: Cannot fetch EPG metadata. **** \n%s", url)
+    return dct
+
+
+def prefetch(cat_id: str, asset_dict: dict[str, str]) -> None:
+    """
+    Fetch every episode's asset and catalogue data
+    concurrently, so fetch() calls for them are
+    answered from the client cache
+    """
+    urls = []
+    for ep_asset_id, cat_details in asset_dict.items():
+        ep_cat_id = cat_details.split(",")[0]
+        urls.append((asset_url(cat_id, "asset", ep_asset_id, ""), None))
+        urls.append((asset_url(cat_id, "cat_asset", ep_cat_id, ""), None))
+    CLIENT.map(urls, max_age=MAX_AGE)
 
 
 def json_dump(json_path: str, dct=None) -> None:
@@ -332,6 +325,7 @@ def main() -> None:
                 len(asset_dict),
                 catalogue_path,
             )
+            prefetch(cat_id, asset_dict)
             for ep_asset_id, cat_details in asset_dict.items():
                 cat_deets = cat_details.split(",")
                 ep_cat_id = cat_deets[0]
@@ -413,7 +407,10 @@ def main() -> None:
                 )
                 if not os.path.exists(contributors_json):
                     contributors_dct = fetch(cat_id, "contributors", ep_asset_id, "")
-                    if len(contributors_dct["item"]) >= 1:
+                    if (
+                        contributors_dct
+                        and len(contributors_dct.get("item") or []) >= 1
+                    ):
                         LOGGER.info("New Contributors JSON: %s", contributors_json)
                         json_dump(contributors_json, contributors_dct)
         else:
@@ -452,6 +449,7 @@ def main() -> None:
                 len(asset_dict),
                 catalogue_path,
             )
+            prefetch(cat_id, asset_dict)
             for ep_asset_id, cat_details in asset_dict.items():
                 cat_deets = cat_details.split(",")
                 ep_cat_id = cat_deets[0]
@@ -495,7 +493,7 @@ def main() -> None:
                 )
                 if not os.path.exists(contributors_json):
                     contributors_dct = fetch(cat_id, "contributors", ep_asset_id, "")
-                    if len(contributors_dct["item"]) > 1:
+                    if contributors_dct and len(contributors_dct.get("item") or []) > 1:
                         LOGGER.info(
                             "New Contributors JSON: %s",
                             f"contributors_{ep_asset_id}.json",
@@ -6,9 +6,10 @@ This script retrieves the series metadata for a programme (if it exists)
 and populates a series_cache that informs series_work_defaults
 
 main():
-1. Make new API enquiry with series id number for each channel
-2. Where present download the JSON to cache folder named as the series id
-3. Save this file in series_cache/ folder
+1. Collect each series id once from every channel's EPG JSON
+2. Make API enquiries for them concurrently through the shared patv_client,
+   which skips series fetched in the last day and sends conditional requests
+3. Save the JSON in series_cache/ folder named as the series id, if changed
 
 2020
 """
@@ -21,7 +22,8 @@ import os
 import sys
 from typing import Any, Final, Optional
 
-import requests
+sys.path.append(os.environ["CODE"])
+import patv_client
 
 # Setup logging
 logger = logging.getLogger("fetch_series_stora_augmented")
@@ -32,6 +34,7 @@ formatter = logging.Formatter("%(asctime)s\t%(levelname)s\t%(message)s")
 hdlr.setFormatter(formatter)
 logger.addHandler(hdlr)
 logger.setLevel(logging.INFO)
+logging.getLogger("patv_client").addHandler(hdlr)
 
 # Some date variables for use in API calls etc
 TODAY = datetime.date.today()
@@ -54,6 +57,22 @@ STORAGE_PATH = os.path.join(os.environ["STORA_PATH"], "series_cache/")
 DATE_PATH = START[0:4] + "/" + START[5:7] + "/" + START[8:10]
 PATHS = os.path.join(JSON_PATH, DATE_PATH)
 CODEPTH = os.environ["CODE"]
+TITLE_CHARS: Final = {
+    " ": "_",
+    ";": "-",
+    "/": "-",
+    ":": "-",
+    "&": "and",
+    "'": "",
+    "!": "",
+    "?": "",
+}
+# Series data fetched in the last day is not requested again,
+# older data is checked with a conditional request
+MAX_AGE: Final = patv_client.DAY
+CLIENT = patv_client.PATVClient(
+    HEADERS, cache_dir=os.path.join(os.environ["LOG_PATH"], "patv_cache")
+)
 
 
 def check_control() -> None:
@@ -78,60 +97,74 @@ def main() -> None:
         "========== Series Cache fetch metadata script STARTED ==============================================="
     )
 
+    series = {}
     for root, _, files in os.walk(PATHS):
         for file in files:
             print(root, file)
             fullpath = os.path.join(root, file)
             filename, ext = os.path.splitext(file)
             if ext == ".json":
-                with open(fullpath, "r") as inf:
-                    dct = json.load(inf)
-                    for subdct in dct["item"][0]["asset"]["related"]:
-                        for key, value in subdct.items():
-                            types = subdct["type"]
-                            if types == "series":
-                                try:
-                                    series_id = subdct["id"]
-                                    d = {
-                                        " ": "_",
-                                        ";": "-",
-                                        "/": "-",
-                                        ":": "-",
-                                        "&": "and",
-                                        "'": "",
-                                        "!": "",
-                                        "?": "",
-                                    }
-                                    title = subdct["title"]
-                                    for k, v in d.items():
-                                        title = title.replace(k, v)
-                                    logger.info(
-                                        "Getting asset details from series_id: %s - %s",
-                                        series_id,
-                                        title,
-                                    )
-                                    get_asset(series_id, title)
-                                except:
-                                    pass
+                series.update(series_ids(fullpath))
+
+    # Each series once, fetched concurrently within the API rate limit
+    logger.info("Getting asset details for %s series", len(series))
+    series_list = list(series.items())
+    dcts = CLIENT.map(
+        [(URL + series_id, QUERYSTRING) for series_id, _ in series_list],
+        max_age=MAX_AGE,
+    )
+    for (series_id, title), dct in zip(series_list, dcts):
+        if dct is None:
+            logger.warning("No series data retrieved for %s - %s", series_id, title)
+            continue
+        get_asset(series_id, title, dct)
 
     logger.info(
         "========== Fetch series augmented metadata script ENDED ================================================"
     )
 
 
-def get_asset(series_id: str, title: str) -> None:
+def series_ids(fullpath: str) -> dict[str, str]:
     """
-    Get series data from PATV
-    using requests library
+    Series IDs and filename safe titles
+    of related series in an EPG JSON
     """
-
-    series_url = URL + series_id
-    dct = requests.request("GET", series_url, headers=HEADERS, params=QUERYSTRING)
+    found = {}
+    try:
+        with open(fullpath, "r") as inf:
+            dct = json.load(inf)
+        related = dct["item"][0]["asset"]["related"]
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        return found
+    for subdct in related:
+        try:
+            if subdct["type"] != "series":
+                continue
+            series_id = subdct["id"]
+            title = subdct["title"]
+        except (KeyError, TypeError):
+            continue
+        for k, v in TITLE_CHARS.items():
+            title = title.replace(k, v)
+        found[series_id] = title
+    return found
+
+
+def get_asset(series_id: str, title: str, dct: dict[str, Any]) -> None:
+    """
+    Write series data from PATV, rewriting
+    the file only where the data has changed
+    """
+    fname = os.path.join(STORAGE_PATH, f"{series_id}_{title}.json")
     try:
+        if os.path.isfile(fname):
+            with open(fname, "r") as f:
+                if json.load(f) == dct:
+                    logger.info("Series data unchanged for %s", fname)
+                    return
         # Outputs response files to storage_path, named as series_id
-        fname = os.path.join(STORAGE_PATH, f"{series_id}_{title}.json")
         with open(fname, "w+") as f:
-            json.dump(dct.json(), f, indent=4)
+            json.dump(dct, f, indent=4)
     except Exception as err:
         logger.warning(
             "** WARNING: Exporting series data has failed to output to %s\n%s",
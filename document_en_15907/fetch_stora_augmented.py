@@ -5,14 +5,16 @@ Fetch JSON from augmented EPG metadata API, for use by document_augmented_stora.
 
 main():
 1. Check if any dictionary paths are absent from STORA path, if not prepeneds "NO_RECORDING_{channel}"
-2. Once a day after shows have completed (12:10am), call the API for yesterday's metadata, using fetch():
-3. If first fetch fails, fetch(): will retry three times pausing up to ten minutes between each.
-4. When downloaded calls json_split(): to split the JSON for each channel into it's time slots
+2. Once a day after shows have completed (12:10am), call the API for yesterday's metadata,
+   all channels at once through the shared rate limited patv_client
+3. If a channel fetch fails, fetch(): will retry twice pausing up to ten minutes between each.
+4. When downloaded calls json_split(): to split the JSON for each channel into it's time slots,
+   indexing each time slot file against STORA generated recording foldernames as it goes
 move():
-5. Called by main(): compares the STORA generated recording foldernames against split JSON file
+5. Called by main(): takes the index of split JSON files and matching foldernames
 6. Move matching JSON time slot file into folder for same time slot. Copy to a second if two found.
 folder_check():
-7. Called by move(): looks for folders without .json files in. If found renames the csv to end '.stora'
+7. Called by main(): looks for unmatched folders without .json files in. If found renames the csv to end '.stora'
 
 2020
 """
@@ -29,9 +31,9 @@ import sys
 import time
 from typing import Any, Final, Optional
 
-# ENV packages
-import requests
-import tenacity
+sys.path.append(os.environ["CODE"])
+import patv_client
+from helpers import stora_schedule_split
 
 # Global variables
 STORAGE_PATH: Final = os.environ["STORA_PATH"]
@@ -58,6 +60,7 @@ formatter = logging.Formatter("%(asctime)s\t%(levelname)s\t%(message)s")
 hdlr.setFormatter(formatter)
 logger.addHandler(hdlr)
 logger.setLevel(logging.INFO)
+logging.getLogger("patv_client").addHandler(hdlr)
 
 # Setup Rest API
 URL = os.environ["PATV_URL"]
@@ -83,6 +86,8 @@ CHANNEL = {
     "five": os.environ["PA_FIVE"],
     "5star": os.environ["PA_5STAR"],
 }
+MAX_MISSING: Final = 4
+CLIENT = patv_client.PATVClient(HEADERS, cache_dir=os.path.join(LOG_PATH, "patv_cache"))
 
 
 def check_control() -> None:
@@ -95,18 +100,11 @@ def check_control() -> None:
             sys.exit("Script run prevented by downtime_control.json. Script exiting.")
 
 
-@tenacity.retry(wait=tenacity.wait_random(min=5, max=30))
-def check_api(value: str) -> Optional[bool]:
+def schedule_params(value: str) -> dict[str, str]:
     """
-    Run standard check with today's date on supplied channelID
+    Schedule request params for channelID
     """
-    params = {"channelId": f"{value}", "start": START, "end": END, "aliases": "True"}
-    req = requests.request("GET", URL, headers=HEADERS, params=params, timeout=120)
-    print(req)
-    if req.status_code == 200:
-        return True
-    logger.info("PATV API return status code: %s", req.status_code)
-    raise tenacity.TryAgain
+    return {"channelId": f"{value}", "start": START, "end": END, "aliases": "True"}
 
 
 def make_path(channel: dict[str, str], item: str) -> None:
@@ -125,63 +123,60 @@ def make_path(channel: dict[str, str], item: str) -> None:
             raise
 
 
-@tenacity.retry(wait=tenacity.wait_random(min=5, max=30))
-def fetch(value) -> Optional[dict[str, str]]:
+def fetch(value: str) -> Optional[dict[str, Any]]:
     """
-    Retrieval of EPG metadata here
+    Retrieval of EPG metadata here, every page of it.
+    The client retries service errors with backoff
     """
-    try:
-        params = {
-            "channelId": f"{value}",
-            "start": START,
-            "end": END,
-            "aliases": "True",
-        }
-        logger.info("fetch(): %s", params)
-        req = requests.request("GET", URL, headers=HEADERS, params=params, timeout=120)
-        jdct = json.loads(req.text)
-    except Exception as err:
-        print("fetch(): **** PROBLEM: Cannot fetch EPG metadata.")
-        logger.critical("**** PROBLEM: Cannot fetch EPG metadata. **** \n%s", err)
-        jdct = None
-
-    if "'message': 'Service error'" in str(jdct):
-        logger.warning("Service is unreachable, pausing and retrying")
-        raise tenacity.TryAgain
+    params = schedule_params(value)
+    logger.info("fetch(): %s", params)
+    jdct = CLIENT.get_all(URL, params)
     if jdct is None:
+        print("fetch(): **** PROBLEM: Cannot fetch EPG metadata.")
         logger.warning("Failed to download EPG schedules, see log error.")
-        raise tenacity.TryAgain
     return jdct
 
 
-def json_split(jdct: dict[str, Any], key: str) -> None:
+def json_split(
+    jdct: dict[str, Any], key: str
+) -> tuple[dict[str, list[str]], list[str]]:
     """
-    Splits dct into subdicts based on 'item' and dateTime being present
+    Splits dct into compact info_{dateTime}.json files, indexed
+    against programme folders with matching start times
     """
     dump_to = os.path.join(PATH, key)
     if "item" not in jdct:
-        return None
-    for subdct in jdct["item"]:
-        if "dateTime" in subdct:
-            try:
-                # Outputs split files in subdct when dateTime present to storage_path/dump_path/
-                dt_item = subdct["dateTime"]
-                fname = os.path.join(dump_to, f"info_{dt_item}.json")
-                with open(fname, "w") as f:
-                    json.dump({"item": [subdct]}, f, indent=4)
-            except Exception as e:
-                print(
-                    f"json_split(): ** WARNING: Splitting script has failed to split and output to {fname} {e}"
-                )
-                logger.warning(
-                    "** WARNING: Splitting script has failed to output to %s %s",
-                    dump_to,
-                    e,
-                )
-            else:
-                logger.info(
-                    "Splitting has been successful. Saving to top folder %s", dump_to
-                )
+        return {}, stora_schedule_split.programme_folders(dump_to)
+    index, folders = stora_schedule_split.split_schedule(jdct, dump_to)
+    logger.info(
+        "Splitting has been successful. Saved %s files to top folder %s",
+        len(index),
+        dump_to,
+    )
+    return index, folders
+
+
+def channel_folders() -> dict[str, str]:
+    """
+    Channel folder names mapped to PATV channel IDs,
+    renamed 'NO_RECORDING_{channel}' where STORA
+    made no folder for the channel
+    """
+    channels = {}
+    for item, value in CHANNEL.items():
+        item_path = os.path.join(PATH, item)
+        print(item_path)
+        if os.path.exists(item_path):
+            os.chmod(item_path, mode=0o777)
+            channels[item] = value
+            continue
+        make_path(CHANNEL, item)
+        logger.warning(
+            " *************** PATH CREATION -- NO_RECORDING_%s -- AS PATH IS ABSENT ***************** ",
+            item,
+        )
+        channels[f"NO_RECORDING_{item}"] = value
+    return channels
 
 
 def main() -> None:
@@ -195,139 +190,41 @@ def main() -> None:
         "========== Fetch augmented metadata script STARTED ==============================================="
     )
 
-    fails = 0
-    for item in CHANNEL.keys():
-        item_path = os.path.join(PATH, item)
-        print(item_path)
-        os.chmod(item_path, mode=0o777)
-        if not os.path.exists(item_path):
-            fails += 1
-            make_path(CHANNEL, item)
-            logger.warning(
-                " *************** PATH CREATION -- NO_RECORDING_%s -- AS PATH IS ABSENT ***************** ",
-                item,
-            )
-            print("Updating new path to channel dictionary")
-            new_channel = f"NO_RECORDING_{item}"
-            old_channel = item
-            # New block to manage up to 3 missing channels
-            if fails == 1:
-                channel1 = dict(CHANNEL)
-                channel1[new_channel] = channel1.pop(old_channel)
-            if fails == 2:
-                channel2 = dict(channel1)
-                channel2[new_channel] = channel2.pop(old_channel)
-            if fails == 3:
-                channel3 = dict(channel2)
-                channel3[new_channel] = channel3.pop(old_channel)
-            if fails == 4:
-                channel4 = dict(channel3)
-                channel4[new_channel] = channel4.pop(old_channel)
-
-    print(fails)
+    channels = channel_folders()
+    fails = sum(key.startswith("NO_RECORDING_") for key in channels)
+    print(f"{fails} channels missing, using channel dictionary: {channels}")
+    # Manage up to 4 missing channels, else exit
+    if fails > MAX_MISSING:
+        logger.critical("Too many channels missing, script exiting.")
+        sys.exit("Exiting because too many channels are absent - manual help needed!")
+
     # If metadata cannot be retrieved the script exits
     logger.info(
         "Requests will now attempt to retrieve the EPG channel metadata from start=%s to end=%s",
         START,
         END,
     )
-
-    # New block to manage upto 3 missing channels, else exit
-    if fails == 0:
-        print(f"NO channels missing, using channel dictionary: {CHANNEL}")
-        for key, value in CHANNEL.items():
-            result = check_api(value)
-            if not result:
-                logger.warning(
-                    "Unable to establish contact with PATV API for channel %s. Script exitings",
-                    key,
-                )
-                sys.exit()
-            jdct = fetch(value)
-            retrieve_dct_data(key, value, jdct)
-        for item in CHANNEL.keys():
-            path_move = os.path.join(STORAGE_PATH, DATE_PATH, item)
-            logger.info("Path for move actions: %s", path_move)
-            move(path_move, item)
-            folder_check(path_move)
-    elif fails == 1:
-        print(f"One channel missing, using channel1 dictionary: {channel1}")
-        for key, value in channel1.items():
-            result = check_api(value)
-            if not result:
-                logger.warning(
-                    "Unable to establish contact with PATV API for channel %s. Script exitings",
-                    key,
-                )
-                sys.exit()
-            jdct = fetch(value)
-            retrieve_dct_data(key, value, jdct)
-        for item in channel1.keys():
-            path_move = os.path.join(STORAGE_PATH, DATE_PATH, item)
-            logger.info("Path for move actions: %s", path_move)
-            move(path_move, item)
-            folder_check(path_move)
-    elif fails == 2:
-        print(f"Two channels missing, using channel2 dictionary: {channel2}")
-        for key, value in channel2.items():
-            result = check_api(value)
-            if not result:
-                logger.warning(
-                    "Unable to establish contact with PATV API for channel %s. Script exitings",
-                    key,
-                )
-                sys.exit()
-            jdct = fetch(value)
-            retrieve_dct_data(key, value, jdct)
-        for item in channel2.keys():
-            path_move = os.path.join(STORAGE_PATH, DATE_PATH, item)
-            logger.info("Path for move actions: %s", path_move)
-            move(path_move, item)
-            folder_check(path_move)
-    elif fails == 3:
-        print(f"Three channels missing, using channel3 dictionary: {channel3}")
-        for key, value in channel3.items():
-            result = check_api(value)
-            if not result:
-                logger.warning(
-                    "Unable to establish contact with PATV API for channel %s. Script exitings",
-                    key,
-                )
-                sys.exit()
-            jdct = fetch(value)
-            retrieve_dct_data(key, value, jdct)
-        for item in channel3.keys():
-            path_move = os.path.join(STORAGE_PATH, DATE_PATH, item)
-            logger.info("Path for move actions: %s", path_move)
-            move(path_move, item)
-            folder_check(path_move)
-    elif fails == 4:
-        print(f"Four channels missing, using channel4 dictionary: {channel4}")
-        for key, value in channel4.items():
-            result = check_api(value)
-            if not result:
-                logger.warning(
-                    "Unable to establish contact with PATV API for channel %s. Script exitings",
-                    key,
-                )
-                sys.exit()
-            jdct = fetch(value)
-            retrieve_dct_data(key, value, jdct)
-        for item in channel4.keys():
-            path_move = os.path.join(STORAGE_PATH, DATE_PATH, item)
-            logger.info("Path for move actions: %s", path_move)
-            move(path_move, item)
-            folder_check(path_move)
-    else:
-        logger.critical("Too many channels missing, script exiting.")
-        sys.exit("Exiting because too many channels are absent - manual help needed!")
+    # All channels fetched at once, within the API rate limit
+    jdcts = CLIENT.map(
+        [(URL, schedule_params(value)) for value in channels.values()], paged=True
+    )
+    indexes = {}
+    for (key, value), jdct in zip(channels.items(), jdcts):
+        indexes[key] = retrieve_dct_data(key, value, jdct)
+    for item, (index, folders) in indexes.items():
+        path_move = os.path.join(STORAGE_PATH, DATE_PATH, item)
+        logger.info("Path for move actions: %s", path_move)
+        matched = move(path_move, item, index)
+        folder_check(path_move, folders, matched)
 
     logger.info(
         "========== Fetch augmented metadata script ENDED ================================================"
     )
 
 
-def retrieve_dct_data(key: str, value: str, jdct=None) -> None:
+def retrieve_dct_data(
+    key: str, value: str, jdct=None
+) -> tuple[dict[str, list[str]], list[str]]:
     """
     Check if DCT data is None, if not instigate json_split
     """
@@ -337,54 +234,34 @@ def retrieve_dct_data(key: str, value: str, jdct=None) -> None:
         )
         time.sleep(300)
         jdct = fetch(value)
-        if jdct is None:
-            logger.warning(
-                "FAILED: Second attempt to retrieve metadata. Third attempt will be made in 10 minutes."
-            )
-            time.sleep(600)
-            jdct = fetch(value)
-            if jdct is None:
-                logger.critical(
-                    "*** FAILED: Third attempt to retrieve metadata from EPG website. Script exiting ***"
-                )
-                sys.exit()
-            else:
-                logger.info(
-                    "EPG metadata successfully retrieved. Starting split of JSON files"
-                )
-                json_split(jdct, key)
-        else:
-            logger.info(
-                "EPG metadata successfully retrieved. Starting split of JSON files"
-            )
-            json_split(jdct, key)
-    else:
-        logger.info("EPG metadata successfully retrieved. Starting split of JSON files")
-        json_split(jdct, key)
+    if jdct is None:
+        logger.warning(
+            "FAILED: Second attempt to retrieve metadata. Third attempt will be made in 10 minutes."
+        )
+        time.sleep(600)
+        jdct = fetch(value)
+    if jdct is None:
+        logger.critical(
+            "*** FAILED: Third attempt to retrieve metadata from EPG website. Script exiting ***"
+        )
+        sys.exit()
+    logger.info("EPG metadata successfully retrieved. Starting split of JSON files")
+    return json_split(jdct, key)
 
 
-def move(path_move: str, item: str) -> None:
+def move(path_move: str, item: str, index: dict[str, list[str]]) -> set[str]:
     """
     Handles move of JSON files
     into correct paths with
-    matching datetime in dir name
+    matching datetime in dir name,
+    using the index made by json_split
     """
-    file_trim = {}
-    for file in os.scandir(path_move):
-        if file.path.endswith(".json"):
-            filename = os.path.basename(file)
-            trim = filename[16:21].replace(":", "-")
-            file_trim.update({trim: path_move + "/" + filename})
-        else:
-            print(f"move(): Skipping {file} as file is not JSON: {path_move}")
-            logger.info(
-                "Skipping file=%s as file is not a JSON: path=%s", file, path_move
-            )
-
-    # Look for JSON time matching programme folders (1 or 2, more critical)
-    directory_list = os.listdir(path_move)
-    for key, value in file_trim.items():
-        matches = [x for x in directory_list if x.startswith(key)]
+    # Move JSON to time matching programme folders (1 or 2, more critical)
+    matched = set()
+    for value, matches in index.items():
+        key = os.path.basename(value)[16:21].replace(":", "-")
+        if len(matches) <= 2:
+            matched.update(matches)
         if len(matches) == 0:
             continue
         elif len(matches) == 1:
@@ -463,57 +340,61 @@ def move(path_move: str, item: str) -> None:
             )
             continue
 
-    # Remove json files not in programme folder and move to unmatched_jsons folder
-    for file in os.scandir(path_move):
-        filepath = os.path.join(path_move, file)
+    # Move json files not in programme folder to unmatched_jsons folder
+    for filepath in index:
         if os.path.isfile(filepath):
-            if filepath.endswith(".json"):
-                filename = os.path.basename(filepath)
-                print(f"move(): {filename} is not a directory")
-                logger.info("%s path is not a directory.", filename)
-                make_new_path = os.path.join(UNMATCHED_JSON, DATE_PATH, item)
-                print(f"Make new path mkdirs: {make_new_path}")
-                try:
-                    os.makedirs(make_new_path, exist_ok=True)
-                    print(f"Directory created successfully {make_new_path}")
-                except OSError as error:
-                    print("Unable to mkdir, probably already exists")
-                    logger.warning(
-                        "Make directory failed, path probably already exists %s", error
-                    )
-                try:
-                    new_path = os.path.join(UNMATCHED_JSON, DATE_PATH, item, filename)
-                    print(f"Moving {filepath} to new location at {new_path}")
-                    logger.info(
-                        "move(): Moving unmatched JSON from %s to new path %s",
-                        filepath,
-                        new_path,
-                    )
-                    shutil.move(filepath, new_path)
-                except Exception as err:
-                    logger.warning(
-                        "move(): Unable to move %s to unmatched_json: %s", filepath, err
-                    )
+            filename = os.path.basename(filepath)
+            print(f"move(): {filename} is not a directory")
+            logger.info("%s path is not a directory.", filename)
+            make_new_path = os.path.join(UNMATCHED_JSON, DATE_PATH, item)
+            print(f"Make new path mkdirs: {make_new_path}")
+            try:
+                os.makedirs(make_new_path, exist_ok=True)
+                print(f"Directory created successfully {make_new_path}")
+            except OSError as error:
+                print("Unable to mkdir, probably already exists")
+                logger.warning(
+                    "Make directory failed, path probably already exists %s", error
+                )
+            try:
+                new_path = os.path.join(UNMATCHED_JSON, DATE_PATH, item, filename)
+                print(f"Moving {filepath} to new location at {new_path}")
+                logger.info(
+                    "move(): Moving unmatched JSON from %s to new path %s",
+                    filepath,
+                    new_path,
+                )
+                shutil.move(filepath, new_path)
+            except Exception as err:
+                logger.warning(
+                    "move(): Unable to move %s to unmatched_json: %s", filepath, err
+                )
+    return matched
 
 
-def folder_check(path_move: str) -> None:
+def folder_check(path_move: str, folders: list[str], matched: set[str]) -> None:
     """
     Where folder missing .JSON
-    rename info.csv to info.csv.stora
+    rename info.csv to info.csv.stora.
+    Folders matched by move() are skipped
     """
     print(f"folder_check(): Searching for folders without any .json in {path_move}")
     logger.info(
         "folder_check(): Searching for folders without any .json in %s", path_move
     )
-    for directory in os.scandir(path_move):
+    for directory in folders:
         dir_path = os.path.join(path_move, directory)
+        if directory in matched:
+            logger.info("Skipping path, as it has been matched to a json: %s", dir_path)
+            continue
         if not os.path.isdir(dir_path):
             logger.info("Skipping, not a folder: %s", dir_path)
             continue
-        if any(file.endswith(".json") for file in os.listdir(dir_path)):
+        dir_files = os.listdir(dir_path)
+        if any(file.endswith(".json") for file in dir_files):
             logger.info("Skipping path, as it contains a json: %s", dir_path)
         else:
-            for file in os.listdir(dir_path):
+            for file in dir_files:
                 if file.startswith("info.csv"):
                     logger.info("folder_check(): CSV file to be renamed: %s", file)
                     old_name = os.path.join(dir_path, file)
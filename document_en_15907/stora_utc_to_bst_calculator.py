@@ -8,10 +8,10 @@ that contain 'priref', 'transmission_start_time' and
 'transmission_date'.
 
 1. Iterate through the CSV building a concatenated 'UTC_timestamp'
-   for all entries
-2. Where a date/time fall within BST - pass date and time strings
-   to utils.check_bst_adjustment() and get back adjusted date/time - use
-   these to replace existing 'transmissions_start_time' and '_date' fields.
+   for all entries, skipping repeated prirefs
+2. Convert timestamps in chunks with time_utils.utc_to_london().
+   Where a date/time falls within BST use the adjusted date/time
+   to replace existing 'transmissions_start_time' and '_date' fields.
 3. Populate new CSV with 'priref', original or new date/time fields
    and new 'UTC_timestamp' field. Return to CID team to ingest to CID.
 
@@ -27,15 +27,15 @@ import csv
 import logging
 import os
 import sys
-from datetime import datetime, timedelta, timezone
-from typing import Any, Final, Optional
-from zoneinfo import ZoneInfo
+from typing import Final, Iterator
 
 sys.path.append(os.environ.get("CODE"))
+import time_utils
 import utils
 
 FORMAT = "%Y-%m-%d %H:%M:%S"
 LOGS = os.environ.get("LOG_PATH")
+CHUNK: Final = 100000
 
 BST_DCT = {
     "2015": ["2015-03-29", "2015-10-25"],
@@ -94,58 +94,75 @@ def main():
         sys.exit("Script run prevented by downtime_control.json. Script exiting.")
 
     # Get the new CSV path created
-    root, csv = os.path.split(sys.argv[1])
-    new_csv = f"utc_update_{csv}"
+    root, csv_name = os.path.split(sys.argv[1])
+    new_csv = f"utc_update_{csv_name}"
     new_csv_path = os.path.join(root, new_csv)
     check_file = make_new_csv(new_csv_path)
     if not check_file:
         sys.exit("Scripts failed to make new CSV to store changed date times in.")
 
-    # Begin iterating supplied rows to make new CSV
-    for row in yield_rows(sys.argv[1]):
-        # Refresh all essential fields
-        priref = utc_timestamp = utc_date = utc_time = csv_date = csv_time = ""
+    rows = utc_rows(sys.argv[1])
+    with open(new_csv_path, "a", newline="") as doc:
+        writer = csv.writer(doc)
+        for chunk in chunked(rows, CHUNK):
+            writer.writerows(bst_rows(chunk))
+
 
+def utc_rows(csv_path: str) -> list[tuple[str, str, str]]:
+    """
+    Priref, UTC date and UTC time for each
+    usable row, first row kept per priref
+    """
+    rows = []
+    seen = set()
+    for row in yield_rows(csv_path):
         if "priref" in str(row):
             continue
-        priref = row[0]
-        check = check_for_priref(new_csv_path, priref)
-        if check:
+        if len(row) < 3:
+            LOGGER.warning("Failed to process: %s", row)
+            continue
+        priref, utc_time, utc_date = row[:3]
+        if priref in seen:
             print(f"Already processed row {row}")
             continue
-
-        # Start UTC manipulations
-        utc_time = row[1]
-        utc_date = row[2]
-
         if len(utc_date) > 3 and len(utc_time) > 4:
-            utc_timestamp = f"{utc_date} {utc_time}"
+            seen.add(priref)
+            rows.append((priref, utc_date, utc_time))
         else:
             LOGGER.warning("Failed to process: %s", row)
-            continue
+    return rows
 
-        bst_data = utils.check_bst_adjustment(utc_timestamp)
-        if not bst_data:
-            LOGGER.warning("Failed to process: %s", row)
-            continue
-        if bst_data[1] == utc_time:
-            csv_date = utc_date
-            csv_time = utc_time
-        else:
-            csv_date = bst_data[0]
-            csv_time = bst_data[1]
-        if not write_to_csv([priref, utc_timestamp, csv_time, csv_date], new_csv_path):
-            LOGGER.warning("Failed to process: %s", row)
+
+def chunked(rows: list, size: int) -> Iterator[list]:
+    """
+    Split rows into lists of size
+    """
+    for num in range(0, len(rows), size):
+        yield rows[num : num + size]
 
 
-def check_for_priref(new_csv, priref):
+def bst_rows(rows: list[tuple[str, str, str]]) -> list[list[str]]:
     """
-    Check derivative CSV for
-    priref already processed
+    Convert a chunk of UTC rows in one pass,
+    keeping original date/time outside BST
     """
-    for row in yield_rows(new_csv):
-        if priref == row[0]:
-            return True
+    timestamps = [f"{utc_date} {utc_time}" for _, utc_date, utc_time in rows]
+    local = time_utils.utc_to_london(timestamps, errors="coerce")
+    dates = time_utils.format_times(local, "%Y-%m-%d")
+    times = time_utils.format_times(local, time_utils.TIME_FORMAT)
+
+    new_rows = []
+    for (priref, utc_date, utc_time), utc_timestamp, bst_date, bst_time in zip(
+        rows, timestamps, dates, times
+    ):
+        if bst_time is None:
+            LOGGER.warning("Failed to process: %s", [priref, utc_time, utc_date])
+            continue
+        if bst_time == utc_time:
+            new_rows.append([priref, utc_timestamp, utc_time, utc_date])
+        else:
+            new_rows.append([priref, utc_timestamp, bst_time, bst_date])
+    return new_rows
 
 
 def make_new_csv(new_csv_path):
@@ -163,14 +180,5 @@ def make_new_csv(new_csv_path):
         return True
 
 
-def write_to_csv(new_row_data, new_csv):
-    """
-    Write additional line to new CSV
-    """
-    with open(new_csv, "a") as doc:
-        writer = csv.writer(doc)
-        writer.writerow(new_row_data)
-
-
 if __name__ == "__main__":
     main()
@@ -23,15 +23,19 @@ columns.
 import os
 import sys
 from datetime import datetime, timedelta, time
-from zoneinfo import ZoneInfo
 import logging
+import threading
 from time import sleep
-from typing import Optional, Iterator, List, Dict
+from typing import Optional, Iterator
 import tenacity
 
 sys.path.append(os.environ.get("CODE"))
 import adlib_v3 as adlib
+import csv_pipeline
+import key_lock
+import time_utils
 import utils
+from helpers import product_category_cache
 from parsers import techedge_csv as te
 
 # Global variable
@@ -43,6 +47,11 @@ LOG_PATH = os.environ.get("LOG_PATH")
 CID_API = utils.get_current_api()
 ADMIN = os.environ.get("ADMIN")
 HOLDING_COMP_DOC = os.path.join(STORAGE, "techedge_holding_company_change.yaml")
+CATEGORIES = product_category_cache.ProductCategoryCache(CID_API)
+CATEGORY_LOCK = threading.Lock()
+LOCK_PATH = os.path.join(LOG_PATH, "techedge_locks")
+CHECKPOINT = os.path.join(LOG_PATH, "document_augmented_work_adverts_checkpoint.json")
+WRITERS = 4
 
 # Setup logging
 LOGGER = logging.getLogger("document_augmented_work_adverts")
@@ -153,13 +162,10 @@ def get_utc(date_start: str, start_time: str) -> Optional[str]:
     for London, adding +1 hours during BST
     Must receive data formatted %Y-%m-%d %H:%M:%S
     """
-    fmt = "%Y-%m-%d %H:%M:%S"
     try:
         make_time = f"{date_start} {start_time}"
-        dt_time = datetime.strptime(make_time, fmt).replace(
-            tzinfo=ZoneInfo("Europe/London")
-        )
-        utc_timestamp = datetime.strftime(dt_time.astimezone(ZoneInfo("UTC")), fmt)
+        dt_utc = time_utils.london_to_utc([make_time])
+        utc_timestamp = time_utils.format_times(dt_utc)[0]
     except Exception as err:
         print(err)
         utc_timestamp = None
@@ -167,181 +173,33 @@ def get_utc(date_start: str, start_time: str) -> Optional[str]:
     return utc_timestamp
 
 
-def get_existing_terms(
-    term_type: str, priref: str, new_term: str
-) -> List[Dict[str, str]]:
+def manage_product_category(
+    major: str, mid: str, minor: str
+) -> tuple[Optional[str], Optional[str], Optional[str]]:
     """
-    Call up thesaurus and retrieve all broader or
-    narrower terms to allow update of new with
-    existing terms. To avoid updaterecord overwrite
+    Return minor, mid and major product_category prirefs from
+    the thesaurus cache, resolved for the whole CSV in main()
+    If any are absent (CSV changed mid-run) create the missing
+    thesaurus entries and narrower term links for this row
     """
-    search = f"priref='{priref}"
-    rec = adlib.retrieve_record(CID_API, "thesaurus", search, 1)[1]
-    if not rec:
-        return []
-
-    entries = rec[0].get(term_type)
-    if not entries:
-        return []
-    length = len(entries)
-    LOGGER.info(
-        "%s %s entries found in thesaurus record <%s>", length, term_type, priref
-    )
-    get_terms = []
-    for term in entries:
-        try:
-            num = term.get("priref")[0].get("spans")[0].get("text")
-            if num:
-                get_terms.append(num)
-        except (IndexError, TypeError):
-            pass
+    with CATEGORY_LOCK:
+        prirefs = CATEGORIES.prirefs(major, mid, minor)
+        if None in prirefs:
+            CATEGORIES.resolve([(major, mid, minor)])
+            prirefs = CATEGORIES.prirefs(major, mid, minor)
+    return prirefs
 
-    terms = []
-    for t in get_terms:
-        terms.append({f"{term_type}.lref": t})
-    terms.append({f"{term_type}.lref": new_term})
 
-    return terms
-
-
-def manage_product_category(major: str, mid: str, minor: str) -> Optional[str]:
+def people_keys(*names: Optional[str]) -> list[str]:
     """
-    Search for product_category entry that matches 'minor' entry
-    ASSUMPTION: If 'minor' is presents parents are made/linked
-    If found return priref | If not found, fetch priref for product_category entry match
-    If not present - create parent thesaurus entry using PROD_CAT priref
-    If not present - create grandparent thesaurus entry using parent priref
-    ASSUMPTION: Mid and Major could exist where Minor does not - check before creation
+    key_lock keys for People record names,
+    skipping missing names
     """
-    search = f"(term='{minor}' and term.type='PROD_CAT')"
-    print(search)
-    hits, rec = adlib.retrieve_record(CID_API, "thesaurus", search, "1")
-    if hits == 1:
-        minor_priref = adlib.retrieve_field_name(rec[0], "priref")[0]
-    else:
-        minordct = [
-            {"term": minor},
-            {"term.type": "PROD_CAT"},
-            {"term.status": "1"},
-            {"source": "TechEdge adverts data supply"},
-            {"record_access.user": "BFIiispublic"},
-            {"record_access.rights": "0"},
-            {"input.name": "datadigipres"},
-            {"input.date": str(datetime.now())[:10]},
-            {"input.time": str(datetime.now())[11:19]},
-            {
-                "input.notes": "Automated bulk record creation using data supplied by TechEdge"
-            },
-        ]
-        sleep(0.25)
-        minor_xml = adlib.create_record_data(CID_API, "thesaurus", "", minordct)
-        minor_rec = adlib.post(CID_API, minor_xml, "thesaurus", "insertrecord")
-        minor_priref = adlib.retrieve_field_name(minor_rec, "priref")[0]
-        if minor_priref:
-            LOGGER.info(
-                "* New thesaurus entry created for Product Category '%s'", minor
-            )
-        else:
-            LOGGER.warning(
-                "Failed to create Thesaurus record for '%s':\n%s", minor, minor_rec
-            )
-            return None, None, None
-
-    search = f"(term='{mid}' and term.type='PROD_CAT')"
-    print(search)
-    hits, rec = adlib.retrieve_record(CID_API, "thesaurus", search, "1")
-    if hits == 1:
-        mid_priref = adlib.retrieve_field_name(rec[0], "priref")[0]
-        if minor_priref in str(rec):
-            LOGGER.info("Minor term %s is linked to Mid term %s already", minor, mid)
-        else:
-            term_dct = get_existing_terms("narrower_term", mid_priref, minor_priref)
-            mid_xml = adlib.create_record_data(
-                CID_API, "thesaurus", mid_priref, term_dct
-            )
-            print(mid_xml)
-            mid_rec = adlib.post(CID_API, mid_xml, "thesaurus", "updaterecord")
-            print(mid_rec)
-    else:
-        middct = [
-            {"term": mid},
-            {"term.type": "PROD_CAT"},
-            {"term.status": "1"},
-            {"narrower_term.lref": minor_priref},
-            {"source": "TechEdge adverts data supply"},
-            {"record_access.user": "BFIiispublic"},
-            {"record_access.rights": "0"},
-            {"input.name": "datadigipres"},
-            {"input.date": str(datetime.now())[:10]},
-            {"input.time": str(datetime.now())[11:19]},
-            {
-                "input.notes": "Automated bulk record creation using data supplied by TechEdge"
-            },
-        ]
-        sleep(0.25)
-        mid_xml = adlib.create_record_data(CID_API, "thesaurus", "", middct)
-        mid_rec = adlib.post(CID_API, mid_xml, "thesaurus", "insertrecord")
-        mid_priref = adlib.retrieve_field_name(mid_rec, "priref")[0]
-        if mid_priref:
-            LOGGER.info(
-                "* New broader term thesaurus entry created for '%s': '%s' - priref %s",
-                minor,
-                mid,
-                mid_priref,
-            )
-        else:
-            LOGGER.warning("Failed to create broader term Thesaurus record: '%s'", mid)
-            mid_priref = None
-
-    search = f"(term='{major}' and term.type='PROD_CAT')"
-    print(search)
-    hits, rec = adlib.retrieve_record(CID_API, "thesaurus", search, "1")
-    if hits == 1:
-        maj_priref = adlib.retrieve_field_name(rec[0], "priref")[0]
-        if mid_priref in str(rec):
-            LOGGER.info("Mid term %s is linked to Major term %s", mid, major)
-        else:
-            term_dct = get_existing_terms("narrower_term", maj_priref, mid_priref)
-            maj_xml = adlib.create_record_data(
-                CID_API, "thesaurus", maj_priref, term_dct
-            )
-            print(maj_xml)
-            maj_rec = adlib.post(CID_API, maj_xml, "thesaurus", "updaterecord")
-            print(maj_rec)
-    else:
-        majdct = [
-            {"term": major},
-            {"term.type": "PROD_CAT"},
-            {"term.status": "1"},
-            {"narrower_term.lref": mid_priref},
-            {"source": "TechEdge adverts data supply"},
-            {"record_access.user": "BFIiispublic"},
-            {"record_access.rights": "0"},
-            {"input.name": "datadigipres"},
-            {"input.date": str(datetime.now())[:10]},
-            {"input.time": str(datetime.now())[11:19]},
-            {
-                "input.notes": "Automated bulk record creation using data supplied by TechEdge"
-            },
-        ]
-        sleep(0.25)
-        maj_xml = adlib.create_record_data(CID_API, "thesaurus", "", majdct)
-        maj_rec = adlib.post(CID_API, maj_xml, "thesaurus", "insertrecord")
-        maj_priref = adlib.retrieve_field_name(maj_rec, "priref")[0]
-        if maj_priref:
-            LOGGER.info(
-                "* New broader term thesaurus entry created for '%s': '%s' - priref %s",
-                mid,
-                major,
-                maj_priref,
-            )
-        else:
-            LOGGER.warning(
-                "Failed to create broader term Thesaurus record: '%s'", major
-            )
-            maj_priref = None
-
-    return minor_priref, mid_priref, maj_priref
+    return [
+        f"people_{str(name).strip().lower()}"
+        for name in names
+        if name and str(name).strip().lower() != "missing"
+    ]
 
 
 def manage_advertiser_people(
@@ -743,14 +601,125 @@ def date_range(start_date: str, end_date: str) -> Iterator[str]:
         yield str(start_date + timedelta(n))
 
 
+def row_key(row: te.Data) -> Optional[tuple]:
+    """
+    One advert showing, for dropping repeated CSV rows
+    """
+    if not row.film_code:
+        return None
+    return (row.film_code, row.channel, row.date, row.start_time)
+
+
+def stop_reason() -> Optional[str]:
+    """
+    Reason to stop writing records, if any
+    """
+    if working_day_check(datetime.now()):
+        return "Exiting: Cannot operate in working hours"
+    if not utils.check_control("pause_scripts"):
+        return "Script run prevented by downtime_control.json. Script exiting."
+    if not utils.cid_check(CID_API):
+        return "* Cannot establish CID session, exiting script"
+    return None
+
+
+def document_group(film_code: str, rows: list[tuple[int, te.Data]]) -> None:
+    """
+    Document every showing of one advert in CSV
+    order, on one writer thread so the Work is
+    only made once
+    """
+    wpriref = None
+    for _, row in rows:
+        wpriref = document_row(row, wpriref)
+
+
+def document_row(row: te.Data, wpriref: Optional[str] = None) -> Optional[str]:
+    """
+    Checks if Work advert exists (unless wpriref supplied)
+    if no - make work record, people records if needed
+    Make Manifestation for the showing if not in CID
+    Returns the Work priref
+    """
+    # Check if unique film code already exists
+    first_showing = False
+    film_code = row.film_code
+    if not wpriref:
+        wpriref = advert_exists_query(film_code)
+    if wpriref is False:
+        LOGGER.info(
+            "Processing row: %s, %s, %s, %s, %s, %s, %s, %s,",
+            row.channel,
+            row.date,
+            row.start_time,
+            row.film_code,
+            row.advertiser,
+            row.brand,
+            row.agency,
+            row.hold_comp,
+        )
+
+        # Get defaults as lists of dictionary pairs
+        first_showing = True
+        rec_def, work_def, work_res_def, _ = build_rec_details(row)
+
+        work_values = []
+        work_values.extend(rec_def)
+        work_values.extend(work_def)
+        work_values.extend(work_res_def)
+        print(work_values)
+
+        wpriref = create_work(row, work_values)
+        if not wpriref:
+            print(f"Work creation error for data: {work_values}")
+            return None
+    else:
+        print("SKIPPING: Work exists for this Ad")
+
+    title_date_start = datetime.strftime(
+        datetime.strptime(row.date, "%d/%m/%Y"), "%Y-%m-%d"
+    )
+    utc_timestamp = get_utc(title_date_start, row.start_time)
+    mpriref = manifestation_exists_query(film_code, utc_timestamp, wpriref)
+    if mpriref is False:
+        LOGGER.info(
+            "Manifestation match not found '%s' - %s %s",
+            row.brand,
+            row.date,
+            row.start_time,
+        )
+
+        rec_def, _, _, manifestation = build_rec_details(row)
+        man_values = []
+        man_values.extend(rec_def)
+        man_values.append({"part_of_reference.lref": wpriref})
+        man_values.extend(manifestation)
+        print(man_values)
+
+        mpriref = create_manifestation(first_showing, row, man_values)
+        if not mpriref:
+            print(f"Manifesatation creation error data data: {manifestation}")
+            LOGGER.warning(
+                "Failed to make new manifestation and link to work: %s\n", wpriref
+            )
+    else:
+        print("SKIPPING: Manifestation exists for this Ad.")
+
+    return wpriref
+
+
 def main():
     """
     Iterates through LLM cleaned CSV supply (single or date dependent)
-    extracts necessary data into variables. Checks if Work advert exists
+    in a staged pipeline: rows validated in a process pool, repeated
+    showings dropped and rows grouped by Film Code. Each advert's
+    rows are handed to one of WRITERS threads, which checks if Work
+    advert exists
     if yes - skip Work creation and create manifestation if needed
     if no - make work record
-          - make people record if needed
+          - make people record if needed, locked per name across writers
           - make Manifestation
+    A checkpoint lets a stopped run resume after the rows committed
     """
 
     if not utils.check_storage(STORAGE):
@@ -762,82 +731,27 @@ def main():
     LOGGER.info(
         "========== Adverts work documentation script STARTED ==============================================="
     )
-    for row in te.iter_techedge_rows(CSV_PATH):
-        if working_day_check(datetime.now()):
-            LOGGER.info("Exiting: Cannot operate in working hours")
-            sys.exit("Exiting: Cannot operate in working hours")
-
-        first_showing = False
-        if not utils.check_control("pause_scripts"):
-            LOGGER.info(
-                "Script run prevented by downtime_control.json. Script exiting."
-            )
-            sys.exit("Script run prevented by downtime_control.json. Script exiting.")
-        if not utils.cid_check(CID_API):
-            LOGGER.warning("* Cannot establish CID session, exiting script")
-            sys.exit("* Cannot establish CID session, exiting script")
-
-        # Check if unique film code already exists
-        film_code = row.film_code
-        wpriref = advert_exists_query(film_code)
-        if wpriref is False:
-            LOGGER.info(
-                "Processing row: %s, %s, %s, %s, %s, %s, %s, %s,",
-                row.channel,
-                row.date,
-                row.start_time,
-                row.film_code,
-                row.advertiser,
-                row.brand,
-                row.agency,
-                row.hold_comp,
-            )
-
-            # Get defaults as lists of dictionary pairs
-            first_showing = True
-            rec_def, work_def, work_res_def, _ = build_rec_details(row)
-
-            work_values = []
-            work_values.extend(rec_def)
-            work_values.extend(work_def)
-            work_values.extend(work_res_def)
-            print(work_values)
-
-            wpriref = create_work(row, work_values)
-            if not wpriref:
-                print(f"Work creation error for data: {work_values}")
-                continue
-        else:
-            print("SKIPPING: Work exists for this Ad")
-
-        title_date_start = datetime.strftime(
-            datetime.strptime(row.date, "%d/%m/%Y"), "%Y-%m-%d"
-        )
-        utc_timestamp = get_utc(title_date_start, row.start_time)
-        mpriref = manifestation_exists_query(film_code, utc_timestamp, wpriref)
-        if mpriref is False:
-            LOGGER.info(
-                "Manifestation match not found '%s' - %s %s",
-                row.brand,
-                row.date,
-                row.start_time,
-            )
+    checkpoint = csv_pipeline.Checkpoint(CHECKPOINT, CSV_PATH)
+    rows, skipped = csv_pipeline.dedupe(
+        csv_pipeline.validated_rows(CSV_PATH, te.validate_row, checkpoint.start()),
+        row_key,
+    )
+    checkpoint.done(skipped)
 
-            rec_def, _, _, manifestation = build_rec_details(row)
-            man_values = []
-            man_values.extend(rec_def)
-            man_values.append({"part_of_reference.lref": wpriref})
-            man_values.extend(manifestation)
-            print(man_values)
+    # Create and link the CSV's product category terms up front
+    CATEGORIES.resolve(
+        (row.major_category, row.mid_category, row.minor_category)
+        for _, row in rows
+        if row.major_category and row.mid_category and row.minor_category
+    )
 
-            mpriref = create_manifestation(first_showing, row, man_values)
-            if not mpriref:
-                print(f"Manifesatation creation error data data: {manifestation}")
-                LOGGER.warning(
-                    "Failed to make new manifestation and link to work: %s\n", wpriref
-                )
-        else:
-            print("SKIPPING: Manifestation exists for this Ad.")
+    groups = csv_pipeline.group_rows(rows, lambda row: row.film_code)
+    reason = csv_pipeline.write_groups(
+        groups, document_group, checkpoint, WRITERS, stop_reason
+    )
+    if reason:
+        LOGGER.info(reason)
+        sys.exit(reason)
 
     LOGGER.info(
         "========== Adverts work documentation script END =======================================================\n"
@@ -855,15 +769,7 @@ def convert_transmission_time(transmission_start_time: str) -> str:
     Handle cases where times supplied greater
     than 23:59:59, eg 27:35:50
     """
-    hours = int(transmission_start_time.split(":")[0])
-    if hours > 23:
-        start_time_int = int(transmission_start_time.split(":")[0]) - 24
-        adjusted_start_time = ":".join(
-            [str(start_time_int).zfill(2)] + transmission_start_time.split(":")[1:]
-        )
-        return adjusted_start_time
-    else:
-        return transmission_start_time
+    return time_utils.wrap_hours([transmission_start_time])[0]
 
 
 def get_duration_total_parts(
@@ -1131,9 +1037,12 @@ def create_work(row, work_values: dict) -> Optional[str]:
     advertiser = row.advertiser
     holding_comp = row.hold_comp
     agency = row.agency
-    agency_priref, _, ad_priref = manage_advertiser_people(
-        advertiser, holding_comp, agency
-    )
+    # People records are shared across film codes, so writers
+    # lock each name while searching for or creating its record
+    with key_lock.hold_all(LOCK_PATH, people_keys(advertiser, holding_comp, agency)):
+        agency_priref, _, ad_priref = manage_advertiser_people(
+            advertiser, holding_comp, agency
+        )
     work_cred_xml = make_credit_data_for_work(ad_priref, agency_priref, work_id)
 
     print("=================================")
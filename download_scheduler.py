@@ -0,0 +1,321 @@
+"""
+Staged scheduler for DPI download requests
+
+Each requested file becomes a DownloadJob that
+moves through a fixed list of stages (tape retrieval,
+checksum, transcode). Every stage has its own bounded
+thread pool, so one request's transcode runs while the
+next request is still coming back from tape.
+
+Jobs are queued round-robin across users so one large
+bulk request cannot starve everyone queued behind it,
+and optionally shortest job first within each user's
+own queue. An is_cancelled callback is checked before
+every stage, so cancelled requests stop between stages.
+
+Batches let one call stand in for the first stage for
+a group of jobs (eg one Black Pearl bulk GET for a whole
+pointer file). A batch takes one place in its user's
+queue, sized by its total bytes, and runs on the first
+stage's pool in that order alongside single jobs. It
+delivers each job on to the next stage as soon as its
+own data has landed.
+
+A stage raising Deferred (eg not enough space on the
+target volume yet) parks the job rather than failing it.
+Parked jobs are retried each time another job finishes,
+and are finished as deferred once nothing else is left
+running that could free up what they wait for.
+
+2026
+"""
+
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Final, Iterable, NamedTuple, Optional, Union
+
+LOGGER = logging.getLogger("download_scheduler")
+DEFAULT_WORKERS: Final = 2
+
+
+@dataclass
+class DownloadJob:
+    """
+    One file moving through the pipeline
+    job_id is the request ID used for
+    cancellation checks and status updates
+    """
+
+    job_id: str
+    user: str
+    size: int = 0
+    data: dict[str, Any] = field(default_factory=dict)
+    completed: list[str] = field(default_factory=list)
+    failed: Optional[str] = None
+    cancelled: bool = False
+    deferred: Optional[str] = None
+
+
+class Deferred(Exception):
+    """
+    Raised by a stage that cannot run the
+    job yet, with the reason as message
+    """
+
+
+BatchFetch = Callable[[list[DownloadJob], Callable[[DownloadJob, bool], None]], None]
+
+
+class Batch(NamedTuple):
+    """
+    Jobs for one user fetched by one call,
+    queued as a single unit
+    """
+
+    jobs: list[DownloadJob]
+    fetch: BatchFetch
+
+    @property
+    def user(self) -> str:
+        return self.jobs[0].user
+
+    @property
+    def size(self) -> int:
+        return sum(job.size for job in self.jobs)
+
+
+Unit = Union[DownloadJob, Batch]
+
+
+class Stage(NamedTuple):
+    """
+    Stage function receives the job and returns
+    False to stop it going any further
+    """
+
+    name: str
+    func: Callable[[DownloadJob], bool]
+    workers: int = DEFAULT_WORKERS
+
+
+def order_jobs(jobs: Iterable[Unit], shortest_first: bool = False) -> list[Unit]:
+    """
+    Interleave jobs and batches round-robin by user,
+    in order of each user's first request, optionally
+    sorting each user's own queue smallest first
+    """
+    queues: dict[str, list[Unit]] = {}
+    for job in jobs:
+        queues.setdefault(job.user, []).append(job)
+    if shortest_first:
+        for queue in queues.values():
+            queue.sort(key=lambda job: job.size)
+
+    ordered = []
+    for batch in itertools.zip_longest(*queues.values()):
+        ordered.extend(job for job in batch if job is not None)
+    return ordered
+
+
+class DownloadScheduler:
+    """
+    Run jobs through stages, each stage
+    with its own bounded worker pool
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        is_cancelled: Optional[Callable[[DownloadJob], bool]] = None,
+        on_complete: Optional[Callable[[DownloadJob], None]] = None,
+        shortest_first: bool = False,
+    ):
+        if not stages:
+            raise ValueError("DownloadScheduler needs at least one stage")
+        self.stages = stages
+        self.is_cancelled = is_cancelled
+        self.on_complete = on_complete
+        self.shortest_first = shortest_first
+        self.pools: list[ThreadPoolExecutor] = []
+        self.pending = 0
+        self.parked: list[tuple[DownloadJob, int]] = []
+        self.finished = 0
+        self.done = threading.Condition()
+
+    def _check_cancelled(self, job: DownloadJob) -> bool:
+        """
+        Cancellation check between stages,
+        a failing check does not stop the job
+        """
+        if self.is_cancelled is None:
+            return False
+        try:
+            return bool(self.is_cancelled(job))
+        except Exception as err:
+            LOGGER.warning("Cancellation check failed for %s: %s", job.job_id, err)
+            return False
+
+    def _advance(self, job: DownloadJob, idx: int) -> None:
+        """
+        Queue job on stage idx, or finish it
+        """
+        if idx == len(self.stages):
+            self._finish(job)
+            return
+        self.pools[idx].submit(self._run_stage, job, idx)
+
+    def _run_stage(self, job: DownloadJob, idx: int) -> None:
+        """
+        Pool worker: check for cancellation once a
+        worker is free, run the stage, then hand the
+        job to the next stage's pool
+        """
+        stage = self.stages[idx]
+        if self._check_cancelled(job):
+            LOGGER.info("Job %s cancelled before stage %s", job.job_id, stage.name)
+            job.cancelled = True
+            self._finish(job)
+            return
+
+        with self.done:
+            finished = self.finished
+        try:
+            carry_on = stage.func(job)
+        except Deferred as err:
+            self._defer(job, idx, str(err) or stage.name, finished)
+            return
+        except Exception as err:
+            LOGGER.exception("Stage %s failed for %s: %s", stage.name, job.job_id, err)
+            job.failed = f"{stage.name}: {err}"
+            carry_on = False
+
+        if carry_on is False:
+            job.failed = job.failed or stage.name
+            self._finish(job)
+            return
+        job.completed.append(stage.name)
+        self._advance(job, idx + 1)
+
+    def _defer(self, job: DownloadJob, idx: int, reason: str, finished: int) -> None:
+        """
+        Park job to retry stage idx after another
+        job finishes, or finish it as deferred if
+        no other job is still running. Retries at
+        once if a job finished while the stage ran
+        """
+        with self.done:
+            running = self.pending - len(self.parked) - 1
+            if running > 0:
+                LOGGER.info("Job %s deferred at stage %s: %s", job.job_id, idx, reason)
+                self.parked.append((job, idx))
+                return
+            retry = self.finished != finished
+        if retry:
+            self.pools[idx].submit(self._run_stage, job, idx)
+            return
+        LOGGER.warning("Job %s left deferred: %s", job.job_id, reason)
+        job.deferred = reason
+        self._finish(job)
+
+    def _finish(self, job: DownloadJob) -> None:
+        """
+        Completion callback then release run(),
+        retrying any parked jobs
+        """
+        try:
+            if self.on_complete:
+                self.on_complete(job)
+        except Exception as err:
+            LOGGER.exception("Completion callback failed for %s: %s", job.job_id, err)
+        finally:
+            with self.done:
+                self.pending -= 1
+                self.finished += 1
+                parked, self.parked = self.parked, []
+                self.done.notify_all()
+            for parked_job, idx in parked:
+                self.pools[idx].submit(self._run_stage, parked_job, idx)
+
+    def _run_batch(self, jobs: list[DownloadJob], fetch: BatchFetch) -> None:
+        """
+        Pool worker: run a batch fetch in place of the
+        first stage, passing each delivered job on and
+        failing any the fetch never delivered
+        """
+        stage = self.stages[0]
+        checked: dict[str, bool] = {}
+        for job in jobs:
+            if job.job_id not in checked:
+                checked[job.job_id] = self._check_cancelled(job)
+        for job in [job for job in jobs if checked[job.job_id]]:
+            job.cancelled = True
+            self._finish(job)
+        jobs = [job for job in jobs if not job.cancelled]
+        if not jobs:
+            return
+
+        waiting = {id(job): job for job in jobs}
+        lock = threading.Lock()
+
+        def deliver(job: DownloadJob, success: bool) -> None:
+            with lock:
+                if waiting.pop(id(job), None) is None:
+                    return
+            if not success:
+                job.failed = job.failed or stage.name
+                self._finish(job)
+                return
+            job.completed.append(stage.name)
+            self._advance(job, 1)
+
+        try:
+            fetch(jobs, deliver)
+        except Exception as err:
+            LOGGER.exception("Batch %s failed: %s", stage.name, err)
+            for job in list(waiting.values()):
+                job.failed = f"{stage.name}: {err}"
+        for job in list(waiting.values()):
+            deliver(job, False)
+
+    def run(
+        self,
+        jobs: Iterable[DownloadJob],
+        batches: Iterable[tuple[list[DownloadJob], BatchFetch]] = (),
+    ) -> list[DownloadJob]:
+        """
+        Process all jobs and batches and block until
+        every job has completed, failed or been cancelled
+        """
+        units = list(jobs) + [
+            Batch(list(group), fetch) for group, fetch in batches if group
+        ]
+        ordered = order_jobs(units, self.shortest_first)
+        all_jobs = [
+            job
+            for unit in ordered
+            for job in (unit.jobs if isinstance(unit, Batch) else [unit])
+        ]
+        self.pending = len(all_jobs)
+        self.parked = []
+        self.finished = 0
+        self.pools = [
+            ThreadPoolExecutor(
+                max_workers=max(1, stage.workers), thread_name_prefix=stage.name
+            )
+            for stage in self.stages
+        ]
+        try:
+            for unit in ordered:
+                if isinstance(unit, Batch):
+                    self.pools[0].submit(self._run_batch, unit.jobs, unit.fetch)
+                else:
+                    self._advance(unit, 0)
+            with self.done:
+                self.done.wait_for(lambda: self.pending == 0)
+        finally:
+            for pool in self.pools:
+                pool.shutdown(wait=True)
+        return all_jobs
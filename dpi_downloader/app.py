@@ -10,10 +10,14 @@ using GET requests, and statuses updated as download progresses.
 import datetime
 import os
 import re
-import sqlite3
+import sys
 
 from flask import Flask, render_template, request
 
+sys.path.append(os.environ["CODE"])
+import request_dashboard
+import request_store
+
 app = Flask(__name__)
 
 
@@ -24,9 +28,10 @@ def index():
 
 
 DBASE = os.environ.get("DATABASE_TRANSCODE")
-CONNECT = sqlite3.connect(DBASE)
-CONNECT.execute(
-    "CREATE TABLE IF NOT EXISTS DOWNLOADS (name TEXT, email TEXT, download_type TEXT, fname TEXT, download_path TEXT, fpath TEXT, transcode TEXT, status TEXT, date TEXT)"
+STORE = request_store.RequestStore(DBASE, "DOWNLOADS", request_store.TRANSCODE_COLUMNS)
+app.register_blueprint(
+    request_dashboard.dashboard_blueprint("downloads", STORE),
+    url_prefix="/dpi_download",
 )
 FLASK_HOST = os.environ["FLASK_HOST"]
 
@@ -61,23 +66,19 @@ def dpi_download_request():
         # Check for non-BFI email and reject
         if "bfi.org.uk" not in email:
             return render_template("email_error_transcode.html")
-        with sqlite3.connect(DBASE) as users:
-            cursor = users.cursor()
-            cursor.execute(
-                "INSERT INTO DOWNLOADS (name,email,download_type,fname,download_path,fpath,transcode,status,date) VALUES (?,?,?,?,?,?,?,?,?)",
-                (
-                    name,
-                    email,
-                    download_type,
-                    fname,
-                    download_path,
-                    fpath,
-                    transcode,
-                    status,
-                    date_stamp,
-                ),
-            )
-            users.commit()
+        STORE.insert(
+            {
+                "name": name,
+                "email": email,
+                "download_type": download_type,
+                "fname": fname,
+                "download_path": download_path,
+                "fpath": fpath,
+                "transcode": transcode,
+                "status": status,
+                "date": date_stamp,
+            }
+        )
         return render_template("index_transcode.html")
     else:
         return render_template("initiate_transcode.html")
@@ -86,13 +87,24 @@ def dpi_download_request():
 @app.route("/dpi_download")
 def dpi_download():
     """
-    Return the View all requested page
+    Return the View all requested page, newest
+    first, one page of the last 14 days at a time.
+    The page then polls the changes API for updates
     """
-    connect = sqlite3.connect(DBASE)
-    cursor = connect.cursor()
-    cursor.execute("SELECT * FROM DOWNLOADS where date >= datetime('now','-14 days')")
-    data = cursor.fetchall()
-    return render_template("downloads_transcode.html", data=data)
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", request_store.PER_PAGE, type=int)
+    last_change = STORE.last_change()[0]
+    data, total = STORE.fetch_page(
+        page=page, per_page=per_page, since_days=14, with_id=True
+    )
+    return render_template(
+        "downloads_transcode.html",
+        data=data,
+        page=page,
+        per_page=per_page,
+        total=total,
+        last_change=last_change,
+    )
 
 
 if __name__ == "__main__":
@@ -30,6 +30,8 @@ import tenacity
 # Private packages
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import image_utils
+import interval_utils
 import utils
 
 # Global paths from environment vars
@@ -332,8 +334,11 @@ def transcode_mp4(fpath: str) -> str:
             return "jpeg fail"
 
         # Generate Full size 600x600, thumbnail 300x300
-        full_jpeg = make_jpg(jpeg_location, "full", None, None)
-        thumb_jpeg = make_jpg(jpeg_location, "thumb", None, None)
+        full_jpeg, thumb_jpeg = image_utils.make_derivatives(jpeg_location)
+        if thumb_jpeg is None:
+            thumb_jpeg = ""
+        if full_jpeg is None:
+            full_jpeg = ""
         log_build.append(
             f"{local_time()}\tINFO\tNew images created at {seconds} seconds into video:\n - {full_jpeg}\n - {thumb_jpeg}"
         )
@@ -421,12 +426,14 @@ def transcode_mp4(fpath: str) -> str:
             log_build.append(f"Creating new transcode path: {transcode_pth}")
             os.makedirs(transcode_pth, mode=0o777, exist_ok=True)
 
-        if not oversize:
-            full_jpeg = make_jpg(fullpath, "full", transcode_pth, None)
-        else:
-            full_jpeg = make_jpg(fullpath, "oversize", transcode_pth, percent)
-
-        thumb_jpeg = make_jpg(fullpath, "thumb", transcode_pth, None)
+        # Decode source once for both large image and thumbnail
+        full_jpeg, thumb_jpeg = image_utils.make_derivatives(
+            fullpath, transcode_pth, percent if oversize else None
+        )
+        if thumb_jpeg is None:
+            thumb_jpeg = ""
+        if full_jpeg is None:
+            full_jpeg = ""
 
         if os.path.isfile(full_jpeg) and os.path.isfile(thumb_jpeg):
             log_build.append(
@@ -494,70 +501,12 @@ def adjust_seconds(duration: int | str, data: str) -> int:
     Adjust second durations within
     FFmpeg detected blackspace
     """
-    blist = retrieve_blackspaces(data)
-    print(f"*** BLACK GAPS: {blist}")
+    starts, ends = interval_utils.parse_detector(data, "black")
+    print(f"*** BLACK GAPS: {list(zip(starts.tolist(), ends.tolist()))}")
 
     if isinstance(duration, str):
         duration = int(duration)
-
-    if not blist:
-        return duration // 2
-
-    secs = duration // 4
-    clash = check_seconds(blist, secs)
-    if not clash:
-        return secs
-
-    for num in range(2, 5):
-        frame_secs = duration // num
-        clash = check_seconds(blist, frame_secs)
-        if not clash:
-            return frame_secs
-
-    if len(blist) > 2:
-        first = blist[1].split(" - ")[1]
-        second = blist[2].split(" - ")[0]
-        frame_secs = int(first) + (int(second) - int(first)) // 2
-        if int(first) < frame_secs < int(second):
-            return frame_secs
-
-    return duration // 2
-
-
-def retrieve_blackspaces(data: str) -> list[str]:
-    """
-    Retrieve black detect log and check if
-    second variable falls in blocks of blackdetected
-    """
-    data_list = data.splitlines()
-    time_range = []
-    for line in data_list:
-        if "black_start" in line:
-            split_line = line.split(":")
-            split_start = split_line[1].split(".")[0]
-            start = re.sub("[^0-9]", "", split_start)
-            split_end = split_line[2].split(".")[0]
-            end = re.sub("[^0-9]", "", split_end)
-            # Round up to next second for cover
-            end = str(int(end) + 1)
-            time_range.append(f"{start} - {end}")
-    return time_range
-
-
-def check_seconds(blackspace: list[str], seconds: int) -> Optional[bool]:
-    """
-    Create range and check for second within
-    """
-    clash = []
-    for item in blackspace:
-        start, end = item.split(" - ")
-        st = int(start) - 1
-        ed = int(end) + 1
-        if seconds in range(st, ed):
-            clash.append(seconds)
-
-    if len(clash) > 0:
-        return True
+    return interval_utils.choose_clear_second(duration, starts, ends)
 
 
 def get_jpeg(seconds: int, fullpath: str, outpath: str) -> bool:
@@ -1286,59 +1235,6 @@ def create_transcode(
         )
 
 
-def make_jpg(
-    filepath: str, arg: str, transcode_pth: Optional[str], percent: Optional[str]
-) -> str:
-    """
-    Create GM JPEG using command based on argument
-    These command work. For full size don't use resize.
-    """
-
-    start_reduce = ["gm", "convert", "-density", "300x300", filepath, "-strip"]
-
-    start = ["gm", "convert", "-density", "600x600", filepath, "-strip"]
-
-    thumb = [
-        "-resize",
-        "x180",
-    ]
-
-    oversize = [
-        "-resize",
-        f"{percent}%x{percent}%",
-    ]
-
-    if not transcode_pth:
-        out = os.path.splitext(filepath)[0]
-    else:
-        fname = os.path.split(filepath)[1]
-        file = os.path.splitext(fname)[0]
-        out = os.path.join(transcode_pth, file)
-
-    if "thumb" in arg:
-        outfile = f"{out}_thumbnail.jpg"
-        cmd = start_reduce + thumb + [f"{outfile}"]
-    elif "oversize" in arg:
-        outfile = f"{out}_largeimage.jpg"
-        cmd = start + oversize + [f"{outfile}"]
-    else:
-        outfile = f"{out}_largeimage.jpg"
-        cmd = start + [f"{outfile}"]
-
-    try:
-        subprocess.call(cmd)
-    except subprocess.CalledProcessError as err:
-        logger.error(
-            "%s\tERROR\tJPEG creation failed for filepath: %s\n%s",
-            local_time(),
-            filepath,
-            err,
-        )
-
-    if os.path.exists(outfile):
-        return outfile
-
-
 def conformance_check(file: str) -> str:
     """
     Checks file against MP4 mediaconch policy
@@ -1346,13 +1242,10 @@ def conformance_check(file: str) -> str:
     the transcode was successful
     """
 
-    mediaconch_cmd = ["mediaconch", "--force", "-p", MP4_POLICY, file]
-
     try:
-        success = subprocess.check_output(mediaconch_cmd)
-        success_str = success.decode("uft-8")
+        success, success_str = utils.get_mediaconch(file, MP4_POLICY)
     except Exception as err:
-        success_str = ""
+        success, success_str = False, ""
         logger.warning(
             "%s\tWARNING\tMediaconch policy retrieval failure for %s\n%s",
             local_time(),
@@ -1360,7 +1253,7 @@ def conformance_check(file: str) -> str:
             err,
         )
 
-    if "pass!" in str(success_str):
+    if success:
         return "PASS!"
     elif success_str.startswith("fail!"):
         return f"FAIL! This policy has failed {success_str}"
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+"""
+Module script for BFI National Archive downloader app.
+
+Plans MP4 access, MP4 watermark and ProRes renditions
+of one downloaded file as a single FFmpeg run. The source
+is probed once, decoded once, and a split filter feeds
+each encoder its own filter chain, with the watermark
+overlaid in the same graph rather than re-encoding the
+access MP4. The per-rendition filters, codec and audio
+settings come from each transcode module's existing
+create_ffmpeg_command so outputs match the single
+rendition scripts. MediaConch checks for every output
+run in parallel once the encode finishes.
+
+MP4 proxy (downloaded_transcode_mp4) stays separate as
+it writes CID records and image files as well.
+
+2026
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Final
+
+import downloaded_transcode_mp4_watermark as mp4_access
+import downloaded_transcode_prores as prores
+
+# Global paths from server environmental variables
+LOG: Final = os.environ["LOG_PATH"]
+WATERMARK: Final = os.environ.get("WATERMARK")
+
+# Rendition name: (file suffix, command builder, policy check)
+RENDITIONS: Final[dict[str, tuple[str, Callable, Callable]]] = {
+    "mp4_access": (
+        "_access.mp4",
+        mp4_access.create_ffmpeg_command,
+        mp4_access.check_policy,
+    ),
+    "mp4_watermark": (
+        "_watermark.mp4",
+        mp4_access.create_ffmpeg_command,
+        mp4_access.check_policy,
+    ),
+    "prores": ("_prores.mov", prores.create_ffmpeg_command, prores.check_policy),
+}
+WATERMARK_OVERLAY: Final = (
+    "[{wm_in}][{vid_in}]scale2ref=w='iw*20/100':h='ow/mdar'[wm{n}][vid{n}];"
+    "[vid{n}][wm{n}]overlay=(main_w-overlay_w)-10:10"
+)
+
+# Setup logging
+logger = logging.getLogger("downloaded_transcode_plan")
+hdlr = logging.FileHandler(
+    os.path.join(LOG, "scheduled_database_downloader_transcode.log")
+)
+formatter = logging.Formatter("%(asctime)s\t%(levelname)s\t%(message)s")
+hdlr.setFormatter(formatter)
+logger.addHandler(hdlr)
+logger.setLevel(logging.INFO)
+
+
+def parse_renditions(transcode: str) -> list[str]:
+    """
+    Request transcode value to rendition names,
+    eg 'prores,mp4_access_watermark'. Empty if any
+    part is not a rendition this planner makes
+    """
+    renditions = []
+    for part in transcode.split(","):
+        part = part.strip()
+        if part == "mp4_access_watermark":
+            part = "mp4_watermark"
+        if part not in RENDITIONS:
+            return []
+        if part not in renditions:
+            renditions.append(part)
+    return renditions
+
+
+def probe_source(fullpath: str) -> dict[str, Any]:
+    """
+    Run each mediainfo/ffprobe helper
+    once for all renditions
+    """
+    audio, stream_default, stereo = mp4_access.check_audio(fullpath)
+    duration, vs = mp4_access.get_duration(fullpath)
+    return {
+        "audio": audio,
+        "stream_default": stream_default,
+        "stereo": stereo,
+        "dar": mp4_access.get_dar(fullpath),
+        "par": mp4_access.get_par(fullpath),
+        "height": mp4_access.get_height(fullpath),
+        "width": mp4_access.get_width(fullpath),
+        "duration": duration,
+        "vs": vs,
+    }
+
+
+def video_data_for(rendition: str, probe: dict[str, Any]) -> list[Any]:
+    """
+    Probe values in the list order each
+    module's create_ffmpeg_command expects
+    """
+    if rendition == "prores":
+        return [
+            probe["vs"],
+            probe["height"],
+            probe["audio"],
+            probe["stream_default"],
+            probe["stereo"],
+        ]
+    return [
+        probe["height"],
+        probe["width"],
+        probe["dar"],
+        probe["par"],
+        probe["audio"],
+        probe["stream_default"],
+        probe["vs"],
+        probe["stereo"],
+    ]
+
+
+def encoder_args(
+    ffmpeg_call: list[str], fullpath: str, output: str
+) -> tuple[str, list[str]]:
+    """
+    Split a single output FFmpeg command into its
+    -vf chain and the per-output arguments, dropping
+    the input, video map and trailing null output
+    """
+    args = ffmpeg_call[ffmpeg_call.index(fullpath) + 1 : ffmpeg_call.index(output)]
+    chain = "null"
+    output_args = []
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if arg in ("-nostdin", "-y"):
+            idx += 1
+        elif arg == "-vf":
+            chain = args[idx + 1]
+            idx += 2
+        elif arg == "-map" and args[idx + 1].startswith("0:v"):
+            idx += 2
+        else:
+            output_args.append(arg)
+            idx += 1
+    return chain, output_args
+
+
+def build_command(
+    fullpath: str, outputs: dict[str, str], probe: dict[str, Any]
+) -> list[str]:
+    """
+    One FFmpeg call decoding the source once,
+    split to each rendition's filters and encoder
+    """
+    cmd = ["ffmpeg", "-nostdin", "-y", "-i", fullpath]
+    if "mp4_watermark" in outputs:
+        cmd += ["-i", WATERMARK]
+
+    total = len(outputs)
+    source = f"[0:v:{probe['vs'] or 0}]"
+    if total > 1:
+        graph = [f"{source}split={total}" + "".join(f"[s{n}]" for n in range(total))]
+        inputs = [f"[s{n}]" for n in range(total)]
+    else:
+        graph = []
+        inputs = [source]
+
+    output_cmds = []
+    for n, (rendition, output) in enumerate(outputs.items()):
+        builder = RENDITIONS[rendition][1]
+        ffmpeg_call = builder(fullpath, output, video_data_for(rendition, probe))
+        if ffmpeg_call is None:
+            raise ValueError(f"No {rendition} FFmpeg settings for this source")
+        chain, output_args = encoder_args(ffmpeg_call, fullpath, output)
+        if rendition == "mp4_watermark":
+            graph.append(f"{inputs[n]}{chain}[p{n}]")
+            graph.append(
+                WATERMARK_OVERLAY.format(wm_in="1", vid_in=f"p{n}", n=n) + f"[v{n}]"
+            )
+        else:
+            graph.append(f"{inputs[n]}{chain}[v{n}]")
+        output_cmds += ["-map", f"[v{n}]"] + output_args + [output]
+
+    return cmd + ["-filter_complex", ";".join(graph)] + output_cmds
+
+
+def check_outputs(outputs: dict[str, str]) -> dict[str, str]:
+    """
+    MediaConch policy checks for all
+    outputs, run in parallel
+    """
+    with ThreadPoolExecutor(max_workers=len(outputs)) as executor:
+        futures = {
+            rendition: executor.submit(RENDITIONS[rendition][2], output)
+            for rendition, output in outputs.items()
+        }
+    return {rendition: future.result() for rendition, future in futures.items()}
+
+
+def transcode_renditions(fullpath: str, renditions: list[str]) -> dict[str, str] | str:
+    """
+    Receives fullpath and rendition names from downloader script.
+    Returns 'not video' or 'False' for an unusable source, else
+    a result per rendition: 'True', 'exists' or 'transcode fail'
+    """
+    if not os.path.isfile(fullpath):
+        logger.warning("SCRIPT EXITING: Error with file path:\n %s", fullpath)
+        return "False"
+    if not mp4_access.check_mime_type(fullpath):
+        logger.warning(
+            "SCRIPT EXITING: Supplied file is not mimetype video:\n %s", fullpath
+        )
+        return "not video"
+    if not mp4_access.check_control():
+        logger.warning("Script run prevented by downtime_control.json. Script exiting.")
+        sys.exit("Script run prevented by downtime_control.json. Script exiting.")
+
+    logger.info(
+        "================== START DPI download transcode renditions START =================="
+    )
+    logger.info("File requested for transcode to %s: %s", renditions, fullpath)
+    path_split = os.path.split(fullpath)
+    stem = path_split[1].split(".")[0]
+
+    results: dict[str, str] = {}
+    outputs: dict[str, str] = {}
+    for rendition in renditions:
+        output = os.path.join(path_split[0], f"{stem}{RENDITIONS[rendition][0]}")
+        if os.path.isfile(output):
+            logger.warning("%s requested but already found in path.", output)
+            results[rendition] = "exists"
+        elif rendition == "mp4_watermark" and not WATERMARK:
+            logger.warning("Watermark requested but no WATERMARK image set.")
+            results[rendition] = "transcode fail"
+        else:
+            outputs[rendition] = output
+    if not outputs:
+        return results
+
+    probe = probe_source(fullpath)
+    logger.info(
+        "Metadata retrieved:\nDAR %s PAR %s Audio %s Height %s Width %s Duration %s",
+        probe["dar"],
+        probe["par"],
+        probe["audio"],
+        probe["height"],
+        probe["width"],
+        probe["duration"],
+    )
+    try:
+        ffmpeg_call = build_command(fullpath, outputs, probe)
+    except ValueError as err:
+        logger.warning("Unable to build FFmpeg command for %s: %s", fullpath, err)
+        results.update(dict.fromkeys(outputs, "transcode fail"))
+        return results
+    logger.info("FFmpeg call: %s", " ".join(ffmpeg_call))
+
+    tic = time.perf_counter()
+    code = subprocess.call(ffmpeg_call)
+    seconds_time = time.perf_counter() - tic
+    logger.info(
+        "*** Encoding time for %s renditions of %s: %s seconds (exit %s)",
+        len(outputs),
+        fullpath,
+        seconds_time,
+        code,
+    )
+
+    for rendition, policy in check_outputs(outputs).items():
+        if code == 0 and policy == "pass!":
+            logger.info("New %s file passed MediaConch policy", rendition)
+            results[rendition] = "True"
+        else:
+            logger.warning("%s file failed transcode or MediaConch policy", rendition)
+            results[rendition] = "transcode fail"
+
+    logger.info(
+        "==================== END DPI download transcode renditions END ===================="
+    )
+    return results
+
+
+if __name__ == "__main__":
+    print(transcode_renditions(sys.argv[1], parse_renditions(sys.argv[2])))
@@ -39,12 +39,29 @@ Single:
    If ProRes initiates ProRes transcode and reports back
    if successful.
    If MP4 initiates MP4 transcode and reports back success
+   Several renditions, or the watermark MP4, are made from
+   one decode of the download (downloaded_transcode_plan)
 8. If transcode completes updates item's status field
    in database.db with:
    - Transcoded
 9. Sends notification email to user who requested download
    with unique transcode message when complete.
 
+Each file found is queued as a download_scheduler job
+with separate bounded pools for tape retrieval, checksum
+and transcode, so one request's transcode overlaps the
+next request's download. Users are served round-robin,
+and --shortest-first orders each user's files smallest
+first. Cancellation is checked between stages.
+
+Before each Black Pearl GET and transcode the expected
+output size is reserved on the target volume in the
+space_ledger shared with the Elasticsearch downloader.
+Jobs that would not fit are deferred until other jobs
+free space. Single requests still deferred at the end
+of the run are set back to 'Requested', and bulk
+requests list them in the email to be requested again.
+
 Blocks download from 'netflix' or 'amazon' buckets.
 
 2023
@@ -59,6 +76,7 @@ import logging
 import os
 import sqlite3
 import sys
+import threading
 from datetime import datetime
 from typing import Final, Optional
 
@@ -68,9 +86,14 @@ from ds3 import ds3, ds3Helpers
 sys.path.append(os.environ["CODE"])
 from downloaded_transcode_mp4 import transcode_mp4
 from downloaded_transcode_mp4_watermark import transcode_mp4_access
+from downloaded_transcode_plan import parse_renditions, transcode_renditions
 from downloaded_transcode_prores import transcode_mov
 
 import adlib_v3 as adlib
+import email_outbox
+import request_store
+import space_ledger
+from download_scheduler import Deferred, DownloadJob, DownloadScheduler, Stage
 
 # GLOBAL VARIABLES
 CID_API: Final = os.environ["CID_API3"]
@@ -83,6 +106,16 @@ DATABASE: Final = os.path.join(CODEPTH, "dpi_downloader/database_transcode.db")
 EMAIL_SENDER: Final = os.environ["EMAIL_SEND"]
 EMAIL_PSWD: Final = os.environ["EMAIL_PASS"]
 FMT: Final = "%Y-%m-%d %H:%M:%s"
+TAPE_WORKERS: Final = 2
+CHECKSUM_WORKERS: Final = 2
+TRANSCODE_WORKERS: Final = 2
+SHORTEST_FIRST: Final = "--shortest-first" in sys.argv
+BULK_LOCK = threading.Lock()
+STORE: Final = request_store.RequestStore(
+    DATABASE, "DOWNLOADS", request_store.TRANSCODE_COLUMNS
+)
+OUTBOX: Final = email_outbox.EmailOutbox(os.path.join(LOG_PATH, "dpi_email_outbox.db"))
+LEDGER: Final = space_ledger.SpaceLedger(os.path.join(LOG_PATH, "dpi_space_ledger.db"))
 
 # Set up logging
 LOGGER = logging.getLogger("schedule_database_downloader_transcode")
@@ -264,6 +297,20 @@ def get_bp_md5(fname: str, bucket: str) -> str:
         return md5.replace('"', "")
 
 
+def get_bp_length(fname: str, bucket: str) -> int:
+    """
+    Fetch BP object size in bytes
+    for shortest first ordering
+    """
+    query = ds3.HeadObjectRequest(bucket, fname)
+    try:
+        result = CLIENT.head_object(query)
+        return int(result.response.msg["Content-Length"])
+    except Exception as err:
+        print(err)
+        return 0
+
+
 def make_check_md5(fpath: str, fname: str, bucket: str) -> tuple[str, str]:
     """
     Generate MD5 for fpath
@@ -295,24 +342,9 @@ def retrieve_requested() -> list[str]:
     """
     requested_data = []
     try:
-        sqlite_connection = sqlite3.connect(DATABASE)
-        cursor = sqlite_connection.cursor()
-        print("Database connected successfully")
-
-        cursor.execute('''SELECT * FROM DOWNLOADS WHERE status = "Requested"''')
-        data = cursor.fetchall()
-        print(data)
-        for row in data:
-            print(type(row), row)
-            if row[-2] == "Requested":
-                requested_data.append(row)
-        cursor.close()
+        requested_data = STORE.fetch_by_status("Requested")
     except sqlite3.Error as err:
         LOGGER.warning("%s", err)
-    finally:
-        if sqlite_connection:
-            sqlite_connection.close()
-            print("Database connection closed")
 
     # Sort for unique tuples only in list
     sorted_data = remove_duplicates(requested_data)
@@ -336,22 +368,10 @@ def update_table(fname: str, trans: str, new_status: str) -> None:
     data, for fname match
     """
     try:
-        sqlite_connection = sqlite3.connect(DATABASE)
-        cursor = sqlite_connection.cursor()
-        # Update row with new status
-        sql_query = (
-            """UPDATE DOWNLOADS SET status = ? WHERE fname = ? AND transcode = ?"""
-        )
-        data = (new_status, fname, trans)
-        cursor.execute(sql_query, data)
-        sqlite_connection.commit()
+        STORE.update_status(new_status, fname=fname, transcode=trans)
         print(f"Record updated with new status {new_status}")
-        cursor.close()
     except sqlite3.Error as err:
         LOGGER.warning("Failed to update database: %s", err)
-    finally:
-        if sqlite_connection:
-            sqlite_connection.close()
 
 
 def check_download_exists(
@@ -381,10 +401,400 @@ def check_download_exists(
     return new_fpath, skip_download
 
 
+def check_for_cancellation(fname: str, transcode: str) -> Optional[str]:
+    """
+    Current status of a request row, so a
+    row set to 'Cancelled' stops between stages
+    """
+    try:
+        return STORE.get_status(fname=fname, transcode=transcode)
+    except sqlite3.Error as err:
+        LOGGER.warning("%s", err)
+    return None
+
+
+def make_job(
+    row_data: dict[str, str],
+    download_fpath: str,
+    filename: str,
+    orig_fname: str,
+    bucket: str,
+    new_fpath: str,
+    skip_download: bool,
+    request: Optional[dict],
+) -> DownloadJob:
+    """
+    Scheduler job for one media file, sized from
+    Black Pearl when shortest first ordering is on
+    """
+    size = 0
+    if SHORTEST_FIRST and not skip_download:
+        size = get_bp_length(filename, bucket)
+    return DownloadJob(
+        job_id=row_data["fname"],
+        user=row_data["username"],
+        size=size,
+        data={
+            "fname": row_data["fname"],
+            "email": row_data["email"],
+            "transcode": row_data["transcode"],
+            "download_fpath": download_fpath,
+            "filename": filename,
+            "orig_fname": orig_fname,
+            "bucket": bucket,
+            "new_fpath": new_fpath,
+            "skip_download": skip_download,
+            "bulk": request,
+        },
+    )
+
+
+def build_single_job(
+    row_data: dict[str, str], download_fpath: str
+) -> Optional[DownloadJob]:
+    """
+    CID lookups and checks for a single file
+    request, returning its scheduler job
+    """
+    fname = row_data["fname"]
+    transcode = row_data["transcode"]
+    media_priref, orig_fname, bucket = get_media_original_filename(fname)
+    if not media_priref:
+        LOGGER.warning("Filename is not recognised, no matching CID Media record")
+        update_table(fname, transcode, "Filename not in CID")
+        return None
+    if "netflix" in str(bucket) or "amazon" in str(bucket):
+        LOGGER.warning("Filename is a Netflix/Amazon item and will not be downloaded")
+        update_table(fname, transcode, "Filename not accessible")
+        return None
+    LOGGER.info(
+        "Download file request matched to CID file %s media record %s",
+        orig_fname,
+        media_priref,
+    )
+
+    # Check if download already exists
+    new_fpath, skip_download = check_download_exists(
+        download_fpath, orig_fname, fname, transcode
+    )
+    if not new_fpath:
+        update_table(fname, transcode, "Download complete, no transcode required")
+        LOGGER.warning(
+            "Downloaded file (no transcode) in location already. Skipping further processing."
+        )
+        return None
+
+    return make_job(
+        row_data,
+        download_fpath,
+        fname,
+        orig_fname,
+        bucket,
+        new_fpath,
+        skip_download,
+        None,
+    )
+
+
+def build_bulk_jobs(row_data: dict[str, str], download_fpath: str) -> list[DownloadJob]:
+    """
+    Expand a bulk pointer file request into one
+    scheduler job per media file, sharing a
+    request dict for the closing email
+    """
+    fname = row_data["fname"]
+    transcode = row_data["transcode"]
+    print(f"Finding prirefs from Pointer file with number: {fname}")
+    if not fname.isnumeric():
+        update_table(fname, transcode, "Error with pointer file number")
+        LOGGER.warning(
+            "Bulk download request. Error with pointer file number: %s.", fname
+        )
+        return []
+    priref_list = get_prirefs(fname)
+    if len(priref_list) > 50:
+        update_table(fname, transcode, "Pointer file over 50 CID items")
+        LOGGER.warning(
+            "Bulk download request. Too many pointer file entries for download maximum of 50: %s.",
+            len(priref_list),
+        )
+        return []
+    LOGGER.info(
+        "Bulk download requested with %s item prirefs to process.",
+        len(priref_list),
+    )
+    pointer_dct = get_dictionary(priref_list)
+    if not any(pointer_dct.values()):
+        update_table(fname, transcode, "Pointer file found no digital media records")
+        LOGGER.warning(
+            "CID item number supplied in pointer file have no associated CID digital media records: %s",
+            pointer_dct,
+        )
+        return []
+
+    request = {
+        "email": row_data["email"],
+        "download_fpath": download_fpath,
+        "remaining": 0,
+        "cancelled": False,
+        "files_processed": {},
+    }
+    jobs = []
+    for media_priref, download_dct in pointer_dct.items():
+        LOGGER.info("** Queueing digital items for CID item record %s", media_priref)
+        for file in download_dct:
+            for filename, (orig_fname, bucket) in file.items():
+                print(
+                    f"Media priref {media_priref} Filename {filename} Original name {orig_fname} in bucket {bucket}"
+                )
+                if not len(filename) > 0:
+                    LOGGER.warning(
+                        "Filename is not recognised, no matching CID Media record"
+                    )
+                    continue
+                if "netflix" in str(bucket) or "amazon" in str(bucket):
+                    LOGGER.warning(
+                        "Filename is a Netflix/Amazon item and will not be downloaded"
+                    )
+                    update_table(fname, transcode, "Filename not accessible")
+                    continue
+                LOGGER.info(
+                    "Download file request matched to CID file %s media record %s",
+                    orig_fname,
+                    media_priref,
+                )
+
+                # Check if download already exists
+                new_fpath, skip_download = check_download_exists(
+                    download_fpath, orig_fname, filename, transcode
+                )
+                if not new_fpath:
+                    LOGGER.warning(
+                        "Download path exists and no transcode required. Skipping."
+                    )
+                    continue
+                jobs.append(
+                    make_job(
+                        row_data,
+                        download_fpath,
+                        filename,
+                        orig_fname,
+                        bucket,
+                        new_fpath,
+                        skip_download,
+                        request,
+                    )
+                )
+
+    request["remaining"] = len(jobs)
+    return jobs
+
+
+def is_cancelled(job: DownloadJob) -> bool:
+    """
+    Scheduler check between stages
+    """
+    return check_for_cancellation(job.job_id, job.data["transcode"]) == "Cancelled"
+
+
+def job_owner(job: DownloadJob) -> str:
+    """
+    Ledger owner key for one job's reservations
+    """
+    return f"{job.job_id}:{job.data['filename']}"
+
+
+def download_size(job: DownloadJob) -> int:
+    """
+    Black Pearl object length, 0 if unknown
+    """
+    if not job.size:
+        job.size = get_bp_length(job.data["filename"], job.data["bucket"])
+    return job.size
+
+
+def reserve_space(job: DownloadJob, path: str, nbytes: int) -> Optional[int]:
+    """
+    Reserve nbytes for a write to path, returning
+    the reservation ID. None if size is unknown,
+    raises Deferred if the volume cannot take it
+    """
+    if not nbytes:
+        return None
+    res_id = LEDGER.reserve(path, nbytes, job_owner(job))
+    if res_id is None:
+        raise Deferred(f"Not enough space for {nbytes} bytes at {path}")
+    return res_id
+
+
+def retrieve_stage(job: DownloadJob) -> bool:
+    """
+    Tape retrieval from Black Pearl, holding a
+    space reservation for the download
+    """
+    data = job.data
+    if data["skip_download"]:
+        return True
+    res_id = reserve_space(
+        job, os.path.join(data["download_fpath"], data["filename"]), download_size(job)
+    )
+    try:
+        return retrieve_file(job)
+    finally:
+        if res_id:
+            LEDGER.release(res_id)
+
+
+def retrieve_file(job: DownloadJob) -> bool:
+    """
+    Single Black Pearl GET for a job and
+    rename UMID to original filename
+    """
+    data = job.data
+    fname = data["fname"]
+    filename = data["filename"]
+    transcode = data["transcode"]
+    LOGGER.info("Beginning download of file %s to download path", filename)
+    if data["bulk"]:
+        update_table(fname, transcode, f"Downloading {data['orig_fname']}")
+    else:
+        update_table(fname, transcode, "Downloading")
+    download_job_id = download_bp_object(
+        filename, data["download_fpath"], data["bucket"]
+    )
+    if download_job_id == "404":
+        LOGGER.warning(
+            "Download of file %s failed. File not found in Black Pearl tape library.",
+            filename,
+        )
+        if not data["bulk"]:
+            update_table(fname, transcode, "Filename not found in Black Pearl")
+        return False
+    if not download_job_id:
+        LOGGER.warning(
+            "Download of file %s failed. Resetting download status.", filename
+        )
+        if not data["bulk"]:
+            update_table(fname, transcode, "Requested")
+        return False
+    LOGGER.info("Downloaded file retrieved successfully. Job ID: %s", download_job_id)
+
+    if str(data["orig_fname"]).strip() != str(filename).strip():
+        LOGGER.info(
+            "Updating download UMID filename with item filename: %s",
+            data["orig_fname"],
+        )
+        umid_fpath = os.path.join(data["download_fpath"], filename)
+        os.rename(umid_fpath, data["new_fpath"])
+    return True
+
+
+def checksum_stage(job: DownloadJob) -> bool:
+    """
+    MD5 verification against Black Pearl ETag
+    """
+    data = job.data
+    if data["skip_download"]:
+        return True
+    local_md5, bp_md5 = make_check_md5(
+        data["new_fpath"], data["filename"], data["bucket"]
+    )
+    LOGGER.info(
+        "MD5 checksum validation check:\n\t%s - Downloaded file MD5\n\t%s - Black Pearl retrieved MD5",
+        local_md5,
+        bp_md5,
+    )
+    if local_md5 == bp_md5:
+        LOGGER.info(
+            "MD5 checksums match. Updating Download status to Download database"
+        )
+    else:
+        LOGGER.warning(
+            "MD5 checksums DO NOT match. Updating Download status to Download database"
+        )
+    if not data["bulk"]:
+        update_table(data["fname"], data["transcode"], "Download complete")
+    return True
+
+
+def transcode_stage(job: DownloadJob) -> bool:
+    """
+    Transcode then remove the download unless
+    the transcode failed on an existing file
+    """
+    data = job.data
+    new_fpath = data["new_fpath"]
+    estimate = 0
+    if os.path.isfile(new_fpath):
+        estimate = space_ledger.estimate_transcode(new_fpath, data["transcode"])
+    res_id = reserve_space(job, data["download_fpath"], estimate)
+    try:
+        trans, failed_trans = create_transcode(
+            new_fpath, data["transcode"], data["fname"]
+        )
+    finally:
+        if res_id:
+            LEDGER.release(res_id)
+
+    # Delete source download from DPI if not failed transcode/already found in path
+    if trans == "no_transcode":
+        LOGGER.info("No transcode requested for this asset.")
+    elif not data["skip_download"] or not failed_trans:
+        LOGGER.info("Deleting downloaded asset: %s", new_fpath)
+        os.remove(new_fpath)
+    data["trans"] = trans
+    return True
+
+
+def complete_job(job: DownloadJob) -> None:
+    """
+    Scheduler completion: email single requests,
+    and close bulk requests once every file is done
+    """
+    data = job.data
+    LEDGER.release_owner(job_owner(job))
+    if job.cancelled:
+        LOGGER.warning("File download has been cancelled. Skipping further processing.")
+    request = data["bulk"]
+    if request is None:
+        if job.deferred:
+            LOGGER.warning("Returning deferred request to queue: %s", job.deferred)
+            update_table(data["fname"], data["transcode"], "Requested")
+        elif "trans" in data:
+            send_email_update(
+                data["email"], data["fname"], data["new_fpath"], data["trans"]
+            )
+        return
+
+    with BULK_LOCK:
+        if job.cancelled:
+            request["cancelled"] = True
+        elif "trans" in data:
+            request["files_processed"][data["orig_fname"]] = f"{data['trans']}"
+        elif job.deferred:
+            request["files_processed"][data["orig_fname"]] = "deferred"
+        request["remaining"] -= 1
+        if request["remaining"] > 0:
+            return
+
+    # Send notification email
+    files_processed = request["files_processed"]
+    if request["cancelled"] or len(files_processed) == 0:
+        return
+    LOGGER.info("Files processed: %s", files_processed)
+    send_email_update_bulk(request["email"], request["download_fpath"], files_processed)
+    update_table(
+        data["fname"],
+        data["transcode"],
+        "Bulk download complete. See email for details",
+    )
+
+
 def main():
     """
-    Retrieve 'Requested' rows from database.db as list of
-    tuples and process one at a time.
+    Retrieve 'Requested' rows from database.db, build
+    a job per file then run the staged scheduler so
+    downloads, checksums and transcodes overlap
     """
     data = retrieve_requested()
     if len(data) == 0:
@@ -395,22 +805,28 @@ def main():
         len(data),
         datetime.now().strftime(FMT)[:19],
     )
+    jobs = []
     for row in data:
         check_control()
-        username = row[0].strip()
-        email = row[1].strip()
-        fname = row[3].strip()
-        dtype = row[2].strip()
-        dpath = row[4].strip()
-        dfolder = row[5].strip()
-        transcode = row[6].strip()
+        row_data = {
+            "username": row[0].strip(),
+            "email": row[1].strip(),
+            "fname": row[3].strip(),
+            "dtype": row[2].strip(),
+            "dpath": row[4].strip(),
+            "dfolder": row[5].strip(),
+            "transcode": row[6].strip(),
+        }
+        fname = row_data["fname"]
+        dpath = row_data["dpath"]
+        transcode = row_data["transcode"]
         LOGGER.info(
             "** New data for download:\n\t- User %s, email %s, file %s,\n\t- Downloading to %s in %s folder. Transcode? %s",
-            username,
-            email,
+            row_data["username"],
+            row_data["email"],
             fname,
             dpath,
-            dfolder,
+            row_data["dfolder"],
             transcode,
         )
 
@@ -422,254 +838,42 @@ def main():
             update_table(fname, transcode, "Download path invalid")
             continue
 
-        download_fpath = os.path.join(dpath, dfolder)
+        download_fpath = os.path.join(dpath, row_data["dfolder"])
         print(download_fpath)
         if not os.path.exists(download_fpath):
             os.makedirs(download_fpath, mode=0o777, exist_ok=True)
             LOGGER.info("Download file path created: %s", download_fpath)
 
-        # Single download
-        if dtype == "single":
-            # Try to locate CID media record for file
-            media_priref, orig_fname, bucket = get_media_original_filename(fname)
-            if not media_priref:
-                LOGGER.warning(
-                    "Filename is not recognised, no matching CID Media record"
-                )
-                update_table(fname, transcode, "Filename not in CID")
-                continue
-            if "netflix" in str(bucket) or "amazon" in str(bucket):
-                LOGGER.warning(
-                    "Filename is a Netflix/Amazon item and will not be downloaded"
-                )
-                update_table(fname, transcode, "Filename not accessible")
-                continue
-            LOGGER.info(
-                "Download file request matched to CID file %s media record %s",
-                orig_fname,
-                media_priref,
-            )
-
-            # Check if download already exists
-            new_fpath, skip_download = check_download_exists(
-                download_fpath, orig_fname, fname, transcode
-            )
-            if not new_fpath:
-                update_table(
-                    fname, transcode, "Download complete, no transcode required"
-                )
-                LOGGER.warning(
-                    "Downloaded file (no transcode) in location already. Skipping further processing."
-                )
-                continue
-            if not skip_download:
-                # Download from BP
-                LOGGER.info("Beginning download of file %s to download path", fname)
-                update_table(fname, transcode, "Downloading")
-                download_job_id = download_bp_object(fname, download_fpath, bucket)
-                if download_job_id == "404":
-                    LOGGER.warning(
-                        "Download of file %s failed. File not found in Black Pearl tape library.",
-                        fname,
-                    )
-                    update_table(fname, transcode, "Filename not found in Black Pearl")
-                    continue
-                if not download_job_id:
-                    LOGGER.warning(
-                        "Download of file %s failed. Resetting download status and script exiting.",
-                        fname,
-                    )
-                    update_table(fname, transcode, "Requested")
-                    continue
-                LOGGER.info(
-                    "Downloaded file retrieved successfully. Job ID: %s",
-                    download_job_id,
-                )
-                if str(orig_fname).strip() != str(fname).strip():
-                    LOGGER.info(
-                        "Updating download UMID filename with item filename: %s",
-                        orig_fname,
-                    )
-                    umid_fpath = os.path.join(download_fpath, fname)
-                    os.rename(umid_fpath, new_fpath)
-
-                # MD5 Verification
-                local_md5, bp_md5 = make_check_md5(new_fpath, fname, bucket)
-                LOGGER.info(
-                    "MD5 checksum validation check:\n\t%s - Downloaded file MD5\n\t%s - Black Pearl retrieved MD5",
-                    local_md5,
-                    bp_md5,
-                )
-                if local_md5 == bp_md5:
-                    LOGGER.info(
-                        "MD5 checksums match. Updating Download status to Download database"
-                    )
-                else:
-                    LOGGER.warning(
-                        "MD5 checksums DO NOT match. Updating Download status to Download database"
-                    )
-                update_table(fname, transcode, "Download complete")
-
-            # Transcode
-            trans, failed_trans = create_transcode(new_fpath, transcode, fname)
-
-            # Delete source download from DPI if not failed transcode/already found in path
-            if trans == "no_transcode":
-                LOGGER.info("No transcode requested for this asset.")
-            elif not skip_download or not failed_trans:
-                LOGGER.info("Deleting downloaded asset: %s", new_fpath)
-                os.remove(new_fpath)
-            # Send notification email
-            send_email_update(email, fname, new_fpath, trans)
-
-        # dtype is bulk
+        if row_data["dtype"] == "single":
+            job = build_single_job(row_data, download_fpath)
+            if job:
+                jobs.append(job)
         else:
-            files_processed = {}
-            print(f"Finding prirefs from Pointer file with number: {fname}")
-            if not fname.isnumeric():
-                update_table(fname, transcode, "Error with pointer file number")
-                LOGGER.warning(
-                    "Bulk download request. Error with pointer file number: %s.", fname
-                )
-                continue
-            priref_list = get_prirefs(fname)
-            if len(priref_list) > 50:
-                update_table(fname, transcode, "Pointer file over 50 CID items")
-                LOGGER.warning(
-                    "Bulk download request. Too many pointer file entries for download maximum of 50: %s.",
-                    len(priref_list),
-                )
-                continue
-            LOGGER.info(
-                "Bulk download requested with %s item prirefs to process.",
-                len(priref_list),
-            )
-            pointer_dct = get_dictionary(priref_list)
-            if not any(pointer_dct.values()):
-                update_table(
-                    fname, transcode, "Pointer file found no digital media records"
-                )
-                LOGGER.warning(
-                    "CID item number supplied in pointer file have no associated CID digital media records: %s",
-                    pointer_dct,
-                )
-                continue
-            # update_table(fname, transcode, 'Processing bulk request')
-            for key, value in pointer_dct.items():
-                media_priref = key
-                print(key)
-                LOGGER.info(
-                    "** Downloading digital items for CID item record %s", media_priref
-                )
-                download_dct = value
-                print(value)
-                for file in download_dct:
-                    for k, v in file.items():
-                        filename = k
-                        orig_fname = v[0]
-                        bucket = v[1]
-                        print(
-                            f"Media priref {media_priref} Filename {filename} Original name {orig_fname} in bucket {bucket}"
-                        )
-                        if not len(filename) > 0:
-                            LOGGER.warning(
-                                "Filename is not recognised, no matching CID Media record"
-                            )
-                            continue
-                        if "netflix" in str(bucket) or "amazon" in str(bucket):
-                            LOGGER.warning(
-                                "Filename is a Netflix/Amazon item and will not be downloaded"
-                            )
-                            update_table(fname, transcode, "Filename not accessible")
-                            continue
-                        LOGGER.info(
-                            "Download file request matched to CID file %s media record %s",
-                            orig_fname,
-                            media_priref,
-                        )
-
-                        # Check if download already exists
-                        new_fpath, skip_download = check_download_exists(
-                            download_fpath, orig_fname, filename, transcode
-                        )
-                        if not new_fpath:
-                            LOGGER.warning(
-                                "Download path exists and no transcode required. Skipping."
-                            )
-                            continue
-                        if not skip_download:
-                            # Download from BP
-                            LOGGER.info(
-                                "Beginning download of file %s to download path",
-                                filename,
-                            )
-                            update_table(fname, transcode, f"Downloading {orig_fname}")
-                            download_job_id = download_bp_object(
-                                filename, download_fpath, bucket
-                            )
-                            if download_job_id == "404":
-                                LOGGER.warning(
-                                    "Download of file %s failed. File not found in Black Pearl tape library.",
-                                    filename,
-                                )
-                                continue
-                            elif not download_job_id:
-                                LOGGER.warning(
-                                    "Download of file %s failed. Resetting download status and script exiting.",
-                                    filename,
-                                )
-                                continue
-                            LOGGER.info(
-                                "Downloaded file retrieved successfully. Job ID: %s",
-                                download_job_id,
-                            )
-                            if str(orig_fname).strip() != str(filename).strip():
-                                LOGGER.info(
-                                    "Updating download UMID filename with item filename: %s",
-                                    orig_fname,
-                                )
-                                umid_fpath = os.path.join(download_fpath, filename)
-                                os.rename(umid_fpath, new_fpath)
-
-                            # MD5 Verification
-                            local_md5, bp_md5 = make_check_md5(
-                                new_fpath, filename, bucket
-                            )
-                            LOGGER.info(
-                                "MD5 checksum validation check:\n\t%s - Downloaded file MD5\n\t%s - Black Pearl retrieved MD5",
-                                local_md5,
-                                bp_md5,
-                            )
-                            if local_md5 == bp_md5:
-                                LOGGER.info(
-                                    "MD5 checksums match. Updating Download status to Download database"
-                                )
-                            else:
-                                LOGGER.warning(
-                                    "MD5 checksums DO NOT match. Updating Download status to Download database"
-                                )
-
-                        # Transcode
-                        trans, failed_trans = create_transcode(
-                            new_fpath, transcode, fname
-                        )
-
-                        # Delete source download from DPI if not failed transcode/already found in path
-                        if trans == "no_transcode":
-                            LOGGER.info("No transcode requested for this asset.")
-                        elif not skip_download or not failed_trans:
-                            LOGGER.info("Deleting downloaded asset: %s", new_fpath)
-                            os.remove(new_fpath)
-                        files_processed[orig_fname] = f"{trans}"
-
-            # Send notification email
-            if len(files_processed) == 0:
-                continue
-            LOGGER.info("Files processed: %s", files_processed)
-            send_email_update_bulk(email, download_fpath, files_processed)
-            update_table(
-                fname, transcode, "Bulk download complete. See email for details"
-            )
+            jobs.extend(build_bulk_jobs(row_data, download_fpath))
+
+    LOGGER.info(
+        "Scheduling %s file jobs. Shortest first: %s", len(jobs), SHORTEST_FIRST
+    )
+    scheduler = DownloadScheduler(
+        [
+            Stage("tape_retrieval", retrieve_stage, TAPE_WORKERS),
+            Stage("checksum", checksum_stage, CHECKSUM_WORKERS),
+            Stage("transcode", transcode_stage, TRANSCODE_WORKERS),
+        ],
+        is_cancelled=is_cancelled,
+        on_complete=complete_job,
+        shortest_first=SHORTEST_FIRST,
+    )
+    sender = email_outbox.OutboxSender(
+        OUTBOX,
+        email_outbox.smtp_ssl_connect("smtp.gmail.com", 465, EMAIL_SENDER, EMAIL_PSWD),
+        sender=EMAIL_SENDER,
+    )
+    sender.start()
+    try:
+        scheduler.run(jobs)
+    finally:
+        sender.stop()
 
     LOGGER.info(
         "================ DPI DOWNLOAD REQUESTS COMPLETED. Date: %s =================\n",
@@ -706,6 +910,9 @@ def create_transcode(
     """
     trans = None
     failed_trans = False
+    renditions = parse_renditions(transcode)
+    if len(renditions) > 1 or renditions == ["mp4_watermark"]:
+        return create_renditions(new_fpath, transcode, fname, renditions)
     if transcode == "prores":
         LOGGER.info(
             "Transcode to ProRes requested, launching ProRes transcode script..."
@@ -789,6 +996,40 @@ def create_transcode(
     return trans, failed_trans
 
 
+def create_renditions(
+    new_fpath: str, transcode: str, fname: str, renditions: list[str]
+) -> tuple[str, bool]:
+    """
+    Make several renditions (or the watermark MP4)
+    from one decode of the download. Returns the
+    email status for each, comma separated
+    """
+    LOGGER.info("Transcode to %s requested. Launching transcode...", renditions)
+    update_table(fname, transcode, f"Transcoding {fname} to {', '.join(renditions)}")
+    results = transcode_renditions(new_fpath, renditions)
+    if isinstance(results, str):
+        LOGGER.warning("Failed to complete transcode. Reason: %s", results)
+        results = dict.fromkeys(renditions, "transcode fail")
+
+    statuses = []
+    for rendition in renditions:
+        success = results[rendition]
+        if success == "True":
+            statuses.append(rendition)
+        elif success == "exists":
+            statuses.append("exists")
+        elif rendition == "prores":
+            statuses.append("Failed prores")
+        else:
+            statuses.append("Failed mp4 access")
+    failed_trans = any(status not in renditions for status in statuses)
+    if failed_trans:
+        update_table(fname, transcode, "Download and transcode failed")
+    else:
+        update_table(fname, transcode, "Download and transcode complete")
+    return ",".join(statuses), failed_trans
+
+
 def send_email_update(
     email: str, fname: str, download_fpath: str, tran_status: str
 ) -> None:
@@ -797,30 +1038,47 @@ def send_email_update(
     downloaded, with path, folder and
     filename of downloaded file
     """
-    import smtplib
-    import ssl
-    from email.message import EmailMessage
-
-    if tran_status == "prores":
-        mssg = "Your transcode to ProRes has completed and replaces your DPI downloaded file above, appended '_prores.mov'."
-    elif tran_status == "mp4":
-        mssg = "Your MP4 access copy and image files have been created for the DPI browser, no file will be found in the DPI location stated above."
-    elif tran_status == "Failed prores":
-        mssg = "Your transcode to ProRes has failed. Please request this file has a ProRes MOV creating manually."
-    elif tran_status == "Failed mp4":
-        mssg = "Your MP4 proxy file request failed. Please request this file has an MP4 proxy and images creating manually."
-    elif tran_status == "Failed mp4 access":
-        mssg = "Your MP4 access request failed. Please request this file has an MP4 access copy (with/without watermark) creating manually."
-    elif tran_status == "wrong file":
-        mssg = "Your MP4 access copy request failed because the file supplied was not video or image file."
-    elif tran_status == "exists":
-        mssg = "Your transcode file already exists in the correct location."
-    elif tran_status == "mp4_watermark":
-        mssg = "Your MP4 access copy with watermark has been created and replaces the download file above, appended '_watermark.mp4'."
-    elif tran_status == "mp4_access":
-        mssg = "Your MP4 access copy has been created and replaces the download file above, appended '_access.mp4'."
-    elif tran_status == "no_transcode":
-        mssg = "No transcode was requested for this download."
+    messages = []
+    for status in tran_status.split(","):
+        if status == "prores":
+            messages.append(
+                "Your transcode to ProRes has completed and replaces your DPI downloaded file above, appended '_prores.mov'."
+            )
+        elif status == "mp4":
+            messages.append(
+                "Your MP4 access copy and image files have been created for the DPI browser, no file will be found in the DPI location stated above."
+            )
+        elif status == "Failed prores":
+            messages.append(
+                "Your transcode to ProRes has failed. Please request this file has a ProRes MOV creating manually."
+            )
+        elif status == "Failed mp4":
+            messages.append(
+                "Your MP4 proxy file request failed. Please request this file has an MP4 proxy and images creating manually."
+            )
+        elif status == "Failed mp4 access":
+            messages.append(
+                "Your MP4 access request failed. Please request this file has an MP4 access copy (with/without watermark) creating manually."
+            )
+        elif status == "wrong file":
+            messages.append(
+                "Your MP4 access copy request failed because the file supplied was not video or image file."
+            )
+        elif status == "exists":
+            messages.append(
+                "Your transcode file already exists in the correct location."
+            )
+        elif status == "mp4_watermark":
+            messages.append(
+                "Your MP4 access copy with watermark has been created and replaces the download file above, appended '_watermark.mp4'."
+            )
+        elif status == "mp4_access":
+            messages.append(
+                "Your MP4 access copy has been created and replaces the download file above, appended '_access.mp4'."
+            )
+        elif status == "no_transcode":
+            messages.append("No transcode was requested for this download.")
+    mssg = " ".join(messages)
 
     name_extracted = email.split(".")[0]
     subject = "DPI file download request completed"
@@ -843,19 +1101,8 @@ This is an automated notification, please do not reply to this email.
 Thank you,
 Digital Preservation team"""
 
-    send_mail = EmailMessage()
-    send_mail["From"] = EMAIL_SENDER
-    send_mail["To"] = email
-    send_mail["Subject"] = subject
-    send_mail.set_content(body)
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as smtp:
-        try:
-            smtp.login(EMAIL_SENDER, EMAIL_PSWD)
-            smtp.sendmail(EMAIL_SENDER, email, send_mail.as_string())
-            LOGGER.info("Email notification sent to %s", email)
-        except Exception as exc:
-            LOGGER.warning("Email notification failed in sending: %s\n%s", email, exc)
+    OUTBOX.enqueue(email, subject, body, digest="dpi_download", sender=EMAIL_SENDER)
+    LOGGER.info("Email notification queued for %s", email)
 
 
 def send_email_update_bulk(
@@ -866,50 +1113,53 @@ def send_email_update_bulk(
     downloaded, with path, folder and
     filename of downloaded file
     """
-    import smtplib
-    import ssl
-    from email.message import EmailMessage
-
     file_list = []
     for key, value in files_processed.items():
-        if value == "prores":
-            file_list.append(
-                f"{key}. ProRes transcode completed and is appended '_prores.mov'."
-            )
-        elif value == "mp4":
-            file_list.append(
-                f"{key}. MP4 proxy video and images files created. DPI download has been deleted."
-            )
-        elif value == "Failed prores":
-            file_list.append(
-                f"{key}. ProRes transcode failed. DPI download left in path for manual transcode."
-            )
-        elif value == "Failed mp4":
-            file_list.append(
-                f"{key}. MP4 proxy video and image creation failed. DPI download left in path for manual transcode."
-            )
-        elif value == "Failed mp4 access":
-            file_list.append(
-                f"{key}. MP4 video transcode failed. DPI download left in path for manual transcode.."
-            )
-        elif value == "wrong file":
-            file_list.append(
-                f"{key}. MP4 proxy video and image creation failed. DPI download is not video or image file."
-            )
-        elif value == "exists":
-            file_list.append(
-                f"{key}. MP4 proxy video or image file already exists in the correct location."
-            )
-        elif value == "mp4_watermark":
-            file_list.append(
-                f"{key}. MP4 watermark transcode completed and appended '_watermark.mp4'."
-            )
-        elif value == "mp4_access":
-            file_list.append(
-                f"{key}. MP4 transcode completed and appended '_access.mp4'."
-            )
-        elif value == "no_transcode":
-            file_list.append(f"{key}. No transcode was requested for this download.")
+        for status in value.split(","):
+            if status == "prores":
+                file_list.append(
+                    f"{key}. ProRes transcode completed and is appended '_prores.mov'."
+                )
+            elif status == "mp4":
+                file_list.append(
+                    f"{key}. MP4 proxy video and images files created. DPI download has been deleted."
+                )
+            elif status == "Failed prores":
+                file_list.append(
+                    f"{key}. ProRes transcode failed. DPI download left in path for manual transcode."
+                )
+            elif status == "Failed mp4":
+                file_list.append(
+                    f"{key}. MP4 proxy video and image creation failed. DPI download left in path for manual transcode."
+                )
+            elif status == "Failed mp4 access":
+                file_list.append(
+                    f"{key}. MP4 video transcode failed. DPI download left in path for manual transcode.."
+                )
+            elif status == "wrong file":
+                file_list.append(
+                    f"{key}. MP4 proxy video and image creation failed. DPI download is not video or image file."
+                )
+            elif status == "exists":
+                file_list.append(
+                    f"{key}. MP4 proxy video or image file already exists in the correct location."
+                )
+            elif status == "mp4_watermark":
+                file_list.append(
+                    f"{key}. MP4 watermark transcode completed and appended '_watermark.mp4'."
+                )
+            elif status == "mp4_access":
+                file_list.append(
+                    f"{key}. MP4 transcode completed and appended '_access.mp4'."
+                )
+            elif status == "no_transcode":
+                file_list.append(
+                    f"{key}. No transcode was requested for this download."
+                )
+            elif status == "deferred":
+                file_list.append(
+                    f"{key}. Not enough storage space to download, please request again."
+                )
 
     name_extracted = email.split(".")[0]
     subject = "DPI bulk file download request completed"
@@ -932,19 +1182,8 @@ This is an automated notification, please do not reply to this email.
 Thank you,
 Digital Preservation team"""
 
-    send_mail = EmailMessage()
-    send_mail["From"] = EMAIL_SENDER
-    send_mail["To"] = email
-    send_mail["Subject"] = subject
-    send_mail.set_content(body)
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as smtp:
-        try:
-            smtp.login(EMAIL_SENDER, EMAIL_PSWD)
-            smtp.sendmail(EMAIL_SENDER, email, send_mail.as_string())
-            LOGGER.info("Email notification sent to %s", email)
-        except Exception as exc:
-            LOGGER.warning("Email notification failed in sending: %s\n%s", email, exc)
+    OUTBOX.enqueue(email, subject, body, digest="dpi_download", sender=EMAIL_SENDER)
+    LOGGER.info("Email notification queued for %s", email)
 
 
 if __name__ == "__main__":
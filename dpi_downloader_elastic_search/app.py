@@ -15,11 +15,15 @@ import datetime
 import itertools
 import os
 import re
-import sqlite3
+import sys
 
 from elasticsearch import Elasticsearch
 from flask import Flask, render_template, request
 
+sys.path.append(os.environ["CODE"])
+import request_dashboard
+import request_store
+
 # Initiate Flask app / Elastic search
 app = Flask(__name__)
 
@@ -40,9 +44,12 @@ else:
 
 # Global variables / connect or create database.db
 DBASE = os.environ["DATABASE_NEWS_PRESERVATION"]
-CONNECT = sqlite3.connect(DBASE)
-CONNECT.execute(
-    "CREATE TABLE IF NOT EXISTS DOWNLOADS (name TEXT, email TEXT, preservation_date TEXT, channel TEXT, status TEXT, date TEXT)"
+STORE = request_store.RequestStore(
+    DBASE, "DOWNLOADS", request_store.NEWS_PRESERVATION_COLUMNS
+)
+app.register_blueprint(
+    request_dashboard.dashboard_blueprint("moves", STORE),
+    url_prefix="/dpi_move",
 )
 
 FLASK_HOST = os.environ["FLASK_HOST"]
@@ -105,13 +112,16 @@ def dpi_move_request():
         # Check for non-BFI email and reject
         if "bfi.org.uk" not in email:
             return render_template("email_error.html")
-        with sqlite3.connect(DBASE) as users:
-            cursor = users.cursor()
-            cursor.execute(
-                "INSERT INTO DOWNLOADS (name,email,preservation_date,channel,status,date) VALUES (?,?,?,?,?,?)",
-                (name, email, preservation_date, channel, status, date_stamp),
-            )
-            users.commit()
+        STORE.insert(
+            {
+                "name": name,
+                "email": email,
+                "preservation_date": preservation_date,
+                "channel": channel,
+                "status": status,
+                "date": date_stamp,
+            }
+        )
         return render_template("index.html")
     else:
         return render_template("initiate.html")
@@ -120,13 +130,24 @@ def dpi_move_request():
 @app.route("/dpi_move")
 def dpi_move():
     """
-    Return the View all requested page
+    Return the View all requested page, newest
+    first, one page of the last 14 days at a time.
+    The page then polls the changes API for updates
     """
-    connect = sqlite3.connect(DBASE)
-    cursor = connect.cursor()
-    cursor.execute("SELECT * FROM DOWNLOADS where date >= datetime('now','-14 days')")
-    data = cursor.fetchall()
-    return render_template("dpi_requests.html", data=data)
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", request_store.PER_PAGE, type=int)
+    last_change = STORE.last_change()[0]
+    data, total = STORE.fetch_page(
+        page=page, per_page=per_page, since_days=14, with_id=True
+    )
+    return render_template(
+        "dpi_requests.html",
+        data=data,
+        page=page,
+        per_page=per_page,
+        total=total,
+        last_change=last_change,
+    )
 
 
 @app.route("/dpi_download_request", methods=["GET", "POST"])
@@ -30,6 +30,8 @@ import tenacity
 # Private packages
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import image_utils
+import interval_utils
 import utils
 
 # Global paths from environment vars
@@ -378,8 +380,19 @@ def transcode_mp4(fullpath: str) -> str:
             return "jpeg fail"
 
         # Generate Full size 600x600, thumbnail 300x300 - pass UID original filenames from Imagen if captured
-        full_jpeg = make_jpg(jpeg_location, "full", None, None, maintain_names)
-        thumb_jpeg = make_jpg(jpeg_location, "thumb", None, None, maintain_names)
+        outputs = None
+        if maintain_names:
+            outputs = (
+                os.path.join(transcode_pth, f"{maintain_names[2]}.jpg"),
+                os.path.join(transcode_pth, f"{maintain_names[1]}.jpg"),
+            )
+        full_jpeg, thumb_jpeg = image_utils.make_derivatives(
+            jpeg_location, outputs=outputs
+        )
+        if thumb_jpeg is None:
+            thumb_jpeg = ""
+        if full_jpeg is None:
+            full_jpeg = ""
 
         log_build.append(
             f"{local_time()}\tINFO\tNew images created at {seconds} seconds into video:\n - {full_jpeg}\n - {thumb_jpeg}"
@@ -431,12 +444,14 @@ def transcode_mp4(fullpath: str) -> str:
             log_build.append(f"Creating new transcode path: {transcode_pth}")
             os.makedirs(transcode_pth, mode=0o777, exist_ok=True)
 
-        if not oversize:
-            full_jpeg = make_jpg(fullpath, "full", transcode_pth, None)
-        else:
-            full_jpeg = make_jpg(fullpath, "oversize", transcode_pth, percent)
-
-        thumb_jpeg = make_jpg(fullpath, "thumb", transcode_pth, None)
+        # Decode source once for both large image and thumbnail
+        full_jpeg, thumb_jpeg = image_utils.make_derivatives(
+            fullpath, transcode_pth, percent if oversize else None
+        )
+        if thumb_jpeg is None:
+            thumb_jpeg = ""
+        if full_jpeg is None:
+            full_jpeg = ""
 
         if os.path.isfile(full_jpeg) and os.path.isfile(thumb_jpeg):
             log_build.append(
@@ -522,70 +537,13 @@ def adjust_seconds(duration: int | str, data: str) -> int:
     Adjust second durations within
     FFmpeg detected blackspace
     """
-    blist = retrieve_blackspaces(data)
-    print(f"*** BLACK GAPS: {blist}")
+    starts, ends = interval_utils.parse_detector(data, "black")
+    print(f"*** BLACK GAPS: {list(zip(starts.tolist(), ends.tolist()))}")
     if isinstance(duration, str):
         if "." in duration:
             duration = duration.split(".")[0]
         duration = int(duration)
-    if not blist:
-        return duration // 2
-
-    secs = duration // 4
-    clash = check_seconds(blist, secs)
-    if not clash:
-        return secs
-
-    for num in range(2, 5):
-        frame_secs = duration // num
-        clash = check_seconds(blist, frame_secs)
-        if not clash:
-            return frame_secs
-
-    if len(blist) > 2:
-        first = blist[1].split(" - ")[1]
-        second = blist[2].split(" - ")[0]
-        frame_secs = int(first) + (int(second) - int(first)) // 2
-        if int(first) < frame_secs < int(second):
-            return frame_secs
-
-    return duration // 2
-
-
-def retrieve_blackspaces(data: str) -> list[str]:
-    """
-    Retrieve black detect log and check if
-    second variable falls in blocks of blackdetected
-    """
-    data_list = data.splitlines()
-    time_range = []
-    for line in data_list:
-        if "black_start" in line:
-            split_line = line.split(":")
-            split_start = split_line[1].split(".")[0]
-            start = re.sub("[^0-9]", "", split_start)
-            split_end = split_line[2].split(".")[0]
-            end = re.sub("[^0-9]", "", split_end)
-            # Round up to next second for cover
-            end = str(int(end) + 1)
-            time_range.append(f"{start} - {end}")
-    return time_range
-
-
-def check_seconds(blackspace: list[str], seconds: int) -> Optional[bool]:
-    """
-    Create range and check for second within
-    """
-    clash = []
-    for item in blackspace:
-        start, end = item.split(" - ")
-        st = int(start) - 1
-        ed = int(end) + 1
-        if seconds in range(st, ed):
-            clash.append(seconds)
-
-    if len(clash) > 0:
-        return True
+    return interval_utils.choose_clear_second(duration, starts, ends)
 
 
 def get_jpeg(seconds: int, fullpath: str, outpath: str) -> bool:
@@ -1288,75 +1246,6 @@ def check_for_fl_fr(fpath: str) -> bool:
     return False
 
 
-def make_jpg(
-    filepath: str,
-    arg: str,
-    transcode_pth: Optional[str],
-    percent: Optional[str],
-    orig_names=None,
-) -> str:
-    """
-    Create GM JPEG using command based on argument
-    These command work. For full size don't use resize.
-    """
-    if orig_names is None:
-        orig_names = []
-
-    start_reduce = ["gm", "convert", "-density", "300x300", filepath, "-strip"]
-
-    start = ["gm", "convert", "-density", "600x600", filepath, "-strip"]
-
-    thumb = [
-        "-resize",
-        "x180",
-    ]
-
-    oversize = [
-        "-resize",
-        f"{percent}%x{percent}%",
-    ]
-    # Should only activate for video option transcode (with no transcode_pth)
-    if orig_names:
-        if not transcode_pth:
-            out = os.path.split(filepath)[0]
-            if "thumb" in arg:
-                outfile = f"{out}/{orig_names[1]}.jpg"
-                cmd = start_reduce + thumb + [f"{outfile}"]
-            else:
-                outfile = f"{out}/{orig_names[2]}.jpg"
-                cmd = start + [f"{outfile}"]
-    # Handles Image options and video not replacing old Imagen era filenames
-    else:
-        if not transcode_pth:
-            out = os.path.splitext(filepath)[0]
-        else:
-            fname = os.path.split(filepath)[1]
-            file = os.path.splitext(fname)[0]
-            out = os.path.join(transcode_pth, file)
-        if "thumb" in arg:
-            outfile = f"{out}_thumbnail.jpg"
-            cmd = start_reduce + thumb + [f"{outfile}"]
-        elif "oversize" in arg:
-            outfile = f"{out}_largeimage.jpg"
-            cmd = start + oversize + [f"{outfile}"]
-        else:
-            outfile = f"{out}_largeimage.jpg"
-            cmd = start + [f"{outfile}"]
-
-    try:
-        subprocess.call(cmd)
-    except Exception as err:
-        logger.error(
-            "%s\tERROR\tJPEG creation failed for filepath: %s\n%s",
-            local_time(),
-            filepath,
-            err,
-        )
-    os.chmod(outfile, 0o777)
-    if os.path.exists(outfile):
-        return outfile
-
-
 def conformance_check(file: str) -> str:
     """
     Checks file against MP4 mediaconch policy
@@ -1364,13 +1253,10 @@ def conformance_check(file: str) -> str:
     the transcode was successful
     """
 
-    mediaconch_cmd = ["mediaconch", "--force", "-p", MP4_POLICY, file]
-
     try:
-        success = subprocess.check_output(mediaconch_cmd)
-        success_str = success.decode("utf-8")
+        success, success_str = utils.get_mediaconch(file, MP4_POLICY)
     except Exception as err:
-        success_str = ""
+        success, success_str = False, ""
         logger.warning(
             "%s\tWARNING\tMediaconch policy retrieval failure for %s\n%s",
             local_time(),
@@ -1378,7 +1264,7 @@ def conformance_check(file: str) -> str:
             err,
         )
 
-    if "pass!" in success_str:
+    if success:
         return "PASS!"
     elif success_str.startswith("fail!"):
         return f"FAIL! This policy has failed {success_str}"
@@ -471,21 +471,14 @@ def conformance_check(filepath: str) -> str:
     Checks mediaconch policy against new V210 mov
     """
 
-    mediaconch_cmd = ["mediaconch", "--force", "-p", PRORES_POLICY, filepath]
-
     try:
-        success = subprocess.check_output(mediaconch_cmd)
-        success_str = success.decode("utf-8")
+        success, _ = utils.get_mediaconch(filepath, PRORES_POLICY)
     except Exception:
-        success_str = ""
+        success = False
         logger.exception("Mediaconch policy retrieval failure for %s", filepath)
 
-    if "N/A!" in success_str:
-        return "FAIL!"
-    elif "pass!" in success_str:
+    if success:
         return "PASS!"
-    elif "fail!" in success_str:
-        return "FAIL!"
     else:
         return "FAIL!"
 
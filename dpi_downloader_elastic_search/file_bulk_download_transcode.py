@@ -48,6 +48,27 @@ Single:
 9. Sends notification email to user who requested download
    with unique transcode message when complete.
 
+Each file found is queued as a download_scheduler job
+with separate bounded pools for tape retrieval, checksum
+and transcode, so one request's transcode overlaps the
+next request's download. Users are served round-robin,
+and --shortest-first orders each user's files smallest
+first. Cancellation is checked between stages.
+
+Bulk and DPI browser collection requests look up media
+records in batched CID searches, and retrieve files with
+one Black Pearl bulk GET per bucket (--no-bulk-get to
+disable). Each file moves on to checksum and transcode
+as soon as it lands.
+
+Before each Black Pearl GET and transcode the expected
+output size is reserved on the target volume in a shared
+space_ledger. Jobs that would not fit are deferred until
+other jobs free space, and single requests still deferred
+at the end of the run are set back to 'Requested'. Files
+left out of a bulk GET for space are listed in the bulk
+email to be requested again.
+
 Dependency: Elasticsearch v8 or v7
 2023
 """
@@ -57,8 +78,9 @@ import itertools
 import logging
 import os
 import sys
+import threading
 from datetime import datetime
-from typing import Final, Optional
+from typing import Any, Final, Optional
 
 from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import (
@@ -71,7 +93,10 @@ from elasticsearch.exceptions import (
 # Local packages
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import email_outbox
+import space_ledger
 import utils
+from download_scheduler import Deferred, DownloadJob, DownloadScheduler, Stage
 
 sys.path.append(os.path.join(os.environ["CODE"], "black_pearl/"))
 import bp_utils as bp
@@ -86,6 +111,21 @@ CONTROL_JSON: Final = os.environ["CONTROL_JSON"]
 CODEPTH: Final = os.environ["CODE"]
 ES_SEARCH: Final = os.environ["ES_SEARCH_PATH"]
 FMT: Final = "%Y-%m-%d %H:%M:%s"
+TAPE_WORKERS: Final = 2
+CHECKSUM_WORKERS: Final = 2
+TRANSCODE_WORKERS: Final = 2
+SHORTEST_FIRST: Final = "--shortest-first" in sys.argv
+BULK_GET: Final = "--no-bulk-get" not in sys.argv
+MEDIA_FIELDS: Final = [
+    "imagen.media.original_filename",
+    "reference_number",
+    "preservation_bucket",
+]
+BULK_LOCK = threading.Lock()
+OUTBOX: Final = email_outbox.EmailOutbox(
+    os.path.join(LOG_PATH, "dpi_elastic_email_outbox.db")
+)
+LEDGER: Final = space_ledger.SpaceLedger(os.path.join(LOG_PATH, "dpi_space_ledger.db"))
 
 # CONNECT TO ES
 ES: Final = Elasticsearch([ES_SEARCH])
@@ -181,14 +221,32 @@ def get_prirefs(pointer: str) -> list[str]:
 
 def get_dictionary(priref_list: list[str]) -> dict[str, list[dict[str, list[str]]]]:
     """
-    Iterate list of prirefs and
-    collate data
+    Collate media files for a list of item prirefs
+    with batched CID searches, falling back to one
+    search per priref if the batch request fails
     """
     print("Launching get_dictionary()")
-    data_dict = {}
-    for priref in priref_list:
-        data = get_media_record_data(priref)
-        data_dict[priref] = data
+    records = adlib.retrieve_records_bulk(
+        CID_API,
+        "media",
+        "object.object_number.lref",
+        priref_list,
+        MEDIA_FIELDS + ["object.object_number.lref"],
+    )
+    if records is None:
+        LOGGER.warning("get_dictionary: Batched CID search failed, searching singly")
+        data_dict = {}
+        for priref in priref_list:
+            data = get_media_record_data(priref)
+            data_dict[priref] = data
+        return data_dict
+
+    data_dict = {priref: [] for priref in priref_list}
+    lookup = {str(priref).strip(): priref for priref in priref_list}
+    for record in records:
+        item_priref = adlib.retrieve_field_name(record, "object.object_number.lref")[0]
+        if item_priref in lookup:
+            data_dict[lookup[item_priref]].append(media_file_entry(record))
     print(data_dict)
     return data_dict
 
@@ -199,13 +257,8 @@ def get_media_record_data(priref: str) -> list[dict[str, list[str]]]:
     """
     print(f"** Launching get_media_record_data() with priref: {priref}")
     search = f'object.object_number.lref="{priref}"'
-    fields = [
-        "imagen.media.original_filename",
-        "reference_number",
-        "preservation_bucket",
-    ]
 
-    hits, records = adlib.retrieve_record(CID_API, "media", search, "0", fields)
+    hits, records = adlib.retrieve_record(CID_API, "media", search, "0", MEDIA_FIELDS)
     if hits is None:
         LOGGER.exception(
             "get_media_record_data: AdlibV3 unable to retrieve data from API with search: %s",
@@ -220,33 +273,36 @@ def get_media_record_data(priref: str) -> list[dict[str, list[str]]]:
         return []
 
     print(hits)
-    all_files = []
-    for num in range(0, hits):
-        if "reference_number" in str(records[num]):
-            ref_num = adlib.retrieve_field_name(records[num], "reference_number")[0]
-            print(ref_num)
-        else:
-            print(records[num])
-            ref_num = ""
-        if "imagen.media.original_filename" in str(records[num]):
-            orig_fname = adlib.retrieve_field_name(
-                records[num], "imagen.media.original_filename"
-            )[0]
-            print(orig_fname)
-        else:
-            print(records[num])
-            orig_fname = ""
-        if "preservation_bucket" in str(records[num]):
-            bucket = adlib.retrieve_field_name(records[num], "preservation_bucket")[0]
-            print(orig_fname)
-        else:
-            print(records[num])
-            bucket = ""
-        if bucket == "":
-            bucket = "imagen"
-        all_files.append({ref_num: [orig_fname, bucket]})
+    return [media_file_entry(records[num]) for num in range(0, hits)]
+
 
-    return all_files
+def media_file_entry(record: dict[str, Any]) -> dict[str, list[str]]:
+    """
+    Reference number mapped to original
+    filename and preservation bucket
+    """
+    if "reference_number" in str(record):
+        ref_num = adlib.retrieve_field_name(record, "reference_number")[0]
+        print(ref_num)
+    else:
+        print(record)
+        ref_num = ""
+    if "imagen.media.original_filename" in str(record):
+        orig_fname = adlib.retrieve_field_name(
+            record, "imagen.media.original_filename"
+        )[0]
+        print(orig_fname)
+    else:
+        print(record)
+        orig_fname = ""
+    if "preservation_bucket" in str(record):
+        bucket = adlib.retrieve_field_name(record, "preservation_bucket")[0]
+    else:
+        print(record)
+        bucket = ""
+    if bucket == "":
+        bucket = "imagen"
+    return {ref_num: [orig_fname, bucket]}
 
 
 def make_check_md5(fpath: str, fname: str, bucket: str) -> tuple[str, str]:
@@ -358,10 +414,529 @@ def check_download_exists(
     return new_fpath, skip_download
 
 
+def build_single_job(
+    row_data: dict[str, str], download_fpath: str
+) -> Optional[DownloadJob]:
+    """
+    CID lookups and checks for a single file
+    request, returning its scheduler job
+    """
+    user_id = row_data["user_id"]
+    fname = row_data["fname"]
+    transcode = row_data["transcode"]
+    media_priref, orig_fname, bucket = get_media_original_filename(fname)
+    LOGGER.info("Bucket: %s", bucket)
+    if not media_priref:
+        LOGGER.warning("Filename is not recognised, no matching CID Media record")
+        update_table(user_id, "Filename not in CID")
+        return None
+    if "netflix" in bucket:
+        LOGGER.warning("Filename is a Netflix item and will not be downloaded")
+        update_table(user_id, "Filename not accessible")
+        return None
+    if "amazon" in bucket:
+        LOGGER.warning("Filename is an Amazon item and will not be downloaded")
+        update_table(user_id, "Filename not accessible")
+        return None
+    LOGGER.info(
+        "Download file request matched to CID file %s media record %s",
+        orig_fname,
+        media_priref,
+    )
+
+    # Check if download already exists
+    new_fpath, skip_download = check_download_exists(
+        download_fpath, orig_fname, fname, transcode
+    )
+    if not new_fpath:
+        update_table(user_id, "Download complete, no transcode required")
+        LOGGER.warning(
+            "Downloaded file (no transcode) in location already. Skipping further processing."
+        )
+        return None
+
+    return make_job(
+        row_data,
+        download_fpath,
+        fname,
+        orig_fname,
+        bucket,
+        new_fpath,
+        skip_download,
+        None,
+    )
+
+
+def build_bulk_jobs(
+    row_data: dict[str, str], download_fpath: str, priref_list: list[str]
+) -> list[DownloadJob]:
+    """
+    Expand a bulk or DPI browser collection request
+    into one scheduler job per media file, sharing a
+    request dict for the closing email
+    """
+    user_id = row_data["user_id"]
+    transcode = row_data["transcode"]
+    if len(priref_list) > 50:
+        update_table(user_id, "Pointer file over 50 CID items")
+        LOGGER.warning(
+            "Bulk download request. Too many pointer file entries for download maximum of 50: %s.",
+            len(priref_list),
+        )
+        return []
+    LOGGER.info(
+        "Bulk download requested with %s item prirefs to process.", len(priref_list)
+    )
+    pointer_dct = get_dictionary(priref_list)
+    if not any(pointer_dct.values()):
+        update_table(user_id, "Pointer file found no digital media records")
+        LOGGER.warning(
+            "CID item number supplied in pointer file have no associated CID digital media records: %s",
+            pointer_dct,
+        )
+        return []
+
+    request = {
+        "email": row_data["email"],
+        "download_fpath": download_fpath,
+        "remaining": 0,
+        "cancelled": False,
+        "files_processed": {},
+        "download_failures": [],
+    }
+    jobs = []
+    for media_priref, download_dct in pointer_dct.items():
+        LOGGER.info("** Queueing digital items for CID item record %s", media_priref)
+        for file in download_dct:
+            for filename, (orig_fname, bucket) in file.items():
+                print(
+                    f"Media priref {media_priref} Filename {filename} Original name {orig_fname} in bucket {bucket}"
+                )
+                if not len(filename) > 0:
+                    LOGGER.warning(
+                        "Filename is not recognised, no matching CID Media record"
+                    )
+                    continue
+                if "netflix" in bucket:
+                    LOGGER.warning(
+                        "Filename is a Netflix item and will not be downloaded"
+                    )
+                    update_table(user_id, "Filename not accessible")
+                    continue
+                LOGGER.info(
+                    "Download file request matched to CID file %s media record %s",
+                    orig_fname,
+                    media_priref,
+                )
+
+                # Check if download already exists
+                new_fpath, skip_download = check_download_exists(
+                    download_fpath, orig_fname, filename, transcode
+                )
+                if not new_fpath:
+                    LOGGER.warning(
+                        "Download path exists and no transcode required. Skipping."
+                    )
+                    continue
+                job = make_job(
+                    row_data,
+                    download_fpath,
+                    filename,
+                    orig_fname,
+                    bucket,
+                    new_fpath,
+                    skip_download,
+                    request,
+                )
+                job.data["media_priref"] = media_priref
+                jobs.append(job)
+
+    request["remaining"] = len(jobs)
+    return jobs
+
+
+def make_job(
+    row_data: dict[str, str],
+    download_fpath: str,
+    filename: str,
+    orig_fname: str,
+    bucket: str,
+    new_fpath: str,
+    skip_download: bool,
+    request: Optional[dict],
+) -> DownloadJob:
+    """
+    Scheduler job for one media file, sized from
+    Black Pearl when shortest first ordering is on
+    """
+    size = 0
+    if SHORTEST_FIRST and not skip_download:
+        try:
+            size = int(bp.get_bp_length(filename, bucket) or 0)
+        except Exception as err:
+            print(err)
+    return DownloadJob(
+        job_id=row_data["user_id"],
+        user=row_data["username"],
+        size=size,
+        data={
+            "fname": row_data["fname"],
+            "email": row_data["email"],
+            "transcode": row_data["transcode"],
+            "download_fpath": download_fpath,
+            "filename": filename,
+            "orig_fname": orig_fname,
+            "bucket": bucket,
+            "blob": "blobbing" in str(bucket),
+            "new_fpath": new_fpath,
+            "skip_download": skip_download,
+            "bulk": request,
+        },
+    )
+
+
+def group_bulk_gets(
+    jobs: list[DownloadJob],
+) -> tuple[list[DownloadJob], list[tuple[list[DownloadJob], Any]]]:
+    """
+    Split out bulk request files still to download
+    into one bulk GET batch per request and bucket
+    Blobbed files keep single threaded retrieval
+    """
+    if not BULK_GET:
+        return jobs, []
+    singles = []
+    groups: dict[tuple[str, str], list[DownloadJob]] = {}
+    for job in jobs:
+        data = job.data
+        if data["bulk"] is None or data["blob"] or data["skip_download"]:
+            singles.append(job)
+            continue
+        groups.setdefault((job.job_id, data["bucket"]), []).append(job)
+    return singles, [(group, bulk_retrieve) for group in groups.values()]
+
+
+def is_cancelled(job: DownloadJob) -> bool:
+    """
+    Scheduler check between stages
+    """
+    status_check = check_for_cancellation(job.job_id)
+    LOGGER.info("Checking status remains 'Requested': %s", status_check)
+    return status_check == "Cancelled"
+
+
+def job_owner(job: DownloadJob) -> str:
+    """
+    Ledger owner key for one job's reservations
+    """
+    return f"{job.job_id}:{job.data['filename']}"
+
+
+def download_size(job: DownloadJob) -> int:
+    """
+    Black Pearl object length, 0 if unknown
+    """
+    if job.size:
+        return job.size
+    try:
+        job.size = int(bp.get_bp_length(job.data["filename"], job.data["bucket"]) or 0)
+    except Exception as err:
+        LOGGER.warning("Unable to get Black Pearl length: %s", err)
+    return job.size
+
+
+def reserve_space(job: DownloadJob, path: str, nbytes: int) -> Optional[int]:
+    """
+    Reserve nbytes for a write to path, returning
+    the reservation ID. None if size is unknown,
+    raises Deferred if the volume cannot take it
+    """
+    if not nbytes:
+        return None
+    res_id = LEDGER.reserve(path, nbytes, job_owner(job))
+    if res_id is None:
+        raise Deferred(f"Not enough space for {nbytes} bytes at {path}")
+    return res_id
+
+
+def retrieve_stage(job: DownloadJob) -> bool:
+    """
+    Tape retrieval from Black Pearl, rename
+    UMID to original filename and chmod
+    """
+    data = job.data
+    if data["skip_download"]:
+        return True
+    filename = data["filename"]
+    res_id = reserve_space(
+        job, os.path.join(data["download_fpath"], filename), download_size(job)
+    )
+    try:
+        return retrieve_file(job)
+    finally:
+        if res_id:
+            LEDGER.release(res_id)
+
+
+def retrieve_file(job: DownloadJob) -> bool:
+    """
+    Single Black Pearl GET for a job
+    """
+    data = job.data
+    filename = data["filename"]
+    LOGGER.info("Beginning download of file %s to download path", filename)
+    if data["bulk"]:
+        update_table(job.job_id, f"Downloading {data['orig_fname']}")
+    elif not data["blob"]:
+        update_table(job.job_id, "Downloading")
+
+    try:
+        if data["blob"]:
+            LOGGER.info("File is blobbed. Verifying each blob as it downloads")
+        download_job_id, data["verified"] = bp.download_verified_object(
+            filename, data["download_fpath"], data["bucket"]
+        )
+    except Exception as err:
+        print(err)
+        if data["bulk"]:
+            download_job_id = None
+        else:
+            update_table(
+                job.job_id, "Blob download error" if data["blob"] else "Download error"
+            )
+            return False
+
+    if not download_job_id:
+        LOGGER.warning("Download of file %s failed.", filename)
+        if data["bulk"]:
+            update_table(job.job_id, f"Unable to download {filename} in batch")
+            data["download_failed"] = True
+        else:
+            update_table(job.job_id, "Requested")
+        return False
+    LOGGER.info("Downloaded file retrieved successfully. Job ID: %s", download_job_id)
+    return place_download(job)
+
+
+def place_download(job: DownloadJob) -> bool:
+    """
+    Rename UMID download to original
+    filename and open up permissions
+    """
+    data = job.data
+    filename = data["filename"]
+    if str(data["orig_fname"]).strip() != str(filename).strip():
+        LOGGER.info(
+            "Updating download UMID filename with item filename: %s",
+            data["orig_fname"],
+        )
+        umid_fpath = os.path.join(data["download_fpath"], filename)
+        os.rename(umid_fpath, data["new_fpath"])
+
+    # Apply CHMOD to download
+    if not os.path.exists(data["new_fpath"]):
+        LOGGER.warning("Download file not found in destination!")
+        if data["bulk"]:
+            update_table(job.job_id, f"Unable to download {filename} in batch")
+            data["download_failed"] = True
+        else:
+            update_table(job.job_id, "File failed to download")
+        return False
+    os.chmod(data["new_fpath"], 0o777)
+    return True
+
+
+def bulk_retrieve(jobs: list[DownloadJob], deliver) -> None:
+    """
+    One Black Pearl bulk GET for all of a request's
+    files in a bucket, passing each file on to the
+    checksum stage as soon as it lands
+    """
+    first = jobs[0].data
+    by_name = {job.data["filename"]: job for job in jobs}
+    LOGGER.info(
+        "Bulk GET of %s files from bucket %s for request %s",
+        len(jobs),
+        first["bucket"],
+        jobs[0].job_id,
+    )
+    file_paths = {
+        fname: os.path.join(job.data["download_fpath"], fname)
+        for fname, job in by_name.items()
+    }
+    reservations = []
+    for fname, job in list(by_name.items()):
+        try:
+            res_id = reserve_space(job, file_paths[fname], download_size(job))
+        except Deferred as err:
+            LOGGER.warning("Bulk GET leaving out %s: %s", fname, err)
+            job.deferred = str(err)
+            del by_name[fname], file_paths[fname]
+            deliver(job, False)
+            continue
+        if res_id:
+            reservations.append(res_id)
+    if not by_name:
+        return
+
+    update_table(jobs[0].job_id, f"Downloading {len(by_name)} items from Black Pearl")
+    try:
+        for fname, verified in bp.download_bulk_objects(file_paths, first["bucket"]):
+            job = by_name.pop(fname)
+            job.data["verified"] = verified
+            LOGGER.info("Bulk GET file landed: %s", fname)
+            deliver(job, place_download(job))
+    except Exception as err:
+        LOGGER.warning("Bulk GET failed for request %s: %s", jobs[0].job_id, err)
+    finally:
+        for res_id in reservations:
+            LEDGER.release(res_id)
+
+    for fname, job in by_name.items():
+        LOGGER.warning("Download of file %s failed in bulk GET", fname)
+        update_table(job.job_id, f"Unable to download {fname} in batch")
+        job.data["download_failed"] = True
+        deliver(job, False)
+
+
+def checksum_stage(job: DownloadJob) -> bool:
+    """
+    Report blob checksums verified while the file
+    streamed in. Falls back to an MD5 re-read against
+    the Black Pearl ETag only when Black Pearl had no
+    usable blob checksums for a non-blobbed file
+    """
+    data = job.data
+    if data["skip_download"]:
+        return True
+    verified = data.get("verified")
+    if verified is None and not data["blob"]:
+        local_md5, bp_md5 = make_check_md5(
+            data["new_fpath"], data["filename"], data["bucket"]
+        )
+        LOGGER.info(
+            "MD5 checksum validation check:\n\t%s - Downloaded file MD5\n\t%s - Black Pearl retrieved MD5",
+            local_md5,
+            bp_md5,
+        )
+        verified = local_md5 == bp_md5
+    if verified:
+        LOGGER.info("Checksums match. Updating Download status to Download database")
+    elif verified is False:
+        LOGGER.warning(
+            "Checksums DO NOT match. Updating Download status to Download database"
+        )
+    else:
+        LOGGER.warning("No Black Pearl blob checksums to verify %s", data["filename"])
+    if not data["bulk"]:
+        update_table(job.job_id, "Download complete")
+    return True
+
+
+def transcode_stage(job: DownloadJob) -> bool:
+    """
+    Transcode then remove the download unless
+    the transcode failed on an existing file
+    """
+    data = job.data
+    new_fpath = data["new_fpath"]
+    estimate = 0
+    if os.path.isfile(new_fpath):
+        estimate = space_ledger.estimate_transcode(new_fpath, data["transcode"])
+    res_id = reserve_space(job, data["download_fpath"], estimate)
+    try:
+        trans, failed_trans = create_transcode(
+            new_fpath, data["transcode"], data["fname"], job.job_id
+        )
+    finally:
+        if res_id:
+            LEDGER.release(res_id)
+
+    # Delete source download from DPI if not failed transcode/already found in path
+    if trans == "no_transcode":
+        LOGGER.info("No transcode requested for this asset.")
+    elif not data["skip_download"] or not failed_trans:
+        LOGGER.info("Deleting downloaded asset: %s", new_fpath)
+        os.remove(new_fpath)
+    data["trans"] = trans
+    return True
+
+
+def complete_job(job: DownloadJob) -> None:
+    """
+    Scheduler completion: email single requests,
+    and close bulk requests once every file is done
+    """
+    data = job.data
+    LEDGER.release_owner(job_owner(job))
+    if job.cancelled:
+        LOGGER.warning("File download has been cancelled. Skipping further processing.")
+    request = data["bulk"]
+    if request is None:
+        if job.deferred:
+            LOGGER.warning("Returning deferred request to queue: %s", job.deferred)
+            update_table(job.job_id, "Requested")
+        elif "trans" in data:
+            print("Sending email to user....")
+            LOGGER.info("Sending email to user....")
+            send_email_update(
+                data["email"], data["fname"], data["new_fpath"], data["trans"]
+            )
+        return
+
+    with BULK_LOCK:
+        if job.cancelled:
+            request["cancelled"] = True
+        elif "trans" in data:
+            request["files_processed"][data["orig_fname"]] = f"{data['trans']}"
+        elif job.deferred:
+            request["download_failures"].append(
+                f"CID media priref: {data['media_priref']} - Filename: {data['filename']} - Not enough storage space, please request again"
+            )
+        elif data.get("download_failed"):
+            request["download_failures"].append(
+                f"CID media priref: {data['media_priref']} - Filename: {data['filename']}"
+            )
+        request["remaining"] -= 1
+        if request["remaining"] > 0:
+            return
+    finish_bulk_request(job.job_id, request)
+
+
+def finish_bulk_request(user_id: str, request: dict) -> None:
+    """
+    Send notification email once all files
+    in a bulk request have been processed
+    """
+    files_processed = request["files_processed"]
+    download_failures = request["download_failures"]
+    email = request["email"]
+    download_fpath = request["download_fpath"]
+    if request["cancelled"]:
+        LOGGER.warning("Bulk download was cancelled. No email sent for %s", user_id)
+        return
+    if len(files_processed) == 0 and len(download_failures) > 0:
+        LOGGER.warning("Files failed to download: %s", download_failures)
+        send_email_failures_bulk(email, download_fpath, download_failures)
+        update_table(user_id, "All downloads failed. Please see email for details")
+        return
+    LOGGER.info("Files processed: %s", files_processed)
+    send_email_update_bulk(email, download_fpath, files_processed, download_failures)
+    if len(download_failures) > 0:
+        LOGGER.warning("Files failed to process: %s", download_failures)
+        update_table(
+            user_id,
+            "Some items failed to download. See email for successful downloads",
+        )
+    else:
+        update_table(user_id, "Bulk download complete. See email for details")
+
+
 def main():
     """
-    Retrieve 'Requested' rows from database.db as list of
-    tuples and process one at a time.
+    Retrieve 'Requested' rows from Elasticsearch, build
+    a job per file then run the staged scheduler so
+    downloads, checksums and transcodes overlap
     """
     if not utils.check_control("pause_scripts") or not utils.check_control(
         "black_pearl"
@@ -378,6 +953,7 @@ def main():
         len(data),
         datetime.now().strftime(FMT)[:19],
     )
+    jobs = []
     for row in data:
         if not utils.check_control("pause_scripts") or not utils.check_control(
             "black_pearl"
@@ -387,23 +963,29 @@ def main():
             )
             sys.exit("Script run prevented by downtime_control.json. Script exiting.")
         check_elasticsearch()
-        username = row[0].strip()
-        email = row[1].strip()
-        fname = row[3].strip()
-        dtype = row[2].strip()
-        dpath = row[4].strip()
-        dfolder = row[5].strip()
-        transcode = row[6].strip()
-        user_id = row[9]
+        row_data = {
+            "username": row[0].strip(),
+            "email": row[1].strip(),
+            "fname": row[3].strip(),
+            "dtype": row[2].strip(),
+            "dpath": row[4].strip(),
+            "dfolder": row[5].strip(),
+            "transcode": row[6].strip(),
+            "user_id": row[9],
+        }
+        user_id = row_data["user_id"]
+        fname = row_data["fname"]
+        dtype = row_data["dtype"]
+        dpath = row_data["dpath"]
         LOGGER.info(
             "** New data for download:\n\t- ID %s, User %s, email %s, file %s,\n\t- Downloading to %s in %s folder. Transcode? %s",
             user_id,
-            username,
-            email,
+            row_data["username"],
+            row_data["email"],
             fname,
             dpath,
-            dfolder,
-            transcode,
+            row_data["dfolder"],
+            row_data["transcode"],
         )
 
         # Check if path supplied valid
@@ -420,7 +1002,7 @@ def main():
             update_table(user_id, "Download path offline")
             continue
 
-        download_fpath = os.path.join(dpath, dfolder)
+        download_fpath = os.path.join(dpath, row_data["dfolder"])
         print(download_fpath)
         if not os.path.exists(download_fpath):
             os.makedirs(download_fpath, 0o777, exist_ok=True)
@@ -430,153 +1012,22 @@ def main():
         except PermissionError as err:
             print(err)
 
-        priref_list = []
+        status_check = check_for_cancellation(user_id)
+        LOGGER.info("Checking status remains 'Requested': %s", status_check)
+        if status_check == "Cancelled":
+            LOGGER.warning("Download has been cancelled. Skipping further processing.")
+            continue
+
         # Single download
         if dtype == "single":
-            # Try to locate CID media record for file
-            blob = False
-            media_priref, orig_fname, bucket = get_media_original_filename(fname)
-            LOGGER.info("Bucket: %s", bucket)
-            if not media_priref:
-                LOGGER.warning(
-                    "Filename is not recognised, no matching CID Media record"
-                )
-                update_table(user_id, "Filename not in CID")
-                continue
-            if "netflix" in bucket:
-                LOGGER.warning("Filename is a Netflix item and will not be downloaded")
-                update_table(user_id, "Filename not accessible")
-                continue
-            if "amazon" in bucket:
-                LOGGER.warning("Filename is an Amazon item and will not be downloaded")
-                update_table(user_id, "Filename not accessible")
-                continue
-            LOGGER.info(
-                "Download file request matched to CID file %s media record %s",
-                orig_fname,
-                media_priref,
-            )
-            if "blobbing" in str(bucket):
-                blob = True
-
-            # Check if download already exists
-            new_fpath, skip_download = check_download_exists(
-                download_fpath, orig_fname, fname, transcode
-            )
-            if not new_fpath:
-                update_table(user_id, "Download complete, no transcode required")
-                LOGGER.warning(
-                    "Downloaded file (no transcode) in location already. Skipping further processing."
-                )
-                continue
-            status_check = check_for_cancellation(user_id)
-            LOGGER.info("Checking status remains 'Requested': %s", status_check)
-            if status_check == "Cancelled":
-                LOGGER.warning(
-                    "File download has been cancelled. Skipping further processing."
-                )
-                continue
-
-            if not skip_download:
-                # Download from BP
-                LOGGER.info("Beginning download of file %s to download path", fname)
-                if not blob:
-                    update_table(user_id, "Downloading")
-                    try:
-                        download_job_id = bp.download_bp_object(
-                            fname, download_fpath, bucket
-                        )
-                    except Exception as err:
-                        print(err)
-                        update_table(user_id, "Download error")
-                        continue
-                elif blob is True:
-                    LOGGER.info("File is blobbed. Changing retrieval method")
-                    try:
-                        download_job_id = bp.download_blobbed_object(
-                            fname, download_fpath, bucket
-                        )
-                    except Exception as error:
-                        print(error)
-                        update_table(user_id, "Blob download error")
-                        continue
-
-                if not download_job_id:
-                    LOGGER.warning(
-                        "Download of file %s failed. Resetting download status and script exiting.",
-                        fname,
-                    )
-                    update_table(user_id, "Requested")
-                    continue
-                LOGGER.info(
-                    "Downloaded file retrieved successfully. Job ID: %s",
-                    download_job_id,
-                )
-                if str(orig_fname).strip() != str(fname).strip():
-                    LOGGER.info(
-                        "Updating download UMID filename with item filename: %s",
-                        orig_fname,
-                    )
-                    umid_fpath = os.path.join(download_fpath, fname)
-                    os.rename(umid_fpath, new_fpath)
-
-                # Apply CHMOD to download
-                if os.path.exists(new_fpath):
-                    os.chmod(new_fpath, 0o777)
-                else:
-                    LOGGER.warning("Download file not found in destination!")
-                    update_table(user_id, "File failed to download")
-                    continue
-
-                # MD5 Verification - skip for blobbed items
-                if not blob:
-                    local_md5, bp_md5 = make_check_md5(new_fpath, fname, bucket)
-                    LOGGER.info(
-                        "MD5 checksum validation check:\n\t%s - Downloaded file MD5\n\t%s - Black Pearl retrieved MD5",
-                        local_md5,
-                        bp_md5,
-                    )
-                    if local_md5 == bp_md5:
-                        LOGGER.info(
-                            "MD5 checksums match. Updating Download status to Download database"
-                        )
-                    else:
-                        LOGGER.warning(
-                            "MD5 checksums DO NOT match. Updating Download status to Download database"
-                        )
-                update_table(user_id, "Download complete")
-
-            # Transcode
-            trans, failed_trans = create_transcode(new_fpath, transcode, fname, user_id)
-
-            # Delete source download from DPI if not failed transcode/already found in path
-            if trans == "no_transcode":
-                LOGGER.info("No transcode requested for this asset.")
-            elif not skip_download or not failed_trans:
-                LOGGER.info("Deleting downloaded asset: %s", new_fpath)
-                os.remove(new_fpath)
-            # Send notification email
-            print("Sending email to user....")
-            LOGGER.info("Sending email to user....")
-            send_email_update(email, fname, new_fpath, trans)
+            job = build_single_job(row_data, download_fpath)
+            if job:
+                jobs.append(job)
             continue
 
         # dtype is DPI browser collection
-        elif dtype == "dpi_browser_collection":
+        if dtype == "dpi_browser_collection":
             priref_list = fname.split(",")
-            if not isinstance(priref_list, list):
-                update_table(user_id, "Error with DPI collection details")
-                LOGGER.warning(
-                    "Problem seems to have occurred with retrieval of DPI Browser collection details. Skipping."
-                )
-                continue
-            status_check = check_for_cancellation(user_id)
-            LOGGER.info("Checking status remains 'Requested': %s", status_check)
-            if status_check == "Cancelled":
-                LOGGER.warning(
-                    "DPI browser file download has been cancelled. Skipping further processing."
-                )
-                continue
         # dtype is bulk
         elif dtype == "bulk":
             print(f"Finding prirefs from Pointer file with number: {fname}")
@@ -586,13 +1037,6 @@ def main():
                     "Bulk download request. Error with pointer file number: %s.", fname
                 )
                 continue
-            status_check = check_for_cancellation(user_id)
-            LOGGER.info("Checking status remains 'Requested': %s", status_check)
-            if status_check == "Cancelled":
-                LOGGER.warning(
-                    "Bulk download has been cancelled. Skipping further processing."
-                )
-                continue
             priref_list = get_prirefs(fname)
             if not isinstance(priref_list, list):
                 update_table(user_id, "Pointer file number not recognised")
@@ -603,174 +1047,31 @@ def main():
                 "Download type not recognised, should be 'bulk', 'single' or 'dpi_browser_collection'."
             )
             continue
+        jobs.extend(build_bulk_jobs(row_data, download_fpath, priref_list))
 
-        # Process remaining 'bulk' or 'dpi_browser_collection' items as list of CID item prirefs
-        files_processed = {}
-        if len(priref_list) > 50:
-            update_table(user_id, "Pointer file over 50 CID items")
-            LOGGER.warning(
-                "Bulk download request. Too many pointer file entries for download maximum of 50: %s.",
-                len(priref_list),
-            )
-            continue
-        LOGGER.info(
-            "Bulk download requested with %s item prirefs to process.", len(priref_list)
-        )
-        pointer_dct = get_dictionary(priref_list)
-        if not any(pointer_dct.values()):
-            update_table(user_id, "Pointer file found no digital media records")
-            LOGGER.warning(
-                "CID item number supplied in pointer file have no associated CID digital media records: %s",
-                pointer_dct,
-            )
-            continue
-        download_failures = []
-        for key, value in pointer_dct.items():
-            media_priref = key
-            print(key)
-            LOGGER.info(
-                "** Downloading digital items for CID item record %s", media_priref
-            )
-            download_dct = value
-            print(value)
-            for file in download_dct:
-                for k, v in file.items():
-                    blob = False
-                    filename = k
-                    orig_fname = v[0]
-                    bucket = v[1]
-                    print(
-                        f"Media priref {media_priref} Filename {filename} Original name {orig_fname} in bucket {bucket}"
-                    )
-                    if not len(filename) > 0:
-                        LOGGER.warning(
-                            "Filename is not recognised, no matching CID Media record"
-                        )
-                        continue
-                    if "netflix" in bucket:
-                        LOGGER.warning(
-                            "Filename is a Netflix item and will not be downloaded"
-                        )
-                        update_table(user_id, "Filename not accessible")
-                        continue
-                    LOGGER.info(
-                        "Download file request matched to CID file %s media record %s",
-                        orig_fname,
-                        media_priref,
-                    )
-                    if "blobbing" in bucket:
-                        blob = True
-
-                    # Check if download already exists
-                    new_fpath, skip_download = check_download_exists(
-                        download_fpath, orig_fname, filename, transcode
-                    )
-                    if not new_fpath:
-                        LOGGER.warning(
-                            "Download path exists and no transcode required. Skipping."
-                        )
-                        continue
-                    if not skip_download:
-                        # Download from BP
-                        LOGGER.info(
-                            "Beginning download of file %s to download path", filename
-                        )
-                        update_table(user_id, f"Downloading {orig_fname}")
-                        if blob is False:
-                            download_job_id = bp.download_bp_object(
-                                filename, download_fpath, bucket
-                            )
-                        elif blob is True:
-                            LOGGER.info("File is blobbed. Changing retrieval method")
-                            download_job_id = bp.download_blobbed_object(
-                                filename, download_fpath, bucket
-                            )
-
-                        if not download_job_id:
-                            LOGGER.warning(
-                                "Download of file %s failed. Attempting to download next item in queue",
-                                filename,
-                            )
-                            update_table(
-                                user_id, f"Unable to download {filename} in batch"
-                            )
-                            download_failures.append(
-                                f"CID media priref: {media_priref} - Filename: {filename}"
-                            )
-                            continue
-                        LOGGER.info(
-                            "Downloaded file retrieved successfully. Job ID: %s",
-                            download_job_id,
-                        )
-                        if str(orig_fname).strip() != str(filename).strip():
-                            LOGGER.info(
-                                "Updating download UMID filename with item filename: %s",
-                                orig_fname,
-                            )
-                            umid_fpath = os.path.join(download_fpath, filename)
-                            os.rename(umid_fpath, new_fpath)
-
-                        # Apply CHMOD to download
-                        if os.path.exists(new_fpath):
-                            os.chmod(new_fpath, 0o777)
-                        else:
-                            LOGGER.warning("No download file found in destination!")
-                            update_table(
-                                user_id, f"Unable to download {filename} in batch"
-                            )
-                            download_failures.append(
-                                f"CID media priref: {media_priref} - Filename: {filename}"
-                            )
-                            continue
-                        # MD5 Verification - skip blobbed items
-                        if blob is False:
-                            local_md5, bp_md5 = make_check_md5(
-                                new_fpath, filename, bucket
-                            )
-                            LOGGER.info(
-                                "MD5 checksum validation check:\n\t%s - Downloaded file MD5\n\t%s - Black Pearl retrieved MD5",
-                                local_md5,
-                                bp_md5,
-                            )
-                            if local_md5 == bp_md5:
-                                LOGGER.info(
-                                    "MD5 checksums match. Updating Download status to Download database"
-                                )
-                            else:
-                                LOGGER.warning(
-                                    "MD5 checksums DO NOT match. Updating Download status to Download database"
-                                )
-
-                    # Transcode
-                    trans, failed_trans = create_transcode(
-                        new_fpath, transcode, fname, user_id
-                    )
-
-                    # Delete source download from DPI if not failed transcode/already found in path
-                    if trans == "no_transcode":
-                        LOGGER.info("No transcode requested for this asset.")
-                    elif not skip_download or not failed_trans:
-                        LOGGER.info("Deleting downloaded asset: %s", new_fpath)
-                        os.remove(new_fpath)
-                    files_processed[orig_fname] = f"{trans}"
-        # Send notification email
-        if len(files_processed) == 0 and len(download_failures) > 0:
-            LOGGER.warning("Files failed to download: %s", download_failures)
-            send_email_failures_bulk(email, download_fpath, download_failures)
-            update_table(user_id, "All downloads failed. Please see email for details")
-            continue
-        LOGGER.info("Files processed: %s", files_processed)
-        send_email_update_bulk(
-            email, download_fpath, files_processed, download_failures
-        )
-        if len(download_failures) > 0:
-            LOGGER.warning("Files failed to process: %s", download_failures)
-            update_table(
-                user_id,
-                "Some items failed to download. See email for successful downloads",
-            )
-        else:
-            update_table(user_id, "Bulk download complete. See email for details")
+    jobs, batches = group_bulk_gets(jobs)
+    LOGGER.info(
+        "Scheduling %s file jobs and %s bulk GETs. Shortest first: %s",
+        len(jobs),
+        len(batches),
+        SHORTEST_FIRST,
+    )
+    scheduler = DownloadScheduler(
+        [
+            Stage("tape_retrieval", retrieve_stage, TAPE_WORKERS),
+            Stage("checksum", checksum_stage, CHECKSUM_WORKERS),
+            Stage("transcode", transcode_stage, TRANSCODE_WORKERS),
+        ],
+        is_cancelled=is_cancelled,
+        on_complete=complete_job,
+        shortest_first=SHORTEST_FIRST,
+    )
+    sender = email_outbox.OutboxSender(OUTBOX, sender=email_outbox.DEFAULT_SENDER)
+    sender.start()
+    try:
+        scheduler.run(jobs, batches)
+    finally:
+        sender.stop()
 
     LOGGER.info(
         "================ DPI DOWNLOAD REQUESTS COMPLETED. Date: %s =================\n",
@@ -920,14 +1221,8 @@ This is an automated notification, please do not reply to this email.
 Thank you,
 Digital Preservation team"""
 
-    success, error = utils.send_email(
-        email, "digitalpreservationsystems@bfi.org.uk", subject, body, ""
-    )
-    if success:
-        LOGGER.info("Email notification sent to %s", email)
-    else:
-        LOGGER.warning("Email notification failed in sending: %s", email)
-        LOGGER.warning(f"Error: %s", error)
+    OUTBOX.enqueue(email, subject, body, digest="dpi_download")
+    LOGGER.info("Email notification queued for %s", email)
 
 
 def send_email_update_bulk(
@@ -1007,14 +1302,8 @@ This is an automated notification, please do not reply to this email.
 Thank you,
 Digital Preservation team"""
 
-    success, error = utils.send_email(
-        email, "digitalpreservationsystems@bfi.org.uk", subject, body, ""
-    )
-    if success:
-        LOGGER.info("Email notification sent to %s", email)
-    else:
-        LOGGER.warning("Email notification failed in sending: %s", email)
-        LOGGER.warning("Error: %s", error)
+    OUTBOX.enqueue(email, subject, body, digest="dpi_download")
+    LOGGER.info("Email notification queued for %s", email)
 
 
 def send_email_failures_bulk(
@@ -1046,14 +1335,8 @@ This is an automated notification, please do not reply to this email.
 Thank you,
 Digital Preservation team"""
 
-    success, error = utils.send_email(
-        email, "digitalpreservationsystems@bfi.org.uk", subject, body, ""
-    )
-    if success:
-        LOGGER.info("Email notification sent to %s", email)
-    else:
-        LOGGER.warning("Email notification failed in sending: %s", email)
-        LOGGER.warning("Error: %s", error)
+    OUTBOX.enqueue(email, subject, body, digest="dpi_download")
+    LOGGER.info("Email notification queued for %s", email)
 
 
 if __name__ == "__main__":
@@ -30,6 +30,7 @@ from typing import Any, Final, Generator, Optional
 
 # Local packages
 sys.path.append(os.environ["CODE"])
+import request_store
 import utils
 
 # GLOBAL VARIABLES
@@ -45,6 +46,9 @@ YESTERDAY: Final = datetime.date.today() - datetime.timedelta(days=1)
 YESTERDAY2: Final = datetime.date.today() - datetime.timedelta(days=2)
 YEST: Final = str(YESTERDAY)
 YEST2: Final = str(YESTERDAY2)
+STORE: Final = request_store.RequestStore(
+    DATABASE, "DOWNLOADS", request_store.NEWS_PRESERVATION_COLUMNS
+)
 
 # Set up logging
 LOGGER: Final = logging.getLogger("news_preservation_move_to_dpi")
@@ -94,24 +98,9 @@ def retrieve_requested() -> list[str]:
     """
     requested_data = []
     try:
-        sqlite_connection = sqlite3.connect(DATABASE)
-        cursor = sqlite_connection.cursor()
-        print("Database connected successfully")
-
-        cursor.execute("SELECT * FROM DOWNLOADS WHERE status = 'Requested'")
-        data = cursor.fetchall()
-        print(data)
-        for row in data:
-            print(type(row), row)
-            if row[-2] == "Requested":
-                requested_data.append(row)
-        cursor.close()
+        requested_data = STORE.fetch_by_status("Requested")
     except sqlite3.Error as err:
         LOGGER.warning("%s", err)
-    finally:
-        if sqlite_connection:
-            sqlite_connection.close()
-            print("Database connection closed")
 
     # Sort for unique tuples only in list
     print(requested_data)
@@ -136,20 +125,12 @@ def update_table(preservation_date: str, channel: str, new_status: str) -> None:
     data, for fname match
     """
     try:
-        sqlite_connection = sqlite3.connect(DATABASE)
-        cursor = sqlite_connection.cursor()
-        # Update row with new status
-        sql_query = """UPDATE DOWNLOADS SET status = ? WHERE preservation_date = ? AND channel = ?"""
-        data = (new_status, preservation_date, channel)
-        cursor.execute(sql_query, data)
-        sqlite_connection.commit()
+        STORE.update_status(
+            new_status, preservation_date=preservation_date, channel=channel
+        )
         print(f"Record updated with new status {new_status}")
-        cursor.close()
     except sqlite3.Error as err:
         LOGGER.warning("Failed to update database: %s", err)
-    finally:
-        if sqlite_connection:
-            sqlite_connection.close()
 
 
 def main():
@@ -1,36 +1,92 @@
 import os
-from functools import lru_cache
+import time
 
 import pandas as pd
 from elasticsearch import Elasticsearch
 
 ELASTIC_PASS = os.environ["ELASTIC_PASS"]
+INDEX_TTL = 300
+PAGE_SIZE = 1000
+KEEP_ALIVE = "1m"
 
+_INDEX_CACHE = {}
 
-@lru_cache(maxsize=1)
-def get_autoingest_docs(es):
-    indices = es.cat.indices(format="json")
-    list_of_auto = [idx["index"] for idx in indices if "autoingest" in idx["index"]]
+
+def get_autoingest_docs(es, ttl=INDEX_TTL):
+    """
+    Autoingest index names, cached per
+    client for ttl seconds so new daily
+    indexes are picked up
+    """
+    now = time.monotonic()
+    cached = _INDEX_CACHE.get(id(es))
+    if cached and now - cached[0] < ttl:
+        return cached[1]
+    indices = es.cat.indices(index="*autoingest*", format="json")
+    list_of_auto = sorted(
+        idx["index"] for idx in indices if "autoingest" in idx["index"]
+    )
+    _INDEX_CACHE[id(es)] = (now, list_of_auto)
     return list_of_auto
 
 
-def search_by_filepath(filepath, list_of_auto, es):
-    query = {
+def build_filepath_query(filepath):
+    """
+    Exact filename, or part files for it
+    (eg N_123_01of02.mkv), anchored with
+    a prefix so no leading wildcard is run
+    """
+    return {
         "bool": {
             "should": [
-                {"term": {"filename.keyword": f"{filepath}"}},
-                {"wildcard": {"filename.keyword": {"value": f"{filepath}*of*"}}},
+                {"term": {"filename.keyword": filepath}},
+                {
+                    "bool": {
+                        "filter": [
+                            {"prefix": {"filename.keyword": filepath}},
+                            {"wildcard": {"filename.keyword": f"{filepath}*of*"}},
+                        ]
+                    }
+                },
             ],
             "minimum_should_match": 1,
         }
     }
-    df = pd.DataFrame()
 
-    for index in list_of_auto:
-        response = es.search(index=index, query=query)
-        df = pd.concat(
-            [df, pd.json_normalize(x["_source"] for x in response["hits"]["hits"])],
-            ignore_index=True,
-        )
 
-    return df
+def search_by_filepath(filepath, list_of_auto, es, page_size=PAGE_SIZE):
+    """
+    One search across all autoingest indexes,
+    paged with search_after on a point in time,
+    building the DataFrame once at the end
+    """
+    if not filepath or not list_of_auto:
+        return pd.DataFrame()
+
+    pit = es.open_point_in_time(
+        index=",".join(list_of_auto), keep_alive=KEEP_ALIVE, ignore_unavailable=True
+    )
+    pit_id = pit["id"]
+    sources = []
+    search_after = None
+    try:
+        while True:
+            kwargs = {"search_after": search_after} if search_after else {}
+            response = es.search(
+                pit={"id": pit_id, "keep_alive": KEEP_ALIVE},
+                query=build_filepath_query(filepath),
+                sort=["_shard_doc"],
+                size=page_size,
+                track_total_hits=False,
+                **kwargs,
+            )
+            hits = response["hits"]["hits"]
+            sources.extend(hit["_source"] for hit in hits)
+            pit_id = response.get("pit_id", pit_id)
+            if len(hits) < page_size:
+                break
+            search_after = hits[-1]["sort"]
+    finally:
+        es.close_point_in_time(id=pit_id)
+
+    return pd.json_normalize(sources)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+
+"""
+Ship autoingest log lines to Elasticsearch
+
+Tails global.log, persistence_confirmation.log and
+the per-script logs in LOG_PATH from the byte offset
+reached on the last run (kept in a JSON offsets file),
+parses each entry and sends them in _bulk requests to
+daily 'autoingest-YYYY.MM.DD' indexes read by the web app.
+
+Autoingest lines are tab separated:
+timestamp, level, local path, remote path, file, message
+Other script log lines keep only timestamp, level, message.
+Continuation lines (eg tracebacks) join the entry above.
+
+Documents are read lazily, so reading waits on ES accepting
+each bulk chunk, and 429 rejections are retried with backoff.
+Each document ID is built from log, inode and offset, so a
+retried run overwrites rather than duplicates. Offsets only
+move forward for a log once all its entries are accepted.
+
+2026
+"""
+
+import datetime
+import glob
+import json
+import logging
+import os
+import re
+import sys
+from typing import Any, Final, Iterator, Optional
+
+from elasticsearch import Elasticsearch, helpers
+
+sys.path.append(os.environ["CODE"])
+import utils
+
+# Global variables
+LOG_PATH: Final = os.environ["LOG_PATH"]
+ELASTIC_PATH: Final = os.environ["ELASTIC_PATH"]
+ELASTIC_PASS: Final = os.environ["ELASTIC_PASS"]
+GLOBAL_LOG: Final = os.path.join(LOG_PATH, "autoingest/global.log")
+PERS_LOG: Final = os.path.join(LOG_PATH, "persistence_confirmation.log")
+OFFSETS: Final = os.path.join(LOG_PATH, "autoingest/log_shipper_offsets.json")
+INDEX_PREFIX: Final = "autoingest"
+CHUNK_SIZE: Final = 500
+MAX_RETRIES: Final = 5
+MAX_BYTES: Final = 200 * 1024 * 1024
+ENTRY_START: Final = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:[,.]\d+)?)[\t ]+([A-Z]+)\t?(.*)$"
+)
+
+# Setup logging
+LOGGER = logging.getLogger("log_shipper")
+HDLR = logging.FileHandler(os.path.join(LOG_PATH, "log_shipper.log"))
+FORMATTER = logging.Formatter("%(asctime)s\t%(levelname)s\t%(message)s")
+HDLR.setFormatter(FORMATTER)
+LOGGER.addHandler(HDLR)
+LOGGER.setLevel(logging.INFO)
+
+
+def parse_timestamp(stamp: str) -> str:
+    """
+    Logging (comma) and datetime (dot)
+    stamps both to ISO format
+    """
+    stamp = stamp.replace(",", ".")
+    fmt = "%Y-%m-%d %H:%M:%S.%f" if "." in stamp else "%Y-%m-%d %H:%M:%S"
+    return datetime.datetime.strptime(stamp, fmt).isoformat()
+
+
+def parse_line(line: str, source: str) -> Optional[dict[str, Any]]:
+    """
+    Split one log entry into document fields,
+    None if the line does not start an entry
+    """
+    match = ENTRY_START.match(line.rstrip("\n"))
+    if not match:
+        return None
+    stamp, level, rest = match.groups()
+    try:
+        timestamp = parse_timestamp(stamp)
+    except ValueError:
+        return None
+
+    doc = {"@timestamp": timestamp, "log_level": level, "source": source}
+    fields = rest.split("\t")
+    if len(fields) >= 4:
+        doc["local_path"] = fields[0]
+        doc["remote_path"] = fields[1]
+        doc["filename"] = fields[2]
+        doc["message"] = "\t".join(fields[3:])
+    else:
+        doc["message"] = rest
+    return doc
+
+
+def index_name(doc: dict[str, Any]) -> str:
+    """
+    Daily index from the entry's own date
+    """
+    return f"{INDEX_PREFIX}-{doc['@timestamp'][:10].replace('-', '.')}"
+
+
+def load_offsets() -> dict[str, dict[str, int]]:
+    """
+    Read offsets saved by the last run
+    """
+    if not os.path.isfile(OFFSETS):
+        return {}
+    try:
+        with open(OFFSETS, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError) as err:
+        LOGGER.warning("Unable to read offsets file, starting from zero: %s", err)
+        return {}
+
+
+def save_offsets(offsets: dict[str, dict[str, int]]) -> None:
+    """
+    Write offsets via a temp file so a crash
+    never leaves a half written file
+    """
+    tmp = f"{OFFSETS}.tmp"
+    with open(tmp, "w") as file:
+        json.dump(offsets, file, indent=2)
+    os.replace(tmp, OFFSETS)
+
+
+def start_offset(fpath: str, saved: Optional[dict[str, int]]) -> int:
+    """
+    Resume from the saved offset unless
+    the log was rotated or truncated
+    """
+    stat = os.stat(fpath)
+    if not saved or saved.get("inode") != stat.st_ino:
+        return 0
+    if saved.get("offset", 0) > stat.st_size:
+        return 0
+    return saved["offset"]
+
+
+def read_entries(
+    fpath: str, offset: int, max_bytes: int = MAX_BYTES
+) -> Iterator[tuple[int, int, dict[str, Any]]]:
+    """
+    Yield (start, end, doc) for each complete
+    entry after offset. Stops before a partial
+    last line, as the writer may still be on it
+    """
+    source = os.path.basename(fpath)
+    pending = None
+    with open(fpath, "rb") as file:
+        file.seek(offset)
+        position = offset
+        for raw in file:
+            if not raw.endswith(b"\n"):
+                break
+            line = raw.decode("utf-8", errors="replace")
+            start, position = position, position + len(raw)
+            doc = parse_line(line, source)
+            if doc is not None:
+                if pending:
+                    yield pending
+                if position - offset > max_bytes:
+                    return
+                pending = (start, position, doc)
+            elif pending:
+                pending[2]["message"] += "\n" + line.rstrip("\n")
+                pending = (pending[0], position, pending[2])
+    if pending:
+        yield pending
+
+
+def ship_log(
+    es: Elasticsearch, fpath: str, saved: Optional[dict[str, int]]
+) -> Optional[dict[str, int]]:
+    """
+    Bulk index new entries from one log,
+    returning its new offset, or None if any
+    document was rejected after retries
+    """
+    inode = os.stat(fpath).st_ino
+    offset = start_offset(fpath, saved)
+    reached = {"offset": offset}
+
+    def actions():
+        for start, end, doc in read_entries(fpath, offset):
+            reached["offset"] = end
+            yield {
+                "_op_type": "index",
+                "_index": index_name(doc),
+                "_id": f"{doc['source']}:{inode}:{start}",
+                "_source": doc,
+            }
+
+    shipped = failed = 0
+    for success, info in helpers.streaming_bulk(
+        es,
+        actions(),
+        chunk_size=CHUNK_SIZE,
+        max_retries=MAX_RETRIES,
+        initial_backoff=2,
+        raise_on_error=False,
+        raise_on_exception=False,
+    ):
+        if success:
+            shipped += 1
+        else:
+            failed += 1
+            LOGGER.warning("Document rejected from %s: %s", fpath, info)
+
+    LOGGER.info("%s: %s entries shipped, %s rejected", fpath, shipped, failed)
+    if failed:
+        return None
+    return {"inode": inode, "offset": reached["offset"]}
+
+
+def get_logs() -> list[str]:
+    """
+    Autoingest logs first, then per-script logs
+    """
+    logs = [GLOBAL_LOG, PERS_LOG]
+    logs.extend(
+        fpath
+        for fpath in sorted(glob.glob(os.path.join(LOG_PATH, "*.log")))
+        if fpath not in logs and not fpath.endswith("log_shipper.log")
+    )
+    return [fpath for fpath in logs if os.path.isfile(fpath)]
+
+
+def main():
+    """
+    Ship each log from its last offset,
+    saving offsets after every log
+    """
+    if not utils.check_control("pause_scripts"):
+        LOGGER.info("Script run prevented by downtime_control.json. Script exiting.")
+        sys.exit("Script run prevented by downtime_control.json. Script exiting.")
+
+    es = Elasticsearch(
+        ELASTIC_PATH, basic_auth=("elastic", ELASTIC_PASS), verify_certs=False
+    )
+    if not es.ping():
+        LOGGER.warning(
+            "Cannot reach Elasticsearch at %s. Script exiting.", ELASTIC_PATH
+        )
+        sys.exit("Cannot reach Elasticsearch. Script exiting.")
+
+    LOGGER.info("=== Log shipper start ===")
+    offsets = load_offsets()
+    for fpath in get_logs():
+        new_offset = ship_log(es, fpath, offsets.get(fpath))
+        if new_offset is None:
+            LOGGER.warning("Offset for %s not advanced, will retry next run", fpath)
+            continue
+        offsets[fpath] = new_offset
+        save_offsets(offsets)
+    LOGGER.info("=== Log shipper end ===")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Notification outbox with batched SMTP delivery
+
+Workers queue emails to a small SQLite outbox
+(request_store table, WAL mode) instead of sending
+them inline, so a slow mail server never stalls a
+download. An OutboxSender thread drains the queue
+every interval seconds, and once more on stop,
+through one authenticated SMTP connection reused
+for every message in the drain.
+
+Each drain first claims its messages (status 'Sending')
+in one IMMEDIATE transaction, so overlapping runs never
+send the same message twice. Claims older than
+CLAIM_TIMEOUT are taken as abandoned by a crashed run
+and claimed again. A drain only takes messages queued
+with its own sender address, matching the account its
+SMTP connection logs in with.
+
+Messages queued with the same digest key for the
+same recipient are coalesced into one digest email
+when they are drained together. Failed sends stay
+queued and are retried up to MAX_ATTEMPTS times.
+
+Usage:
+    outbox = email_outbox.EmailOutbox(OUTBOX_DB)
+    sender = email_outbox.OutboxSender(outbox, connect, sender=SENDER)
+    sender.start()
+    outbox.enqueue(email, subject, body, digest="dpi_download", sender=SENDER)
+    sender.stop()
+
+2026
+"""
+
+import datetime
+import logging
+import os
+import smtplib
+import ssl
+import threading
+from email.message import EmailMessage
+from typing import Any, Callable, Final, Optional
+
+import request_store
+
+LOGGER = logging.getLogger("email_outbox")
+SMTP_SERVER: Final = os.environ.get("SMTP_SERVER")
+SMTP_PORT: Final = os.environ.get("SMTP_PORT")
+EMAIL: Final = os.environ.get("EMAIL_ADDRESS")
+PASSWORD: Final = os.environ.get("EMAIL_PASSWORD")
+DEFAULT_SENDER: Final = "digitalpreservationsystems@bfi.org.uk"
+MAX_ATTEMPTS: Final = 5
+INTERVAL: Final = 60
+DRAIN_LIMIT: Final = 200
+CLAIM_TIMEOUT: Final = 1800
+
+OUTBOX_COLUMNS: Final = """
+    msg_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    digest TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    status TEXT NOT NULL,
+    claimed TEXT,
+    date TEXT NOT NULL
+"""
+
+
+def smtp_ssl_connect(
+    host: Optional[str] = SMTP_SERVER,
+    port: Optional[Any] = SMTP_PORT,
+    user: Optional[str] = EMAIL,
+    password: Optional[str] = PASSWORD,
+) -> Callable[[], smtplib.SMTP]:
+    """
+    Factory for logged in SMTP_SSL connections,
+    defaults as utils.send_email
+    """
+
+    def connect() -> smtplib.SMTP:
+        smtp = smtplib.SMTP_SSL(
+            host, int(port), context=ssl.create_default_context(), timeout=60
+        )
+        if user:
+            smtp.login(user, password)
+        return smtp
+
+    return connect
+
+
+class EmailOutbox:
+    """
+    Persistent queue of outgoing emails
+    """
+
+    def __init__(self, path: str):
+        self.store = request_store.RequestStore(path, "OUTBOX", OUTBOX_COLUMNS)
+
+    def enqueue(
+        self,
+        recipient: str,
+        subject: str,
+        body: str,
+        digest: Optional[str] = None,
+        sender: str = DEFAULT_SENDER,
+    ) -> int:
+        """
+        Queue a message, returning its ID
+        """
+        return self.store.insert(
+            {
+                "recipient": recipient,
+                "sender": sender,
+                "subject": subject,
+                "body": body,
+                "digest": digest,
+                "status": "Queued",
+                "date": datetime.datetime.now().strftime(request_store.DATE_FMT),
+            }
+        )
+
+    def queued(self, limit: int = DRAIN_LIMIT) -> list[dict[str, Any]]:
+        """
+        Oldest queued messages first
+        """
+        cursor = self.store.connection().execute(
+            "SELECT * FROM OUTBOX WHERE status = 'Queued' ORDER BY msg_id LIMIT ?",
+            (limit,),
+        )
+        return request_store.as_dicts(cursor)
+
+    def claim(
+        self, limit: int = DRAIN_LIMIT, sender: Optional[str] = None
+    ) -> list[dict[str, Any]]:
+        """
+        Mark the oldest queued (or abandoned) messages
+        'Sending' and return them, in one IMMEDIATE
+        transaction so no other drain can claim them.
+        Only messages from sender, if given
+        """
+        now = datetime.datetime.now()
+        stale = (now - datetime.timedelta(seconds=CLAIM_TIMEOUT)).strftime(
+            request_store.DATE_FMT
+        )
+        sql = (
+            "SELECT * FROM OUTBOX WHERE (status = 'Queued' "
+            "OR (status = 'Sending' AND claimed < ?))"
+        )
+        params: list[Any] = [stale]
+        if sender is not None:
+            sql += " AND sender = ?"
+            params.append(sender)
+        sql += " ORDER BY msg_id LIMIT ?"
+        params.append(limit)
+
+        conn = self.store.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            messages = request_store.as_dicts(conn.execute(sql, params))
+            conn.executemany(
+                "UPDATE OUTBOX SET status = 'Sending', claimed = ? WHERE msg_id = ?",
+                [
+                    (now.strftime(request_store.DATE_FMT), msg["msg_id"])
+                    for msg in messages
+                ],
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return messages
+
+    def mark_sent(self, msg_ids: list[int]) -> None:
+        """
+        Record successful delivery
+        """
+        conn = self.store.connection()
+        with conn:
+            conn.executemany(
+                "UPDATE OUTBOX SET status = 'Sent', error = NULL, claimed = NULL "
+                "WHERE msg_id = ?",
+                [(msg_id,) for msg_id in msg_ids],
+            )
+
+    def mark_failed(self, msg_ids: list[int], error: str) -> None:
+        """
+        Count a failed attempt, giving up
+        after MAX_ATTEMPTS
+        """
+        conn = self.store.connection()
+        with conn:
+            conn.executemany(
+                "UPDATE OUTBOX SET attempts = attempts + 1, error = ?, claimed = NULL, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'Failed' ELSE 'Queued' END "
+                "WHERE msg_id = ?",
+                [(error, MAX_ATTEMPTS, msg_id) for msg_id in msg_ids],
+            )
+
+
+def build_batches(
+    messages: list[dict[str, Any]],
+) -> list[tuple[list[int], EmailMessage]]:
+    """
+    One email per message, except messages sharing
+    recipient and digest key, coalesced into a digest
+    """
+    groups: dict[tuple, list[dict[str, Any]]] = {}
+    for msg in messages:
+        if msg["digest"]:
+            key = (msg["recipient"], msg["sender"], msg["digest"])
+        else:
+            key = ("single", msg["msg_id"])
+        groups.setdefault(key, []).append(msg)
+
+    batches = []
+    for group in groups.values():
+        first = group[0]
+        email = EmailMessage()
+        email["From"] = first["sender"]
+        email["To"] = first["recipient"]
+        if len(group) == 1:
+            email["Subject"] = first["subject"]
+            email.set_content(first["body"])
+        else:
+            email["Subject"] = f"{first['subject']} (and {len(group) - 1} more updates)"
+            divider = "\n\n" + "-" * 60 + "\n"
+            email.set_content(
+                f"You have {len(group)} updates:\n"
+                + divider.join(
+                    f"{msg['subject']}\n{msg['body'].strip()}" for msg in group
+                )
+            )
+        batches.append(([msg["msg_id"] for msg in group], email))
+    return batches
+
+
+def drain(
+    outbox: EmailOutbox,
+    connect: Callable[[], smtplib.SMTP],
+    limit: int = DRAIN_LIMIT,
+    sender: Optional[str] = None,
+) -> int:
+    """
+    Claim and send queued messages (from sender,
+    if given) over one SMTP connection, reconnecting
+    once if the server drops it.
+    Returns number of emails sent
+    """
+    messages = outbox.claim(limit, sender)
+    if not messages:
+        return 0
+
+    sent = 0
+    smtp = None
+    try:
+        for msg_ids, email in build_batches(messages):
+            for attempt in range(2):
+                try:
+                    if smtp is None:
+                        smtp = connect()
+                    smtp.send_message(email)
+                    outbox.mark_sent(msg_ids)
+                    sent += 1
+                    break
+                except smtplib.SMTPServerDisconnected as err:
+                    smtp = None
+                    if attempt:
+                        outbox.mark_failed(msg_ids, str(err))
+                except (smtplib.SMTPException, OSError) as err:
+                    LOGGER.warning("Email to %s failed: %s", email["To"], err)
+                    outbox.mark_failed(msg_ids, str(err))
+                    if not isinstance(err, smtplib.SMTPRecipientsRefused):
+                        smtp = None
+                    break
+    finally:
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+    LOGGER.info("Outbox drained: %s emails sent for %s messages", sent, len(messages))
+    return sent
+
+
+class OutboxSender:
+    """
+    Background thread draining the outbox
+    every interval seconds, and once on stop.
+    Pass the sender address the connection
+    logs in as, to leave other senders' mail
+    """
+
+    def __init__(
+        self,
+        outbox: EmailOutbox,
+        connect: Optional[Callable[[], smtplib.SMTP]] = None,
+        interval: float = INTERVAL,
+        sender: Optional[str] = None,
+    ):
+        self.outbox = outbox
+        self.connect = connect or smtp_ssl_connect()
+        self.interval = interval
+        self.sender = sender
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self.stopping.wait(self.interval):
+            self.drain()
+        self.drain()
+
+    def drain(self) -> int:
+        """
+        One drain, logging rather than raising
+        """
+        try:
+            return drain(self.outbox, self.connect, sender=self.sender)
+        except Exception as err:
+            LOGGER.exception("Outbox drain failed: %s", err)
+            return 0
+
+    def start(self) -> None:
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self._run, name="email_outbox", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop and flush anything still queued
+        """
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
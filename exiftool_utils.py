@@ -0,0 +1,226 @@
+"""
+Persistent exiftool session for EXIF reads/writes
+
+Keeps one 'exiftool -stay_open True -@ -' process
+per worker process, so Perl start-up is paid once
+rather than once per file. Requests are written to
+the process as argument blocks ending '-execute{N}'
+and responses read back to the matching '{readyN}'
+marker. Several requests can be queued before the
+responses are read (pipelined), and each read request
+may carry many paths, returned as parsed JSON dicts.
+
+Usage:
+    metadata = exiftool_utils.get_metadata([path1, path2])
+    metadata[path1]['ImageWidth']
+    text = exiftool_utils.get_text([path1, path2])[path1]
+
+2026
+"""
+
+import atexit
+import json
+import os
+import subprocess
+import threading
+from typing import Final, Iterable, Optional
+
+EXIFTOOL: Final = os.environ.get("EXIFTOOL", "exiftool")
+CHUNK: Final = 200
+
+
+class ExifToolSession:
+    """
+    Wrapper for a stay_open exiftool process
+    Use as a context manager, or via get_session()
+    for one shared session per worker process
+    """
+
+    def __init__(self, executable: str = EXIFTOOL):
+        self.executable = executable
+        self.process: Optional[subprocess.Popen] = None
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Launch exiftool reading argument
+        blocks from stdin
+        """
+        if self.running:
+            return
+        self.process = subprocess.Popen(
+            [self.executable, "-stay_open", "True", "-@", "-"],
+            shell=False,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    @property
+    def running(self) -> bool:
+        """
+        True while the exiftool process is alive
+        """
+        return self.process is not None and self.process.poll() is None
+
+    def close(self) -> None:
+        """
+        Ask exiftool to exit and wait for it
+        """
+        if not self.running:
+            self.process = None
+            return
+        try:
+            self.process.stdin.write(b"-stay_open\nFalse\n")
+            self.process.stdin.flush()
+            self.process.communicate(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write_block(self, args: list[str]) -> int:
+        """
+        Queue one request, returning
+        its execute number
+        """
+        self.counter += 1
+        block = "\n".join(args + [f"-execute{self.counter}"]) + "\n"
+        self.process.stdin.write(block.encode("utf-8"))
+        return self.counter
+
+    def _read_response(self, num: int) -> str:
+        """
+        Read stdout up to the ready
+        marker for request num
+        """
+        marker = f"{{ready{num}}}".encode("utf-8")
+        lines = []
+        for line in iter(self.process.stdout.readline, b""):
+            if line.rstrip() == marker:
+                return b"".join(lines).decode("utf-8", errors="replace")
+            lines.append(line)
+        raise OSError("exiftool session ended before response was complete")
+
+    def execute_many(self, requests: list[list[str]]) -> list[str]:
+        """
+        Pipeline several requests: all argument blocks
+        are written by a feeder thread while responses
+        are read back in order on this one
+        """
+        with self.lock:
+            self.start()
+            first = self.counter + 1
+            failure: list[Exception] = []
+
+            def feed():
+                try:
+                    for args in requests:
+                        self._write_block(args)
+                    self.process.stdin.flush()
+                except OSError as err:
+                    failure.append(err)
+
+            feeder = threading.Thread(target=feed, daemon=True)
+            feeder.start()
+            responses = []
+            try:
+                for num in range(first, first + len(requests)):
+                    responses.append(self._read_response(num))
+            finally:
+                feeder.join()
+            if failure:
+                raise failure[0]
+            return responses
+
+    def execute(self, *args: str) -> str:
+        """
+        Run one exiftool request, returning stdout
+        """
+        return self.execute_many([list(args)])[0]
+
+    def get_metadata(
+        self, paths: Iterable[str], tags: Optional[list[str]] = None, chunk: int = CHUNK
+    ) -> dict[str, dict[str, object]]:
+        """
+        Read metadata for many paths as
+        {path: {tag: value}}, chunk paths
+        per pipelined request
+        """
+        paths = list(paths)
+        tag_args = [f"-{tag}" for tag in tags or []]
+        requests = [
+            ["-json", "-charset", "filename=utf8"] + tag_args + paths[num : num + chunk]
+            for num in range(0, len(paths), chunk)
+        ]
+        metadata: dict[str, dict[str, object]] = {}
+        for response in self.execute_many(requests):
+            if not response.strip():
+                continue
+            try:
+                records = json.loads(response)
+            except ValueError as err:
+                print(f"Unable to parse exiftool JSON response: {err}")
+                continue
+            for record in records:
+                metadata[record.get("SourceFile")] = record
+        return metadata
+
+    def get_text(self, paths: Iterable[str]) -> dict[str, str]:
+        """
+        Default exiftool text output per path,
+        one request each, pipelined in one write
+        """
+        paths = list(paths)
+        requests = [["-charset", "filename=utf8", dpath] for dpath in paths]
+        return dict(zip(paths, self.execute_many(requests)))
+
+    def set_tags(self, paths: Iterable[str], tags: dict[str, str]) -> str:
+        """
+        Write tag values to each path in place
+        returning exiftool's summary output
+        """
+        args = [f"-{tag}={value}" for tag, value in tags.items()]
+        args += ["-overwrite_original", "-charset", "filename=utf8"]
+        return self.execute(*args, *list(paths))
+
+
+_SESSION: Optional[ExifToolSession] = None
+_SESSION_PID: Optional[int] = None
+
+
+def get_session() -> ExifToolSession:
+    """
+    One running session per worker process,
+    restarted if the process has been forked
+    """
+    global _SESSION, _SESSION_PID
+    if _SESSION is None or _SESSION_PID != os.getpid():
+        _SESSION = ExifToolSession()
+        _SESSION_PID = os.getpid()
+        atexit.register(_SESSION.close)
+    _SESSION.start()
+    return _SESSION
+
+
+def get_metadata(
+    paths: Iterable[str], tags: Optional[list[str]] = None
+) -> dict[str, dict[str, object]]:
+    """
+    Metadata for paths from the shared session
+    """
+    return get_session().get_metadata(paths, tags)
+
+
+def get_text(paths: Iterable[str]) -> dict[str, str]:
+    """
+    Text output for paths from the shared session
+    """
+    return get_session().get_text(paths)
@@ -0,0 +1,153 @@
+"""
+EPG genre mapping service
+
+Loads EPG_genre_mapping.yaml once per process into a
+dict of (genre, genre2, subject, subject2) priref tuples
+keyed by normalised category code, so documentation
+scripts look up each programme's category without
+re-reading the YAML. The map is reloaded only if the
+YAML's mtime changes mid-run.
+
+Category codes missing from the map, or mapped to
+'Undefined', are buffered and written to the undefined
+genres log once per run, one line per code.
+
+Usage:
+    GENRES = genre_map.GenreMap(GENRE_MAP, UNDEFINED_LOG)
+    prirefs = GENRES.lookup(category_code, title, description)
+    ...
+    GENRES.flush()
+
+2026
+"""
+
+import atexit
+import logging
+import os
+from typing import Any, Final, Optional
+
+import yaml
+
+LOGGER = logging.getLogger("genre_map")
+FIELDS: Final = ("Genre", "Genre2", "Subject", "Subject2")
+UNDEFINED: Final = "Undefined"
+
+
+def normalise(category_code: str) -> str:
+    """
+    Map key for an EPG category code
+    """
+    return str(category_code).strip().lower()
+
+
+def priref_of(value: Any) -> str:
+    """
+    Priref from a mapping entry, held as
+    {name: priref} or 'name: priref'
+    """
+    if isinstance(value, dict):
+        if not value or UNDEFINED in value:
+            return ""
+        return str(list(value.values())[-1])
+    if isinstance(value, str) and value != UNDEFINED:
+        return value.split(":")[-1].strip()
+    return ""
+
+
+def compile_map(data: dict[str, Any]) -> dict[str, tuple[str, str, str, str]]:
+    """
+    YAML genres section to priref tuples
+    """
+    compiled = {}
+    for code, entry in (data.get("genres") or {}).items():
+        entry = entry or {}
+        compiled[normalise(code)] = tuple(priref_of(entry.get(f)) for f in FIELDS)
+    return compiled
+
+
+def undefined_codes(data: dict[str, Any]) -> frozenset[str]:
+    """
+    Category codes whose Genre is 'Undefined'
+    """
+    return frozenset(
+        normalise(code)
+        for code, entry in (data.get("genres") or {}).items()
+        if UNDEFINED in str((entry or {}).get("Genre"))
+    )
+
+
+class GenreMap:
+    """
+    Category code lookups with buffered
+    undefined category reporting
+    """
+
+    def __init__(self, path: str, undefined_log: Optional[str] = None) -> None:
+        self.path = path
+        self.undefined_log = undefined_log
+        self._mtime: Optional[float] = None
+        self._map: dict[str, tuple[str, str, str, str]] = {}
+        self._undefined: frozenset[str] = frozenset()
+        self._pending: dict[str, str] = {}
+        atexit.register(self.flush)
+
+    def _load(self) -> None:
+        """
+        Compile YAML on first use or
+        if it has changed since
+        """
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return
+        with open(self.path, "r", encoding="utf-8") as file:
+            data = yaml.safe_load(file) or {}
+        self._map = compile_map(data)
+        self._undefined = undefined_codes(data)
+        self._mtime = mtime
+        LOGGER.info("Genre map loaded: %s categories", len(self._map))
+
+    def lookup(
+        self, category_code: str, title: str = "", description: str = ""
+    ) -> Optional[tuple[str, str, str, str]]:
+        """
+        Genre, genre2, subject and subject2 prirefs
+        for category_code, '' where not mapped.
+        None if the code is not in the map
+        """
+        self._load()
+        key = normalise(category_code)
+        prirefs = self._map.get(key)
+        if prirefs is None:
+            LOGGER.warning(
+                "%s -- New category not in EPG_genre_map.yaml: %s", category_code, title
+            )
+            self.report(category_code, title, description)
+        elif key in self._undefined:
+            self.report(category_code, title, description)
+        return prirefs
+
+    def report(self, category_code: str, title: str, description: str) -> None:
+        """
+        Buffer an undefined category,
+        first title and description only
+        """
+        self._pending.setdefault(
+            normalise(category_code),
+            f"Category: {category_code}     Title: {title}     Description: {description}",
+        )
+
+    def flush(self) -> None:
+        """
+        Append buffered undefined categories to the
+        log, skipping codes written earlier this run
+        """
+        lines = [line for line in self._pending.values() if line is not None]
+        if lines and self.undefined_log:
+            try:
+                with open(self.undefined_log, "a", encoding="utf-8") as genre_log:
+                    for line in lines:
+                        genre_log.write(f"\n{line}")
+            except OSError as err:
+                LOGGER.warning("Unable to write undefined genres log: %s", err)
+                return
+        self._pending = dict.fromkeys(self._pending)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+"""
+Advert break detection for STORA off-air
+MPEG-TS recordings, replacing the buffered
+adverts_identifier_mpeg_ts scripts
+
+One FFmpeg pass per stream.mpeg2.ts decodes the
+audio only (-vn, downmixed to mono at 8kHz) into
+silencedetect. With --freeze a downscaled video
+branch feeds freezedetect in the same pass. FFmpeg
+stderr is read line by line as it is produced so
+only event timestamps are held in memory.
+
+Runs of silences spaced at 10-60 second intervals
+are written as advert segments to advert_breaks.json
+in the programme folder. document_augmented_stora
+attaches them to the Item record via segment_values().
+
+main():
+1. Receives optional date path (YYYY/MM/DD) from
+   sys.argv, otherwise uses yesterday
+2. Globs stream.mpeg2.ts in every channel folder
+   for that date, skipping folders already analysed
+3. Runs detection for each file in a multiprocessing
+   Pool, MAX_PARALLEL files at a time
+4. Writes JSON segment list atomically per programme
+
+2026
+"""
+
+import datetime
+import glob
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+from functools import partial
+from multiprocessing import Pool
+from typing import Final, Iterable, Iterator, Optional
+
+import numpy as np
+
+sys.path.append(os.environ["CODE"])
+import interval_utils
+
+# Global variables
+STORAGE: Final = os.environ.get("STORA_PATH", "")
+LOG_PATH: Final = os.environ.get("LOG_PATH", "")
+MAX_PARALLEL: Final = 6
+OUTPUT_JSON: Final = "advert_breaks.json"
+DOWNMIX: Final = "aformat=sample_rates=8000:channel_layouts=mono"
+SILENCE_FILTER: Final = "silencedetect=noise=-31dB:d=0.4"
+FREEZE_FILTER: Final = "freezedetect=noise=-60dB:d=0.2"
+EVENT: Final = re.compile(r"(silence|freeze)_(start|end)\s*:\s*(-?\d+(?:\.\d+)?)")
+
+LOGGER = logging.getLogger("advert_break_detector")
+
+
+def build_command(fpath: str, freeze: bool = False) -> list[str]:
+    """
+    FFmpeg command for a single decode pass,
+    audio only unless freeze detection wanted.
+    Audio is downmixed in the filter chain so
+    silencedetect sees mono 8kHz samples
+    """
+    cmd = ["ffmpeg", "-hide_banner", "-nostats", "-i", fpath]
+    if not freeze:
+        return cmd + [
+            "-map",
+            "0:a:0",
+            "-vn",
+            "-sn",
+            "-dn",
+            "-af",
+            f"{DOWNMIX},{SILENCE_FILTER}",
+            "-f",
+            "null",
+            "-",
+        ]
+
+    graph = (
+        f"[0:a:0]{DOWNMIX},{SILENCE_FILTER}[a];"
+        f"[0:v:0]scale=320:-2,{FREEZE_FILTER}[v]"
+    )
+    return cmd + [
+        "-filter_complex",
+        graph,
+        "-map",
+        "[a]",
+        "-map",
+        "[v]",
+        "-sn",
+        "-dn",
+        "-f",
+        "null",
+        "-",
+    ]
+
+
+def iter_events(lines: Iterable[str]) -> Iterator[tuple[str, float, float]]:
+    """
+    Consume detector output a line at a time,
+    yielding (detector, start, end) as each
+    interval closes
+    """
+    open_starts: dict[str, Optional[float]] = {"silence": None, "freeze": None}
+    for line in lines:
+        for detector, kind, value in EVENT.findall(line):
+            if kind == "start":
+                open_starts[detector] = float(value)
+            elif open_starts[detector] is not None:
+                yield detector, open_starts[detector], float(value)
+                open_starts[detector] = None
+
+
+def collect_intervals(
+    lines: Iterable[str],
+) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """
+    Gather streamed events into start/end
+    arrays per detector
+    """
+    events: dict[str, list[tuple[float, float]]] = {"silence": [], "freeze": []}
+    for detector, start, end in iter_events(lines):
+        events[detector].append((start, end))
+
+    intervals = {}
+    for detector, pairs in events.items():
+        arr = np.array(pairs, dtype=float).reshape(-1, 2)
+        arr = arr[np.argsort(arr[:, 0], kind="stable")]
+        intervals[detector] = (arr[:, 0], arr[:, 1])
+    return intervals
+
+
+def build_segments(
+    intervals: dict[str, tuple[np.ndarray, np.ndarray]],
+    freeze: bool = False,
+    tolerance: float = 0.5,
+    min_matches: int = 3,
+) -> list[dict[str, object]]:
+    """
+    Turn silence (and freeze) intervals into advert
+    segments: clusters of regularly spaced silences,
+    running from the first silence start to the end
+    of the last silence in the cluster
+    """
+    starts, ends = intervals["silence"]
+    if freeze:
+        within = interval_utils.in_any_interval(starts, *intervals["freeze"])
+        starts, ends = starts[within], ends[within]
+
+    segments = []
+    for cluster in interval_utils.find_regular_clusters(
+        starts, tolerance=tolerance, min_matches=min_matches
+    ):
+        last = np.searchsorted(starts, cluster[-1])
+        seg_start = float(cluster[0])
+        seg_end = float(ends[last])
+        segments.append(
+            {
+                "start": round(seg_start, 3),
+                "end": round(seg_end, 3),
+                "start_timecode": str(datetime.timedelta(seconds=int(seg_start))),
+                "end_timecode": str(datetime.timedelta(seconds=int(seg_end))),
+                "silences": len(cluster),
+            }
+        )
+    return segments
+
+
+def detect_advert_breaks(fpath: str, freeze: bool = False) -> Optional[dict]:
+    """
+    Run the single FFmpeg pass for fpath and
+    return the segment document for JSON output
+    """
+    cmd = build_command(fpath, freeze)
+    try:
+        with subprocess.Popen(
+            cmd,
+            shell=False,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            errors="replace",
+        ) as proc:
+            intervals = collect_intervals(proc.stderr)
+            returncode = proc.wait()
+    except OSError as err:
+        LOGGER.warning("FFmpeg could not be launched for %s: %s", fpath, err)
+        return None
+
+    if returncode != 0:
+        LOGGER.warning("FFmpeg exited %s for %s", returncode, fpath)
+
+    return {
+        "file": fpath,
+        "created": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "freeze_filtered": freeze,
+        "ffmpeg_returncode": returncode,
+        "segments": build_segments(intervals, freeze),
+    }
+
+
+def write_segments(fpath: str, document: dict) -> str:
+    """
+    Write advert_breaks.json next to the stream,
+    via temp file and rename so readers never
+    see a partial document
+    """
+    out_path = os.path.join(os.path.dirname(fpath), OUTPUT_JSON)
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        json.dump(document, out)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def load_segments(folder: str) -> list[dict[str, object]]:
+    """
+    Segment list for a programme folder, for
+    use by the STORA documentation scripts
+    """
+    json_path = os.path.join(folder, OUTPUT_JSON)
+    if not os.path.isfile(json_path):
+        return []
+    try:
+        with open(json_path, "r", encoding="utf-8") as data:
+            return json.load(data).get("segments", [])
+    except (OSError, ValueError) as err:
+        LOGGER.warning("Unable to read %s: %s", json_path, err)
+        return []
+
+
+def segment_values(folder: str) -> list[dict[str, str]]:
+    """
+    CID Item utb fields listing the advert
+    segments found for a programme folder,
+    empty if it has not been analysed
+    """
+    segments = load_segments(folder)
+    if not segments:
+        return []
+    lines = [
+        f"{seg['start_timecode']} - {seg['end_timecode']} ({seg['silences']} silences)"
+        for seg in segments
+    ]
+    return [
+        {"utb.fieldname": "Advert breaks"},
+        {"utb.content": "\n".join(lines)},
+    ]
+
+
+def process_file(fpath: str, freeze: bool = False) -> tuple[str, Optional[int]]:
+    """
+    Pool worker: detect and write
+    returns path and segment count
+    """
+    document = detect_advert_breaks(fpath, freeze)
+    if document is None:
+        return fpath, None
+    write_segments(fpath, document)
+    return fpath, len(document["segments"])
+
+
+def needs_analysis(fpath: str) -> bool:
+    """
+    Skip streams whose JSON is newer
+    than the recording
+    """
+    out_path = os.path.join(os.path.dirname(fpath), OUTPUT_JSON)
+    if not os.path.exists(out_path):
+        return True
+    return os.path.getmtime(out_path) < os.path.getmtime(fpath)
+
+
+def main():
+    """
+    Analyse all channel recordings for one
+    day in parallel, one FFmpeg pass per file
+    """
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    freeze = "--freeze" in sys.argv
+    if args:
+        date_path = args[0].strip("/")
+    else:
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        date_path = yesterday.strftime("%Y/%m/%d")
+
+    if LOG_PATH:
+        hdlr = logging.FileHandler(os.path.join(LOG_PATH, "advert_break_detector.log"))
+        hdlr.setFormatter(logging.Formatter("%(asctime)s\t%(levelname)s\t%(message)s"))
+        LOGGER.addHandler(hdlr)
+    LOGGER.setLevel(logging.INFO)
+
+    day_path = os.path.join(STORAGE, date_path)
+    if not os.path.isdir(day_path):
+        sys.exit(f"Date path not found: {day_path}")
+
+    file_list = sorted(
+        fpath
+        for fpath in glob.glob(os.path.join(day_path, "*", "*", "stream.mpeg2.ts"))
+        if needs_analysis(fpath)
+    )
+    LOGGER.info(
+        "START ADVERT BREAK DETECTION %s: %s files, freeze=%s",
+        day_path,
+        len(file_list),
+        freeze,
+    )
+
+    with Pool(processes=MAX_PARALLEL) as pool:
+        worker = partial(process_file, freeze=freeze)
+        for fpath, total in pool.imap_unordered(worker, file_list):
+            if total is None:
+                LOGGER.warning("Advert detection failed: %s", fpath)
+            else:
+                LOGGER.info("%s advert segments found: %s", total, fpath)
+
+    LOGGER.info("END ADVERT BREAK DETECTION ===============================")
+
+
+if __name__ == "__main__":
+    main()
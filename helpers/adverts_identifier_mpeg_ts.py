@@ -3,6 +3,9 @@ import sys
 import subprocess
 from datetime import timedelta
 
+sys.path.append(os.environ["CODE"])
+import interval_utils
+
 
 def get_silence_detection(input_file):
 
@@ -31,72 +34,25 @@ def get_silence_detection(input_file):
 
 
 def retrieve_silences(data):
-    data_list = data.splitlines()
-    time_range = []
-    for line in data_list:
-        if "silence_start" in line:
-            print(line)
-            start = line.split(":")[-1].strip()
-        if "silence_end" in line:
-            print(line)
-            end = line.split(":")[-1].split("|")[0].strip()
-            if start and end:
-                time_range.append((start, end))
-            start = None
-            end = None
-
-    return time_range
+    starts, ends = interval_utils.parse_detector(data, "silence")
+    return starts, ends
 
 
 def find_advert_breaks(input_file):
     audio_data = get_silence_detection(input_file)
-    time_range = retrieve_silences(audio_data)
-
-    return time_range
-
+    starts, _ = retrieve_silences(audio_data)
 
-def parse_start_times(data):
-    starts = []
-    for item in data:
-        try:
-            start_str, _ = item
-            starts.append(float(start_str.strip()))
-        except ValueError:
-            continue  # skip bad entries
-    return sorted(starts)
+    return starts
 
 
 def format_time(seconds):
     return str(timedelta(seconds=int(round(seconds))))
 
 
-def is_valid_gap(gap, tolerance=0.50):
-    for base in range(10, 61, 10):  # 10,20,30,40,50, upto 60
-        if abs(gap - base) <= tolerance:
-            return True
-    return False
-
-
-def find_silence_clusters(data, tolerance=0.5, min_matches=3):
-    starts = parse_start_times(data)
-    if not starts:
-        return []
-
-    clusters = []
-    current_cluster = [starts[0]]
-
-    for i in range(1, len(starts)):
-        gap = starts[i] - starts[i - 1]
-
-        if is_valid_gap(gap, tolerance):
-            current_cluster.append(starts[i])
-        else:
-            if len(current_cluster) >= min_matches:
-                clusters.append(current_cluster)
-            current_cluster = [starts[i]]
-
-    if len(current_cluster) >= min_matches:
-        clusters.append(current_cluster)
+def find_silence_clusters(starts, tolerance=0.5, min_matches=3):
+    clusters = interval_utils.find_regular_clusters(
+        starts, tolerance=tolerance, min_matches=min_matches
+    )
 
     result = []
     for cluster in clusters:
@@ -11,6 +11,9 @@ import sys
 import subprocess
 from datetime import timedelta
 
+sys.path.append(os.environ["CODE"])
+import interval_utils
+
 
 def get_silence_detection(fpath):
     """
@@ -47,32 +50,12 @@ def get_silence_detection(fpath):
 def retrieve_silences(data):
     """
     Fetch from FFmpeg data output
-    start/end points for filters
+    start/end arrays for both filters
     """
-    data_list = data.splitlines()
-    time_range = []
-    freeze_range = []
-
-    for line in data_list:
-        line = line.strip()
-        if "silence_start" in line:
-            start = line.split(":")[-1].strip()
-        if "silence_end" in line:
-            end = line.split(":")[-1].strip()
-            if start and end:
-                time_range.append((start, end))
-            start = None
-            end = None
-        if "freeze_start" in line:
-            freeze_start = line.split(":")[-1].strip()
-        if "freeze_end" in line:
-            freeze_end = line.split(":")[-1].strip()
-            if freeze_start and freeze_end:
-                freeze_range.append((freeze_start, freeze_end))
-            freeze_start = None
-            freeze_end = None
-
-    return time_range, freeze_range
+    silences = interval_utils.parse_detector(data, "silence")
+    freezes = interval_utils.parse_detector(data, "freeze")
+
+    return silences, freezes
 
 
 def find_advert_breaks(fpath):
@@ -81,46 +64,13 @@ def find_advert_breaks(fpath):
     correlate with visual freezes
     """
     audio_data = get_silence_detection(fpath)
-    time_range, freeze_range = retrieve_silences(audio_data)
-    print(freeze_range)
-    if not time_range:
+    (starts, _), freezes = retrieve_silences(audio_data)
+    print(freezes)
+    if not len(starts):
         return None
-    filtered = []
-    for s, e in time_range:
-        print(s, e)
-        if start_within_freezes(s, freeze_range):
-            filtered.append((s, e))
-
-    return filtered
+    within = interval_utils.in_any_interval(starts, *freezes)
 
-
-def start_within_freezes(sstart, freeze_range):
-    """
-    Check ranges for previous func
-    """
-    for fstart, fend in freeze_range:
-        if sstart >= fstart and sstart <= fend:
-            return True
-    return False
-
-
-def parse_start_times(data):
-    """
-    Clean up and sort start times
-    """
-    starts = []
-    for item in data:
-        print(item)
-        try:
-            if isinstance(item, (tuple, list)):
-                start = float(item[0])
-            else:
-                start_str, _ = item.split("-")
-                start = float(start_str.strip())
-            starts.append(start)
-        except ValueError:
-            continue  # skip bad entries
-    return sorted(starts)
+    return starts[within]
 
 
 def format_time(seconds):
@@ -130,40 +80,16 @@ def format_time(seconds):
     return str(timedelta(seconds=int(round(seconds))))
 
 
-def is_valid_gap(gap, tolerance=0.5):
-    """
-    Looks for gaps that 10 sec X divisble only
-    """
-    for base in range(10, 61, 10):  # 10,20,30,40,50, upto 60
-        if abs(gap - base) <= tolerance:
-            return True
-    return False
-
-
-def find_silence_clusters(data, tolerance=0.5, min_matches=3):
+def find_silence_clusters(starts, tolerance=0.5, min_matches=3):
     """
     Only allow through clusters of 10x second
     gaps to identify advert blocks
     """
-    starts = parse_start_times(data)
-    if not starts:
+    if starts is None:
         return []
-
-    clusters = []
-    current_cluster = [starts[0]]
-
-    for i in range(1, len(starts)):
-        gap = starts[i] - starts[i - 1]
-
-        if is_valid_gap(gap, tolerance):
-            current_cluster.append(starts[i])
-        else:
-            if len(current_cluster) >= min_matches:
-                clusters.append(current_cluster)
-            current_cluster = [starts[i]]
-
-    if len(current_cluster) >= min_matches:
-        clusters.append(current_cluster)
+    clusters = interval_utils.find_regular_clusters(
+        starts, tolerance=tolerance, min_matches=min_matches
+    )
 
     result = []
     for cluster in clusters:
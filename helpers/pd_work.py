@@ -2,7 +2,6 @@ import pandas as pd
 import csv
 import json
 import datetime
-import yaml
 import pandas as pd
 from zoneinfo import ZoneInfo
 from datetime import datetime, timezone
@@ -13,11 +12,15 @@ import sys
 
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import genre_map
 
 CODE_PATH = os.environ["CODE"]
 GENRE_MAP = os.path.join(CODE_PATH, "document_en_15907/EPG_genre_mapping.yaml")
 SUBS_PTH = os.environ["SUBS_PATH2"]
 GENRE_PTH = SUBS_PTH.split("subtitles_not_in_cid/")[0]
+GENRES = genre_map.GenreMap(
+    GENRE_MAP, os.path.join(GENRE_PTH, "redux_undefined_genres.txt")
+)
 
 
 def get_description(info_json):
@@ -59,82 +62,11 @@ def genre_retrieval(category_code, description, title):
     """
     Retrieve genre data, return as list
     """
-    with open(GENRE_MAP, "r", encoding="utf8") as files:
-        data = yaml.load(files, Loader=yaml.FullLoader)
-        print(
-            f"genre_retrieval(): The genre data is being retrieved for: {category_code}"
-        )
-    for _ in data:
-        if category_code in data["genres"]:
-            genre_one = {}
-            genre_two = {}
-            subject_one = {}
-            subject_two = {}
-
-            genre_one = data["genres"][category_code.strip("u")]["Genre"]
-            print(f"genre_retrieval(): Genre one: {genre_one}")
-            if "Undefined" in str(genre_one):
-                print(
-                    f"genre_retrieval(): Undefined category_code discovered: {category_code}"
-                )
-                with open(
-                    os.path.join(GENRE_PTH, "redux_undefined_genres.txt"), "a"
-                ) as genre_log:
-                    genre_log.write("\n")
-                    genre_log.write(
-                        f"Category: {category_code}     Title: {title}     Description: {description}"
-                    )
-                genre_one_priref = ""
-            else:
-                for _, val in genre_one.items():
-                    genre_one_priref = val
-                print(
-                    f"genre_retrieval(): Key value for genre_one_priref: {genre_one_priref}"
-                )
-            try:
-                genre_two = data["genres"][category_code.strip("u")]["Genre2"]
-                for _, val in genre_two.items():
-                    genre_two_priref = val
-            except (IndexError, KeyError):
-                genre_two_priref = ""
-
-            try:
-                subject_one = data["genres"][category_code.strip("u")]["Subject"]
-                for _, val in subject_one.items():
-                    subject_one_priref = val
-                print(
-                    f"genre_retrieval(): Key value for subject_one_priref: {subject_one_priref}"
-                )
-            except (IndexError, KeyError):
-                subject_one_priref = ""
-
-            try:
-                subject_two = data["genres"][category_code.strip("u")]["Subject2"]
-                for _, val in subject_two.items():
-                    subject_two_priref = val
-                print(
-                    f"genre_retrieval(): Key value for subject_two_priref: {subject_two_priref}"
-                )
-            except (IndexError, KeyError):
-                subject_two_priref = ""
-
-            return [
-                genre_one_priref,
-                genre_two_priref,
-                subject_one_priref,
-                subject_two_priref,
-            ]
-
-        else:
-            print(f"{category_code} -- New category not in EPG_genre_map.yaml: {title}")
-            with open(
-                os.path.join(GENRE_PTH, "redux_undefined_genres.txt"), "a"
-            ) as genre_log:
-                genre_log.write("\n")
-                genre_log.write(
-                    f"Category: {category_code}     Title: {title}     Description: {description}"
-                )
-            return []
+    print(f"genre_retrieval(): The genre data is being retrieved for: {category_code}")
+    prirefs = GENRES.lookup(category_code, title, description)
+    if prirefs is None:
+        return []
+    return list(prirefs)
 
 
 if __name__ == "__main__":
@@ -339,7 +271,7 @@ if __name__ == "__main__":
                     genre_two_priref,
                     subject_one_priref,
                     subject_two_priref,
-                ) = genre_retrieval(category_code, description, asset_title)
+                ) = genre_outcome
 
             results_one = {"priref": part_of_reference_result[0]}
             results = {
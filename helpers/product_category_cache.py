@@ -0,0 +1,204 @@
+"""
+Product category thesaurus cache for TechEdge adverts
+
+Loads every PROD_CAT thesaurus term, with its narrower
+term links, in one CID search. resolve() then works out
+the major/mid/minor category tree for a whole CSV in
+memory, inserts only the terms CID does not hold yet, and
+sends one narrower term update per parent term for any
+new links, rather than searching and updating each row's
+three terms one by one.
+
+Usage:
+    CATEGORIES = product_category_cache.ProductCategoryCache(CID_API)
+    CATEGORIES.resolve({(major, mid, minor), ...})
+    minor_pri, mid_pri, maj_pri = CATEGORIES.prirefs(major, mid, minor)
+
+2026
+"""
+
+import logging
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Final, Iterable, Optional
+
+sys.path.append(os.environ["CODE"])
+import adlib_v3 as adlib
+
+LOGGER = logging.getLogger("product_category_cache")
+TERM_TYPE: Final = "PROD_CAT"
+
+
+def term_key(term: str) -> str:
+    """
+    Lookup key for a category term
+    """
+    return str(term).strip().lower()
+
+
+def narrower_prirefs(record: dict[str, Any]) -> list[str]:
+    """
+    Narrower term prirefs held
+    in a thesaurus record
+    """
+    prirefs = []
+    for term in record.get("narrower_term") or []:
+        try:
+            num = term.get("priref")[0].get("spans")[0].get("text")
+        except (AttributeError, IndexError, TypeError):
+            continue
+        if num:
+            prirefs.append(num)
+    return prirefs
+
+
+def category_record(term: str) -> list[dict[str, str]]:
+    """
+    New PROD_CAT thesaurus record data
+    """
+    return [
+        {"term": term},
+        {"term.type": TERM_TYPE},
+        {"term.status": "1"},
+        {"source": "TechEdge adverts data supply"},
+        {"record_access.user": "BFIiispublic"},
+        {"record_access.rights": "0"},
+        {"input.name": "datadigipres"},
+        {"input.date": str(datetime.now())[:10]},
+        {"input.time": str(datetime.now())[11:19]},
+        {
+            "input.notes": "Automated bulk record creation using data supplied by TechEdge"
+        },
+    ]
+
+
+class ProductCategoryCache:
+    """
+    PROD_CAT terms and their narrower
+    term links, loaded once per run
+    """
+
+    def __init__(self, api: str) -> None:
+        self.api = api
+        self.terms: dict[str, str] = {}
+        self.narrower: dict[str, set[str]] = defaultdict(set)
+        self.loaded = False
+
+    def load(self) -> bool:
+        """
+        Fetch every PROD_CAT term in one search
+        """
+        hits, records = adlib.retrieve_record(
+            self.api, "thesaurus", f"term.type='{TERM_TYPE}'", "0"
+        )
+        if hits is None:
+            LOGGER.warning("Unable to load %s thesaurus terms", TERM_TYPE)
+            return False
+        for record in records if isinstance(records, list) else []:
+            priref = (adlib.retrieve_field_name(record, "priref") or [""])[0]
+            term = (adlib.retrieve_field_name(record, "term") or [""])[0]
+            if not priref or not term:
+                continue
+            # Keep the first record where a term is duplicated
+            self.terms.setdefault(term_key(term), priref)
+            self.narrower[priref].update(narrower_prirefs(record))
+        self.loaded = True
+        LOGGER.info("Product category cache loaded: %s terms", len(self.terms))
+        return True
+
+    def prirefs(
+        self, major: str, mid: str, minor: str
+    ) -> tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        Minor, mid and major prirefs,
+        None for any not in CID
+        """
+        return (
+            self.terms.get(term_key(minor)),
+            self.terms.get(term_key(mid)),
+            self.terms.get(term_key(major)),
+        )
+
+    def plan(
+        self, chains: Iterable[tuple[str, str, str]]
+    ) -> tuple[list[str], dict[str, list[str]]]:
+        """
+        Terms to insert, and narrower terms to link
+        to each parent term, for (major, mid, minor)
+        chains. Known links are left out
+        """
+        inserts = {}
+        links: dict[str, dict[str, str]] = defaultdict(dict)
+        for major, mid, minor in chains:
+            for term in (minor, mid, major):
+                if term_key(term) not in self.terms:
+                    inserts.setdefault(term_key(term), term)
+            for parent, child in ((mid, minor), (major, mid)):
+                parent_pri = self.terms.get(term_key(parent))
+                child_pri = self.terms.get(term_key(child))
+                if parent_pri and child_pri in self.narrower[parent_pri]:
+                    continue
+                links[term_key(parent)].setdefault(term_key(child), child)
+        return list(inserts.values()), {
+            parent: list(children.values()) for parent, children in links.items()
+        }
+
+    def resolve(self, chains: Iterable[tuple[str, str, str]]) -> None:
+        """
+        Insert missing terms and link narrower terms
+        for every (major, mid, minor) chain
+        """
+        if not self.loaded and not self.load():
+            return
+        inserts, links = self.plan(dict.fromkeys(chains))
+        for term in inserts:
+            self.insert(term)
+        for parent, children in links.items():
+            self.link(parent, children)
+
+    def insert(self, term: str) -> Optional[str]:
+        """
+        Create a PROD_CAT term record
+        """
+        xml = adlib.create_record_data(self.api, "thesaurus", "", category_record(term))
+        rec = adlib.post(self.api, xml, "thesaurus", "insertrecord")
+        priref = (
+            (adlib.retrieve_field_name(rec, "priref") or [None])[0] if rec else None
+        )
+        if not priref:
+            LOGGER.warning("Failed to create Thesaurus record for '%s':\n%s", term, rec)
+            return None
+        LOGGER.info("* New thesaurus entry created for Product Category '%s'", term)
+        self.terms[term_key(term)] = priref
+        return priref
+
+    def link(self, parent: str, children: list[str]) -> bool:
+        """
+        Add children as narrower terms of parent in one
+        update, keeping its existing narrower terms
+        """
+        parent_pri = self.terms.get(term_key(parent))
+        if not parent_pri:
+            return False
+        child_pris = [self.terms.get(term_key(child)) for child in children]
+        new = [
+            pri for pri in child_pris if pri and pri not in self.narrower[parent_pri]
+        ]
+        if not new:
+            return False
+        narrower = sorted(self.narrower[parent_pri]) + new
+        xml = adlib.create_record_data(
+            self.api,
+            "thesaurus",
+            parent_pri,
+            [{"narrower_term.lref": pri} for pri in narrower],
+        )
+        rec = adlib.post(self.api, xml, "thesaurus", "updaterecord")
+        if not rec:
+            LOGGER.warning("Failed to link narrower terms to '%s': %s", parent, new)
+            return False
+        LOGGER.info("Linked %s narrower terms to '%s'", len(new), parent)
+        self.narrower[parent_pri].update(new)
+        return True
@@ -1,11 +1,12 @@
 import json
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timedelta
 import sys
 import os
 import os.path
 
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import time_utils
 from document_en_15907 import title_article
 
 import glob
@@ -112,36 +113,25 @@ def check_bst_adjustment(utc_datetime_str: str):
     for London, adding +1 hours during BST
     Must receive data formatted %Y-%m-%d %H:%M:%S
     """
-    format = "%Y-%m-%d %H:%M:%S"
     try:
-        dt_utc = datetime.strptime(utc_datetime_str, format).replace(
-            tzinfo=timezone.utc
-        )
-        print(dt_utc)
+        dt_london = time_utils.utc_to_london([utc_datetime_str])
     except ValueError as err:
         raise ValueError(
             f"Invalid datetime string format: {err}. Expected '%Y-%m-%d %H:%M:%S'"
         )
 
-    london_tz = ZoneInfo("Europe/London")
-    dt_london = dt_utc.astimezone(london_tz)
-    string_bst = datetime.strftime(dt_london, format)
-    return string_bst.split(" ")
+    return time_utils.format_times(dt_london)[0].split(" ")
 
 
 def calculate_transmission_stoptime(duration: str, start_time: str):
 
-    time_format = "%H:%M:%S"
     try:
-        duration_int = int(duration)
+        end_time = time_utils.stop_times([start_time], [duration])
     except TypeError as e:
         print(e)
         return None
 
-    start_time = datetime.strptime(start_time, time_format)
-    end_time = start_time + timedelta(minutes=duration_int)
-
-    return end_time.strftime("%H:%M:%S")
+    return time_utils.format_times(end_time, time_utils.TIME_FORMAT)[0]
 
 
 def split_title(title_article):
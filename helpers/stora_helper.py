@@ -2,8 +2,6 @@
 Helper function for STORA
 """
 
-from datetime import datetime, timedelta
-
 
 def calculate_transmission_stoptime(duration: str, start_time: str) -> str | None:
     """
@@ -23,14 +21,12 @@ def calculate_transmission_stoptime(duration: str, start_time: str) -> str | Non
         estimated end time (return None if the inputs are wrong)
 
     """
-    time_format = "%H:%M:%S"
+    import time_utils
+
     try:
-        duration_int = int(duration)
+        end_time = time_utils.stop_times([start_time], [duration])
     except TypeError as e:
         print(e)
         return None
 
-    start_time = datetime.strptime(start_time, time_format)
-    end_time = start_time + timedelta(minutes=duration_int)
-
-    return end_time.strftime("%H:%M:%S")
+    return time_utils.format_times(end_time, time_utils.TIME_FORMAT)[0]
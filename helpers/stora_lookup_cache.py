@@ -0,0 +1,222 @@
+"""
+Lookup cache for STORA documentation
+
+Maps PATV series IDs to CID series work prirefs,
+PATV asset IDs to the parent work priref of an existing
+manifestation (repeat showings), and series IDs to the
+series_cache JSON holding their EPG data.
+
+Prirefs found are kept in a JSON file between runs and
+in memory for the run. IDs CID has no record for are only
+kept for the run, as the script may go on to create them.
+prewarm() fills the cache for every ID in a run with one
+batched CID search per chunk of IDs, so programmes that
+repeat through the day never query CID one by one.
+
+2026
+"""
+
+import datetime
+import json
+import logging
+import os
+import sys
+from typing import Any, Final, Iterable, Optional
+
+sys.path.append(os.environ["CODE"])
+import adlib_v3_sess as adlib
+
+LOGGER = logging.getLogger("stora_lookup_cache")
+CHUNK: Final = 25
+MAN_LIMIT: Final = 1000
+TTL_DAYS: Final = 30
+DATE_FMT: Final = "%Y-%m-%d"
+
+
+def chunks(items: list[str], size: int = CHUNK) -> Iterable[list[str]]:
+    """
+    Split list into lists of size
+    """
+    for idx in range(0, len(items), size):
+        yield items[idx : idx + size]
+
+
+def any_of(ids: list[str]) -> str:
+    """
+    CID search matching any of ids
+    on alternative_number
+    """
+    return "(" + " or ".join(f'alternative_number="{i}"' for i in ids) + ")"
+
+
+def first_value(record: dict[str, Any], field: str) -> str:
+    """
+    First value of a CID field, or empty string
+    """
+    try:
+        values = adlib.retrieve_field_name(record, field)
+        return values[0] or ""
+    except (IndexError, TypeError, KeyError):
+        return ""
+
+
+class StoraLookupCache:
+    """
+    Series priref, repeat work priref and
+    series cache file lookups for one run
+    """
+
+    def __init__(
+        self, path: str, series_cache_path: str, ttl_days: int = TTL_DAYS
+    ) -> None:
+        self.path = path
+        self.series_cache_path = series_cache_path
+        self.series: dict[str, str] = {}
+        self.works: dict[str, str] = {}
+        self.series_data: dict[str, tuple] = {}
+        self._listing: Optional[list[str]] = None
+        self._saved: dict[str, dict[str, list[str]]] = {"series": {}, "works": {}}
+        self._load(ttl_days)
+
+    def _load(self, ttl_days: int) -> None:
+        """
+        Read prirefs saved by earlier runs,
+        dropping any older than ttl_days
+        """
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                saved = json.load(file)
+        except (OSError, ValueError) as err:
+            LOGGER.warning("Unable to read lookup cache %s: %s", self.path, err)
+            return
+        cutoff = (datetime.date.today() - datetime.timedelta(days=ttl_days)).strftime(
+            DATE_FMT
+        )
+        for kind in ("series", "works"):
+            for key, (priref, date) in saved.get(kind, {}).items():
+                if date >= cutoff:
+                    self._saved[kind][key] = [priref, date]
+                    getattr(self, kind)[key] = priref
+
+    def save(self) -> None:
+        """
+        Write found prirefs via a temp file, keeping
+        entries saved meanwhile by other processes
+        """
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    saved = json.load(file)
+            except (OSError, ValueError):
+                saved = {}
+            for kind in ("series", "works"):
+                for key, value in saved.get(kind, {}).items():
+                    self._saved[kind].setdefault(key, value)
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(self._saved, file, indent=2)
+        os.replace(tmp, self.path)
+
+    def _set(self, kind: str, key: str, priref: str) -> None:
+        getattr(self, kind)[key] = priref
+        if priref:
+            today = datetime.date.today().strftime(DATE_FMT)
+            self._saved[kind][key] = [priref, today]
+
+    def set_series(self, series_id: str, priref: str) -> None:
+        """
+        Record series work priref, or ''
+        for no series in CID yet
+        """
+        self._set("series", series_id, priref)
+
+    def set_work(self, asset_id: str, priref: str) -> None:
+        """
+        Record parent work priref for an asset,
+        or '' for no manifestation in CID yet
+        """
+        self._set("works", asset_id, priref)
+
+    def prewarm(
+        self,
+        api: str,
+        sess: Any,
+        series_ids: Iterable[str],
+        asset_ids: Iterable[str],
+    ) -> None:
+        """
+        Batched CID searches for every series ID and
+        asset ID not already cached. IDs a complete
+        search did not return are cached as ''
+        """
+        series_todo = sorted({i for i in series_ids if i and i not in self.series})
+        for chunk in chunks(series_todo):
+            hits, records = adlib.retrieve_record(
+                api, "works", any_of(chunk), str(len(chunk) * 5), sess
+            )
+            self._absorb("series", "priref", chunk, hits, records)
+
+        asset_todo = sorted({i for i in asset_ids if i and i not in self.works})
+        for chunk in chunks(asset_todo):
+            search = f'{any_of(chunk)} and alternative_number.type="PATV asset id"'
+            hits, records = adlib.retrieve_record(
+                api,
+                "manifestations",
+                search,
+                str(MAN_LIMIT),
+                sess,
+                ["priref", "alternative_number", "part_of_reference.lref"],
+            )
+            self._absorb("works", "part_of_reference.lref", chunk, hits, records)
+        LOGGER.info(
+            "Lookup cache prewarmed: %s series, %s assets",
+            len(self.series),
+            len(self.works),
+        )
+
+    def _absorb(self, kind: str, field: str, chunk: list[str], hits, records) -> None:
+        """
+        Cache field (the priref wanted) from each record
+        of one batched search against the ID it matched.
+        Misses are cached only if every hit was returned
+        """
+        if hits is None:
+            LOGGER.warning("CID search failed for %s IDs, left uncached", len(chunk))
+            return
+        records = records or []
+        if not isinstance(records, list):
+            LOGGER.warning("No record list returned for %s IDs", len(chunk))
+            return
+        wanted = set(chunk)
+        found = set()
+        for record in records:
+            priref = first_value(record, field)
+            if len(priref) <= 1:
+                continue
+            alt_nums = adlib.retrieve_field_name(record, "alternative_number") or []
+            for alt_num in wanted.intersection(alt_nums) - found:
+                found.add(alt_num)
+                self._set(kind, alt_num, priref)
+        if hits <= len(records):
+            for key in wanted - found:
+                getattr(self, kind)[key] = ""
+
+    def series_file(self, series_id: str) -> Optional[str]:
+        """
+        series_cache JSON path for series_id, listing
+        the folder once per run and again on a miss
+        as new series files are fetched mid-run
+        """
+        for relist in (False, True):
+            if self._listing is None or relist:
+                self._listing = sorted(
+                    fname
+                    for fname in os.listdir(self.series_cache_path)
+                    if fname.endswith(".json")
+                )
+            for fname in self._listing:
+                if series_id in fname:
+                    return os.path.join(self.series_cache_path, fname)
+        return None
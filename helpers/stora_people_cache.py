@@ -0,0 +1,208 @@
+"""
+People lookup cache for STORA cast and credits
+
+Maps PATV person IDs to CID people priref, name and
+activity types. prewarm() resolves every ID in a batch
+of EPG files with one OR search per chunk of IDs, so a
+drama's 50+ contributors, and the same actors repeated
+across thousands of files, are not searched one by one.
+
+People found are kept in a JSON file between runs as
+priref and name only. Activity types are only held for
+the run, and current_activity_types() re-reads them from
+CID before the scripts append one, so types added in CID
+meanwhile (by cataloguers or the other castcred script)
+are kept. IDs with no person in CID are only kept for the
+run, as the scripts go on to create them.
+
+2026
+"""
+
+import datetime
+import json
+import logging
+import os
+import sys
+from typing import Any, Final, Iterable, Optional
+
+sys.path.append(os.environ["CODE"])
+import adlib_v3_sess as adlib
+from helpers.stora_lookup_cache import chunks, first_value
+
+LOGGER = logging.getLogger("stora_people_cache")
+TTL_DAYS: Final = 60
+DATE_FMT: Final = "%Y-%m-%d"
+FIELDS: Final = ["priref", "name", "activity_type", "utb.content", "utb.fieldname"]
+
+
+def person_search(ids: list[str]) -> str:
+    """
+    CID people search matching any of ids
+    held as PATV Person ID
+    """
+    return " or ".join(
+        f"(utb.content='{i}' WHEN utb.fieldname='PATV Person ID')" for i in ids
+    )
+
+
+def current_activity_types(api: str, session: Any, priref: str) -> Optional[list[str]]:
+    """
+    Activity types held in CID now for person
+    priref, None if the record can't be read
+    """
+    try:
+        hits, records = adlib.retrieve_record(
+            api, "people", f"priref={priref}", "1", session, ["activity_type"]
+        )
+        if hits is None or not isinstance(records, list) or not records:
+            return None
+        act_types = adlib.retrieve_field_name(records[0], "activity_type") or []
+    except (KeyError, IndexError, TypeError) as err:
+        LOGGER.warning("Unable to read activity types for %s: %s", priref, err)
+        return None
+    return [act for act in act_types if act]
+
+
+def contributor_ids(fullpath: str) -> list[str]:
+    """
+    PATV person IDs of every contributor
+    in an EPG JSON, for prewarm()
+    """
+    try:
+        with open(fullpath, "r", encoding="utf-8") as inf:
+            asset = json.load(inf)["item"][0]["asset"]
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        return []
+    return [
+        str(person["id"])
+        for person in asset.get("contributor") or []
+        if isinstance(person, dict) and person.get("id")
+    ]
+
+
+class StoraPeopleCache:
+    """
+    PATV person ID to (priref, name, activity types),
+    activity types known for this run only
+    """
+
+    def __init__(self, path: str, ttl_days: int = TTL_DAYS) -> None:
+        self.path = path
+        self.people: dict[str, Optional[tuple[str, str, list[str]]]] = {}
+        self._saved: dict[str, list[Any]] = {}
+        self._load(ttl_days)
+
+    def _load(self, ttl_days: int) -> None:
+        """
+        Read people saved by earlier runs,
+        dropping any older than ttl_days
+        """
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                saved = json.load(file)
+        except (OSError, ValueError) as err:
+            LOGGER.warning("Unable to read people cache %s: %s", self.path, err)
+            return
+        cutoff = (datetime.date.today() - datetime.timedelta(days=ttl_days)).strftime(
+            DATE_FMT
+        )
+        for credit_id, value in saved.items():
+            priref, name, date = value[0], value[1], value[-1]
+            if date >= cutoff:
+                self._saved[credit_id] = [priref, name, date]
+                self.people[credit_id] = (priref, name, [])
+
+    def save(self) -> None:
+        """
+        Write people found via a temp file, merging in
+        entries saved meanwhile by other processes,
+        newest date kept for each person
+        """
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    saved = json.load(file)
+            except (OSError, ValueError):
+                saved = {}
+            for credit_id, value in saved.items():
+                mine = self._saved.get(credit_id)
+                if mine is None or value[-1] > mine[-1]:
+                    self._saved[credit_id] = [value[0], value[1], value[-1]]
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(self._saved, file, indent=2)
+        os.replace(tmp, self.path)
+
+    def get(self, credit_id: str) -> Optional[tuple[str, str, list[str]]]:
+        """
+        Cached (priref, name, activity types), ('', '', [])
+        for no person in CID, or None if not looked up
+        """
+        if credit_id not in self.people:
+            return None
+        return self.people[credit_id] or ("", "", [])
+
+    def set_person(
+        self, credit_id: str, priref: str, name: str, act_types: list[str]
+    ) -> None:
+        """
+        Record a person found in or created in CID,
+        activity types kept for this run only
+        """
+        act_types = [act for act in act_types if act]
+        self.people[credit_id] = (priref, name, act_types)
+        today = datetime.date.today().strftime(DATE_FMT)
+        self._saved[credit_id] = [priref, name, today]
+
+    def set_activity_types(self, priref: str, act_types: list[str]) -> None:
+        """
+        Record the activity types person
+        priref now holds in CID, for this run
+        """
+        for credit_id, cached in list(self.people.items()):
+            if cached and cached[0] == priref:
+                self.people[credit_id] = (priref, cached[1], list(act_types))
+
+    def prewarm(
+        self, api: str, session: Any, credit_ids: Iterable[str], size: int = 20
+    ) -> None:
+        """
+        Batched CID searches for every person ID not
+        already cached. IDs a complete search did not
+        return are cached as missing for the run
+        """
+        todo = sorted({str(i) for i in credit_ids if i and i not in self.people})
+        for chunk in chunks(todo, size):
+            hits, records = adlib.retrieve_record(
+                api,
+                "people",
+                person_search(chunk),
+                str(len(chunk) * 5),
+                session,
+                FIELDS,
+            )
+            if hits is None:
+                LOGGER.warning("CID people search failed for %s IDs", len(chunk))
+                continue
+            records = records or []
+            if not isinstance(records, list):
+                continue
+            wanted = set(chunk)
+            found = set()
+            for record in records:
+                priref = first_value(record, "priref")
+                if not priref:
+                    continue
+                utb = adlib.retrieve_field_name(record, "utb.content") or []
+                for credit_id in wanted.intersection(utb) - found:
+                    found.add(credit_id)
+                    act_types = adlib.retrieve_field_name(record, "activity_type") or []
+                    self.set_person(
+                        credit_id, priref, first_value(record, "name"), act_types
+                    )
+            if hits <= len(records):
+                for credit_id in wanted - found:
+                    self.people[credit_id] = None
+        LOGGER.info("People cache prewarmed: %s people", len(self.people))
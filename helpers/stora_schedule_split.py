@@ -0,0 +1,92 @@
+"""
+Schedule splitter for STORA EPG fetches
+
+Splits a PATV channel schedule into one info_{dateTime}.json
+per programme slot, in a single pass:
+- Items are read one at a time, from a decoded schedule or
+  incrementally with ijson from a JSON file or stream, so a
+  schedule is never held twice in memory
+- Each slot is written as compact JSON to a temp file, then
+  renamed into place, so no half written JSON is matched
+- The channel folder is listed once, and each slot file
+  indexed against the programme folders whose HH-MM start
+  matches its dateTime, for move() and folder_check()
+
+2026
+"""
+
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any, BinaryIO, Final, Iterator, Union
+
+LOGGER = logging.getLogger("stora_schedule_split")
+ITEM_PREFIX: Final = "item.item"
+
+
+def slot_key(date_time: str) -> str:
+    """
+    HH-MM start of a programme folder
+    for an item's dateTime
+    """
+    return date_time[11:16].replace(":", "-")
+
+
+def iter_items(source: Union[dict[str, Any], BinaryIO]) -> Iterator[dict[str, Any]]:
+    """
+    Schedule items from a decoded schedule,
+    or parsed incrementally from a binary file
+    (ijson is only needed for files and streams)
+    """
+    if isinstance(source, dict):
+        yield from source.get("item") or []
+        return
+    import ijson
+
+    yield from ijson.items(source, ITEM_PREFIX, use_float=True)
+
+
+def write_compact(fpath: str, data: Any) -> None:
+    """
+    Write compact JSON via a temp file
+    """
+    tmp = f"{fpath}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump(data, file, separators=(",", ":"))
+    os.replace(tmp, fpath)
+
+
+def programme_folders(dump_to: str) -> list[str]:
+    """
+    Programme folder names in a channel folder
+    """
+    return sorted(entry.name for entry in os.scandir(dump_to) if entry.is_dir())
+
+
+def split_schedule(
+    source: Union[dict[str, Any], BinaryIO], dump_to: str
+) -> tuple[dict[str, list[str]], list[str]]:
+    """
+    Write each item with a dateTime to dump_to,
+    returning an index of slot file path to matching
+    programme folders, and all programme folders
+    """
+    folders = programme_folders(dump_to)
+    by_slot = defaultdict(list)
+    for folder in folders:
+        by_slot[folder[:5]].append(folder)
+
+    index = {}
+    for subdct in iter_items(source):
+        dt_item = subdct.get("dateTime") if isinstance(subdct, dict) else None
+        if not dt_item:
+            continue
+        fname = os.path.join(dump_to, f"info_{dt_item}.json")
+        try:
+            write_compact(fname, {"item": [subdct]})
+        except (OSError, TypeError, ValueError) as err:
+            LOGGER.warning("Unable to write schedule slot %s: %s", fname, err)
+            continue
+        index[fname] = by_slot.get(slot_key(dt_item), [])
+    return index, folders
@@ -0,0 +1,195 @@
+"""
+Image derivative generation for access copies
+
+Each source image is decoded once with Pillow and
+both the large image (600ppi, optionally resized by
+percent) and the thumbnail (300ppi, 180px high) are
+encoded from that one decode. Where Pillow cannot
+read a source, a single 'gm batch' process writes
+both outputs, so GraphicsMagick still only starts
+once per image.
+
+Unlike the gm commands, Pillow output is rotated
+upright from the EXIF orientation tag before the
+metadata is dropped, and CMYK sources are converted
+to sRGB through their embedded ICC profile where one
+is present (a plain conversion otherwise).
+
+Batches of images are spread across a process pool
+with make_derivatives_batch().
+
+2026
+"""
+
+import io
+import os
+import subprocess
+from functools import partial
+from multiprocessing import Pool
+from typing import Final, Optional
+
+from PIL import Image, ImageCms, ImageOps
+
+Image.MAX_IMAGE_PIXELS = None
+
+LARGE_DPI: Final = (600, 600)
+THUMB_DPI: Final = (300, 300)
+THUMB_HEIGHT: Final = 180
+JPEG_QUALITY: Final = 90
+MAX_PARALLEL: Final = 4
+
+
+def output_paths(filepath: str, transcode_pth: Optional[str] = None) -> tuple[str, str]:
+    """
+    Large image and thumbnail paths, using the
+    same naming as the gm make_jpg it replaced
+    """
+    if not transcode_pth:
+        out = os.path.splitext(filepath)[0]
+    else:
+        file = os.path.splitext(os.path.basename(filepath))[0]
+        out = os.path.join(transcode_pth, file)
+    return f"{out}_largeimage.jpg", f"{out}_thumbnail.jpg"
+
+
+def to_rgb(img: Image.Image) -> Image.Image:
+    """
+    Convert any source mode (16-bit, CMYK,
+    alpha, palette) to 8-bit RGB for JPEG
+    """
+    if img.mode == "RGB":
+        return img
+    if img.mode == "CMYK" and img.info.get("icc_profile"):
+        try:
+            return ImageCms.profileToProfile(
+                img,
+                ImageCms.ImageCmsProfile(io.BytesIO(img.info["icc_profile"])),
+                ImageCms.createProfile("sRGB"),
+                outputMode="RGB",
+            )
+        except (ImageCms.PyCMSError, OSError):
+            pass
+    if img.mode.startswith("I;16") or img.mode == "I":
+        img = img.convert("I").point(lambda val: val * (1 / 256)).convert("L")
+    return img.convert("RGB")
+
+
+def thumb_size(width: int, height: int) -> tuple[int, int]:
+    """
+    Width matching gm '-resize x180'
+    """
+    return max(1, round(width * THUMB_HEIGHT / height)), THUMB_HEIGHT
+
+
+def pillow_derivatives(
+    filepath: str,
+    large_out: Optional[str],
+    thumb_out: Optional[str],
+    percent: Optional[str] = None,
+) -> None:
+    """
+    Decode once, write both derivatives
+    Thumbnail only requests let JPEG sources
+    use draft mode for a reduced scale decode
+    """
+    with Image.open(filepath) as src:
+        if not large_out and src.format == "JPEG":
+            src.draft("RGB", thumb_size(*src.size))
+        img = to_rgb(ImageOps.exif_transpose(src))
+
+    if large_out:
+        large = img
+        if percent:
+            scale = float(percent) / 100
+            large = img.resize(
+                (max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                Image.LANCZOS,
+            )
+        large.save(large_out, "JPEG", quality=JPEG_QUALITY, dpi=LARGE_DPI)
+
+    if thumb_out:
+        thumb = img.resize(thumb_size(*img.size), Image.LANCZOS)
+        thumb.save(thumb_out, "JPEG", quality=JPEG_QUALITY, dpi=THUMB_DPI)
+
+
+def gm_derivatives(
+    filepath: str,
+    large_out: Optional[str],
+    thumb_out: Optional[str],
+    percent: Optional[str] = None,
+) -> None:
+    """
+    Fallback: one 'gm batch' session for
+    both convert commands
+    """
+    commands = []
+    if large_out:
+        resize = f" -resize {percent}%x{percent}%" if percent else ""
+        commands.append(
+            f'convert -density 600x600 "{filepath}" -strip{resize} "{large_out}"'
+        )
+    if thumb_out:
+        commands.append(
+            f'convert -density 300x300 "{filepath}" -strip -resize x{THUMB_HEIGHT} "{thumb_out}"'
+        )
+    subprocess.run(
+        ["gm", "batch", "-echo", "off", "-feedback", "off", "-"],
+        input="\n".join(commands) + "\n",
+        shell=False,
+        check=True,
+        universal_newlines=True,
+        capture_output=True,
+    )
+
+
+def make_derivatives(
+    filepath: str,
+    transcode_pth: Optional[str] = None,
+    percent: Optional[str] = None,
+    large: bool = True,
+    thumb: bool = True,
+    outputs: Optional[tuple[str, str]] = None,
+) -> tuple[Optional[str], Optional[str]]:
+    """
+    Create large image and thumbnail JPEGs from
+    one source, returning the paths created
+    (None for any that failed or were not asked for)
+    outputs overrides the (large, thumb) paths
+    """
+    large_out, thumb_out = outputs or output_paths(filepath, transcode_pth)
+    large_out = large_out if large else None
+    thumb_out = thumb_out if thumb else None
+
+    try:
+        pillow_derivatives(filepath, large_out, thumb_out, percent)
+    except (OSError, ValueError, Image.DecompressionBombError) as err:
+        print(f"Pillow unable to create JPEGs for {filepath}, using gm: {err}")
+        try:
+            gm_derivatives(filepath, large_out, thumb_out, percent)
+        except (OSError, subprocess.CalledProcessError) as gm_err:
+            print(f"gm unable to create JPEGs for {filepath}: {gm_err}")
+
+    created = []
+    for outfile in (large_out, thumb_out):
+        if outfile and os.path.exists(outfile):
+            os.chmod(outfile, 0o777)
+            created.append(outfile)
+        else:
+            created.append(None)
+    return created[0], created[1]
+
+
+def make_derivatives_batch(
+    filepaths: list[str],
+    transcode_pth: Optional[str] = None,
+    percent: Optional[str] = None,
+    processes: int = MAX_PARALLEL,
+) -> dict[str, tuple[Optional[str], Optional[str]]]:
+    """
+    Create derivatives for many images across
+    a process pool, returning {source: (large, thumb)}
+    """
+    worker = partial(make_derivatives, transcode_pth=transcode_pth, percent=percent)
+    with Pool(processes=processes) as pool:
+        results = pool.map(worker, filepaths, chunksize=4)
+    return dict(zip(filepaths, results))
@@ -0,0 +1,179 @@
+"""
+Interval analysis for FFmpeg detector output
+(blackdetect, silencedetect, freezedetect)
+
+Detector stderr is parsed with one regex pass
+into NumPy arrays of start/end seconds, and
+queries are answered with vectorised operations
+so multi-hour recordings with thousands of events
+are handled without per-second range() checks.
+
+2026
+"""
+
+import re
+from typing import Final, Iterable, Optional, Union
+
+import numpy as np
+
+DETECTORS: Final = ("black", "silence", "freeze")
+ADVERT_GAPS: Final = np.arange(10, 61, 10)
+NUMBER: Final = r"(-?\d+(?:\.\d+)?)"
+
+
+def parse_detector(
+    data: str, detector: str, duration: Optional[float] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parse FFmpeg stderr for one detector into
+    sorted float arrays of start and end seconds
+    A start left open at end of stream is closed
+    at duration when supplied, else dropped
+    """
+    if detector not in DETECTORS:
+        raise ValueError(f"Unknown detector {detector}, expected one of {DETECTORS}")
+    pattern = re.compile(rf"{detector}_(start|end)\s*:\s*{NUMBER}")
+    events = pattern.findall(data)
+    if not events:
+        return np.empty(0), np.empty(0)
+
+    kinds = np.array([kind == "start" for kind, _ in events])
+    values = np.array([value for _, value in events], dtype=float)
+
+    # Pair each end with the start immediately before it
+    is_end = ~kinds
+    has_start = np.zeros(len(kinds), dtype=bool)
+    has_start[1:] = kinds[:-1]
+    paired = is_end & has_start
+    ends = values[paired]
+    starts = values[np.flatnonzero(paired) - 1]
+
+    if kinds[-1] and duration is not None:
+        starts = np.append(starts, values[-1])
+        ends = np.append(ends, float(duration))
+
+    order = np.argsort(starts, kind="stable")
+    return starts[order], ends[order]
+
+
+def merge_intervals(
+    starts: np.ndarray, ends: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merge overlapping or touching intervals
+    returning sorted, disjoint start/end arrays
+    """
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    if starts.size == 0:
+        return starts, ends
+
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    ends = np.maximum.accumulate(ends[order])
+    new_group = np.ones(starts.size, dtype=bool)
+    new_group[1:] = starts[1:] > ends[:-1]
+    first = np.flatnonzero(new_group)
+    last = np.append(first[1:] - 1, starts.size - 1)
+    return starts[first], ends[last]
+
+
+def in_any_interval(
+    times: Union[float, Iterable[float]],
+    starts: np.ndarray,
+    ends: np.ndarray,
+    pad: float = 0.0,
+) -> np.ndarray:
+    """
+    Boolean array, True where a time falls inside
+    any interval widened by pad seconds each side
+    """
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+    m_starts, m_ends = merge_intervals(
+        np.asarray(starts, dtype=float) - pad, np.asarray(ends, dtype=float) + pad
+    )
+    if m_starts.size == 0:
+        return np.zeros(times.shape, dtype=bool)
+
+    idx = np.searchsorted(m_starts, times, side="right") - 1
+    inside = idx >= 0
+    inside[inside] = times[inside] <= m_ends[idx[inside]]
+    return inside
+
+
+def largest_gap(
+    starts: np.ndarray, ends: np.ndarray, duration: float
+) -> Optional[tuple[float, float]]:
+    """
+    Longest stretch of (0, duration) not covered
+    by any interval, eg the largest non-black gap
+    """
+    m_starts, m_ends = merge_intervals(starts, ends)
+    gap_starts = np.concatenate(([0.0], m_ends))
+    gap_ends = np.concatenate((m_starts, [float(duration)]))
+    gap_ends = np.minimum(gap_ends, float(duration))
+    lengths = gap_ends - gap_starts
+    if lengths.size == 0 or lengths.max() <= 0:
+        return None
+    biggest = int(np.argmax(lengths))
+    return float(gap_starts[biggest]), float(gap_ends[biggest])
+
+
+def find_regular_clusters(
+    times: np.ndarray,
+    gaps: np.ndarray = ADVERT_GAPS,
+    tolerance: float = 0.5,
+    min_matches: int = 3,
+) -> list[np.ndarray]:
+    """
+    Groups of at least min_matches sorted times whose
+    consecutive spacing is within tolerance of one of
+    gaps, eg silences 10/20/30 secs apart in advert breaks
+    """
+    times = np.sort(np.asarray(times, dtype=float))
+    if times.size < 2 or times.size < min_matches:
+        return []
+
+    spacing = np.diff(times)
+    valid = (
+        np.abs(spacing[:, None] - np.asarray(gaps, dtype=float)[None, :]) <= tolerance
+    ).any(axis=1)
+
+    # Run boundaries of consecutive valid gaps
+    edges = np.diff(np.concatenate(([0], valid.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+
+    clusters = []
+    for first, stop in zip(run_starts, run_ends):
+        # A run of n valid gaps spans n + 1 times
+        if stop - first + 1 >= min_matches:
+            clusters.append(times[first : stop + 1])
+    return clusters
+
+
+def choose_clear_second(
+    duration: float, starts: np.ndarray, ends: np.ndarray, pad: float = 1.0
+) -> float:
+    """
+    Pick a whole second for a still frame that is
+    clear of blackdetect intervals: duration // 4,
+    then // 2, // 3, then the middle of the largest
+    non-black gap, falling back to // 2
+    """
+    if len(starts) == 0:
+        return duration // 2
+
+    candidates = [duration // num for num in (4, 2, 3)]
+    clash = in_any_interval(candidates, starts, np.ceil(ends), pad=pad)
+    for secs, hit in zip(candidates, clash):
+        if not hit:
+            return secs
+
+    gap = largest_gap(starts, ends, duration)
+    if gap:
+        middle = (gap[0] + gap[1]) // 2
+        if gap[0] < middle < gap[1]:
+            return middle if isinstance(duration, float) else int(middle)
+
+    return duration // 2
@@ -0,0 +1,66 @@
+"""
+Cross-process locks keyed on a string
+
+Each key maps to a lock file in lock_dir held with
+fcntl.flock, so worker processes and separate cron
+runs on the same host serialise work on one key (a
+series ID, an asset ID) while other keys carry on.
+The kernel drops the lock if a holder dies, so no
+stale lock clean up is needed.
+
+flock also serialises threads of one process, as each
+hold() opens its own file description. hold_all() takes
+several keys in sorted order, so holders of overlapping
+key sets cannot deadlock.
+
+Usage:
+    with key_lock.hold(LOCK_PATH, f"series_{series_id}"):
+        ...
+
+2026
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import os
+import re
+from typing import Iterable, Iterator
+
+
+def lock_file(lock_dir: str, key: str) -> str:
+    """
+    Lock file path for key, keeping safe
+    characters readable and hashing the key
+    so distinct keys never share a file
+    """
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", key)[:80]
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(lock_dir, f"{safe}_{digest}.lock")
+
+
+@contextlib.contextmanager
+def hold(lock_dir: str, key: str) -> Iterator[None]:
+    """
+    Block until key's lock is held,
+    release it on exit
+    """
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(lock_file(lock_dir, key), "a", encoding="utf-8") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def hold_all(lock_dir: str, keys: Iterable[str]) -> Iterator[None]:
+    """
+    Hold every key's lock, taken in
+    sorted order, release all on exit
+    """
+    with contextlib.ExitStack() as stack:
+        for key in sorted(set(keys)):
+            stack.enter_context(hold(lock_dir, key))
+        yield
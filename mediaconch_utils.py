@@ -0,0 +1,222 @@
+"""
+MediaConch conformance checks with
+cached results and batched policy runs
+
+Results are stored in a small SQLite cache
+keyed on file path, size + mtime (or MD5 digest)
+and a hash of the policy XML. An unchanged file
+checked against an unchanged policy never reaches
+the mediaconch subprocess a second time.
+
+Files missing from the cache are passed to
+mediaconch in batches, so the policy XML is
+loaded once per batch instead of once per file.
+
+2026
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+from datetime import datetime
+from typing import Final, Optional
+
+LOG_PATH: Final = os.environ.get("LOG_PATH", "")
+CACHE_DB: Final = os.environ.get(
+    "MEDIACONCH_CACHE",
+    os.path.join(LOG_PATH, "mediaconch_cache.db") if LOG_PATH else "",
+)
+BATCH_SIZE: Final = 50
+OUTCOMES: Final = ("pass!", "fail!", "N/A!")
+
+_POLICY_HASHES: dict[tuple[str, int], str] = {}
+
+
+def policy_hash(policy: str) -> str:
+    """
+    SHA256 of policy XML, memoised on
+    path and mtime so edits invalidate
+    """
+    stat = os.stat(policy)
+    key = (os.path.abspath(policy), stat.st_mtime_ns)
+    if key not in _POLICY_HASHES:
+        with open(policy, "rb") as xml:
+            _POLICY_HASHES[key] = hashlib.sha256(xml.read()).hexdigest()
+    return _POLICY_HASHES[key]
+
+
+def file_key(dpath: str, digest: bool = False) -> str:
+    """
+    Identity of a file's content, size and
+    mtime by default or a full MD5 digest
+    """
+    if digest:
+        hash_md5 = hashlib.md5()
+        with open(dpath, "rb") as fname:
+            for chunk in iter(lambda: fname.read(65536), b""):
+                hash_md5.update(chunk)
+        return f"md5:{hash_md5.hexdigest()}"
+
+    stat = os.stat(dpath)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def parse_mediaconch_output(output: str) -> dict[str, dict[str, object]]:
+    """
+    Split text output of a (multi-file) mediaconch
+    policy run into one result per file path:
+    {'passed': bool, 'failures': [rule, ...], 'output': str}
+    """
+    results: dict[str, dict[str, object]] = {}
+    current: Optional[dict[str, object]] = None
+
+    for line in output.splitlines():
+        outcome = line.split(" ", 1)[0]
+        if outcome in OUTCOMES and " " in line:
+            dpath = line.split(" ", 1)[1].strip()
+            current = {
+                "passed": outcome == "pass!",
+                "failures": [],
+                "output": f"{line}\n",
+            }
+            results[dpath] = current
+            continue
+        if current is None:
+            continue
+        current["output"] += f"{line}\n"
+        if "[fail:" in line:
+            current["failures"].append(line.strip().lstrip("-").strip())
+
+    return results
+
+
+def run_mediaconch(paths: list[str], policy: str) -> dict[str, dict[str, object]]:
+    """
+    One mediaconch call for a list of paths
+    Files mediaconch could not report on are
+    returned as failed with the raw output
+    """
+    cmd = ["mediaconch", "--force", "-p", policy] + paths
+    try:
+        meta = subprocess.run(cmd, shell=False, capture_output=True, check=False)
+        output = meta.stdout.decode("utf-8", errors="replace")
+    except OSError as err:
+        print(f"Mediaconch call failed for policy {policy}: {err}")
+        output = ""
+
+    results = parse_mediaconch_output(output)
+    for dpath in paths:
+        if dpath not in results:
+            results[dpath] = {
+                "passed": False,
+                "failures": ["No mediaconch response for file"],
+                "output": output,
+            }
+    return results
+
+
+def _connect(cache_db: str) -> Optional[sqlite3.Connection]:
+    """
+    Open the result cache, creating
+    the table on first use
+    """
+    if not cache_db:
+        return None
+    try:
+        conn = sqlite3.connect(cache_db, timeout=30)
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                path TEXT NOT NULL,
+                file_key TEXT NOT NULL,
+                policy_hash TEXT NOT NULL,
+                passed INTEGER NOT NULL,
+                failures TEXT NOT NULL,
+                output TEXT NOT NULL,
+                checked TEXT NOT NULL,
+                PRIMARY KEY (path, file_key, policy_hash)
+            )"""
+        )
+    except sqlite3.Error as err:
+        print(f"Mediaconch cache unavailable {cache_db}: {err}")
+        return None
+    return conn
+
+
+def check_files(
+    paths: list[str],
+    policy: str,
+    use_cache: bool = True,
+    digest: bool = False,
+    cache_db: str = CACHE_DB,
+    batch_size: int = BATCH_SIZE,
+) -> dict[str, dict[str, object]]:
+    """
+    Check many files against one policy,
+    returning {path: result} where result is
+    {'passed': bool, 'failures': list, 'output': str,
+    'cached': bool}
+    """
+    p_hash = policy_hash(policy)
+    conn = _connect(cache_db) if use_cache else None
+    results: dict[str, dict[str, object]] = {}
+    keys: dict[str, str] = {}
+    pending: list[str] = []
+
+    for dpath in paths:
+        keys[dpath] = file_key(dpath, digest)
+        row = None
+        if conn is not None:
+            row = conn.execute(
+                "SELECT passed, failures, output FROM results WHERE path = ? AND file_key = ? AND policy_hash = ?",
+                (dpath, keys[dpath], p_hash),
+            ).fetchone()
+        if row:
+            results[dpath] = {
+                "passed": bool(row[0]),
+                "failures": json.loads(row[1]),
+                "output": row[2],
+                "cached": True,
+            }
+        else:
+            pending.append(dpath)
+
+    for num in range(0, len(pending), batch_size):
+        batch = pending[num : num + batch_size]
+        for dpath, result in run_mediaconch(batch, policy).items():
+            result["cached"] = False
+            results[dpath] = result
+
+    if conn is not None:
+        checked = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        dpath,
+                        keys[dpath],
+                        p_hash,
+                        int(results[dpath]["passed"]),
+                        json.dumps(results[dpath]["failures"]),
+                        results[dpath]["output"],
+                        checked,
+                    )
+                    for dpath in pending
+                    if str(results[dpath]["output"]).startswith(OUTCOMES)
+                ],
+            )
+        conn.close()
+
+    return results
+
+
+def check_file(dpath: str, policy: str, use_cache: bool = True) -> tuple[bool, str]:
+    """
+    Single file check returning the same
+    (bool, mediaconch text) tuple as
+    utils.get_mediaconch
+    """
+    result = check_files([dpath], policy, use_cache=use_cache)[dpath]
+    return result["passed"], result["output"]
@@ -0,0 +1,96 @@
+"""
+Fast-path validation for the PA Media pydantic parsers.
+
+Opt in with PA_PARSER_MODE=fast (eg for historical
+re-documentation runs). Each parser's
+parse_payload_strict_json then hands the payload here:
+- Bytes or str go straight to model_validate_json,
+  without a json.loads of the whole payload first
+- Extra keys are ignored instead of forbidden, so no
+  UnexpectedFieldError once the schema is settled
+- Results are kept in an LRU cache keyed by model and
+  BLAKE2b hash of the payload, so a file parsed again
+  in the same run is not validated twice. Cached models
+  are shared between callers and must not be modified
+
+Strict mode (the default) is unchanged.
+
+2026
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+FAST = os.environ.get("PA_PARSER_MODE", "strict").lower() == "fast"
+CACHE_SIZE = 2048
+# API error bodies are short, full payloads never are
+SNIFF_LIMIT = 1024
+
+_CACHE: "OrderedDict[Tuple[str, str], Optional[BaseModel]]" = OrderedDict()
+
+
+def is_error_payload(data: Any) -> bool:
+    """
+    PA Media service error or not found reply,
+    checked as parse_payload_strict_json does
+    """
+    if not isinstance(data, dict):
+        return False
+    message = str(data.get("message", ""))
+    if message == "Service error" or "does not exist." in message:
+        return True
+    return "NotFound" in str(data.get("name", ""))
+
+
+def payload_key(model: Type[BaseModel], raw: bytes) -> Tuple[str, str]:
+    """
+    Cache key for a payload parsed to model
+    """
+    digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+    return f"{model.__module__}.{model.__qualname__}", digest
+
+
+def parse_fast(
+    model: Type[BaseModel], raw_json: Union[str, bytes, bytearray]
+) -> Optional[BaseModel]:
+    """
+    Validate raw JSON to model ignoring extra keys.
+    Returns None for empty and error payloads, as
+    strict mode. Type/schema issues and most invalid
+    JSON raise ValidationError
+    """
+    raw = raw_json.encode("utf-8") if isinstance(raw_json, str) else bytes(raw_json)
+    if not raw.strip():
+        return None
+
+    key = payload_key(model, raw)
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+
+    result: Optional[BaseModel]
+    if len(raw) <= SNIFF_LIMIT and is_error_payload(json.loads(raw)):
+        result = None
+    else:
+        result = model.model_validate_json(raw, extra="ignore")
+
+    _CACHE[key] = result
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return result
+
+
+def cache_info() -> Dict[str, int]:
+    """Entries held in the parsed-result cache."""
+    return {"entries": len(_CACHE), "max": CACHE_SIZE}
+
+
+def clear_cache() -> None:
+    """Empty the parsed-result cache."""
+    _CACHE.clear()
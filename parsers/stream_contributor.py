@@ -14,6 +14,8 @@ from typing import Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 import json
 
+from parsers import fast_path
+
 
 class UnexpectedFieldError(ValueError):
     """Raised if a JSON contains unanticipated field"""
@@ -82,7 +84,12 @@ def parse_payload_strict_json(raw_json: str) -> RootPayload:
     - Invalid JSON -> JSONDecodeError
     - Type/schema issues -> ValidationError
     - Unexpected fields -> UnexpectedFieldError (with paths)
+    PA_PARSER_MODE=fast validates via parsers.fast_path instead
     """
+
+    if fast_path.FAST:
+        return fast_path.parse_fast(RootPayload, raw_json)
+
     if not raw_json.strip():
         return None
 
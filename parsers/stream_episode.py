@@ -14,6 +14,8 @@ from typing import Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 import json
 
+from parsers import fast_path
+
 
 class UnexpectedFieldError(ValueError):
     """Raised if a JSON contains unanticipated field"""
@@ -144,19 +146,23 @@ class Episode(APIModel):
     deleted_date: Optional[datetime] = Field(default=None, alias="deletedAt")
 
 
-def parse_payload(data: Dict[str, Any]) -> Series:
+def parse_payload(data: Dict[str, Any]) -> Episode:
     """Parse a decoded JSON dict into typed models."""
     return Episode.model_validate(data)
 
 
-def parse_payload_strict_json(raw_json: str) -> Series:
+def parse_payload_strict_json(raw_json: str) -> Episode:
     """
     Strict parser:
     - Invalid JSON -> JSONDecodeError
     - Type/schema issues -> ValidationError
     - Unexpected fields -> UnexpectedFieldError (with paths)
+    PA_PARSER_MODE=fast validates via parsers.fast_path instead
     """
 
+    if fast_path.FAST:
+        return fast_path.parse_fast(Episode, raw_json)
+
     if not raw_json.strip():
         return None
 
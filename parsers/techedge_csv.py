@@ -91,3 +91,20 @@ def iter_techedge_rows(csv_path: str):
     """
     with open(csv_path, "r", encoding="utf-8", newline="") as f:
         yield from BasemodelCSVReader(f, Data)
+
+
+ALIASES = {field.alias or name for name, field in Data.model_fields.items()}
+
+
+def validate_row(row: dict):
+    """
+    Validate one csv.DictReader row as
+    iter_techedge_rows does, for use in
+    a process pool. Empty values are None
+    """
+    values = {
+        key.strip(): value or None
+        for key, value in row.items()
+        if key and key.strip() in ALIASES
+    }
+    return Data.model_validate(values)
@@ -0,0 +1,349 @@
+"""
+Shared PA Media (PATV) API client
+
+Used by the fetch_*_augmented scripts in place of their
+own requests calls and tenacity waits:
+- A token bucket keeps every thread's requests within
+  the API quota (rate per second, with a burst)
+- map() runs many requests on a bounded thread pool,
+  eg all channels' schedules for a day at once
+- 429/5xx replies and 'Service error' bodies are retried
+  with exponential backoff, honouring Retry-After
+- With a cache_dir, responses are kept on disk keyed by
+  URL and params. Cached ETag/Last-Modified are sent as a
+  conditional request, and payloads younger than max_age
+  are not requested again at all. Each response is also
+  held in memory for the run. Entries not written for
+  cache_ttl seconds are pruned when the client starts
+- get_all() follows 'hasNext' pages, joining 'item' lists.
+  A page repeating an earlier page's items (eg if the API
+  ignores the page parameter) ends paging there
+
+Usage:
+    client = patv_client.PATVClient(HEADERS, cache_dir=CACHE)
+    schedules = client.map([(URL, params) for params in channel_params])
+    series = client.get(f"{URL}{series_id}", max_age=patv_client.DAY)
+
+2026
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Final, Iterable, Optional
+from urllib.parse import urlencode
+
+import requests
+
+LOGGER = logging.getLogger("patv_client")
+RATE: Final = 5.0
+BURST: Final = 10
+WORKERS: Final = 6
+ATTEMPTS: Final = 6
+BACKOFF: Final = 5.0
+BACKOFF_MAX: Final = 300.0
+TIMEOUT: Final = 120
+MAX_PAGES: Final = 100
+DAY: Final = 86400
+CACHE_TTL: Final = 14 * DAY
+RETRY_STATUS: Final = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket, refilled
+    at rate tokens a second up to burst
+    """
+
+    def __init__(self, rate: float = RATE, burst: int = BURST) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Take a token, waiting for one if needed
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def cache_key(url: str, params: Optional[dict[str, Any]] = None) -> str:
+    """
+    Stable key for a URL and its params
+    """
+    query = urlencode(sorted((params or {}).items()))
+    return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+
+def is_service_error(body: Any) -> bool:
+    """
+    PATV error body that is worth retrying
+    """
+    return isinstance(body, dict) and body.get("message") == "Service error"
+
+
+def items_key(items: list[Any]) -> str:
+    """
+    Fingerprint of a page's items, to spot
+    a page served again in place of the next
+    """
+    return hashlib.sha256(
+        json.dumps(items, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class PATVClient:
+    """
+    Rate limited, cached and concurrent
+    GET requests to the PATV API
+    """
+
+    def __init__(
+        self,
+        headers: dict[str, str],
+        rate: float = RATE,
+        burst: int = BURST,
+        workers: int = WORKERS,
+        cache_dir: Optional[str] = None,
+        attempts: int = ATTEMPTS,
+        timeout: int = TIMEOUT,
+        cache_ttl: float = CACHE_TTL,
+    ) -> None:
+        self.headers = dict(headers)
+        self.bucket = TokenBucket(rate, burst)
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.attempts = attempts
+        self.timeout = timeout
+        self._local = threading.local()
+        self._memo: dict[str, Any] = {}
+        self._memo_lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.prune(cache_ttl)
+
+    def prune(self, ttl: float) -> int:
+        """
+        Remove cache entries not written for ttl
+        seconds, returning the number removed
+        """
+        if not self.cache_dir:
+            return 0
+        cutoff = time.time() - ttl
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                fpath = os.path.join(root, file)
+                try:
+                    if os.path.getmtime(fpath) < cutoff:
+                        os.remove(fpath)
+                        removed += 1
+                except OSError:
+                    continue
+        if removed:
+            LOGGER.info("Pruned %s PATV cache entries", removed)
+        return removed
+
+    def _send(
+        self, url: str, params: Optional[dict[str, Any]], headers: dict[str, str]
+    ) -> requests.Response:
+        """
+        One GET on this thread's session
+        """
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session.get(
+            url, params=params, headers=headers, timeout=self.timeout
+        )
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load(self, key: str) -> Optional[dict[str, Any]]:
+        """
+        Cached response entry, if any
+        """
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(key), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, entry: dict[str, Any]) -> None:
+        """
+        Write a response entry via a temp file
+        """
+        if not self.cache_dir:
+            return
+        fpath = self._cache_path(key)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        tmp = f"{fpath}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(tmp, fpath)
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """
+        Seconds to wait before the next attempt
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), BACKOFF_MAX)
+        delay = min(BACKOFF * 2**attempt, BACKOFF_MAX)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def get(
+        self,
+        url: str,
+        params: Optional[dict[str, Any]] = None,
+        max_age: Optional[float] = None,
+    ) -> Optional[Any]:
+        """
+        Decoded JSON for url and params, or None once
+        all attempts fail. Cached payloads younger than
+        max_age seconds are returned without a request
+        """
+        key = cache_key(url, params)
+        with self._memo_lock:
+            if key in self._memo:
+                return self._memo[key]
+
+        entry = self._load(key)
+        if entry and max_age is not None and time.time() - entry["date"] < max_age:
+            return self._remember(key, entry["body"])
+
+        headers = dict(self.headers)
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        for attempt in range(self.attempts):
+            self.bucket.acquire()
+            response = None
+            try:
+                response = self._send(url, params, headers)
+                if response.status_code == 304 and entry:
+                    entry["date"] = time.time()
+                    self._store(key, entry)
+                    return self._remember(key, entry["body"])
+                if response.status_code not in RETRY_STATUS:
+                    body = response.json()
+                    if not is_service_error(body):
+                        if response.status_code == 200:
+                            self._store(
+                                key,
+                                {
+                                    "url": url,
+                                    "params": params,
+                                    "etag": response.headers.get("ETag"),
+                                    "last_modified": response.headers.get(
+                                        "Last-Modified"
+                                    ),
+                                    "date": time.time(),
+                                    "body": body,
+                                },
+                            )
+                        return self._remember(key, body)
+                LOGGER.warning(
+                    "PATV API status %s for %s, attempt %s",
+                    response.status_code,
+                    url,
+                    attempt + 1,
+                )
+            except (requests.RequestException, ValueError) as err:
+                LOGGER.warning("PATV API request failed for %s: %s", url, err)
+            if attempt + 1 < self.attempts:
+                time.sleep(self._backoff(attempt, response))
+
+        LOGGER.critical("PATV API gave no usable response for %s %s", url, params)
+        return None
+
+    def _remember(self, key: str, body: Any) -> Any:
+        with self._memo_lock:
+            self._memo[key] = body
+        return body
+
+    def get_all(
+        self,
+        url: str,
+        params: Optional[dict[str, Any]] = None,
+        max_age: Optional[float] = None,
+    ) -> Optional[dict[str, Any]]:
+        """
+        Every page of a paged reply, following hasNext,
+        with 'item' lists joined into the first page.
+        Stops at an empty page or one already seen
+        """
+        params = dict(params or {})
+        first = self.get(url, params, max_age)
+        if not isinstance(first, dict):
+            return first
+        combined = dict(first)
+        combined["item"] = list(first.get("item") or [])
+        seen = {items_key(combined["item"])}
+        page_body = first
+        page = int(params.get("page", 1))
+        while page_body.get("hasNext") and page < MAX_PAGES:
+            page += 1
+            page_body = self.get(url, {**params, "page": page}, max_age)
+            if not isinstance(page_body, dict):
+                LOGGER.warning("Page %s missing for %s, results incomplete", page, url)
+                return None
+            items = page_body.get("item") or []
+            key = items_key(items)
+            if not items or key in seen:
+                LOGGER.warning(
+                    "Page %s for %s is empty or repeats an earlier page, stopping",
+                    page,
+                    url,
+                )
+                break
+            seen.add(key)
+            combined["item"].extend(items)
+        combined["hasNext"] = False
+        return combined
+
+    def map(
+        self,
+        requests_list: Iterable[tuple[str, Optional[dict[str, Any]]]],
+        max_age: Optional[float] = None,
+        paged: bool = False,
+    ) -> list[Optional[Any]]:
+        """
+        Run (url, params) requests on up to workers
+        threads, returning results in the same order
+        """
+        call = self.get_all if paged else self.get
+        requests_list = list(requests_list)
+        if not requests_list:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(self.workers, len(requests_list))
+        ) as executor:
+            futures = [
+                executor.submit(call, url, params, max_age)
+                for url, params in requests_list
+            ]
+        return [future.result() for future in futures]
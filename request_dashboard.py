@@ -0,0 +1,125 @@
+"""
+JSON status API for request_store tables
+
+Builds a Flask blueprint with two endpoints:
+  <prefix>/api/requests  one page of recent requests,
+                         filtered server-side by user/status
+  <prefix>/api/changes   rows changed since change ID N
+
+Both are tagged with an ETag built from the table's
+latest change ID (plus the query for pages) and the
+change time as Last-Modified, with a short max-age.
+A poll with nothing new gets a 304 and no body, so
+status pages poll /api/changes rather than reloading
+the whole table.
+
+Usage:
+    app.register_blueprint(
+        request_dashboard.dashboard_blueprint("downloads", STORE),
+        url_prefix="/dpi_download",
+    )
+
+2026
+"""
+
+import datetime
+import hashlib
+from typing import Final
+
+from flask import Blueprint, jsonify, request
+
+import request_store
+
+MAX_AGE: Final = 5
+MAX_PER_PAGE: Final = 500
+
+
+def _conditional(response, etag: str, changed_at, max_age: int):
+    """
+    Tag response and turn it into a 304
+    if the client already holds this version
+    """
+    response.set_etag(etag)
+    if changed_at:
+        response.last_modified = datetime.datetime.strptime(
+            changed_at, request_store.DATE_FMT
+        ).replace(tzinfo=datetime.timezone.utc)
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+
+def dashboard_blueprint(
+    name: str,
+    store: request_store.RequestStore,
+    user_column: str = "name",
+    since_days: int = 14,
+    max_age: int = MAX_AGE,
+) -> Blueprint:
+    """
+    Blueprint serving pages and changes
+    for one RequestStore
+    """
+    blueprint = Blueprint(name, __name__)
+
+    @blueprint.route("/api/requests")
+    def requests_page():
+        """
+        One page of requests as JSON, newest first
+        """
+        page = request.args.get("page", 1, type=int)
+        per_page = min(
+            request.args.get("per_page", request_store.PER_PAGE, type=int),
+            MAX_PER_PAGE,
+        )
+        filters = {}
+        if request.args.get("user"):
+            filters[user_column] = request.args["user"].strip()
+        if request.args.get("status"):
+            filters["status"] = request.args["status"].strip()
+
+        last_change, changed_at = store.last_change()
+        query = f"{page}|{per_page}|{sorted(filters.items())}"
+        etag = f"{name}-{last_change}-{hashlib.md5(query.encode()).hexdigest()[:12]}"
+        if request.if_none_match.contains(etag):
+            return _conditional(jsonify({}), etag, changed_at, max_age)
+
+        rows, total = store.fetch_page(
+            page=page,
+            per_page=per_page,
+            since_days=since_days,
+            filters=filters or None,
+            with_id=True,
+        )
+        response = jsonify(
+            {
+                "page": page,
+                "per_page": per_page,
+                "total": total,
+                "last_change": last_change,
+                "rows": rows,
+            }
+        )
+        return _conditional(response, etag, changed_at, max_age)
+
+    @blueprint.route("/api/changes")
+    def changes():
+        """
+        Rows changed since change ID 'since'
+        """
+        since = request.args.get("since", 0, type=int)
+        last_change, changed_at = store.last_change()
+        etag = f"{name}-changes-{since}-{last_change}"
+        if last_change <= since or request.if_none_match.contains(etag):
+            return _conditional(
+                jsonify({"last_change": last_change, "rows": []}),
+                etag,
+                changed_at,
+                max_age,
+            )
+        rows, last = store.fetch_changes(since)
+        return _conditional(
+            jsonify({"last_change": last, "rows": rows}), etag, changed_at, max_age
+        )
+
+    return blueprint
@@ -0,0 +1,308 @@
+"""
+Shared SQLite request store for the Flask
+request apps and the cron workers that action them
+
+Opens each database in WAL mode so the web UI
+can keep reading while a worker writes, and keeps
+one connection per thread rather than one per
+request or per call. Status updates use fixed SQL
+so sqlite3's statement cache prepares them once per
+connection. Tables get an index on (status, date)
+for the worker's 'Requested' scans, and on date for
+the recent requests views, which are paginated.
+
+Insert and update triggers log each changed rowid to a
+<table>_changes table, so status dashboards can ask for
+just the rows changed since the last change ID they saw.
+
+Usage:
+    store = request_store.RequestStore(DBASE, "DOWNLOADS", TRANSCODE_COLUMNS)
+    store.insert({"name": name, "status": "Requested", ...})
+    rows, total = store.fetch_page(page=1, per_page=50, since_days=14)
+
+2026
+"""
+
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Any, Final, Optional
+
+BUSY_TIMEOUT_MS: Final = 30000
+PER_PAGE: Final = 100
+CHANGES_LIMIT: Final = 500
+CHANGES_KEEP_DAYS: Final = 14
+DATE_FMT: Final = "%Y-%m-%d %H:%M:%S"
+
+TRANSCODE_COLUMNS: Final = (
+    "name TEXT, email TEXT, download_type TEXT, fname TEXT, download_path TEXT, "
+    "fpath TEXT, transcode TEXT, status TEXT, date TEXT"
+)
+NEWS_PRESERVATION_COLUMNS: Final = (
+    "name TEXT, email TEXT, preservation_date TEXT, channel TEXT, status TEXT, date TEXT"
+)
+WORKFLOW_COLUMNS: Final = """
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    client_category TEXT NOT NULL,
+    jobid INTEGER PRIMARY KEY AUTOINCREMENT,
+    items_list TEXT NOT NULL,
+    activity_code TEXT NOT NULL,
+    request_type TEXT NOT NULL,
+    request_outcome TEXT NOT NULL,
+    description TEXT NOT NULL,
+    delivery_date TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    instructions TEXT NOT NULL,
+    client_name TEXT NOT NULL,
+    contact_details TEXT,
+    department TEXT NOT NULL,
+    status TEXT NOT NULL,
+    date TEXT NOT NULL
+"""
+
+
+class RequestStore:
+    """
+    One table of requests in one SQLite database,
+    with a reused connection per thread
+    """
+
+    def __init__(
+        self, path: str, table: str, columns: str, row_factory: Optional[Any] = None
+    ):
+        self.path = path
+        self.table = table
+        self.row_factory = row_factory
+        self.local = threading.local()
+        self.columns = self._create(columns)
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        This thread's connection, opened
+        on first use with WAL enabled
+        """
+        conn = getattr(self.local, "conn", None)
+        if conn is None or getattr(self.local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            if self.row_factory:
+                conn.row_factory = self.row_factory
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def close(self) -> None:
+        """
+        Close this thread's connection
+        """
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def _create(self, columns: str) -> list[str]:
+        """
+        Create table and indexes if missing,
+        returning the table's column names
+        """
+        conn = self.connection()
+        with conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({columns})")
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table.lower()}_status_date "
+                f"ON {self.table} (status, date)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table.lower()}_date "
+                f"ON {self.table} (date)"
+            )
+            changes = f"{self.table}_changes"
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {changes} ("
+                "change_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "row_id INTEGER NOT NULL, "
+                "changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+            for action in ("INSERT", "UPDATE"):
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {changes}_{action.lower()} "
+                    f"AFTER {action} ON {self.table} BEGIN "
+                    f"INSERT INTO {changes} (row_id) VALUES (NEW.rowid); END"
+                )
+            conn.execute(
+                f"DELETE FROM {changes} WHERE changed_at < datetime('now', ?)",
+                (f"-{CHANGES_KEEP_DAYS} days",),
+            )
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")]
+
+    def insert(self, row: dict[str, Any]) -> int:
+        """
+        Add a request, returning its rowid
+        """
+        unknown = set(row) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown columns for {self.table}: {sorted(unknown)}")
+        names = list(row)
+        sql = (
+            f"INSERT INTO {self.table} ({','.join(names)}) "
+            f"VALUES ({','.join('?' for _ in names)})"
+        )
+        conn = self.connection()
+        with conn:
+            cursor = conn.execute(sql, [row[name] for name in names])
+        return cursor.lastrowid
+
+    def _where(self, match: dict[str, Any]) -> tuple[str, list[Any]]:
+        """
+        Fixed column order so identical match keys
+        always give the same (cached) statement
+        """
+        keys = sorted(match)
+        unknown = set(keys) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown columns for {self.table}: {sorted(unknown)}")
+        clause = " AND ".join(f"{key} = ?" for key in keys)
+        return clause, [match[key] for key in keys]
+
+    def update_status(self, new_status: str, **match: Any) -> int:
+        """
+        Set status on rows matching all of
+        match, returning rows changed
+        """
+        if not match:
+            raise ValueError("update_status needs at least one column to match")
+        clause, params = self._where(match)
+        conn = self.connection()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE {self.table} SET status = ? WHERE {clause}",
+                [new_status] + params,
+            )
+        return cursor.rowcount
+
+    def get_status(self, **match: Any) -> Optional[str]:
+        """
+        Status of the first row matching match
+        """
+        clause, params = self._where(match)
+        row = (
+            self.connection()
+            .execute(f"SELECT status FROM {self.table} WHERE {clause} LIMIT 1", params)
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def fetch_by_status(self, status: str) -> list[Any]:
+        """
+        All rows with status, oldest first,
+        served from the (status, date) index
+        """
+        return (
+            self.connection()
+            .execute(
+                f"SELECT * FROM {self.table} WHERE status = ? ORDER BY date",
+                (status,),
+            )
+            .fetchall()
+        )
+
+    def _page_where(
+        self, since_days: Optional[int], filters: Optional[dict[str, Any]]
+    ) -> tuple[str, list[Any]]:
+        """
+        WHERE clause for the date window
+        and exact match filters
+        """
+        clauses, params = [], []
+        if since_days is not None:
+            cutoff = datetime.datetime.now() - datetime.timedelta(days=since_days)
+            clauses.append("date >= ?")
+            params.append(cutoff.strftime(DATE_FMT))
+        if filters:
+            clause, values = self._where(filters)
+            clauses.append(clause)
+            params.extend(values)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def fetch_page(
+        self,
+        page: int = 1,
+        per_page: int = PER_PAGE,
+        since_days: Optional[int] = 14,
+        filters: Optional[dict[str, Any]] = None,
+        with_id: bool = False,
+    ) -> tuple[list[Any], int]:
+        """
+        One page of rows, newest first, for the
+        last since_days days, with optional exact
+        match filters. Returns rows and total count.
+        with_id returns dicts including the rowid
+        """
+        where, params = self._page_where(since_days, filters)
+        page = max(1, int(page))
+        per_page = max(1, int(per_page))
+        conn = self.connection()
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM {self.table} {where}", params
+        ).fetchone()[0]
+        select = "rowid AS id, *" if with_id else "*"
+        cursor = conn.execute(
+            f"SELECT {select} FROM {self.table} {where} "
+            "ORDER BY date DESC LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page],
+        )
+        if with_id:
+            return as_dicts(cursor), total
+        return cursor.fetchall(), total
+
+    def last_change(self) -> tuple[int, Optional[str]]:
+        """
+        Latest change ID and its UTC time,
+        (0, None) when nothing has changed
+        """
+        row = (
+            self.connection()
+            .execute(
+                f"SELECT change_id, changed_at FROM {self.table}_changes "
+                "ORDER BY change_id DESC LIMIT 1"
+            )
+            .fetchone()
+        )
+        return (row[0], row[1]) if row else (0, None)
+
+    def fetch_changes(
+        self, since: int, limit: int = CHANGES_LIMIT
+    ) -> tuple[list[dict[str, Any]], int]:
+        """
+        Current state of rows changed after change
+        ID since, each row once, with the last change
+        ID covered for the caller's next request
+        """
+        cursor = self.connection().execute(
+            f"SELECT c.change_id, t.rowid AS id, t.* FROM {self.table}_changes c "
+            f"JOIN {self.table} t ON t.rowid = c.row_id "
+            "WHERE c.change_id > ? ORDER BY c.change_id LIMIT ?",
+            (int(since), max(1, int(limit))),
+        )
+        rows: dict[int, dict[str, Any]] = {}
+        last = int(since)
+        for row in as_dicts(cursor):
+            last = row.pop("change_id")
+            rows.pop(row["id"], None)
+            rows[row["id"]] = row
+        return list(rows.values()), last
+
+
+def as_dicts(cursor: sqlite3.Cursor) -> list[dict[str, Any]]:
+    """
+    Cursor rows as column name dicts
+    """
+    names = [col[0] for col in cursor.description]
+    return [dict(zip(names, row)) for row in cursor]
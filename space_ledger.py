@@ -0,0 +1,257 @@
+"""
+Space reservations for downloads and transcodes
+
+Workers estimate how much a job will write (Black Pearl
+object length for a download, a bitrate estimate for a
+transcode) and reserve it against the target volume
+before starting. A reservation only succeeds when the
+volume's free space (statvfs), less every reservation
+still in flight on that volume and a headroom margin,
+can take it. Jobs that do not fit are deferred rather
+than failing hours into a tape GET or FFmpeg encode.
+
+The ledger is a small SQLite table (request_store, WAL
+mode) so worker threads and concurrent cron runs on the
+same host share it. Each check and insert runs in one
+BEGIN IMMEDIATE transaction. Bytes already written to a
+reserved path are taken off its reservation, as statvfs
+already counts them, and reservations from dead processes
+or older than RESERVATION_TTL hours are ignored.
+
+Usage:
+    ledger = space_ledger.SpaceLedger(LEDGER_DB)
+    res_id = ledger.reserve(output_path, estimate, owner=job_id)
+    if res_id is None:
+        raise Deferred("Not enough space")
+    ...
+    ledger.release(res_id)
+
+2026
+"""
+
+import datetime
+import json
+import logging
+import os
+import socket
+import subprocess
+from typing import Final, Optional
+
+import request_store
+
+LOGGER = logging.getLogger("space_ledger")
+HEADROOM: Final = 0.02
+RESERVATION_TTL: Final = 48
+SAFETY: Final = 1.1
+
+# Bits per pixel per frame for each rendition
+RENDITION_BPP: Final = {
+    "prores": 4.5,
+    "mp4_access": 0.25,
+    "mp4_access_watermark": 0.25,
+    "mp4_watermark": 0.25,
+    "mp4_proxy": 0.25,
+}
+AUDIO_BITRATE: Final = 2_000_000
+
+LEDGER_COLUMNS: Final = """
+    res_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    volume TEXT NOT NULL,
+    path TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    owner TEXT,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    date TEXT NOT NULL
+"""
+
+
+def existing_dir(path: str) -> str:
+    """
+    Nearest existing directory for a
+    path that may not be written yet
+    """
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def volume_of(path: str) -> str:
+    """
+    Device ID naming the volume path is on
+    """
+    return str(os.stat(existing_dir(path)).st_dev)
+
+
+def pid_alive(pid: int) -> bool:
+    """
+    True if pid is a running process on this host
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SpaceLedger:
+    """
+    Shared ledger of in-flight space
+    reservations per volume
+    """
+
+    def __init__(self, path: str, headroom: float = HEADROOM):
+        self.store = request_store.RequestStore(path, "SPACE_LEDGER", LEDGER_COLUMNS)
+        self.headroom = headroom
+        self.host = socket.gethostname()
+
+    def _outstanding(self, conn, volume: str) -> int:
+        """
+        Bytes still to be written by live reservations
+        on volume, expiring any left by dead processes
+        """
+        cutoff = datetime.datetime.now() - datetime.timedelta(hours=RESERVATION_TTL)
+        rows = conn.execute(
+            "SELECT res_id, path, bytes, host, pid FROM SPACE_LEDGER "
+            "WHERE volume = ? AND status = 'Reserved' AND date >= ?",
+            (volume, cutoff.strftime(request_store.DATE_FMT)),
+        ).fetchall()
+        total = 0
+        for res_id, path, nbytes, host, pid in rows:
+            if host == self.host and not pid_alive(pid):
+                conn.execute(
+                    "UPDATE SPACE_LEDGER SET status = 'Expired' WHERE res_id = ?",
+                    (res_id,),
+                )
+                continue
+            written = os.path.getsize(path) if os.path.isfile(path) else 0
+            total += max(0, nbytes - written)
+        return total
+
+    def available(self, path: str) -> int:
+        """
+        Free bytes on path's volume, less headroom
+        and outstanding reservations
+        """
+        conn = self.store.connection()
+        with conn:
+            outstanding = self._outstanding(conn, volume_of(path))
+        return self._free(path) - outstanding
+
+    def _free(self, path: str) -> int:
+        """
+        statvfs free space less headroom
+        """
+        stat = os.statvfs(existing_dir(path))
+        free = stat.f_bavail * stat.f_frsize
+        return int(free - stat.f_blocks * stat.f_frsize * self.headroom)
+
+    def reserve(self, path: str, nbytes: int, owner: str = "") -> Optional[int]:
+        """
+        Reserve nbytes for a file to be written
+        at path. Returns the reservation ID, or
+        None when the volume cannot take it
+        """
+        volume = volume_of(path)
+        conn = self.store.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            outstanding = self._outstanding(conn, volume)
+            free = self._free(path)
+            if nbytes + outstanding > free:
+                conn.commit()
+                LOGGER.warning(
+                    "No space for %s bytes at %s: %s free, %s reserved",
+                    nbytes,
+                    path,
+                    free,
+                    outstanding,
+                )
+                return None
+            cursor = conn.execute(
+                "INSERT INTO SPACE_LEDGER "
+                "(volume, path, bytes, owner, host, pid, status, date) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'Reserved', ?)",
+                (
+                    volume,
+                    path,
+                    int(nbytes),
+                    owner,
+                    self.host,
+                    os.getpid(),
+                    datetime.datetime.now().strftime(request_store.DATE_FMT),
+                ),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return cursor.lastrowid
+
+    def release(self, res_id: int) -> None:
+        """
+        Release a reservation once its file is
+        written, failed or no longer wanted
+        """
+        self.store.update_status("Released", res_id=res_id)
+
+    def release_owner(self, owner: str) -> int:
+        """
+        Release every reservation held by owner
+        """
+        return self.store.update_status("Released", owner=owner, status="Reserved")
+
+
+def estimate_transcode(fpath: str, transcode: str) -> int:
+    """
+    Bytes a transcode of fpath may write, from its
+    duration, frame size and rate with each rendition's
+    bits per pixel. Falls back to the source size per
+    rendition when ffprobe cannot read it. Renditions
+    are comma separated, unknown ones count as zero
+    """
+    renditions = [part.strip() for part in transcode.split(",")]
+    bpp = sum(RENDITION_BPP.get(rendition, 0) for rendition in renditions)
+    if not bpp:
+        return 0
+
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=width,height,r_frame_rate:format=duration",
+        "-of",
+        "json",
+        fpath,
+    ]
+    try:
+        probe = json.loads(subprocess.check_output(cmd))
+        stream = probe["streams"][0]
+        num, den = stream["r_frame_rate"].split("/")
+        fps = float(num) / float(den)
+        duration = float(probe["format"]["duration"])
+        video_bits = stream["width"] * stream["height"] * fps * bpp
+    except (
+        OSError,
+        subprocess.CalledProcessError,
+        KeyError,
+        IndexError,
+        ValueError,
+        ZeroDivisionError,
+    ):
+        LOGGER.warning("Unable to probe %s, estimating from source size", fpath)
+        counted = sum(1 for rendition in renditions if rendition in RENDITION_BPP)
+        return int(os.path.getsize(fpath) * counted * SAFETY)
+
+    audio_bits = AUDIO_BITRATE * len(renditions)
+    return int((video_bits + audio_bits) * duration / 8 * SAFETY)
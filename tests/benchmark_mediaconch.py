@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""
+Compare per-file mediaconch latency for
+the original one subprocess per file call
+against mediaconch_utils batched and cached
+checks
+
+Usage:
+python3 benchmark_mediaconch.py <policy.xml> <file> [<file> ...]
+
+2026
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.environ["CODE"])
+import mediaconch_utils
+
+
+def per_file_subprocess(paths: list[str], policy: str) -> float:
+    """
+    Previous utils.get_mediaconch behaviour,
+    one mediaconch process per file
+    """
+    start = time.perf_counter()
+    for dpath in paths:
+        subprocess.run(
+            ["mediaconch", "--force", "-p", policy, dpath],
+            shell=False,
+            capture_output=True,
+            check=False,
+        )
+    return time.perf_counter() - start
+
+
+def batched(paths: list[str], policy: str, cache_db: str) -> float:
+    """
+    mediaconch_utils.check_files timing
+    """
+    start = time.perf_counter()
+    mediaconch_utils.check_files(paths, policy, cache_db=cache_db)
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Time each approach and print
+    milliseconds per file
+    """
+    if len(sys.argv) < 3:
+        sys.exit("Usage: benchmark_mediaconch.py <policy.xml> <file> [<file> ...]")
+
+    policy = sys.argv[1]
+    paths = sys.argv[2:]
+    total = len(paths)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_db = os.path.join(tmp, "mediaconch_cache.db")
+        timings = {
+            "per-file subprocess": per_file_subprocess(paths, policy),
+            "batched, cold cache": batched(paths, policy, cache_db),
+            "batched, warm cache": batched(paths, policy, cache_db),
+        }
+
+    print(f"Policy {policy} checked against {total} files")
+    for name, seconds in timings.items():
+        print(f"{name:<22} {seconds * 1000 / total:10.2f} ms/file")
+
+
+if __name__ == "__main__":
+    main()
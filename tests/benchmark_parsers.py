@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+"""
+Compare PA Media parser throughput for strict
+validation (json.loads then extra='forbid') against
+parsers.fast_path (model_validate_json on bytes,
+extra keys ignored, parsed-result cache)
+
+Usage:
+python3 benchmark_parsers.py <parser> <file> [<file> ...]
+eg python3 benchmark_parsers.py stora_episode_parser info_*.json
+
+2026
+"""
+
+import importlib
+import os
+import sys
+import time
+
+sys.path.append(os.environ["CODE"])
+from parsers import fast_path
+
+
+def timed(parse, payloads: list[bytes]) -> tuple[float, int]:
+    """
+    Seconds to parse every payload
+    and count of failures
+    """
+    failed = 0
+    start = time.perf_counter()
+    for payload in payloads:
+        try:
+            parse(payload)
+        except ValueError:
+            failed += 1
+    return time.perf_counter() - start, failed
+
+
+def main():
+    """
+    Time each mode and print files per second
+    """
+    if len(sys.argv) < 3:
+        sys.exit("Usage: benchmark_parsers.py <parser> <file> [<file> ...]")
+
+    parser = importlib.import_module(f"parsers.{sys.argv[1]}")
+    model = parser.parse_payload_strict_json.__annotations__["return"]
+    model = getattr(parser, model) if isinstance(model, str) else model
+    payloads = []
+    for fpath in sys.argv[2:]:
+        with open(fpath, "rb") as file:
+            payloads.append(file.read())
+    total = len(payloads)
+
+    fast_path.clear_cache()
+    timings = {
+        "strict": timed(
+            lambda raw: parser.parse_payload_strict_json(raw.decode("utf-8")),
+            payloads,
+        ),
+        "fast, cold cache": timed(
+            lambda raw: fast_path.parse_fast(model, raw), payloads
+        ),
+        "fast, warm cache": timed(
+            lambda raw: fast_path.parse_fast(model, raw), payloads
+        ),
+    }
+
+    print(f"{sys.argv[1]} parsed {total} files")
+    for name, (seconds, failed) in timings.items():
+        rate = total / seconds if seconds else float("inf")
+        print(f"{name:<18} {rate:12.1f} files/s  {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -205,6 +205,37 @@ def test_retrieve_record(mocker):
     assert called_args["database"] == "items"
 
 
+def test_retrieve_records_bulk(mocker):
+    calls = []
+
+    def fake_retrieve(api, database, search, limit, fields=None):
+        calls.append(search)
+        return 2, [{"priref": ["1"]}, {"priref": ["2"]}]
+
+    mocker.patch("adlib_v3.retrieve_record", side_effect=fake_retrieve)
+
+    result = adlib.retrieve_records_bulk(
+        "fake_api",
+        "media",
+        "object.object_number.lref",
+        ["11", " 12", "", "13"],
+        batch=2,
+    )
+
+    assert len(calls) == 2
+    assert (
+        calls[0] == '(object.object_number.lref="11" or object.object_number.lref="12")'
+    )
+    assert calls[1] == '(object.object_number.lref="13")'
+    assert len(result) == 4
+
+
+def test_retrieve_records_bulk_api_failure(mocker):
+    mocker.patch("adlib_v3.retrieve_record", return_value=(None, None))
+
+    assert adlib.retrieve_records_bulk("fake_api", "media", "priref", ["1"]) is None
+
+
 def test_retrieve_invalid_record(mocker):
     mock_get = mocker.patch("adlib_v3.get")
     mock_get.return_value = {
@@ -0,0 +1,107 @@
+"""
+Test functions for STORA advert break detection.
+"""
+
+import json
+
+import pytest
+
+from helpers import advert_break_detector as abd
+
+STDERR_LINES = [
+    "Input #0, mpegts, from 'stream.mpeg2.ts':\n",
+    "[silencedetect @ 0x7f2a] silence_start: 5.1\n",
+    "[silencedetect @ 0x7f2a] silence_end: 6.0 | silence_duration: 0.9\n",
+    "[silencedetect @ 0x7f2a] silence_start: 600.2\n",
+    "[freezedetect @ 0x7f2b] lavfi.freezedetect.freeze_start: 600.0\n",
+    "[silencedetect @ 0x7f2a] silence_end: 600.9 | silence_duration: 0.7\n",
+    "[freezedetect @ 0x7f2b] lavfi.freezedetect.freeze_end: 601.0\n",
+    "[silencedetect @ 0x7f2a] silence_start: 630.1\n",
+    "[silencedetect @ 0x7f2a] silence_end: 630.8 | silence_duration: 0.7\n",
+    "[silencedetect @ 0x7f2a] silence_start: 640.3\n",
+    "[silencedetect @ 0x7f2a] silence_end: 641.0 | silence_duration: 0.7\n",
+    "[silencedetect @ 0x7f2a] silence_start: 3500.0\n",
+]
+
+
+def test_iter_events():
+    """
+    Tests intervals are yielded as they close and
+    an unclosed start at end of stream is ignored
+    """
+    events = list(abd.iter_events(STDERR_LINES))
+    assert events[0] == ("silence", 5.1, 6.0)
+    assert ("freeze", 600.0, 601.0) in events
+    assert len([ev for ev in events if ev[0] == "silence"]) == 4
+
+
+@pytest.mark.parametrize(
+    "freeze, expected",
+    [
+        (False, [(600.2, 641.0, 3)]),
+        (True, []),
+    ],
+)
+def test_build_segments(freeze, expected):
+    """
+    Tests regularly spaced silences become one segment,
+    and freeze filtering drops silences without a freeze
+    """
+    intervals = abd.collect_intervals(STDERR_LINES)
+    segments = abd.build_segments(intervals, freeze)
+    assert [(seg["start"], seg["end"], seg["silences"]) for seg in segments] == expected
+
+
+def test_build_command_audio_only():
+    """
+    Tests the default pass decodes audio only,
+    downmixed ahead of silencedetect in both passes
+    """
+    cmd = abd.build_command("stream.mpeg2.ts")
+    assert "-vn" in cmd
+    assert "-ar" not in cmd and "-ac" not in cmd
+    assert cmd[cmd.index("-af") + 1] == (
+        "aformat=sample_rates=8000:channel_layouts=mono,"
+        "silencedetect=noise=-31dB:d=0.4"
+    )
+    freeze = abd.build_command("stream.mpeg2.ts", freeze=True)
+    graph = freeze[freeze.index("-filter_complex") + 1]
+    assert graph.startswith(f"[0:a:0]{abd.DOWNMIX},{abd.SILENCE_FILTER}[a];")
+
+
+def test_write_and_load_segments(tmp_path):
+    """
+    Tests segment JSON is written beside the
+    stream and read back for documentation
+    """
+    fpath = tmp_path / "stream.mpeg2.ts"
+    fpath.write_bytes(b"")
+    document = {"file": str(fpath), "segments": [{"start": 1.0, "end": 2.0}]}
+
+    out_path = abd.write_segments(str(fpath), document)
+
+    assert json.loads((tmp_path / "advert_breaks.json").read_text()) == document
+    assert out_path.endswith("advert_breaks.json")
+    assert abd.load_segments(str(tmp_path)) == [{"start": 1.0, "end": 2.0}]
+    assert not abd.needs_analysis(str(fpath))
+
+
+def test_segment_values(tmp_path):
+    """
+    Tests segments become CID Item utb fields,
+    and unanalysed or unreadable folders add none
+    """
+    assert abd.segment_values(str(tmp_path)) == []
+    (tmp_path / "advert_breaks.json").write_text("{", encoding="utf-8")
+    assert abd.segment_values(str(tmp_path)) == []
+
+    segment = {"start_timecode": "0:10:00", "end_timecode": "0:10:41", "silences": 3}
+    abd.write_segments(
+        str(tmp_path / "stream.mpeg2.ts"), {"segments": [segment, segment]}
+    )
+    assert abd.segment_values(str(tmp_path)) == [
+        {"utb.fieldname": "Advert breaks"},
+        {
+            "utb.content": "0:10:00 - 0:10:41 (3 silences)\n0:10:00 - 0:10:41 (3 silences)"
+        },
+    ]
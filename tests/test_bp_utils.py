@@ -12,3 +12,25 @@ def test_check_control():
     assert true_response is True
     false_response = utils.check_control("power_off_all")
     assert false_response is False
+
+
+def test_hashing_sink_matches_blob_checksum():
+    """
+    Tests bytes written through the sink reach
+    the stream and give Black Pearl's base64 MD5
+    """
+    import base64
+    import hashlib
+    import io
+
+    stream = io.BytesIO()
+    sink = bp_utils.HashingSink(stream, "MD5")
+    sink.write(b"blob part one ")
+    sink.write(b"blob part two")
+
+    expected = base64.b64encode(
+        hashlib.md5(b"blob part one blob part two").digest()
+    ).decode()
+    assert stream.getvalue() == b"blob part one blob part two"
+    assert sink.checksum() == expected
+    assert bp_utils.HashingSink(io.BytesIO(), "CRC_32C").supported is False
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+import os
+import sys
+import threading
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import csv_pipeline
+
+
+def to_row(row):
+    if not row["code"]:
+        raise ValueError("No code")
+    return {"code": row["code"], "slot": row["slot"]}
+
+
+def make_csv(tmp_path):
+    fpath = tmp_path / "adverts.csv"
+    fpath.write_text(
+        "code,slot\nA,1\nB,1\nA,2\n,3\nA,2\nC,4\n",
+        encoding="utf-8",
+    )
+    return str(fpath)
+
+
+def test_validated_rows_in_order(tmp_path):
+    """
+    Tests rows are validated in chunks on the pool
+    and yielded in CSV order, invalid rows as None
+    """
+    rows = list(csv_pipeline.validated_rows(make_csv(tmp_path), to_row, chunk_size=2))
+    assert [num for num, _ in rows] == [1, 2, 3, 4, 5, 6]
+    assert rows[3] == (4, None)
+    assert rows[0] == (1, {"code": "A", "slot": "1"})
+
+    rows = list(csv_pipeline.validated_rows(make_csv(tmp_path), to_row, start=4))
+    assert [num for num, _ in rows] == [5, 6]
+
+
+def test_dedupe_and_group(tmp_path):
+    """
+    Tests repeated and invalid rows are skipped
+    and the rest grouped by key in first row order
+    """
+    rows = csv_pipeline.validated_rows(make_csv(tmp_path), to_row)
+    kept, skipped = csv_pipeline.dedupe(rows, lambda row: (row["code"], row["slot"]))
+    assert skipped == [4, 5]
+    groups = csv_pipeline.group_rows(kept, lambda row: row["code"])
+    assert list(groups) == ["A", "B", "C"]
+    assert [num for num, _ in groups["A"]] == [1, 3]
+
+
+def test_checkpoint_commits_contiguous_rows(tmp_path):
+    """
+    Tests only rows following on from the last
+    committed row move the checkpoint, and a new
+    checkpoint on the same CSV resumes there
+    """
+    csv_path = make_csv(tmp_path)
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = csv_pipeline.Checkpoint(path, csv_path)
+    assert checkpoint.start() == 0
+    checkpoint.done([2, 4])
+    assert checkpoint.row == 0
+    checkpoint.done([1])
+    assert checkpoint.row == 2
+    checkpoint.done([3])
+    assert checkpoint.row == 4
+    assert csv_pipeline.Checkpoint(path, csv_path).start() == 4
+
+    with open(csv_path, "a", encoding="utf-8") as file:
+        file.write("D,5\n")
+    assert csv_pipeline.Checkpoint(path, csv_path).start() == 0
+
+
+def test_checkpoint_clear(tmp_path):
+    """
+    Tests a cleared checkpoint restarts an
+    unchanged CSV from row 0
+    """
+    csv_path = make_csv(tmp_path)
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = csv_pipeline.Checkpoint(path, csv_path)
+    checkpoint.commit(3)
+    assert csv_pipeline.Checkpoint(path, csv_path).start() == 3
+    checkpoint.clear()
+    checkpoint.clear()
+    assert not os.path.exists(path)
+    assert csv_pipeline.Checkpoint(path, csv_path).start() == 0
+
+
+def test_write_groups_failure_and_stop(tmp_path):
+    """
+    Tests a failed group holds the checkpoint back,
+    and stop ends the run once running groups finish
+    """
+    csv_path = make_csv(tmp_path)
+    checkpoint = csv_pipeline.Checkpoint(str(tmp_path / "checkpoint.json"), csv_path)
+    groups = {"A": [(1, "a"), (3, "a")], "B": [(2, "b")], "C": [(6, "c")]}
+    written = []
+    lock = threading.Lock()
+
+    def write_group(key, rows):
+        if key == "B":
+            raise RuntimeError("CID write failed")
+        with lock:
+            written.append(key)
+
+    assert csv_pipeline.write_groups(groups, write_group, checkpoint, 2) is None
+    assert sorted(written) == ["A", "C"]
+    assert checkpoint.row == 1
+
+    calls = []
+
+    def stop():
+        calls.append(1)
+        return "Working hours" if len(calls) > 1 else None
+
+    written.clear()
+    reason = csv_pipeline.write_groups(groups, write_group, checkpoint, 1, stop)
+    assert reason == "Working hours"
+    assert written == ["A"]
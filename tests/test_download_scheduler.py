@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+from download_scheduler import (
+    Batch,
+    Deferred,
+    DownloadJob,
+    DownloadScheduler,
+    Stage,
+    order_jobs,
+)
+
+
+def make_jobs():
+    return [
+        DownloadJob("1", "alice", size=500),
+        DownloadJob("2", "alice", size=10),
+        DownloadJob("3", "alice", size=50),
+        DownloadJob("4", "bob", size=100),
+        DownloadJob("5", "carol", size=1),
+    ]
+
+
+def test_order_jobs_round_robin_by_user():
+    """
+    Tests one user's bulk request is interleaved
+    with other users rather than served first
+    """
+    ordered = [job.job_id for job in order_jobs(make_jobs())]
+
+    assert ordered == ["1", "4", "5", "2", "3"]
+
+
+def test_order_jobs_shortest_first():
+    """
+    Tests each user's own jobs are sorted by size
+    while users are still served round-robin
+    """
+    ordered = [job.job_id for job in order_jobs(make_jobs(), shortest_first=True)]
+
+    assert ordered == ["2", "4", "5", "3", "1"]
+
+
+def test_order_jobs_batch_is_one_unit():
+    """
+    Tests a batch takes one place in its user's
+    queue, sorted by its total size
+    """
+    batch = Batch([DownloadJob("6", "dave", 400), DownloadJob("6", "dave", 300)], None)
+    units = make_jobs() + [batch, DownloadJob("7", "dave", size=20)]
+    ordered = order_jobs(units, shortest_first=True)
+
+    assert batch.size == 700
+    assert [unit.job_id for unit in ordered[:5]] == ["2", "4", "5", "7", "3"]
+    assert ordered[5] is batch and ordered[6].job_id == "1"
+
+
+def test_batch_queued_with_other_users_jobs():
+    """
+    Tests bulk GET batches wait their user's turn
+    on the first stage rather than all going first
+    """
+    started = []
+
+    def retrieve(job):
+        started.append(job.job_id)
+        return True
+
+    def fetch(jobs, deliver):
+        started.append(jobs[0].job_id)
+        for job in jobs:
+            deliver(job, True)
+
+    scheduler = DownloadScheduler([Stage("retrieve", retrieve, 1)])
+    scheduler.run(
+        [DownloadJob("3", "carol"), DownloadJob("4", "carol")],
+        batches=[
+            ([DownloadJob("1", "alice"), DownloadJob("1", "alice")], fetch),
+            ([DownloadJob("2", "alice")], fetch),
+        ],
+    )
+
+    assert started == ["3", "1", "4", "2"]
+
+
+def test_stages_overlap_between_jobs():
+    """
+    Tests a job in the transcode stage does
+    not block the next job's retrieval
+    """
+    transcode_started = threading.Event()
+    overlapped = []
+
+    def retrieve(job):
+        if job.job_id == "2":
+            overlapped.append(transcode_started.wait(timeout=5))
+        return True
+
+    def transcode(job):
+        if job.job_id == "1":
+            transcode_started.set()
+            time.sleep(0.1)
+        return True
+
+    scheduler = DownloadScheduler(
+        [Stage("retrieve", retrieve, 1), Stage("transcode", transcode, 1)]
+    )
+    jobs = scheduler.run([DownloadJob("1", "alice"), DownloadJob("2", "bob")])
+
+    assert overlapped == [True]
+    assert all(job.completed == ["retrieve", "transcode"] for job in jobs)
+
+
+def test_cancelled_and_failed_jobs_stop_between_stages():
+    """
+    Tests cancellation is honoured before the next
+    stage, and a raising stage stops only that job
+    """
+    cancelled = set()
+    finished = []
+
+    def retrieve(job):
+        if job.job_id == "2":
+            cancelled.add("2")
+        if job.job_id == "3":
+            raise OSError("tape drive offline")
+        return True
+
+    scheduler = DownloadScheduler(
+        [Stage("retrieve", retrieve), Stage("transcode", lambda job: True)],
+        is_cancelled=lambda job: job.job_id in cancelled,
+        on_complete=finished.append,
+    )
+    jobs = {
+        job.job_id: job
+        for job in scheduler.run(
+            [DownloadJob("1", "a"), DownloadJob("2", "b"), DownloadJob("3", "c")]
+        )
+    }
+
+    assert jobs["1"].completed == ["retrieve", "transcode"]
+    assert jobs["2"].cancelled is True
+    assert jobs["2"].completed == ["retrieve"]
+    assert jobs["3"].failed == "retrieve: tape drive offline"
+    assert len(finished) == 3
+
+
+def test_batch_delivers_jobs_as_they_land():
+    """
+    Tests a batch fetch replaces the first stage,
+    passing landed jobs on and failing the rest
+    """
+    transcoded = []
+
+    def fetch(jobs, deliver):
+        deliver(jobs[1], True)
+        deliver(jobs[0], True)
+
+    def transcode(job):
+        transcoded.append(job.job_id)
+        return True
+
+    scheduler = DownloadScheduler(
+        [Stage("retrieve", lambda job: True), Stage("transcode", transcode, 1)]
+    )
+    jobs = scheduler.run(
+        [],
+        batches=[
+            (
+                [DownloadJob("1", "a"), DownloadJob("2", "a"), DownloadJob("3", "a")],
+                fetch,
+            )
+        ],
+    )
+
+    assert transcoded == ["2", "1"]
+    assert jobs[2].failed == "retrieve"
+    assert jobs[0].completed == ["retrieve", "transcode"]
+
+
+def test_deferred_job_retried_after_another_finishes():
+    """
+    Tests a job deferred for space is parked and
+    retried once another job has finished
+    """
+    released = threading.Event()
+    attempts = []
+
+    def retrieve(job):
+        if job.job_id == "2":
+            attempts.append(released.is_set())
+            if not released.is_set():
+                raise Deferred("Not enough space")
+        else:
+            time.sleep(0.1)
+        return True
+
+    def finished(job):
+        if job.job_id == "1":
+            released.set()
+
+    scheduler = DownloadScheduler(
+        [Stage("retrieve", retrieve, 2)], on_complete=finished
+    )
+    jobs = scheduler.run([DownloadJob("1", "alice"), DownloadJob("2", "bob")])
+
+    assert attempts == [False, True]
+    assert all(job.completed == ["retrieve"] for job in jobs)
+    assert all(job.deferred is None for job in jobs)
+
+
+def test_deferred_job_finished_when_nothing_else_runs():
+    """
+    Tests a job that still cannot run once no other
+    job is left is finished as deferred, not hung
+    """
+    finished = []
+
+    def retrieve(job):
+        raise Deferred("Not enough space")
+
+    scheduler = DownloadScheduler(
+        [Stage("retrieve", retrieve, 2)], on_complete=finished.append
+    )
+    jobs = scheduler.run([DownloadJob("1", "alice"), DownloadJob("2", "bob")])
+
+    assert len(finished) == 2
+    assert all(job.deferred == "Not enough space" for job in jobs)
+    assert all(job.completed == [] for job in jobs)
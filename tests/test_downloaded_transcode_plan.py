@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.append(os.environ["CODE"])
+sys.path.append(os.path.join(os.environ["CODE"], "dpi_downloader/"))
+
+# custom import
+import downloaded_transcode_plan as plan
+
+PROBE = {
+    "audio": "Audio",
+    "stream_default": None,
+    "stereo": None,
+    "dar": "16:9",
+    "par": "1.000",
+    "height": "1080",
+    "width": "1920",
+    "duration": 60,
+    "vs": "0",
+}
+
+
+def test_parse_renditions():
+    """
+    Tests request values map to renditions,
+    rejecting any the planner doesn't make
+    """
+    assert plan.parse_renditions("prores,mp4_access_watermark") == [
+        "prores",
+        "mp4_watermark",
+    ]
+    assert plan.parse_renditions("mp4_access") == ["mp4_access"]
+    assert plan.parse_renditions("prores,mp4_proxy") == []
+    assert plan.parse_renditions("none") == []
+
+
+def test_encoder_args_drops_input_and_null_output():
+    """
+    Tests the -vf chain and per-output args are
+    split from a single output ProRes command
+    """
+    cmd = plan.prores.create_ffmpeg_command(
+        "in.mxf", "out.mov", plan.video_data_for("prores", PROBE)
+    )
+    chain, args = plan.encoder_args(cmd, "in.mxf", "out.mov")
+
+    assert chain == "bwdif=send_frame"
+    assert "-vf" not in args and "0:v:0" not in args
+    assert args[:2] == ["-map", "0:a?"]
+    assert "prores_ks" in args and "-nostdin" not in args
+
+
+def test_build_command_splits_one_decode(monkeypatch):
+    """
+    Tests one input feeds a split with a chain
+    and encoder per output, watermark overlaid
+    """
+    monkeypatch.setattr(plan, "WATERMARK", "wm.png")
+    outputs = {"mp4_watermark": "in_watermark.mp4", "prores": "in_prores.mov"}
+    cmd = plan.build_command("in.mxf", outputs, PROBE)
+
+    assert cmd.count("-i") == 2 and cmd[cmd.index("-i") + 1] == "in.mxf"
+    assert "wm.png" in cmd
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v:0]split=2[s0][s1];")
+    assert "[s0]yadif,scale=1920:-1:flags=lanczos,pad=1920:1080:-1:-1[p0]" in graph
+    assert "[vid0][wm0]overlay=(main_w-overlay_w)-10:10[v0]" in graph
+    assert "[s1]bwdif=send_frame[v1]" in graph
+    mp4_args = cmd[cmd.index("[v0]") - 1 : cmd.index("in_watermark.mp4")]
+    assert "libx264" in mp4_args and "prores_ks" not in mp4_args
+    mov_args = cmd[cmd.index("[v1]") - 1 : cmd.index("in_prores.mov")]
+    assert "prores_ks" in mov_args and "libx264" not in mov_args
+    assert cmd[-1] == "in_prores.mov"
+
+
+def test_build_command_single_output_no_split():
+    """
+    Tests a lone output maps the source directly
+    """
+    cmd = plan.build_command("in.mxf", {"prores": "in_prores.mov"}, PROBE)
+
+    assert cmd[cmd.index("-filter_complex") + 1] == "[0:v:0]bwdif=send_frame[v0]"
+
+
+def test_check_outputs_runs_each_policy(monkeypatch):
+    """
+    Tests every output gets its own policy result
+    """
+    checked = []
+
+    def fake_check(path):
+        checked.append(path)
+        return "pass!" if path.endswith(".mov") else "FAIL!"
+
+    monkeypatch.setitem(plan.RENDITIONS, "prores", ("_prores.mov", None, fake_check))
+    monkeypatch.setitem(
+        plan.RENDITIONS, "mp4_access", ("_access.mp4", None, fake_check)
+    )
+    results = plan.check_outputs({"prores": "a.mov", "mp4_access": "a.mp4"})
+
+    assert results == {"prores": "pass!", "mp4_access": "FAIL!"}
+    assert sorted(checked) == ["a.mov", "a.mp4"]
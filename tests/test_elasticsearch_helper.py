@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.append(os.path.join(os.environ["CODE"], "elasticsearch_web_app"))
+
+# custom import
+import elasticsearch_helper
+
+
+class FakeCat:
+    def __init__(self):
+        self.calls = 0
+
+    def indices(self, **kwargs):
+        self.calls += 1
+        return [{"index": "autoingest_2026"}, {"index": "autoingest_2025"}]
+
+
+class FakeES:
+    def __init__(self, total):
+        self.cat = FakeCat()
+        self.docs = [{"filename": f"N_{num}_01of01.mkv"} for num in range(total)]
+        self.searches = []
+        self.closed = None
+
+    def open_point_in_time(self, index, **kwargs):
+        self.index = index
+        return {"id": "pit1"}
+
+    def search(self, size, search_after=None, **kwargs):
+        self.searches.append(search_after)
+        start = search_after[0] + 1 if search_after else 0
+        hits = [
+            {"_source": doc, "sort": [num]}
+            for num, doc in enumerate(self.docs[start : start + size], start)
+        ]
+        return {"pit_id": "pit2", "hits": {"hits": hits}}
+
+    def close_point_in_time(self, id):
+        self.closed = id
+
+
+def test_search_by_filepath_one_query_paged():
+    """
+    Tests all indexes are searched together
+    and pages follow search_after into one frame
+    """
+    es = FakeES(total=5)
+
+    df = elasticsearch_helper.search_by_filepath(
+        "N_", ["autoingest_2025", "autoingest_2026"], es, page_size=2
+    )
+
+    assert es.index == "autoingest_2025,autoingest_2026"
+    assert es.searches == [None, [1], [3]]
+    assert len(df) == 5
+    assert es.closed == "pit2"
+
+
+def test_get_autoingest_docs_ttl_cache():
+    """
+    Tests index names are cached until
+    the TTL runs out
+    """
+    es = FakeES(total=0)
+
+    first = elasticsearch_helper.get_autoingest_docs(es)
+    elasticsearch_helper.get_autoingest_docs(es)
+    assert es.cat.calls == 1
+    assert first == ["autoingest_2025", "autoingest_2026"]
+
+    elasticsearch_helper.get_autoingest_docs(es, ttl=0)
+    assert es.cat.calls == 2
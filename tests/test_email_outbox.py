@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+import os
+import smtplib
+import socket
+import sys
+
+import pytest
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import email_outbox
+
+
+class FakeSMTP:
+    """
+    Records messages, counting connections
+    """
+
+    connections = 0
+
+    def __init__(self, drop_after=None):
+        FakeSMTP.connections += 1
+        self.sent = []
+        self.drop_after = drop_after
+
+    def send_message(self, msg):
+        if self.drop_after is not None and len(self.sent) >= self.drop_after:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.sent.append(msg)
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture()
+def outbox(tmp_path):
+    FakeSMTP.connections = 0
+    return email_outbox.EmailOutbox(str(tmp_path / "outbox.db"))
+
+
+def test_drain_coalesces_digest_on_one_connection(outbox):
+    """
+    Tests messages for one user with a digest key
+    become one email, all sent on one connection
+    """
+    servers = []
+
+    def connect():
+        servers.append(FakeSMTP())
+        return servers[-1]
+
+    outbox.enqueue("a.user@bfi.org.uk", "Download completed", "File 1", "dpi")
+    outbox.enqueue("b.user@bfi.org.uk", "Download completed", "File 2", "dpi")
+    outbox.enqueue("a.user@bfi.org.uk", "Download completed", "File 3", "dpi")
+    outbox.enqueue("a.user@bfi.org.uk", "Alert", "Not coalesced")
+
+    assert email_outbox.drain(outbox, connect) == 3
+    assert FakeSMTP.connections == 1
+    digest = servers[0].sent[0]
+    assert digest["To"] == "a.user@bfi.org.uk"
+    assert "File 1" in digest.get_content() and "File 3" in digest.get_content()
+    assert outbox.queued() == []
+
+
+def test_drain_reconnects_and_retries_failures(outbox):
+    """
+    Tests a dropped connection is reopened once,
+    and failures stay queued for the next drain
+    """
+    servers = []
+
+    def connect():
+        servers.append(FakeSMTP(drop_after=1))
+        return servers[-1]
+
+    outbox.enqueue("a.user@bfi.org.uk", "One", "1")
+    outbox.enqueue("b.user@bfi.org.uk", "Two", "2")
+
+    assert email_outbox.drain(outbox, connect) == 2
+    assert FakeSMTP.connections == 2
+
+    def refuse():
+        raise ConnectionRefusedError("mail server down")
+
+    outbox.enqueue("c.user@bfi.org.uk", "Three", "3")
+    assert email_outbox.drain(outbox, refuse) == 0
+    queued = outbox.queued()
+    assert queued[0]["attempts"] == 1 and queued[0]["error"] == "mail server down"
+
+
+def test_sender_delivers_to_local_smtp(outbox):
+    """
+    Tests the background sender flushes the
+    outbox to a local SMTP server on stop
+    """
+    controller_mod = pytest.importorskip("aiosmtpd.controller")
+    received = []
+
+    class Collect:
+        async def handle_DATA(self, server, session, envelope):
+            received.append(envelope)
+            return "250 Message accepted for delivery"
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    controller = controller_mod.Controller(Collect(), hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        sender = email_outbox.OutboxSender(
+            outbox, lambda: smtplib.SMTP("127.0.0.1", port), interval=60
+        )
+        sender.start()
+        outbox.enqueue("a.user@bfi.org.uk", "Download completed", "File 1", "dpi")
+        outbox.enqueue("a.user@bfi.org.uk", "Download completed", "File 2", "dpi")
+        sender.stop()
+    finally:
+        controller.stop()
+
+    assert len(received) == 1
+    assert received[0].rcpt_tos == ["a.user@bfi.org.uk"]
+
+
+def test_claim_is_exclusive_and_per_sender(outbox, tmp_path):
+    """
+    Tests claimed messages are not claimed again by
+    another connection, and only the sender's are taken
+    """
+    outbox.enqueue("a.user@bfi.org.uk", "One", "1", sender="dpi@bfi.org.uk")
+    outbox.enqueue("b.user@bfi.org.uk", "Two", "2", sender="dpi@bfi.org.uk")
+    outbox.enqueue("c.user@bfi.org.uk", "Three", "3")
+    other = email_outbox.EmailOutbox(str(tmp_path / "outbox.db"))
+
+    claimed = outbox.claim(sender="dpi@bfi.org.uk")
+    assert [msg["subject"] for msg in claimed] == ["One", "Two"]
+    assert other.claim(sender="dpi@bfi.org.uk") == []
+    assert [msg["subject"] for msg in other.claim()] == ["Three"]
+    assert outbox.queued() == []
+
+
+def test_abandoned_claims_are_reclaimed(outbox, mocker):
+    """
+    Tests messages left 'Sending' by a crashed
+    drain are claimed again after CLAIM_TIMEOUT
+    """
+    outbox.enqueue("a.user@bfi.org.uk", "One", "1")
+    assert len(outbox.claim()) == 1
+    assert outbox.claim() == []
+
+    mocker.patch("email_outbox.CLAIM_TIMEOUT", -60)
+    assert [msg["subject"] for msg in outbox.claim()] == ["One"]
+
+
+def test_drain_leaves_other_senders(outbox):
+    """
+    Tests a drain only sends mail queued
+    for the account it connects with
+    """
+    server = FakeSMTP()
+    outbox.enqueue("a.user@bfi.org.uk", "Mine", "1", sender="dpi@bfi.org.uk")
+    outbox.enqueue("b.user@bfi.org.uk", "Theirs", "2")
+
+    assert email_outbox.drain(outbox, lambda: server, sender="dpi@bfi.org.uk") == 1
+    assert [msg["Subject"] for msg in server.sent] == ["Mine"]
+    assert [msg["subject"] for msg in outbox.queued()] == ["Theirs"]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import exiftool_utils
+
+FAKE_EXIFTOOL = """#!{python}
+import json
+import sys
+
+args = []
+for line in sys.stdin:
+    line = line.rstrip("\\n")
+    if line == "-stay_open":
+        continue
+    if line == "False":
+        break
+    if line.startswith("-execute"):
+        paths = [arg for arg in args if not arg.startswith("-") and arg != "filename=utf8"]
+        if "-json" in args:
+            print(json.dumps([{{"SourceFile": p, "ImageWidth": 100}} for p in paths]))
+        else:
+            for p in paths:
+                print(f"File Name                       : {{p}}")
+        print("{{ready" + line[len("-execute"):] + "}}", flush=True)
+        args = []
+    else:
+        args.append(line)
+"""
+
+
+@pytest.fixture()
+def session(tmp_path):
+    fake = tmp_path / "exiftool"
+    fake.write_text(FAKE_EXIFTOOL.format(python=sys.executable))
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    with exiftool_utils.ExifToolSession(str(fake)) as sess:
+        yield sess
+
+
+def test_get_metadata_chunks_and_pipelines(session):
+    """
+    Tests many paths are split across pipelined
+    requests on one process and merged by path
+    """
+    paths = [f"/mnt/images/{num}.tif" for num in range(5)]
+    pid = session.process.pid
+
+    result = session.get_metadata(paths, chunk=2)
+
+    assert sorted(result) == paths
+    assert result["/mnt/images/3.tif"]["ImageWidth"] == 100
+    assert session.counter == 3
+    assert session.process.pid == pid
+
+
+def test_get_text_one_response_per_path(session):
+    """
+    Tests default text output is returned
+    against the path it was requested for
+    """
+    result = session.get_text(["/mnt/a.jpg", "/mnt/b.jpg"])
+
+    assert result["/mnt/b.jpg"].strip().endswith(": /mnt/b.jpg")
+    assert "/mnt/a.jpg" not in result["/mnt/b.jpg"]
+
+
+def test_close_stops_process(session):
+    """
+    Tests the stay_open process exits on close
+    and restarts when used again
+    """
+    session.close()
+    assert not session.running
+
+    assert session.get_metadata(["/mnt/c.tif"])["/mnt/c.tif"]["ImageWidth"] == 100
+    assert session.running
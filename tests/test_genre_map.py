@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import genre_map
+
+YAML_DATA = """
+genres:
+   movie-drama:general:
+      Genre:
+         Drama                             : 110214
+   movie-drama:animated-movie-drama:
+      Genre:
+         Drama                             : 110214
+      Genre2:
+         Animation                         : 110130
+      Subject:
+         Cartoons                          : 12345
+   movie-drama:adult-movie-drama:
+      Genre:
+         Undefined                         : 000000
+      Genre2:
+         Drama                             : 110214
+"""
+
+
+def make_map(tmp_path):
+    path = tmp_path / "genres.yaml"
+    path.write_text(YAML_DATA)
+    return genre_map.GenreMap(str(path), str(tmp_path / "undefined.txt"))
+
+
+def test_lookup_returns_priref_tuple(tmp_path):
+    """
+    Tests mapped, partly mapped and missing codes
+    """
+    genres = make_map(tmp_path)
+    assert genres.lookup("movie-drama:general") == ("110214", "", "", "")
+    assert genres.lookup(" Movie-Drama:Animated-Movie-Drama ") == (
+        "110214",
+        "110130",
+        "12345",
+        "",
+    )
+    assert genres.lookup("movie-drama:adult-movie-drama") == ("", "110214", "", "")
+    assert genres.lookup("unknown:code") is None
+
+
+def test_undefined_codes_logged_once_per_run(tmp_path):
+    """
+    Tests undefined reports are buffered
+    until flush and de-duplicated by code
+    """
+    genres = make_map(tmp_path)
+    log = tmp_path / "undefined.txt"
+    genres.lookup("unknown:code", "Title one", "First")
+    genres.lookup("unknown:code", "Title two", "Second")
+    genres.lookup("movie-drama:adult-movie-drama", "Title three", "Third")
+    assert not log.exists()
+
+    genres.flush()
+    lines = log.read_text().strip().splitlines()
+    assert lines == [
+        "Category: unknown:code     Title: Title one     Description: First",
+        "Category: movie-drama:adult-movie-drama     Title: Title three     Description: Third",
+    ]
+
+    genres.lookup("unknown:code", "Title four", "Fourth")
+    genres.flush()
+    assert len(log.read_text().strip().splitlines()) == 2
+
+
+def test_reloads_when_yaml_changes(tmp_path):
+    """
+    Tests an edited YAML is picked up
+    """
+    genres = make_map(tmp_path)
+    assert genres.lookup("news:general") is None
+    path = tmp_path / "genres.yaml"
+    path.write_text(YAML_DATA + "   news:general:\n      Genre:\n         News : 1\n")
+    os.utime(path, (1, 1))
+    assert genres.lookup("news:general") == ("1", "", "", "")
+
+
+def test_repo_genre_map_compiles():
+    """
+    Tests the shipped mapping loads
+    """
+    genres = genre_map.GenreMap(
+        os.path.join(os.environ["CODE"], "document_en_15907/EPG_genre_mapping.yaml")
+    )
+    assert genres.lookup("movie-drama:general") == ("110214", "", "", "")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import pytest
+from PIL import Image, ImageCms
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import image_utils
+
+
+@pytest.fixture()
+def sample_images(tmp_path):
+    """
+    Write small RGB JPEG, 16-bit TIFF
+    and CMYK TIFF sources
+    """
+    src = tmp_path / "source"
+    src.mkdir()
+    paths = []
+    rgb = src / "N_123456_01of01.jpg"
+    Image.new("RGB", (800, 600), (200, 10, 10)).save(rgb)
+    paths.append(str(rgb))
+    grey16 = src / "N_123457_01of01.tif"
+    Image.new("I;16", (400, 400), 40000).save(grey16)
+    paths.append(str(grey16))
+    cmyk = src / "N_123458_01of01.tif"
+    Image.new("CMYK", (300, 600), (0, 50, 50, 0)).save(cmyk)
+    paths.append(str(cmyk))
+    return paths
+
+
+def test_output_paths():
+    """
+    Tests names match the previous gm make_jpg outputs
+    """
+    assert image_utils.output_paths("/mnt/N_1_01of01.tif") == (
+        "/mnt/N_1_01of01_largeimage.jpg",
+        "/mnt/N_1_01of01_thumbnail.jpg",
+    )
+    assert image_utils.output_paths("/mnt/N_1_01of01.tif", "/out") == (
+        "/out/N_1_01of01_largeimage.jpg",
+        "/out/N_1_01of01_thumbnail.jpg",
+    )
+
+
+@pytest.mark.parametrize("percent, large_width", [(None, 800), ("75", 600)])
+def test_make_derivatives(tmp_path, sample_images, percent, large_width):
+    """
+    Tests one call writes both sizes with the
+    expected dimensions and densities
+    """
+    large, thumb = image_utils.make_derivatives(
+        sample_images[0], str(tmp_path), percent
+    )
+
+    with Image.open(large) as img:
+        assert img.size[0] == large_width
+        assert round(img.info["dpi"][0]) == 600
+    with Image.open(thumb) as img:
+        assert img.size == (240, 180)
+        assert round(img.info["dpi"][0]) == 300
+
+
+def test_make_derivatives_modes(tmp_path, sample_images):
+    """
+    Tests 16-bit and CMYK sources are
+    written as 8-bit RGB JPEGs
+    """
+    for source in sample_images[1:]:
+        large, thumb = image_utils.make_derivatives(source, str(tmp_path))
+        assert os.path.isfile(large)
+        with Image.open(thumb) as img:
+            assert img.mode == "RGB"
+            assert img.size[1] == 180
+
+
+def test_make_derivatives_outputs(tmp_path, sample_images):
+    """
+    Tests outputs overrides the derivative
+    names, as for retained Imagen filenames
+    """
+    outputs = (str(tmp_path / "large_uid.jpg"), str(tmp_path / "thumb_uid.jpg"))
+    assert image_utils.make_derivatives(sample_images[0], outputs=outputs) == outputs
+
+
+def test_make_derivatives_batch(tmp_path, sample_images):
+    """
+    Tests pooled generation covers every mode
+    """
+    results = image_utils.make_derivatives_batch(
+        sample_images, str(tmp_path), processes=2
+    )
+
+    assert set(results) == set(sample_images)
+    for large, thumb in results.values():
+        assert os.path.isfile(large)
+        with Image.open(thumb) as img:
+            assert img.mode == "RGB"
+            assert img.size[1] == 180
+
+
+def test_cmyk_uses_icc_profile(mocker):
+    """
+    Tests CMYK sources with an embedded profile
+    are converted through it, and without one
+    by a plain conversion
+    """
+    converted = Image.new("RGB", (4, 4))
+    convert = mocker.patch("PIL.ImageCms.profileToProfile", return_value=converted)
+    img = Image.new("CMYK", (4, 4), (0, 255, 255, 0))
+    assert image_utils.to_rgb(img).mode == "RGB"
+    convert.assert_not_called()
+
+    img.info["icc_profile"] = ImageCms.ImageCmsProfile(
+        ImageCms.createProfile("sRGB")
+    ).tobytes()
+    assert image_utils.to_rgb(img) is converted
+    assert convert.call_args.kwargs["outputMode"] == "RGB"
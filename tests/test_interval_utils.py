@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import interval_utils
+
+BLACKDETECT = """
+[blackdetect @ 0x55d1] black_start:0 black_end:2.04 black_duration:2.04
+[blackdetect @ 0x55d1] black_start:24.6 black_end:26.2 black_duration:1.6
+[blackdetect @ 0x55d1] black_start:49.1 black_end:51 black_duration:1.9
+"""
+
+SILENCEDETECT = """
+[silencedetect @ 0x7f2a] silence_start: 610.5
+[silencedetect @ 0x7f2a] silence_end: 611.2 | silence_duration: 0.7
+[silencedetect @ 0x7f2a] silence_start: 620.4
+[silencedetect @ 0x7f2a] silence_end: 621 | silence_duration: 0.6
+[silencedetect @ 0x7f2a] silence_start: 650.6
+[silencedetect @ 0x7f2a] silence_end: 651 | silence_duration: 0.4
+[silencedetect @ 0x7f2a] silence_start: 3590.2
+"""
+
+
+def test_parse_detector():
+    """
+    Tests start/end pairs are parsed from both the
+    single line and two line detector formats
+    """
+    starts, ends = interval_utils.parse_detector(BLACKDETECT, "black")
+    assert starts.tolist() == [0.0, 24.6, 49.1]
+    assert ends.tolist() == [2.04, 26.2, 51.0]
+
+    starts, ends = interval_utils.parse_detector(SILENCEDETECT, "silence")
+    assert starts.tolist() == [610.5, 620.4, 650.6]
+
+    starts, ends = interval_utils.parse_detector(
+        SILENCEDETECT, "silence", duration=3600
+    )
+    assert starts[-1] == 3590.2
+    assert ends[-1] == 3600.0
+
+    with pytest.raises(ValueError):
+        interval_utils.parse_detector(BLACKDETECT, "colour")
+
+
+@pytest.mark.parametrize(
+    "times, pad, expected",
+    [
+        ([1, 10, 25, 52], 0.0, [True, False, True, False]),
+        ([1, 10, 25, 52], 1.0, [True, False, True, True]),
+        (30, 0.0, [False]),
+    ],
+)
+def test_in_any_interval(times, pad, expected):
+    """
+    Tests membership of many times against
+    the parsed blackdetect intervals
+    """
+    starts, ends = interval_utils.parse_detector(BLACKDETECT, "black")
+    result = interval_utils.in_any_interval(times, starts, ends, pad=pad)
+    assert result.tolist() == expected
+
+
+def test_merge_and_largest_gap():
+    """
+    Tests overlapping intervals merge and the largest
+    uncovered stretch of the duration is returned
+    """
+    starts = np.array([5.0, 0.0, 8.0, 40.0])
+    ends = np.array([9.0, 2.0, 12.0, 45.0])
+    m_starts, m_ends = interval_utils.merge_intervals(starts, ends)
+    assert m_starts.tolist() == [0.0, 5.0, 40.0]
+    assert m_ends.tolist() == [2.0, 12.0, 45.0]
+    assert interval_utils.largest_gap(starts, ends, 60) == (12.0, 40.0)
+    assert interval_utils.largest_gap(np.array([0.0]), np.array([60.0]), 60) is None
+
+
+def test_find_regular_clusters():
+    """
+    Tests only runs of 10 second multiple
+    spacings are returned as clusters
+    """
+    starts = np.array([5.0, 100.0, 110.2, 129.8, 160.1, 500.0, 503.0])
+    clusters = interval_utils.find_regular_clusters(starts)
+    assert len(clusters) == 1
+    assert clusters[0].tolist() == [100.0, 110.2, 129.8, 160.1]
+    assert interval_utils.find_regular_clusters(starts, min_matches=5) == []
+
+
+@pytest.mark.parametrize(
+    "duration, expected",
+    [
+        (100, 33),
+        (200, 100),
+        (52, 13),
+        (6, 4),
+    ],
+)
+def test_choose_clear_second(duration, expected):
+    """
+    Tests the first candidate second clear of black
+    (with padding) is selected, else the middle of
+    the largest non-black gap
+    """
+    starts, ends = interval_utils.parse_detector(BLACKDETECT, "black")
+    assert interval_utils.choose_clear_second(duration, starts, ends) == expected
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import key_lock
+
+
+def hold_and_record(lock_dir, key, record):
+    with key_lock.hold(lock_dir, key):
+        with open(record, "a", encoding="utf-8") as file:
+            file.write("start\n")
+        time.sleep(0.2)
+        with open(record, "a", encoding="utf-8") as file:
+            file.write("end\n")
+
+
+def test_lock_file_distinct_for_similar_keys(tmp_path):
+    """
+    Tests keys that sanitise alike keep separate files
+    """
+    first = key_lock.lock_file(str(tmp_path), "series_a/b")
+    second = key_lock.lock_file(str(tmp_path), "series_a_b")
+    assert first != second
+    assert first.startswith(str(tmp_path))
+
+
+def test_hold_serialises_processes(tmp_path):
+    """
+    Tests two processes holding one key
+    never overlap
+    """
+    record = str(tmp_path / "record.txt")
+    procs = [
+        multiprocessing.Process(
+            target=hold_and_record, args=(str(tmp_path / "locks"), "asset_1", record)
+        )
+        for _ in range(2)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    with open(record, encoding="utf-8") as file:
+        assert file.read().split() == ["start", "end", "start", "end"]
+
+
+def test_hold_all_serialises_threads_without_deadlock(tmp_path):
+    """
+    Tests threads holding overlapping key sets,
+    given in different orders, never overlap
+    """
+    lock_dir = str(tmp_path / "locks")
+    active = []
+    overlaps = []
+
+    def work(keys):
+        for _ in range(5):
+            with key_lock.hold_all(lock_dir, keys):
+                active.append(1)
+                if len(active) > 1:
+                    overlaps.append(1)
+                time.sleep(0.01)
+                active.pop()
+
+    threads = [
+        threading.Thread(target=work, args=(keys,))
+        for keys in (["people_a", "people_b"], ["people_b", "people_a", "people_a"])
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert not overlaps
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.append(os.path.join(os.environ["CODE"], "elasticsearch_web_app"))
+
+# custom import
+import log_shipper
+
+
+def test_parse_line_autoingest_fields():
+    """
+    Tests tab separated autoingest entries
+    split into path, file and message fields
+    """
+    line = "2026-03-02 10:15:01,123\tINFO\t/mnt/qnap/autoingest/ingest\tautoingest/ingest\tN_123_01of01.mkv\tMoved ingest-ready file\n"
+
+    doc = log_shipper.parse_line(line, "global.log")
+
+    assert doc["@timestamp"] == "2026-03-02T10:15:01.123000"
+    assert doc["log_level"] == "INFO"
+    assert doc["filename"] == "N_123_01of01.mkv"
+    assert doc["message"] == "Moved ingest-ready file"
+    assert log_shipper.index_name(doc) == "autoingest-2026.03.02"
+
+
+def test_parse_line_persistence_and_plain():
+    """
+    Tests space separated persistence entries,
+    message-only script entries and non-entries
+    """
+    pers = "2026-03-02 10:15:01.500000 INFO\t/mnt/a\t/mnt/a\tN_1.mkv\tDeleted\n"
+    plain = "2026-03-02 10:15:01,000\tWARNING\tCannot establish CID session\n"
+
+    assert log_shipper.parse_line(pers, "p.log")["filename"] == "N_1.mkv"
+    assert log_shipper.parse_line(plain, "s.log")["message"] == (
+        "Cannot establish CID session"
+    )
+    assert "filename" not in log_shipper.parse_line(plain, "s.log")
+    assert log_shipper.parse_line("Traceback (most recent call last):\n", "s") is None
+
+
+def test_read_entries_resumes_and_skips_partial_line(tmp_path):
+    """
+    Tests continuation lines join their entry,
+    a partial last line is left for next run
+    and reading resumes from a saved offset
+    """
+    log = tmp_path / "script.log"
+    first = "2026-03-02 10:00:00,000\tERROR\tFailed\n"
+    trace = "Traceback (most recent call last):\n"
+    second = "2026-03-02 10:00:01,000\tINFO\tDone\n"
+    log.write_text(first + trace + second + "2026-03-02 10:00:02,000\tIN")
+
+    entries = list(log_shipper.read_entries(str(log), 0))
+
+    assert [doc["message"] for _, _, doc in entries] == [
+        "Failed\nTraceback (most recent call last):",
+        "Done",
+    ]
+    assert entries[0][1] == len(first + trace)
+    resumed = list(log_shipper.read_entries(str(log), entries[0][1]))
+    assert [doc["message"] for _, _, doc in resumed] == ["Done"]
+    assert log_shipper.start_offset(str(log), {"inode": -1, "offset": 10}) == 0
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import mediaconch_utils
+
+PASS_FAIL_OUTPUT = (
+    "pass! /mnt/qnap/N_123456_01of01.mp4\n"
+    "fail! /mnt/qnap/N_654321_01of01.mp4\n"
+    "   --  [fail:Video/Format] is_equal AVC\n"
+    "   --  [fail:Audio/SamplingRate] is_equal 48000\n"
+)
+
+
+def test_parse_mediaconch_output():
+    """
+    Tests a multi-file text response is split per
+    file path with the failing rules collected
+    """
+    result = mediaconch_utils.parse_mediaconch_output(PASS_FAIL_OUTPUT)
+
+    assert result["/mnt/qnap/N_123456_01of01.mp4"]["passed"] is True
+    assert result["/mnt/qnap/N_123456_01of01.mp4"]["failures"] == []
+    assert result["/mnt/qnap/N_654321_01of01.mp4"]["passed"] is False
+    assert result["/mnt/qnap/N_654321_01of01.mp4"]["failures"] == [
+        "[fail:Video/Format] is_equal AVC",
+        "[fail:Audio/SamplingRate] is_equal 48000",
+    ]
+
+
+@pytest.fixture()
+def policy_and_files(tmp_path):
+    policy = tmp_path / "policy.xml"
+    policy.write_text("<policy/>")
+    paths = []
+    for num in range(3):
+        media = tmp_path / f"N_12345{num}_01of01.mp4"
+        media.write_text("dummy media content")
+        paths.append(str(media))
+    return str(policy), paths
+
+
+def test_check_files_batches_and_caches(tmp_path, monkeypatch, policy_and_files):
+    """
+    Tests uncached files are sent in one mediaconch
+    call and a second check is served from the cache
+    """
+    policy, paths = policy_and_files
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        out = "".join(f"pass! {pth}\n" for pth in cmd[4:])
+        return subprocess.CompletedProcess(cmd, 0, stdout=out.encode())
+
+    monkeypatch.setattr(mediaconch_utils.subprocess, "run", fake_run)
+    cache_db = str(tmp_path / "cache.db")
+
+    first = mediaconch_utils.check_files(paths, policy, cache_db=cache_db)
+    second = mediaconch_utils.check_files(paths, policy, cache_db=cache_db)
+
+    assert len(calls) == 1
+    assert calls[0][4:] == paths
+    assert all(first[pth]["passed"] and not first[pth]["cached"] for pth in paths)
+    assert all(second[pth]["passed"] and second[pth]["cached"] for pth in paths)
+
+
+def test_check_files_cache_invalidated(tmp_path, monkeypatch, policy_and_files):
+    """
+    Tests a changed file or policy is checked again
+    and that missing responses are not cached
+    """
+    policy, paths = policy_and_files
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=b"")
+
+    monkeypatch.setattr(mediaconch_utils.subprocess, "run", fake_run)
+    cache_db = str(tmp_path / "cache.db")
+
+    result = mediaconch_utils.check_files(paths[:1], policy, cache_db=cache_db)
+    assert result[paths[0]]["passed"] is False
+    mediaconch_utils.check_files(paths[:1], policy, cache_db=cache_db)
+    assert len(calls) == 2
+
+    def fake_pass(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=f"pass! {cmd[4]}\n".encode())
+
+    monkeypatch.setattr(mediaconch_utils.subprocess, "run", fake_pass)
+    mediaconch_utils.check_files(paths[:1], policy, cache_db=cache_db)
+    mediaconch_utils.check_files(paths[:1], policy, cache_db=cache_db)
+    assert len(calls) == 3
+
+    with open(paths[0], "a") as media:
+        media.write("more content")
+    mediaconch_utils.check_files(paths[:1], policy, cache_db=cache_db)
+    assert len(calls) == 4
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+from parsers import fast_path
+from parsers import stora_episode_parser as jp
+
+PAYLOAD = {
+    "hasNext": False,
+    "total": 1,
+    "item": [
+        {
+            "id": "item-1",
+            "dateTime": "2026-01-01T10:00:00Z",
+            "asset": {"id": "asset-1", "title": "Title", "newField": "x"},
+        }
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    fast_path.clear_cache()
+    yield
+    fast_path.clear_cache()
+
+
+def test_strict_mode_still_forbids_extra_fields(monkeypatch):
+    """
+    Tests default mode is unchanged
+    """
+    monkeypatch.setattr(fast_path, "FAST", False)
+    with pytest.raises(jp.UnexpectedFieldError):
+        jp.parse_payload_strict_json(json.dumps(PAYLOAD))
+
+
+def test_fast_mode_ignores_extra_fields(monkeypatch):
+    """
+    Tests fast mode validates str and bytes
+    """
+    monkeypatch.setattr(fast_path, "FAST", True)
+    val = jp.parse_payload_strict_json(json.dumps(PAYLOAD))
+    assert val.item[0].asset.title == "Title"
+    assert val.item[0].date_time.year == 2026
+    assert fast_path.parse_fast(jp.RootPayload, json.dumps(PAYLOAD).encode()) is val
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        "",
+        '{"message": "Service error"}',
+        '{"message": "Asset abc does not exist."}',
+        '{"name": "NotFoundError"}',
+    ],
+)
+def test_fast_mode_error_payloads(payload):
+    """
+    Tests error replies return None as strict
+    """
+    assert fast_path.parse_fast(jp.RootPayload, payload) is None
+
+
+def test_cache_is_bounded_lru(monkeypatch):
+    """
+    Tests oldest entries are evicted
+    """
+    monkeypatch.setattr(fast_path, "CACHE_SIZE", 2)
+    for total in range(3):
+        fast_path.parse_fast(jp.RootPayload, json.dumps({"total": total}))
+    assert fast_path.cache_info() == {"entries": 2, "max": 2}
+    key = fast_path.payload_key(jp.RootPayload, json.dumps({"total": 0}).encode())
+    assert key not in fast_path._CACHE
+
+
+TITLE_PAYLOAD = {"id": "asset-1", "title": "Title", "newField": "x"}
+
+
+@pytest.mark.parametrize(
+    "module, model, payload",
+    [
+        ("stora_episode_parser", "RootPayload", PAYLOAD),
+        ("stora_series_parser", "Series", TITLE_PAYLOAD),
+        ("stream_catalogue", "Series", TITLE_PAYLOAD),
+        ("stream_episode", "Episode", TITLE_PAYLOAD),
+        ("stream_season", "Season", TITLE_PAYLOAD),
+        (
+            "stream_contributor",
+            "RootPayload",
+            {"total": 1, "item": [{"id": "person-1", "name": "Name", "newField": 1}]},
+        ),
+    ],
+)
+def test_fast_mode_each_parser(monkeypatch, module, model, payload):
+    """
+    Tests every parser's fast mode validates to
+    its own model, where strict mode rejects
+    the extra field
+    """
+    parser = importlib.import_module(f"parsers.{module}")
+    raw = json.dumps(payload)
+    with pytest.raises(parser.UnexpectedFieldError):
+        parser.parse_payload_strict_json(raw)
+
+    monkeypatch.setattr(fast_path, "FAST", True)
+    val = parser.parse_payload_strict_json(raw)
+    assert isinstance(val, getattr(parser, model))
+    assert parser.parse_payload_strict_json('{"message": "Service error"}') is None
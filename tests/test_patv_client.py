@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import patv_client
+
+
+class Reply:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("No JSON")
+        return self.body
+
+
+def ok_reply(body, headers=None):
+    return Reply(200, body, headers)
+
+
+def make_client(tmp_path, replies, **kwargs):
+    """
+    Client whose requests are answered from replies
+    """
+    client = patv_client.PATVClient(
+        {"apikey": "x"}, rate=1000, burst=1000, cache_dir=str(tmp_path), **kwargs
+    )
+    sent = []
+
+    def send(url, params, headers):
+        sent.append((url, dict(params or {}), dict(headers)))
+        return replies.pop(0)
+
+    client._send = send
+    client._backoff = lambda attempt, response: 0
+    return client, sent
+
+
+def test_token_bucket_limits_rate():
+    """
+    Tests tokens beyond the burst wait
+    for the bucket to refill
+    """
+    bucket = patv_client.TokenBucket(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_token_bucket_thread_safe():
+    """
+    Tests threads share one bucket
+    """
+    bucket = patv_client.TokenBucket(rate=100, burst=5)
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(10)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_cache_key_ignores_param_order():
+    """
+    Tests the same params in any order
+    share one key
+    """
+    first = patv_client.cache_key("u", {"a": 1, "b": 2})
+    assert first == patv_client.cache_key("u", {"b": 2, "a": 1})
+    assert first != patv_client.cache_key("u", {"a": 1})
+
+
+def test_get_caches_in_run_and_max_age(tmp_path):
+    """
+    Tests a payload is requested once per run,
+    and not again while younger than max_age
+    """
+    client, sent = make_client(tmp_path, [ok_reply({"id": 1})])
+    assert client.get("u", {"a": "1"}) == {"id": 1}
+    assert client.get("u", {"a": "1"}) == {"id": 1}
+    assert len(sent) == 1
+
+    client, sent = make_client(tmp_path, [])
+    assert client.get("u", {"a": "1"}, max_age=60) == {"id": 1}
+    assert not sent
+
+
+def test_get_conditional_request(tmp_path):
+    """
+    Tests a cached ETag is sent and a 304
+    answered from the cache
+    """
+    client, _ = make_client(tmp_path, [ok_reply({"id": 1}, {"ETag": '"v1"'})])
+    client.get("u")
+    client, sent = make_client(tmp_path, [Reply(304)])
+    assert client.get("u") == {"id": 1}
+    assert sent[0][2]["If-None-Match"] == '"v1"'
+
+
+def test_get_retries_rate_limit_and_service_error(tmp_path):
+    """
+    Tests 429 and 'Service error' replies are
+    retried, and None returned once attempts run out
+    """
+    replies = [
+        Reply(429, headers={"Retry-After": "1"}),
+        Reply(200, {"message": "Service error"}),
+        ok_reply({"id": 2}),
+    ]
+    client, sent = make_client(tmp_path, replies)
+    assert client.get("u") == {"id": 2}
+    assert len(sent) == 3
+
+    client, sent = make_client(tmp_path, [Reply(503), Reply(503)], attempts=2)
+    assert client.get("v") is None
+    assert len(sent) == 2
+
+
+def test_get_all_follows_has_next(tmp_path):
+    """
+    Tests pages are followed and items joined
+    """
+    replies = [
+        ok_reply({"hasNext": True, "item": [1, 2]}),
+        ok_reply({"hasNext": True, "item": [3]}),
+        ok_reply({"hasNext": False, "item": [4]}),
+    ]
+    client, sent = make_client(tmp_path, replies)
+    result = client.get_all("u", {"channelId": "c"})
+    assert result["item"] == [1, 2, 3, 4]
+    assert [params.get("page") for _, params, _ in sent] == [None, 2, 3]
+
+
+def test_get_all_stops_on_repeated_page(tmp_path):
+    """
+    Tests paging ends when the API serves the
+    first page again instead of the next one
+    """
+    page = {"hasNext": True, "item": [1, 2]}
+    client, sent = make_client(tmp_path, [ok_reply(page), ok_reply(page)])
+    result = client.get_all("u", {"channelId": "c"})
+    assert result["item"] == [1, 2]
+    assert result["hasNext"] is False
+    assert len(sent) == 2
+
+
+def test_cache_pruned_after_ttl(tmp_path):
+    """
+    Tests cache entries older than cache_ttl are
+    removed when a client starts, newer ones kept
+    """
+    client, _ = make_client(tmp_path, [ok_reply({"id": 1}), ok_reply({"id": 2})])
+    client.get("old")
+    client.get("new")
+    old_path = client._cache_path(patv_client.cache_key("old"))
+    stale = time.time() - 3 * patv_client.DAY
+    os.utime(old_path, (stale, stale))
+
+    client, _ = make_client(tmp_path, [], cache_ttl=2 * patv_client.DAY)
+    assert not os.path.exists(old_path)
+    assert os.path.exists(client._cache_path(patv_client.cache_key("new")))
+
+
+def test_map_keeps_order(tmp_path):
+    """
+    Tests concurrent results come back
+    in request order
+    """
+    client = patv_client.PATVClient({}, rate=1000, burst=1000, workers=4)
+    client._send = lambda url, params, headers: ok_reply({"url": url})
+    results = client.map([(f"u{num}", None) for num in range(10)])
+    assert [result["url"] for result in results] == [f"u{num}" for num in range(10)]
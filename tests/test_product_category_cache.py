@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+from helpers import product_category_cache as pcc
+
+
+def record(priref, term, narrower=()):
+    return {
+        "priref": [priref],
+        "term": [term],
+        "narrower_term": [{"priref": [{"spans": [{"text": num}]}]} for num in narrower],
+    }
+
+
+THESAURUS = [
+    record("100", "Food", ["200"]),
+    record("200", "Snacks", ["300"]),
+    record("300", "Crisps"),
+    record("400", "Drink"),
+]
+
+
+def make_cache(mocker):
+    """
+    Cache loaded from THESAURUS, recording posts
+    """
+    posts = []
+    mocker.patch("adlib_v3.retrieve_record", return_value=(len(THESAURUS), THESAURUS))
+    mocker.patch(
+        "adlib_v3.create_record_data",
+        side_effect=lambda api, db, priref, data: (priref, data),
+    )
+
+    def post(api, payload, database, method):
+        posts.append((method, payload))
+        return {"priref": [str(900 + len(posts))]}
+
+    mocker.patch("adlib_v3.post", side_effect=post)
+    mocker.patch(
+        "adlib_v3.retrieve_field_name",
+        side_effect=lambda rec, field: rec.get(field),
+    )
+    cache = pcc.ProductCategoryCache("fake_api")
+    assert cache.load()
+    return cache, posts
+
+
+def test_known_chain_needs_no_posts(mocker):
+    """
+    Tests a chain held in CID with its links
+    is resolved without any insert or update
+    """
+    cache, posts = make_cache(mocker)
+    cache.resolve([("Food", "Snacks", "crisps ")] * 500)
+    assert not posts
+    assert cache.prirefs("Food", "Snacks", "Crisps") == ("300", "200", "100")
+
+
+def test_plan_only_missing(mocker):
+    """
+    Tests only missing terms and links
+    are planned, once each
+    """
+    cache, _ = make_cache(mocker)
+    inserts, links = cache.plan(
+        [
+            ("Food", "Snacks", "Nuts"),
+            ("Food", "Snacks", "Nuts"),
+            ("Drink", "Juice", "Orange"),
+        ]
+    )
+    assert inserts == ["Nuts", "Orange", "Juice"]
+    assert links == {"snacks": ["Nuts"], "juice": ["Orange"], "drink": ["Juice"]}
+
+
+def test_resolve_inserts_then_links(mocker):
+    """
+    Tests new terms are inserted, and parents
+    updated once keeping existing narrower terms
+    """
+    cache, posts = make_cache(mocker)
+    cache.resolve([("Food", "Snacks", "Nuts"), ("Food", "Snacks", "Popcorn")])
+    methods = [method for method, _ in posts]
+    assert methods == ["insertrecord", "insertrecord", "updaterecord"]
+    priref, data = posts[-1][1]
+    assert priref == "200"
+    assert data == [
+        {"narrower_term.lref": "300"},
+        {"narrower_term.lref": "901"},
+        {"narrower_term.lref": "902"},
+    ]
+    assert cache.prirefs("Food", "Snacks", "Popcorn") == ("902", "200", "100")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import datetime
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import request_dashboard
+import request_store
+
+
+@pytest.fixture()
+def store(tmp_path):
+    store = request_store.RequestStore(
+        str(tmp_path / "database.db"), "DOWNLOADS", request_store.TRANSCODE_COLUMNS
+    )
+    now = datetime.datetime.now().strftime(request_store.DATE_FMT)
+    for user, fname in (("alice", "a.mkv"), ("bob", "b.mkv"), ("alice", "c.mkv")):
+        store.insert({"name": user, "fname": fname, "status": "Requested", "date": now})
+    yield store
+    store.close()
+
+
+@pytest.fixture()
+def client(store):
+    app = Flask(__name__)
+    app.register_blueprint(
+        request_dashboard.dashboard_blueprint("downloads", store),
+        url_prefix="/dpi_download",
+    )
+    return app.test_client()
+
+
+def test_requests_page_filters_and_etag(client, store):
+    """
+    Tests pages are filtered server-side and an
+    unchanged table answers 304 to its ETag
+    """
+    response = client.get("/dpi_download/api/requests?user=alice&per_page=1")
+    body = response.get_json()
+
+    assert body["total"] == 2
+    assert len(body["rows"]) == 1 and body["rows"][0]["name"] == "alice"
+    assert response.last_modified is not None
+
+    etag = response.headers["ETag"]
+    again = client.get(
+        "/dpi_download/api/requests?user=alice&per_page=1",
+        headers={"If-None-Match": etag},
+    )
+    assert again.status_code == 304
+
+    store.update_status("Cancelled", fname="a.mkv")
+    changed = client.get(
+        "/dpi_download/api/requests?user=alice&per_page=1",
+        headers={"If-None-Match": etag},
+    )
+    assert changed.status_code == 200
+
+
+def test_changes_since_id(client, store):
+    """
+    Tests the changes endpoint returns only
+    rows changed after the given change ID
+    """
+    since = client.get("/dpi_download/api/changes").get_json()["last_change"]
+    store.update_status("Complete", fname="b.mkv")
+
+    body = client.get(f"/dpi_download/api/changes?since={since}").get_json()
+
+    assert [row["fname"] for row in body["rows"]] == ["b.mkv"]
+    assert body["rows"][0]["status"] == "Complete"
+    empty = client.get(f"/dpi_download/api/changes?since={body['last_change']}")
+    assert empty.get_json()["rows"] == []
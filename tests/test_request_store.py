@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+import datetime
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import request_store
+
+
+@pytest.fixture()
+def store(tmp_path):
+    store = request_store.RequestStore(
+        str(tmp_path / "database.db"), "DOWNLOADS", request_store.TRANSCODE_COLUMNS
+    )
+    yield store
+    store.close()
+
+
+def add(store, fname, status="Requested", days_ago=0, transcode="none"):
+    date = datetime.datetime.now() - datetime.timedelta(days=days_ago)
+    store.insert(
+        {
+            "name": "user",
+            "email": "user@bfi.org.uk",
+            "fname": fname,
+            "transcode": transcode,
+            "status": status,
+            "date": date.strftime(request_store.DATE_FMT),
+        }
+    )
+
+
+def test_wal_mode_and_indexes(store):
+    """
+    Tests the database is opened in WAL mode
+    and the status/date indexes are created
+    """
+    conn = store.connection()
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list(DOWNLOADS)")]
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert "idx_downloads_status_date" in indexes
+    assert "idx_downloads_date" in indexes
+
+
+def test_update_and_get_status(store):
+    """
+    Tests status updates only touch
+    rows matching every column given
+    """
+    add(store, "N_123_01of01.mkv", transcode="none")
+    add(store, "N_123_01of01.mkv", transcode="mp4")
+
+    changed = store.update_status(
+        "Cancelled", fname="N_123_01of01.mkv", transcode="mp4"
+    )
+
+    assert changed == 1
+    assert store.get_status(fname="N_123_01of01.mkv", transcode="mp4") == "Cancelled"
+    assert store.get_status(fname="N_123_01of01.mkv", transcode="none") == "Requested"
+    assert [row[3] for row in store.fetch_by_status("Requested")] == [
+        "N_123_01of01.mkv"
+    ]
+    with pytest.raises(ValueError):
+        store.update_status("Cancelled", not_a_column="x")
+
+
+def test_fetch_page_newest_first_within_window(store):
+    """
+    Tests pages are newest first, limited to the
+    date window and filters, with a full count
+    """
+    for num in range(5):
+        add(store, f"file_{num}", days_ago=num)
+    add(store, "old_file", days_ago=30)
+    store.update_status("Complete", fname="file_1")
+
+    first, total = store.fetch_page(page=1, per_page=2)
+    second, _ = store.fetch_page(page=2, per_page=2)
+    complete, complete_total = store.fetch_page(filters={"status": "Complete"})
+
+    assert total == 5
+    assert [row[3] for row in first] == ["file_0", "file_1"]
+    assert [row[3] for row in second] == ["file_2", "file_3"]
+    assert complete_total == 1 and complete[0][3] == "file_1"
+
+
+def test_connection_reused_per_thread(store):
+    """
+    Tests one connection is kept per thread,
+    and other threads get their own
+    """
+    other = []
+    thread = threading.Thread(target=lambda: other.append(store.connection()))
+    thread.start()
+    thread.join()
+
+    assert store.connection() is store.connection()
+    assert other[0] is not store.connection()
+
+
+def test_fetch_changes_since_id(store):
+    """
+    Tests inserts and updates are logged as changes
+    and each changed row is returned once, current
+    """
+    add(store, "file_a")
+    since, _ = store.last_change()
+    add(store, "file_b")
+    store.update_status("Transcoding", fname="file_a")
+    store.update_status("Complete", fname="file_a")
+
+    rows, last = store.fetch_changes(since)
+
+    assert [(row["fname"], row["status"]) for row in rows] == [
+        ("file_b", "Requested"),
+        ("file_a", "Complete"),
+    ]
+    assert last == store.last_change()[0]
+    assert store.fetch_changes(last) == ([], last)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import os
+import sys
+import threading
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import space_ledger
+
+
+def make_ledger(tmp_path, free):
+    ledger = space_ledger.SpaceLedger(str(tmp_path / "ledger.db"), headroom=0)
+    ledger._free = lambda path: free
+    return ledger
+
+
+def test_reserve_refuses_what_does_not_fit(tmp_path):
+    """
+    Tests reservations add up per volume
+    and refuse once free space is used
+    """
+    ledger = make_ledger(tmp_path, 1000)
+    target = str(tmp_path / "out.mov")
+
+    assert ledger.reserve(target, 600, "job1") is not None
+    assert ledger.reserve(target, 600, "job2") is None
+    assert ledger.reserve(target, 400, "job2") is not None
+    assert ledger.available(target) == 0
+
+
+def test_written_bytes_come_off_reservation(tmp_path):
+    """
+    Tests bytes already on disk at a reserved
+    path are not counted twice
+    """
+    ledger = make_ledger(tmp_path, 1000)
+    target = tmp_path / "download.mxf"
+    ledger.reserve(str(target), 800, "job1")
+    target.write_bytes(b"x" * 300)
+
+    assert ledger.available(str(target)) == 1000 - 500
+
+
+def test_release_and_release_owner(tmp_path):
+    """
+    Tests released space can be reserved again
+    """
+    ledger = make_ledger(tmp_path, 1000)
+    target = str(tmp_path / "out.mp4")
+    res_id = ledger.reserve(target, 700, "job1")
+    ledger.reserve(target, 300, "job2")
+
+    ledger.release(res_id)
+    assert ledger.available(target) == 700
+    assert ledger.release_owner("job2") == 1
+    assert ledger.available(target) == 1000
+
+
+def test_dead_process_reservations_expire(tmp_path, monkeypatch):
+    """
+    Tests a crashed worker's reservation
+    is not held against the volume
+    """
+    ledger = make_ledger(tmp_path, 1000)
+    target = str(tmp_path / "out.mov")
+    ledger.reserve(target, 900, "job1")
+    monkeypatch.setattr(space_ledger, "pid_alive", lambda pid: False)
+
+    assert ledger.reserve(target, 900, "job2") is not None
+
+
+def test_concurrent_reservations_never_overcommit(tmp_path):
+    """
+    Tests threads racing to reserve cannot
+    together take more than is free
+    """
+    ledger = make_ledger(tmp_path, 1000)
+    target = str(tmp_path / "out.mov")
+    granted = []
+
+    def worker():
+        if ledger.reserve(target, 100, "job") is not None:
+            granted.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(granted) == 10
+
+
+def test_estimate_transcode_from_probe(monkeypatch, tmp_path):
+    """
+    Tests bitrate estimate scales with renditions,
+    falling back to source size if unreadable
+    """
+    probe = b'{"streams": [{"width": 1920, "height": 1080, "r_frame_rate": "25/1"}], "format": {"duration": "60.0"}}'
+    monkeypatch.setattr(space_ledger.subprocess, "check_output", lambda cmd: probe)
+
+    prores = space_ledger.estimate_transcode("in.mxf", "prores")
+    both = space_ledger.estimate_transcode("in.mxf", "prores,mp4_access")
+    assert 1.5e9 < prores < 2.5e9
+    assert both > prores
+    assert space_ledger.estimate_transcode("in.mxf", "none") == 0
+
+    source = tmp_path / "in.mxf"
+    source.write_bytes(b"x" * 1000)
+    monkeypatch.setattr(
+        space_ledger.subprocess,
+        "check_output",
+        lambda cmd: (_ for _ in ()).throw(OSError("no ffprobe")),
+    )
+    assert space_ledger.estimate_transcode(str(source), "prores") == 1100
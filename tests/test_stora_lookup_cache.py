@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+import json
+import os
+import sys
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+from helpers import stora_lookup_cache
+
+
+def make_cache(tmp_path):
+    series_path = tmp_path / "series_cache"
+    series_path.mkdir(exist_ok=True)
+    return stora_lookup_cache.StoraLookupCache(
+        str(tmp_path / "lookups.json"), str(series_path)
+    )
+
+
+def test_any_of_and_chunks():
+    """
+    Tests batched search string and chunking
+    """
+    assert (
+        stora_lookup_cache.any_of(["a", "b"])
+        == '(alternative_number="a" or alternative_number="b")'
+    )
+    assert list(stora_lookup_cache.chunks(["1", "2", "3"], 2)) == [["1", "2"], ["3"]]
+
+
+def test_prewarm_caches_hits_and_complete_misses(tmp_path, monkeypatch):
+    """
+    Tests hits map to their ID and misses are only
+    cached when the search returned every hit
+    """
+    calls = []
+
+    def retrieve(api, database, search, limit, sess, fields=None):
+        calls.append(database)
+        if database == "works":
+            return 1, [{"priref": ["100"], "alternative_number": ["s1"]}]
+        return 5, [
+            {
+                "priref": ["200"],
+                "alternative_number": ["a1"],
+                "part_of_reference.lref": ["300"],
+            }
+        ]
+
+    monkeypatch.setattr(stora_lookup_cache.adlib, "retrieve_record", retrieve)
+    monkeypatch.setattr(
+        stora_lookup_cache.adlib,
+        "retrieve_field_name",
+        lambda record, field: record.get(field, [""]),
+    )
+    cache = make_cache(tmp_path)
+    cache.prewarm("api", None, ["s1", "s2"], ["a1", "a2"])
+
+    assert calls == ["works", "manifestations"]
+    assert cache.series == {"s1": "100", "s2": ""}
+    assert cache.works == {"a1": "300"}
+
+    cache.prewarm("api", None, ["s1", "s2"], [])
+    assert calls == ["works", "manifestations"]
+
+
+def test_save_keeps_found_prirefs_within_ttl(tmp_path):
+    """
+    Tests only found prirefs are saved and
+    expired ones are dropped on load
+    """
+    cache = make_cache(tmp_path)
+    cache.set_series("s1", "100")
+    cache.set_series("s2", "")
+    cache.save()
+
+    reloaded = make_cache(tmp_path)
+    assert reloaded.series == {"s1": "100"}
+
+    with open(tmp_path / "lookups.json", encoding="utf-8") as file:
+        saved = json.load(file)
+    saved["series"]["s1"][1] = "2000-01-01"
+    with open(tmp_path / "lookups.json", "w", encoding="utf-8") as file:
+        json.dump(saved, file)
+    assert make_cache(tmp_path).series == {}
+
+
+def test_series_file_relists_on_miss(tmp_path):
+    """
+    Tests series files written mid-run are found
+    """
+    cache = make_cache(tmp_path)
+    assert cache.series_file("abc") is None
+    new_file = tmp_path / "series_cache" / "2026-10-19_abc.json"
+    new_file.write_text("{}")
+    assert cache.series_file("abc") == str(new_file)
+
+
+def test_save_merges_other_processes_entries(tmp_path):
+    """
+    Tests workers saving in turn keep
+    each other's prirefs
+    """
+    first = make_cache(tmp_path)
+    second = make_cache(tmp_path)
+    first.set_series("s1", "100")
+    second.set_work("a1", "300")
+    first.save()
+    second.save()
+
+    reloaded = make_cache(tmp_path)
+    assert reloaded.series == {"s1": "100"}
+    assert reloaded.works == {"a1": "300"}
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import json
+import os
+import sys
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+from helpers import stora_people_cache
+
+
+def make_cache(tmp_path):
+    return stora_people_cache.StoraPeopleCache(str(tmp_path / "people.json"))
+
+
+def test_person_search_and_contributor_ids(tmp_path):
+    """
+    Tests OR search and ID collection from EPG JSON
+    """
+    assert stora_people_cache.person_search(["p1", "p2"]) == (
+        "(utb.content='p1' WHEN utb.fieldname='PATV Person ID') or "
+        "(utb.content='p2' WHEN utb.fieldname='PATV Person ID')"
+    )
+    epg = tmp_path / "info.json.documented"
+    epg.write_text(
+        json.dumps(
+            {"item": [{"asset": {"contributor": [{"id": "p1"}, {"name": "x"}]}}]}
+        )
+    )
+    assert stora_people_cache.contributor_ids(str(epg)) == ["p1"]
+    assert stora_people_cache.contributor_ids(str(tmp_path / "missing")) == []
+
+
+def test_prewarm_maps_people_by_utb(tmp_path, monkeypatch):
+    """
+    Tests records map back to their PATV ID
+    and complete searches cache misses
+    """
+    searches = []
+
+    def retrieve(api, database, search, limit, session, fields=None):
+        searches.append(search)
+        return 1, [
+            {
+                "priref": ["900"],
+                "name": ["Surname, First"],
+                "activity_type": ["Cast"],
+                "utb.content": ["Biography text", "p1"],
+            }
+        ]
+
+    monkeypatch.setattr(stora_people_cache.adlib, "retrieve_record", retrieve)
+    monkeypatch.setattr(
+        stora_people_cache.adlib,
+        "retrieve_field_name",
+        lambda record, field: record.get(field, [""]),
+    )
+    cache = make_cache(tmp_path)
+    cache.prewarm("api", None, ["p1", "p2", "p1"])
+
+    assert len(searches) == 1
+    assert cache.get("p1") == ("900", "Surname, First", ["Cast"])
+    assert cache.get("p2") == ("", "", [])
+    assert cache.get("p3") is None
+
+    cache.prewarm("api", None, ["p1", "p2"])
+    assert len(searches) == 1
+
+
+def test_save_keeps_names_only_and_newest_entries(tmp_path):
+    """
+    Tests only priref and name persist, activity
+    types stay in the run, and save keeps the newest
+    entry written by another process
+    """
+    cache = make_cache(tmp_path)
+    cache.set_person("p1", "900", "Surname, First", ["Cast"])
+    cache.set_person("p2", "901", "Old, Name", [])
+    cache.people["p3"] = None
+    cache.set_activity_types("900", ["Cast", "Direction"])
+    assert cache.get("p1") == ("900", "Surname, First", ["Cast", "Direction"])
+
+    other = make_cache(tmp_path)
+    other.set_person("p2", "901", "New, Name", [])
+    other._saved["p2"][-1] = "2999-01-01"
+    other.save()
+    cache.save()
+
+    with open(tmp_path / "people.json", encoding="utf-8") as file:
+        saved = json.load(file)
+    assert saved["p1"][:2] == ["900", "Surname, First"] and len(saved["p1"]) == 3
+    assert saved["p2"][:2] == ["901", "New, Name"]
+    reloaded = make_cache(tmp_path)
+    assert reloaded.get("p1") == ("900", "Surname, First", [])
+    assert reloaded.get("p3") is None
+
+
+def test_load_older_entries_with_activity_types(tmp_path):
+    """
+    Tests entries saved with activity types load
+    without them, so CID is re-read before appending
+    """
+    (tmp_path / "people.json").write_text(
+        json.dumps({"p1": ["900", "Surname, First", ["Cast"], "2999-01-01"]})
+    )
+    assert make_cache(tmp_path).get("p1") == ("900", "Surname, First", [])
+
+
+def test_current_activity_types(monkeypatch):
+    """
+    Tests activity types are read from the
+    person record, None if it can't be read
+    """
+    searches = []
+
+    def retrieve(api, database, search, limit, session, fields=None):
+        searches.append(search)
+        return 1, [{"activity_type": ["Cast", "Direction"]}]
+
+    monkeypatch.setattr(stora_people_cache.adlib, "retrieve_record", retrieve)
+    monkeypatch.setattr(
+        stora_people_cache.adlib,
+        "retrieve_field_name",
+        lambda record, field: record.get(field, [""]),
+    )
+    assert stora_people_cache.current_activity_types("api", None, "900") == [
+        "Cast",
+        "Direction",
+    ]
+    assert searches == ["priref=900"]
+
+    monkeypatch.setattr(
+        stora_people_cache.adlib, "retrieve_record", lambda *args: (None, None)
+    )
+    assert stora_people_cache.current_activity_types("api", None, "900") is None
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import io
+import json
+import os
+import sys
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+from helpers import stora_schedule_split
+
+SCHEDULE = {
+    "hasNext": False,
+    "item": [
+        {"dateTime": "2026-01-24T21:00:00.000Z", "title": "News", "rating": 1.5},
+        {"dateTime": "2026-01-24T21:30:00.000Z", "title": "Film"},
+        {"title": "No dateTime"},
+    ],
+}
+
+
+def make_channel(tmp_path):
+    channel = tmp_path / "bbconehd"
+    for folder in ("21-00-00_21-30-00", "21-30-00_23-00-00", "21-30-05_23-00-00"):
+        (channel / folder).mkdir(parents=True)
+    return channel
+
+
+def test_split_schedule_indexes_folders(tmp_path):
+    """
+    Tests slot files are written compact and
+    indexed against folders of the same start
+    """
+    channel = make_channel(tmp_path)
+    index, folders = stora_schedule_split.split_schedule(SCHEDULE, str(channel))
+    news = str(channel / "info_2026-01-24T21:00:00.000Z.json")
+    film = str(channel / "info_2026-01-24T21:30:00.000Z.json")
+    assert index == {
+        news: ["21-00-00_21-30-00"],
+        film: ["21-30-00_23-00-00", "21-30-05_23-00-00"],
+    }
+    assert len(folders) == 3
+    with open(news, "r", encoding="utf-8") as file:
+        text = file.read()
+    assert "\n" not in text
+    assert json.loads(text) == {"item": [SCHEDULE["item"][0]]}
+    assert not [fname for fname in os.listdir(channel) if ".tmp." in fname]
+
+
+def test_split_schedule_streams_file(tmp_path):
+    """
+    Tests a binary stream is parsed item by item
+    to the same result as a decoded schedule
+    """
+    channel = make_channel(tmp_path)
+    stream = io.BytesIO(json.dumps(SCHEDULE).encode("utf-8"))
+    index, _ = stora_schedule_split.split_schedule(stream, str(channel))
+    assert len(index) == 2
+    news = str(channel / "info_2026-01-24T21:00:00.000Z.json")
+    with open(news, "r", encoding="utf-8") as file:
+        assert json.load(file)["item"][0]["rating"] == 1.5
+
+
+def test_slot_key():
+    """
+    Tests dateTime to folder start
+    """
+    assert stora_schedule_split.slot_key("2026-01-24T06:05:00.000Z") == "06-05"
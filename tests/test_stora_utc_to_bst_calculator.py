@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+import csv
+import os
+import sys
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+from document_en_15907 import stora_utc_to_bst_calculator
+
+
+def test_main_writes_bst_csv(tmp_path, mocker):
+    """
+    Tests main reads a CID export and writes
+    utc_update_ CSV beside it, BST rows adjusted
+    and repeated prirefs skipped
+    """
+    csv_path = tmp_path / "stora_export.csv"
+    csv_path.write_text(
+        "priref,transmission_start_time,transmission_date\n"
+        "1,12:00:00,2024-07-01\n"
+        "2,12:00:00,2024-12-01\n"
+        "1,09:00:00,2024-07-02\n"
+        "3,bad,\n"
+    )
+    mocker.patch.object(sys, "argv", ["stora_utc_to_bst_calculator.py", str(csv_path)])
+    mocker.patch("utils.check_storage", return_value=True)
+    mocker.patch("utils.check_control", return_value=True)
+
+    stora_utc_to_bst_calculator.main()
+
+    with open(tmp_path / "utc_update_stora_export.csv", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows == [
+        ["priref", "utc_timestamp", "transmission_start_time", "transmission_date"],
+        ["1", "2024-07-01 12:00:00", "13:00:00", "2024-07-01"],
+        ["2", "2024-12-01 12:00:00", "12:00:00", "2024-12-01"],
+    ]
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.environ["CODE"])
+
+# custom import
+import time_utils
+
+
+def test_utc_to_london():
+    """
+    Tests UTC times move an hour on
+    in BST and are unchanged in GMT
+    """
+    local = time_utils.utc_to_london(
+        ["2024-07-01 12:00:00", "2024-12-01 12:00:00", "2024-03-31 00:59:59"]
+    )
+    assert list(time_utils.format_times(local)) == [
+        "2024-07-01 13:00:00",
+        "2024-12-01 12:00:00",
+        "2024-03-31 00:59:59",
+    ]
+
+
+def test_london_to_utc_clock_changes():
+    """
+    Tests repeated times at the end of BST are
+    taken as BST, and skipped times as GMT
+    """
+    utc = time_utils.london_to_utc(
+        ["2024-07-01 13:00:00", "2024-10-27 01:30:00", "2024-03-31 01:30:00"]
+    )
+    assert list(time_utils.format_times(utc)) == [
+        "2024-07-01 12:00:00",
+        "2024-10-27 00:30:00",
+        "2024-03-31 01:30:00",
+    ]
+
+
+def test_coerce_gives_none():
+    """
+    Tests invalid timestamps raise, or
+    format as None with errors='coerce'
+    """
+    with pytest.raises(ValueError):
+        time_utils.utc_to_london(["2024-13-01 12:00:00"])
+    local = time_utils.utc_to_london(
+        ["2024-13-01 12:00:00", "2024-07-01 12:00:00"], errors="coerce"
+    )
+    assert list(time_utils.format_times(local)) == [None, "2024-07-01 13:00:00"]
+
+
+def test_stop_times():
+    """
+    Tests durations in minutes are added to start
+    times, and bad durations raise
+    """
+    stops = time_utils.stop_times(["10:00:00", "23:30:00"], [90, "45"])
+    assert list(time_utils.format_times(stops, time_utils.TIME_FORMAT)) == [
+        "11:30:00",
+        "00:15:00",
+    ]
+    with pytest.raises(ValueError):
+        time_utils.stop_times(["10:00:00"], ["m"])
+    with pytest.raises(TypeError):
+        time_utils.stop_times(["10:00:00"], [None])
+
+
+def test_wrap_hours():
+    """
+    Tests times past 23:59:59 are wrapped
+    into the day, others left as supplied
+    """
+    wrapped = time_utils.wrap_hours(["27:35:50", "23:59:59", "06:00:00", "24:00:00"])
+    assert list(wrapped) == ["03:35:50", "23:59:59", "06:00:00", "00:00:00"]
+
+
+def test_overlaps():
+    """
+    Tests slots overlap pairwise, touching slots
+    do not, and a[:, None] compares every pair
+    """
+    start_a = time_utils.as_datetime64(["2024-07-01T10:00", "2024-07-01T12:00"])
+    end_a = time_utils.as_datetime64(["2024-07-01T11:00", "2024-07-01T13:00"])
+    start_b = time_utils.as_datetime64(["2024-07-01T10:30", "2024-07-01T13:00"])
+    end_b = time_utils.as_datetime64(["2024-07-01T11:30", "2024-07-01T14:00"])
+    assert list(time_utils.overlaps(start_a, end_a, start_b, end_b)) == [True, False]
+
+    every = time_utils.overlaps(start_a[:, None], end_a[:, None], start_b, end_b)
+    assert every.shape == (2, 2)
+    assert np.array_equal(every, [[True, False], [False, False]])
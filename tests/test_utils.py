@@ -378,7 +378,7 @@ def test_exif_data(mocker):
 
     This test checks the behaviour of the function where the filename is supplied
     and returns the the file's metadata.
-    It uses mocking and patching to replicate and isolate the command line process
+    It uses mocking and patching to replicate and isolate the exiftool session
     for testing purposes.
 
     """
@@ -425,16 +425,20 @@ def test_exif_data(mocker):
         b"Image Size                      : 720x576\n"
         b"Megapixels                      : 0.415\n"
     )
-    mocker.patch("subprocess.check_output", return_value=mock_output)
-    # mocker.patch("subprocess.check_output",
-    # side_effect=subprocess.CalledProcessError(1, 'exiftool'))
+    get_text = mocker.patch(
+        "exiftool_utils.get_text",
+        return_value={"tests/MKV_sample.mkv": mock_output.decode("utf-8")},
+    )
 
     result = utils.exif_data("tests/MKV_sample.mkv")
-    parital_result = "File Name                       : MKV_sample.mkv\n"
+    parital_result = "File Name                       : MKV_sample.mkv"
 
     assert parital_result in result
 
-    subprocess.check_output.assert_called_with(["exiftool", "tests/MKV_sample.mkv"])
+    get_text.assert_called_with(["tests/MKV_sample.mkv"])
+
+    get_text.side_effect = OSError("exiftool session ended")
+    assert utils.exif_data("tests/MKV_sample.mkv") is None
 
 
 @pytest.mark.parametrize(
@@ -452,7 +456,7 @@ def test_get_metadata(mocker, stream, args, expected_result):
 
     This test checks the behaviour of the function where the stream,
     args and filename are supplied and returns the metadata of the file.
-    It uses mocking and patching to replicate and isolate the command line process
+    It uses mocking and patching to replicate and isolate the exiftool session
     for testing purposes.
 
     """
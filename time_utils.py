@@ -0,0 +1,124 @@
+"""
+Batch date/time arithmetic for EPG and
+transmission data
+
+Timestamps are parsed once into pandas datetime
+arrays, and converted between UTC and Europe/London,
+given stop times or tested for overlap with
+vectorised operations, so reconciliation jobs over
+millions of slots avoid per-string strptime and
+ZoneInfo calls. Scalar helpers in utils, stora_helper
+and the STORA scripts wrap these with one-item lists.
+
+All functions return naive datetimes (or strings),
+as CID and the EPG CSVs hold naive date/time fields.
+
+2026
+"""
+
+from typing import Any, Final, Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+LONDON: Final = "Europe/London"
+FORMAT: Final = "%Y-%m-%d %H:%M:%S"
+TIME_FORMAT: Final = "%H:%M:%S"
+
+Times = Union[Iterable[Any], pd.DatetimeIndex, np.ndarray]
+
+
+def parse(values: Times, fmt: str = FORMAT, errors: str = "raise") -> pd.DatetimeIndex:
+    """
+    Parse strings in fmt, or pass through datetimes.
+    Invalid values raise ValueError, or are NaT
+    with errors='coerce'
+    """
+    if isinstance(values, pd.DatetimeIndex):
+        return values
+    return pd.DatetimeIndex(
+        pd.to_datetime(np.asarray(values, dtype=object), format=fmt, errors=errors)
+    )
+
+
+def utc_to_london(values: Times, errors: str = "raise") -> pd.DatetimeIndex:
+    """
+    UTC date/times to London local time,
+    an hour ahead during BST
+    """
+    return (
+        parse(values, errors=errors)
+        .tz_localize("UTC")
+        .tz_convert(LONDON)
+        .tz_localize(None)
+    )
+
+
+def london_to_utc(values: Times, errors: str = "raise") -> pd.DatetimeIndex:
+    """
+    London local date/times to UTC. As ZoneInfo,
+    times repeated when BST ends are taken as BST,
+    and times skipped when BST starts as GMT
+    """
+    local = parse(values, errors=errors)
+    return (
+        local.tz_localize(
+            LONDON,
+            ambiguous=np.ones(len(local), dtype=bool),
+            nonexistent=pd.Timedelta(hours=1),
+        )
+        .tz_convert("UTC")
+        .tz_localize(None)
+    )
+
+
+def stop_times(start_times: Times, durations: Iterable[Any]) -> pd.DatetimeIndex:
+    """
+    Start times (HH:MM:SS) plus durations in minutes.
+    Non-numeric durations raise ValueError, missing
+    durations TypeError
+    """
+    minutes = np.asarray(list(durations), dtype=object).astype(np.int64)
+    return parse(start_times, TIME_FORMAT) + pd.to_timedelta(minutes, unit="m")
+
+
+def format_times(values: pd.DatetimeIndex, fmt: str = FORMAT) -> np.ndarray:
+    """
+    Datetimes to strings in fmt, None for NaT
+    """
+    formatted = values.strftime(fmt)
+    return np.where(values.isna(), None, np.asarray(formatted, dtype=object))
+
+
+def wrap_hours(times: Iterable[str]) -> np.ndarray:
+    """
+    HH:MM:SS times past 23:59:59 (eg 27:35:50)
+    brought back into the day, others unchanged
+    """
+    times = pd.Series(list(times), dtype=object).astype(str)
+    parts = times.str.split(":", n=1, expand=True)
+    hours = parts[0].astype(int)
+    wrapped = (hours - 24).astype(str).str.zfill(2) + ":" + parts[1].fillna("")
+    return np.where(hours > 23, wrapped, times).astype(object)
+
+
+def as_datetime64(values: Times) -> np.ndarray:
+    """
+    NumPy datetime64 array, keeping the
+    shape of datetime64 arrays passed in
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind == "M":
+        return values
+    return np.asarray(values, dtype="datetime64[ns]")
+
+
+def overlaps(start_a: Times, end_a: Times, start_b: Times, end_b: Times) -> np.ndarray:
+    """
+    Whether each slot a overlaps slot b, slots
+    touching at one instant do not overlap. Pass
+    a[:, None] arrays to test every a against every b
+    """
+    start_a, end_a, start_b, end_b = map(
+        as_datetime64, (start_a, end_a, start_b, end_b)
+    )
+    return (start_a < end_b) & (start_b < end_a)
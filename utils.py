@@ -14,19 +14,20 @@ import re
 import smtplib
 import ssl
 import subprocess
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, timedelta
 from email import encoders
 from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Final, Optional
-from zoneinfo import ZoneInfo
 
 import ffmpeg
 import yaml
 
 # BFI library
 import adlib_v3 as adlib
+import exiftool_utils
+import mediaconch_utils
 
 # Global imports
 LOG_PATH: Final = os.environ.get("LOG_PATH", "")
@@ -376,22 +377,32 @@ def sort_ext(ext):
 # (dpath: str) -> str:
 def exif_data(dpath):
     """
-    Retrieve exiftool data
-    return match to field if available
+    Retrieve exiftool data from the persistent
+    exiftool session, as a list of text lines
     """
-
-    cmd = ["exiftool", dpath]
     try:
-        data = subprocess.run(cmd, shell=False, capture_output=True)
-        data = data.stdout.decode("latin-1")
-        print(data)
-    except subprocess.CalledProcessError as err:
+        data = exiftool_utils.get_text([dpath]).get(dpath)
+    except OSError as err:
         print(err)
         return None
-    exif_d = data.split("exiftool', '")[-1]
-    exif_md = exif_d.split("']")[0]
-    exif_metadata = exif_md.split("\n")
-    return exif_metadata
+    if data is None:
+        return None
+    print(data)
+    return data.split("\n")
+
+
+# (dpaths: list[str]) -> dict[str, dict[str, str]]:
+def exif_data_batch(dpaths):
+    """
+    Retrieve exiftool JSON for many files
+    from the persistent exiftool session
+    returned as {path: {tag: value}}
+    """
+    try:
+        return exiftool_utils.get_metadata(dpaths)
+    except OSError as err:
+        print(err)
+        return {}
 
 
 def probe_metadata(arg, stream, fpath):
@@ -438,16 +449,11 @@ def get_metadata(stream, arg, dpath):
 def get_mediaconch(dpath, policy):
     """
     Check for 'pass! {path}' in mediaconch reponse
-    for supplied file path and policy
+    for supplied file path and policy, results
+    cached against file size/mtime and policy hash
     """
 
-    cmd = ["mediaconch", "--force", "-p", policy, dpath]
-
-    meta = subprocess.check_output(cmd).decode("utf-8")
-    if meta.startswith(f"pass! {dpath}"):
-        return True, meta
-
-    return False, meta
+    return mediaconch_utils.check_file(dpath, policy)
 
 
 # (filepath: str) -> Optional[str | bytes]:
@@ -751,21 +757,19 @@ def check_bst_adjustment(utc_datetime_str: str) -> Optional[list[str]]:
     Passes datetime through timezone change
     for London, adding +1 hours during BST
     Must receive data formatted %Y-%m-%d %H:%M:%S
+    Use time_utils.utc_to_london for many at once,
+    imported here to keep pandas out of utils import
     """
-    format = "%Y-%m-%d %H:%M:%S"
+    import time_utils
+
     try:
-        dt_utc = datetime.strptime(utc_datetime_str, format).replace(
-            tzinfo=timezone.utc
-        )
-        print(dt_utc)
+        dt_london = time_utils.utc_to_london([utc_datetime_str])
     except ValueError as err:
         raise ValueError(
             f"Invalid datetime string format: {err}. Expected '%Y-%m-%d %H:%M:%S'"
         )
 
-    london_tz = ZoneInfo("Europe/London")
-    dt_london = dt_utc.astimezone(london_tz)
-    string_bst = datetime.strftime(dt_london, format)
+    string_bst = time_utils.format_times(dt_london)[0]
     return string_bst.split(" ")
 
 
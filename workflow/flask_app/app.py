@@ -17,7 +17,6 @@ import os
 import re
 import sys
 import sqlite3
-from contextlib import closing
 from flask import (
     Flask,
     render_template,
@@ -26,12 +25,12 @@ from flask import (
     url_for,
     session,
     abort,
-    g,
     flash,
 )
 
 sys.path.append("/home/datadigipres/code/git/BFI_scripts")
 import adlib_v3 as adlib
+import request_store
 import utils
 
 app = Flask(__name__)
@@ -42,33 +41,10 @@ FLASK_HOST = os.environ.get("FLASK_HOST")
 LOG_PATH = os.environ.get("LOG_PATH")
 CID_API = utils.get_current_api()
 
-# Ensure DB and table exist
-with sqlite3.connect(DBASE) as conn:
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS REQUESTS (
-            username TEXT NOT NULL,
-            email TEXT NOT NULL,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            client_category TEXT NOT NULL,
-            jobid INTEGER PRIMARY KEY AUTOINCREMENT,
-            items_list TEXT NOT NULL,
-            activity_code TEXT NOT NULL,
-            request_type TEXT NOT NULL,
-            request_outcome TEXT NOT NULL,
-            description TEXT NOT NULL,
-            delivery_date TEXT NOT NULL,
-            destination TEXT NOT NULL,
-            instructions TEXT NOT NULL,
-            client_name TEXT NOT NULL,
-            contact_details TEXT,
-            department TEXT NOT NULL,
-            status TEXT NOT NULL,
-            date TEXT NOT NULL
-        )
-    """
-    )
+# Ensure DB and table exist, WAL mode and indexes
+STORE = request_store.RequestStore(
+    DBASE, "REQUESTS", request_store.WORKFLOW_COLUMNS, row_factory=sqlite3.Row
+)
 
 
 def get_user_data(username, password):
@@ -103,23 +79,6 @@ def get_user_data(username, password):
         return []
 
 
-def get_db():
-    """
-    One connection per request
-    """
-    if "db" not in g:
-        g.db = sqlite3.connect(DBASE, detect_types=sqlite3.PARSE_DECLTYPES)
-        g.db.row_factory = sqlite3.Row
-    return g.db
-
-
-@app.teardown_appcontext
-def close_db(exc):
-    db = g.pop("db", None)
-    if db is not None:
-        db.close()
-
-
 def login_required(view_func):
     """
     Simple decorator to block unauthenticated access
@@ -254,31 +213,28 @@ def workflow_request():
             return redirect(url_for("workflow_request"))
 
         try:
-            with closing(get_db()) as db:
-                db.execute(
-                    "INSERT INTO REQUESTS (username,email,first_name,last_name,client_category,items_list,activity_code,request_type,request_outcome,description,delivery_date,destination,instructions,client_name,contact_details,department,status,date) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
-                    (
-                        username,
-                        email,
-                        fname,
-                        lname,
-                        user_category,
-                        saved_search,
-                        activity_code_selected,
-                        request_type,
-                        request_outcome,
-                        description,
-                        delivery_date,
-                        destination,
-                        instructions,
-                        client_name,
-                        contact_details,
-                        dept,
-                        status,
-                        date_stamp,
-                    ),
-                )
-                db.commit()
+            STORE.insert(
+                {
+                    "username": username,
+                    "email": email,
+                    "first_name": fname,
+                    "last_name": lname,
+                    "client_category": user_category,
+                    "items_list": saved_search,
+                    "activity_code": activity_code_selected,
+                    "request_type": request_type,
+                    "request_outcome": request_outcome,
+                    "description": description,
+                    "delivery_date": delivery_date,
+                    "destination": destination,
+                    "instructions": instructions,
+                    "client_name": client_name,
+                    "contact_details": contact_details,
+                    "department": dept,
+                    "status": status,
+                    "date": date_stamp,
+                }
+            )
 
             # Flash a success message
             flash("Workflow request successfully submitted!", "success")
@@ -25,11 +25,13 @@ from typing import Final, Optional
 # Local imports
 sys.path.append(os.environ["CODE"])
 import adlib_v3 as adlib
+import request_store
 import utils
 
 # Global variables
 LOG_PATH = os.environ["LOG_PATH"]
 DATABASE = os.environ.get("WF_DATABASE")
+STORE = request_store.RequestStore(DATABASE, "REQUESTS", request_store.WORKFLOW_COLUMNS)
 NOW = datetime.now()
 DT_STR = NOW.strftime("%d/%m/%Y %H:%M:%S")
 
@@ -107,24 +109,9 @@ def retrieve_requested() -> list[str]:
     """
     requested_data = []
     try:
-        sqlite_connection = sqlite3.connect(DATABASE)
-        cursor = sqlite_connection.cursor()
-        print("Database connected successfully")
-
-        cursor.execute('''SELECT * FROM REQUESTS WHERE status = "Requested"''')
-        data = cursor.fetchall()
-        print(data)
-        for row in data:
-            print(type(row), row)
-            if row[17] == "Requested":
-                requested_data.append(row)
-        cursor.close()
+        requested_data = STORE.fetch_by_status("Requested")
     except sqlite3.Error as err:
         LOGGER.warning("%s", err)
-    finally:
-        if sqlite_connection:
-            sqlite_connection.close()
-            print("Database connection closed")
 
     # Sort for unique tuples only in list
     sorted_data = remove_duplicates(requested_data)
@@ -332,20 +319,10 @@ def update_table(job_id: str, new_status: str) -> None:
     data, for fname match
     """
     try:
-        sqlite_connection = sqlite3.connect(DATABASE)
-        cursor = sqlite_connection.cursor()
-        # Update row with new status
-        sql_query = """UPDATE REQUESTS SET status = ? WHERE jobid = ?"""
-        data = (new_status, job_id)
-        cursor.execute(sql_query, data)
-        sqlite_connection.commit()
+        STORE.update_status(new_status, jobid=job_id)
         LOGGER.info("Record updated with new status '%s'", new_status)
-        cursor.close()
     except sqlite3.Error as err:
         LOGGER.warning("Failed to update database: %s", err)
-    finally:
-        if sqlite_connection:
-            sqlite_connection.close()
 
 
 def send_email_update(